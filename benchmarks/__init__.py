@@ -0,0 +1,2 @@
+from benchmarks.cases import CASES
+from benchmarks.runner import BenchmarkRunner
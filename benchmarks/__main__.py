@@ -0,0 +1,94 @@
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks.runner import BenchmarkRunner
+
+# Committed tabular DB, copied so that the benchmarks never modify it
+DB_PATH = Path(__file__).parents[1] / "data" / "gcf_data.db"
+
+
+def main():
+
+    parser = argparse.ArgumentParser(
+        description="Run the micro-benchmarks and fail on regressions "
+        "against the stored baseline"
+    )
+    parser.add_argument(
+        "--filter", default=None, help="Only run cases containing this"
+    )
+    parser.add_argument("--repeat", default=30, type=int)
+    parser.add_argument(
+        "--threshold",
+        default=0.1,
+        type=float,
+        help="Relative median slowdown to flag",
+    )
+    parser.add_argument(
+        "--alpha",
+        default=0.01,
+        type=float,
+        help="Significance level of the slowdown test",
+    )
+    parser.add_argument(
+        "--baseline",
+        default=None,
+        type=Path,
+        help="Baseline JSON, by default the one of this machine",
+    )
+    parser.add_argument(
+        "--save",
+        action="store_true",
+        help="Store the samples as the new baseline",
+    )
+    args = parser.parse_args()
+    baseline = args.baseline or BenchmarkRunner.get_default_baseline()
+    baseline = baseline.resolve()
+
+    runner = BenchmarkRunner(
+        repeat=args.repeat,
+        threshold=args.threshold,
+        alpha=args.alpha,
+        pattern=args.filter,
+    )
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Run against a scratch copy of the tabular DB
+        os.makedirs(Path(tmp_dir) / "data")
+        shutil.copy(DB_PATH, Path(tmp_dir) / "data" / "gcf_data.db")
+        cwd = os.getcwd()
+        os.chdir(tmp_dir)
+        try:
+            runner.run()
+        finally:
+            os.chdir(cwd)
+
+    if not baseline.exists():
+        print(f"\nNo baseline at {baseline}, run with --save to store one")
+    else:
+        comparisons = runner.compare(baseline)
+        print(f"\nCompared to {baseline}:")
+        for comparison in comparisons:
+            ratio = comparison["ratio"]
+            p = comparison["p"]
+            print(
+                f"{comparison['key']:<56}"
+                f"{f'{ratio:.2f}x' if ratio else '-':>8}"
+                f"{f'p={p:.4f}' if p is not None else '':>10}"
+                f"  {comparison['status']}"
+            )
+        slower = [c["key"] for c in comparisons if c["status"] == "slower"]
+        if slower:
+            print(f"\n{len(slower)} regressions: {', '.join(slower)}")
+            if not args.save:
+                sys.exit(1)
+
+    if args.save:
+        runner.save(baseline)
+
+
+if __name__ == "__main__":
+
+    main()
@@ -0,0 +1,235 @@
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from src.db.db_handler import DBHandler
+from src.db.db_schema import CountryDict, Entity
+from src.importer.export.project_export_importer import ProjectExportImporter
+from src.kg.db.query_executor import QueryExecutor
+from src.kg.services.base_data_service import DataService
+from src.kg.services.data.project_service import ProjectService
+from src.kg.services.meta.sector_node_service import SectorService
+from src.parser.project_country_parser import ProjectCountryParser
+from src.utils.dtype_policy import DtypePolicy
+
+# Registered cases: setup function and input sizes by name. A setup takes a
+# size and returns the function to time and a factory of fresh arguments.
+CASES = {}
+SEED = 0
+
+
+def case(name: str, sizes: tuple[int, ...] = (100, 1_000, 10_000)):
+    """Decorator registering a benchmark case setup
+
+    Args:
+        name (str): Case name, after the benchmarked function
+        sizes (tuple[int, ...], optional): Input sizes. Defaults to
+            (100, 1_000, 10_000).
+    """
+
+    def decorator(setup):
+        CASES[name] = (setup, sizes)
+        return setup
+
+    return decorator
+
+
+@lru_cache
+def _get_parser() -> ProjectCountryParser:
+    """Helper function to get a shared country parser, as the country
+    converter is slow to instantiate"""
+    return ProjectCountryParser(DBHandler())
+
+
+@lru_cache
+def _get_importer() -> ProjectExportImporter:
+    """Helper function to get a shared export importer"""
+    return ProjectExportImporter(DBHandler())
+
+
+def _make_projects(size: int) -> pd.DataFrame:
+    """Helper function to build a project table as read by the service
+
+    Args:
+        size (int): Number of rows
+
+    Returns:
+        pd.DataFrame: Projects with memory-lean dtypes
+    """
+
+    rng = np.random.default_rng(SEED)
+    df = pd.DataFrame(
+        {
+            "id": np.arange(1, size + 1),
+            "ref": [f"FP{i:03d}" for i in range(size)],
+            "modalityId": rng.integers(1, 3, size),
+            "name": [f"Project {i} for resilience" for i in range(size)],
+            "entityId": rng.integers(1, 162, size).astype(float),
+            "bmId": rng.integers(1, 44, size),
+            "sectorId": rng.integers(1, 3, size),
+            "themeId": rng.integers(1, 4, size),
+            "sizeId": rng.integers(1, 5, size),
+            "essCategoryId": rng.integers(1, 7, size),
+            "financingUsd": rng.integers(10**5, 10**9, size),
+        }
+    )
+    # Missing values, as for nullable foreign keys
+    df.loc[df.index % 10 == 0, "entityId"] = np.nan
+
+    return DtypePolicy.apply(df)
+
+
+def _make_countries(size: int) -> pd.DataFrame:
+    """Helper function to build the country column of an export, with one
+    to three country names per row
+
+    Args:
+        size (int): Number of rows
+
+    Returns:
+        pd.DataFrame: IDs and comma-separated country names
+    """
+
+    rng = np.random.default_rng(SEED)
+    names = _get_parser().lookup_registry.get(CountryDict).index
+    # Names with commas would be split apart, as in the exports
+    names = names[~names.str.contains(",")].to_numpy()
+    countries = [
+        ", ".join(rng.choice(names, rng.integers(1, 4), replace=False))
+        for _ in range(size)
+    ]
+
+    return DtypePolicy.apply(
+        pd.DataFrame({"id": np.arange(1, size + 1), "Countries": countries})
+    )
+
+
+@case("DataService._process_data")
+def data_process_data(size: int):
+    service = ProjectService(None)
+    df = _make_projects(size)
+
+    def run() -> None:
+        service.raw_df = df
+        service._process_data()
+
+    return run, tuple
+
+
+def _make_sectors(size: int) -> pd.DataFrame:
+    """Helper function to build a dictionary table as read by the service
+
+    Args:
+        size (int): Number of rows
+
+    Returns:
+        pd.DataFrame: IDs and names with memory-lean dtypes
+    """
+
+    return DtypePolicy.apply(
+        pd.DataFrame(
+            {"id": np.arange(size), "name": [f"name {i}" for i in range(size)]}
+        )
+    )
+
+
+@case("MetaService._process_data")
+def meta_process_data(size: int):
+    service = SectorService(None)
+    df = _make_sectors(size)
+
+    def run() -> None:
+        service.raw_df = df
+        service._process_data()
+
+    return run, tuple
+
+
+@case("MetaService._process_data[custom_keys]")
+def meta_process_data_custom_keys(size: int):
+    service = SectorService(None)
+    service.custom_keys = ["id", "sectorName"]
+    df = _make_sectors(size)
+
+    def run() -> None:
+        service.raw_df = df
+        service._process_data()
+
+    return run, tuple
+
+
+@case("BaseCountryParser._explode_country_names")
+def explode_country_names(size: int):
+    parser = _get_parser()
+    df = _make_countries(size)
+
+    def run(input_df: pd.DataFrame) -> None:
+        parser.input = input_df
+        parser._explode_country_names()
+
+    return run, lambda: (df.copy(),)
+
+
+@case("BaseCountryParser._map_country_ids", sizes=(100, 1_000))
+def map_country_ids(size: int):
+    parser = _get_parser()
+    parser.input = _make_countries(size)
+    parser._explode_country_names()
+    df = parser.parsed
+
+    def run(parsed: pd.DataFrame) -> None:
+        parser.parsed = parsed
+        parser._map_country_ids()
+
+    return run, lambda: (df.copy(),)
+
+
+@case("BaseXlsxImporter._map_ids")
+def map_ids(size: int):
+    importer = _get_importer()
+    mapper = importer.lookup_registry.get(Entity, name_col="code")
+    rng = np.random.default_rng(SEED)
+    df = DtypePolicy.apply(
+        pd.DataFrame({"Entity": rng.choice(mapper.index.to_numpy(), size)})
+    )
+
+    def run(input_df: pd.DataFrame) -> None:
+        importer._map_ids(input_df, "Entity", "entity_id", mapper)
+
+    return run, lambda: (df.copy(),)
+
+
+@case("BaseXlsxImporter._move_col")
+def move_col(size: int):
+    importer = _get_importer()
+    df = pd.DataFrame(
+        np.zeros((size, 20)), columns=[f"col_{i}" for i in range(20)]
+    )
+
+    def run(input_df: pd.DataFrame) -> None:
+        importer._move_col(input_df, "col_15", 0)
+
+    return run, lambda: (df.copy(),)
+
+
+@case("QueryExecutor._chunk_list", sizes=(1_000, 10_000, 100_000))
+def chunk_list(size: int):
+    data = [{"id": i, "properties": {"name": str(i)}} for i in range(size)]
+
+    def run() -> None:
+        for _ in QueryExecutor._chunk_list(data, 500):
+            pass
+
+    return run, tuple
+
+
+@case("DataService._snake_to_camel", sizes=(10, 100, 1_000))
+def snake_to_camel(size: int):
+    cols = [f"delivery_partner_{i}_id" for i in range(size)]
+
+    def run() -> None:
+        for col in cols:
+            DataService._snake_to_camel(col)
+
+    return run, tuple
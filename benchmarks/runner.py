@@ -0,0 +1,208 @@
+import gc
+import json
+import math
+import platform
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.cases import CASES
+
+
+class BenchmarkRunner:
+    """Runner of the registered micro-benchmark cases, guarding against
+    regressions with stored baselines.
+
+    Each sample times a single call with garbage collection disabled, on
+    fresh arguments built outside of the timing. A case at a given size is
+    flagged as slower when its median exceeds the baseline median by more
+    than `threshold`, and a one-sided Mann-Whitney U test of its samples
+    against the baseline samples is significant at `alpha`. Requiring both
+    keeps noisy machines from failing on small, insignificant differences.
+    """
+
+    BASELINE_DIR = Path(__file__).parent / "baselines"
+
+    def __init__(
+        self,
+        repeat: int = 30,
+        warmup: int = 3,
+        threshold: float = 0.1,
+        alpha: float = 0.01,
+        pattern: str = None,
+    ) -> None:
+
+        self.repeat = repeat
+        self.warmup = warmup
+        self.threshold = threshold
+        self.alpha = alpha
+        self.pattern = pattern
+        # Instance variable to store the samples in nanoseconds by key
+        self.samples = {}
+
+    @staticmethod
+    def get_default_baseline() -> Path:
+        """Static helper method to get the baseline path of this machine, as
+        timings are only comparable on the same machine
+
+        Returns:
+            Path: Baseline JSON path
+        """
+
+        node = platform.node() or "default"
+        version = "".join(platform.python_version_tuple()[:2])
+
+        return BenchmarkRunner.BASELINE_DIR / f"{node}-py{version}.json"
+
+    @staticmethod
+    def _p_slower(current: np.ndarray, baseline: np.ndarray) -> float:
+        """Static helper method for the one-sided Mann-Whitney U test that
+        current samples tend to be larger than baseline samples, with the
+        normal approximation and average ranks for ties
+
+        Args:
+            current (np.ndarray): Current samples
+            baseline (np.ndarray): Baseline samples
+
+        Returns:
+            float: p-value
+        """
+
+        n, m = len(current), len(baseline)
+        ranks = pd.Series(np.concatenate([current, baseline])).rank()
+        u = ranks.iloc[:n].sum() - n * (n + 1) / 2
+        sigma = math.sqrt(n * m * (n + m + 1) / 12)
+        if not sigma:
+            return 1.0
+        # Continuity corrected z-score
+        z = (u - n * m / 2 - 0.5) / sigma
+
+        return 0.5 * math.erfc(z / math.sqrt(2))
+
+    def _measure(self, setup, size: int) -> list[int]:
+        """Helper method to time the calls of a case at one size
+
+        Args:
+            setup (Callable): Case setup, returning the function to time and
+                a factory of its arguments
+            size (int): Input size
+
+        Returns:
+            list[int]: Call durations in nanoseconds
+        """
+
+        func, make_args = setup(size)
+        for _ in range(self.warmup):
+            func(*make_args())
+
+        samples = []
+        gc.collect()
+        gc.disable()
+        try:
+            for _ in range(self.repeat):
+                args = make_args()
+                start = time.perf_counter_ns()
+                func(*args)
+                samples.append(time.perf_counter_ns() - start)
+        finally:
+            gc.enable()
+
+        return samples
+
+    def run(self) -> dict[str, list[int]]:
+        """Run every registered case matching the pattern at all its sizes
+
+        Returns:
+            dict[str, list[int]]: Call durations in nanoseconds by
+                `name[size]` key
+        """
+
+        for name, (setup, sizes) in CASES.items():
+            if self.pattern and self.pattern not in name:
+                continue
+            for size in sizes:
+                key = f"{name}[{size}]"
+                self.samples[key] = self._measure(setup, size)
+                median = np.median(self.samples[key]) / 1000
+                print(f"{key:<56}{median:>12.1f} us")
+
+        return self.samples
+
+    def compare(self, baseline_path: Path) -> list[dict]:
+        """Compare the samples against a stored baseline
+
+        Args:
+            baseline_path (Path): Baseline JSON path
+
+        Returns:
+            list[dict]: Comparisons with `key`, `median`, `baseline`,
+                `ratio`, `p` and `status` ("ok", "slower", "faster" or
+                "new")
+        """
+
+        baseline = {}
+        if baseline_path.exists():
+            baseline = json.loads(baseline_path.read_text())["samples"]
+
+        comparisons = []
+        for key, samples in self.samples.items():
+            current = np.asarray(samples, dtype=float)
+            comparison = {
+                "key": key,
+                "median": float(np.median(current)),
+                "baseline": None,
+                "ratio": None,
+                "p": None,
+                "status": "new",
+            }
+            if key in baseline:
+                previous = np.asarray(baseline[key], dtype=float)
+                ratio = comparison["median"] / float(np.median(previous))
+                comparison["baseline"] = float(np.median(previous))
+                comparison["ratio"] = ratio
+                comparison["status"] = "ok"
+                if ratio > 1 + self.threshold:
+                    comparison["p"] = self._p_slower(current, previous)
+                    if comparison["p"] < self.alpha:
+                        comparison["status"] = "slower"
+                elif ratio < 1 - self.threshold:
+                    comparison["p"] = self._p_slower(previous, current)
+                    if comparison["p"] < self.alpha:
+                        comparison["status"] = "faster"
+            comparisons.append(comparison)
+
+        return comparisons
+
+    def save(self, baseline_path: Path) -> bool:
+        """Store the samples as the baseline, keeping the baselines of cases
+        that were not run
+
+        Args:
+            baseline_path (Path): Baseline JSON path
+
+        Returns:
+            bool: True after completion
+        """
+
+        samples = {}
+        if baseline_path.exists():
+            samples = json.loads(baseline_path.read_text())["samples"]
+        samples.update(self.samples)
+
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(
+            json.dumps(
+                {
+                    "machine": platform.platform(),
+                    "python": platform.python_version(),
+                    "samples": samples,
+                },
+                indent=1,
+                sort_keys=True,
+            )
+        )
+        print(f"Saved baseline of {len(self.samples)} keys to {baseline_path}")
+
+        return True
@@ -0,0 +1,133 @@
+import argparse
+import multiprocessing
+import os
+import resource
+import shutil
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+# Data tables replicated to build the synthetic dataset
+SCALED_TABLES = ["project", "entity", "readiness"]
+
+
+def build_scaled_db(source: Path, target: Path, scale: int) -> bool:
+    """Copy the tabular DB and replicate the rows of the data tables `scale`
+    times, keeping dictionary tables and foreign keys as is
+
+    Args:
+        source (Path): Path to the source SQLite DB
+        target (Path): Path to the scaled SQLite DB
+        scale (int): Number of copies of each data table row
+
+    Returns:
+        bool: True after completion
+    """
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    shutil.copy(source, target)
+
+    with sqlite3.connect(target) as conn:
+        for table in SCALED_TABLES:
+            info = conn.execute(f"PRAGMA table_info({table})").fetchall()
+            cols = [row[1] for row in info]
+            offset = conn.execute(f"SELECT MAX(id) FROM {table}").fetchone()[0]
+            select_cols = ", ".join(
+                "id + ?" if col == "id" else col for col in cols
+            )
+            for i in range(1, scale):
+                conn.execute(
+                    f"INSERT INTO {table} ({', '.join(cols)}) "
+                    f"SELECT {select_cols} FROM {table} WHERE id <= ?",
+                    (i * offset, offset),
+                )
+        conn.commit()
+
+    return True
+
+
+def measure(workdir: str, lean: bool) -> dict:
+    """Prepare the writes of all graph services in a fresh process and
+    measure the memory used
+
+    Args:
+        workdir (str): Directory holding `data/gcf_data.db`
+        lean (bool): Toggle for the memory-lean dtype policy
+
+    Returns:
+        dict: Dataframe sizes by service, peak traced and resident memory
+    """
+
+    # The default DB handler resolves the DB relative to the working dir
+    os.chdir(workdir)
+
+    from src.kg.knowledge_graph import KnowledgeGraph
+    from src.utils.dtype_policy import DtypePolicy
+
+    DtypePolicy.enabled = lean
+    meta_services, data_services = KnowledgeGraph._build_services(None)
+
+    frames = {}
+    start = time.perf_counter()
+    tracemalloc.start()
+    for name, service in {**meta_services, **data_services}.items():
+        service._get_data()
+        frames[name] = int(service.raw_df.memory_usage(deep=True).sum())
+        writes = service.prepare()
+        del writes
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "frames": frames,
+        "peak": peak,
+        # Linux reports the maximum resident set size in kilobytes
+        "rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def main():
+
+    parser = argparse.ArgumentParser(
+        description="Compare the memory of graph service preparation with "
+        "and without the memory-lean dtype policy"
+    )
+    parser.add_argument("--db", default="data/gcf_data.db", type=Path)
+    parser.add_argument("--scale", default=100, type=int)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        print(f"Building synthetic DB at {args.scale}x scale...")
+        target = Path(workdir) / "data" / "gcf_data.db"
+        build_scaled_db(args.db.resolve(), target, args.scale)
+
+        # Measure each mode in a fresh process so peaks do not carry over
+        ctx = multiprocessing.get_context("spawn")
+        results = {}
+        for lean in [False, True]:
+            with ctx.Pool(1) as pool:
+                results[lean] = pool.apply(measure, (workdir, lean))
+
+    mb = 1024**2
+    print(f"\n{'Service':<20}{'Default (MB)':>14}{'Lean (MB)':>14}")
+    for name, size in results[False]["frames"].items():
+        lean_size = results[True]["frames"][name]
+        print(f"{name:<20}{size / mb:>14.2f}{lean_size / mb:>14.2f}")
+    for key, label in [("peak", "Peak traced"), ("rss", "Peak RSS")]:
+        default, lean = results[False][key], results[True][key]
+        print(
+            f"{label:<20}{default / mb:>14.2f}{lean / mb:>14.2f}"
+            f"  ({1 - lean / default:.0%} less)"
+        )
+    print(
+        f"{'Time (s)':<20}{results[False]['seconds']:>14.2f}"
+        f"{results[True]['seconds']:>14.2f}"
+    )
+
+
+if __name__ == "__main__":
+
+    main()
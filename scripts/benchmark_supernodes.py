@@ -0,0 +1,182 @@
+import argparse
+import statistics
+import time
+
+from src.db.db_schema import (
+    SectorDict,
+    SizeDict,
+    StageDict,
+    StatusDict,
+    ThemeDict,
+)
+from src.kg.db.connection import Connection
+from src.kg.knowledge_graph import KnowledgeGraph
+
+# Low-cardinality metadata relationships that become supernodes at scale,
+# with their dictionary table, needed to remove labels in label mode
+SUPERNODE_KEYS = {
+    "sizeId": SizeDict,
+    "sectorId": SectorDict,
+    "stageId": StageDict,
+    "themeId": ThemeDict,
+    "statusId": StatusDict,
+}
+# Modes compared, as set in the `mode` key of the relationships config
+MODES = {
+    "relationship": "relationship",
+    "property": "property",
+    "label": "label",
+    "both": ["relationship", "property"],
+}
+
+
+def get_queries(mode: str, ns: str) -> dict[str, str]:
+    """Get the benchmark queries for a mode: the README analysis queries and
+    a lookup of all projects of a sector
+
+    Args:
+        mode (str): Modeling mode
+        ns (str): Node label namespace of the mode
+
+    Returns:
+        dict[str, str]: Cypher queries by name
+    """
+
+    if mode == "relationship":
+        sector_query = (
+            f"MATCH (:{ns}Sector {{id: 1}})<-[:HAS]-(p:{ns}Project) "
+            "RETURN count(p) AS count"
+        )
+    elif mode == "label":
+        sector_query = f"MATCH (p:{ns}Project:{ns}Sector_1) RETURN count(p)"
+    else:
+        sector_query = (
+            f"MATCH (p:{ns}Project) WHERE p.sectorId = 1 RETURN count(p)"
+        )
+
+    return {
+        "benin_neighborhood": f"""
+            MATCH (r:{ns}Region)<-[:IS_IN]-(ben:{ns}Country {{iso3: "BEN"}})
+                <-[*]-(n)
+            RETURN count(DISTINCT n)
+        """,
+        "benin_japan_path": f"""
+            MATCH p = shortestPath(
+                (ben:{ns}Country {{iso3: "BEN"}})-[*..10]-
+                (jpn:{ns}Country {{iso3: "JPN"}})
+            )
+            RETURN length(p)
+        """,
+        "ldc_neighbors": f"""
+            MATCH (c:{ns}Country)<-[]-(n)
+            WHERE c.isLdc = True
+            RETURN count(n)
+        """,
+        "sector_projects": sector_query,
+    }
+
+
+def drop(conn: Connection, kg: KnowledgeGraph) -> bool:
+    """Drop the nodes, constraints and indexes of a benchmark graph
+
+    Args:
+        conn (Connection): Established connection
+        kg (KnowledgeGraph): Knowledge graph of the benchmark namespace
+
+    Returns:
+        bool: True after completion
+    """
+
+    with conn.session(kg.database) as session:
+        for label in kg.count_expected_nodes():
+            # Batched deletes need an implicit transaction
+            session.run(f"""
+                MATCH (n:{label})
+                CALL {{ WITH n DETACH DELETE n }}
+                IN TRANSACTIONS OF 10000 ROWS
+                """).consume()
+            session.run(
+                f"DROP CONSTRAINT {label.lower()}_id_unique IF EXISTS"
+            ).consume()
+            for key in SUPERNODE_KEYS:
+                session.run(
+                    f"DROP INDEX {label.lower()}_{key.lower()}_index IF EXISTS"
+                ).consume()
+
+    return True
+
+
+def run_mode(conn: Connection, mode: str, repeat: int) -> dict[str, float]:
+    """Load the graph with a modeling mode, then time the queries
+
+    Args:
+        conn (Connection): Established connection
+        mode (str): Modeling mode
+        repeat (int): Number of timed runs per query
+
+    Returns:
+        dict[str, float]: Load time in seconds and median query latencies in
+            milliseconds
+    """
+
+    ns = f"Bench{mode.capitalize()}"
+    kg = KnowledgeGraph(conn=conn, namespace=ns)
+    for service in kg.data_services.values():
+        for key, rel_config in service.relationships.items():
+            if key in SUPERNODE_KEYS:
+                rel_config["mode"] = MODES[mode]
+                rel_config["table"] = SUPERNODE_KEYS[key]
+    # Create the indexes of the property modes
+    kg._ensure_constraints()
+
+    results = {}
+    try:
+        start = time.perf_counter()
+        kg.initialize()
+        kg.populate()
+        results["load (s)"] = time.perf_counter() - start
+
+        for name, query in get_queries(mode, ns).items():
+            # Warm up the query plan and page cache first
+            kg.query_executor.execute_read(query)
+            latencies = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                kg.query_executor.execute_read(query)
+                latencies.append((time.perf_counter() - start) * 1000)
+            results[f"{name} (ms)"] = statistics.median(latencies)
+    finally:
+        drop(conn, kg)
+
+    return results
+
+
+def main():
+
+    parser = argparse.ArgumentParser(
+        description="Compare load time and query latencies of supernode "
+        "modeling modes, each loaded into its own label namespace"
+    )
+    parser.add_argument("--modes", nargs="+", default=list(MODES))
+    parser.add_argument("--repeat", default=20, type=int)
+    args = parser.parse_args()
+
+    conn = Connection()
+    conn.connect()
+
+    results = {mode: run_mode(conn, mode, args.repeat) for mode in args.modes}
+
+    metrics = list(next(iter(results.values())))
+    print(f"\n{'Metric':<28}" + "".join(f"{m:>14}" for m in results))
+    for metric in metrics:
+        print(
+            f"{metric:<28}"
+            + "".join(f"{results[m][metric]:>14.2f}" for m in results)
+        )
+
+    conn.close()
+
+
+if __name__ == "__main__":
+
+    main()
@@ -1,3 +1,4 @@
+from src.db.change_feed import ChangeFeed
 from src.kg.db.connection import Connection
 from src.kg.knowledge_graph import KnowledgeGraph
 
@@ -9,10 +10,17 @@ def main():
 
     kg = KnowledgeGraph(conn=conn)
 
+    # Changes logged before the tables are read are covered by the build
+    feed = ChangeFeed()
+    feed.install()
+    head = feed.get_head()
+
     # Initialize graph with metadata nodes
     kg.initialize()
     # Populate graph with data nodes
     kg.populate()
+    # Precompute statistics and rollups, write snapshot and publish build
+    kg.finalize(head)
 
     kg.close()
 
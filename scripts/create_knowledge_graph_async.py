@@ -0,0 +1,37 @@
+import asyncio
+
+from src.db.change_feed import ChangeFeed
+from src.kg.db.async_connection import AsyncConnection
+from src.kg.db.connection import Connection
+from src.kg.async_knowledge_graph import AsyncKnowledgeGraph
+
+
+async def main():
+
+    conn = AsyncConnection()
+    await conn.connect()
+    # Post-build stages run through a sync connection
+    sync_conn = Connection()
+    sync_conn.connect()
+
+    kg = AsyncKnowledgeGraph(conn=conn, max_concurrency=4)
+
+    # Changes logged before the tables are read are covered by the build
+    feed = ChangeFeed()
+    feed.install()
+    head = feed.get_head()
+
+    # Initialize graph with metadata nodes
+    await kg.initialize()
+    # Populate graph with data nodes
+    await kg.populate()
+    # Precompute statistics and rollups, write snapshot and publish build
+    await kg.finalize(sync_conn, head)
+
+    await kg.close()
+    sync_conn.close()
+
+
+if __name__ == "__main__":
+
+    asyncio.run(main())
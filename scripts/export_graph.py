@@ -0,0 +1,66 @@
+import argparse
+
+from src.kg.db.connection import Connection
+from src.kg.export import GraphExporter, get_subgraphs
+from src.kg.knowledge_graph import KnowledgeGraph
+from src.kg.rebuild import get_graph_resolver
+
+
+def main():
+
+    parser = argparse.ArgumentParser(
+        description="Stream a subgraph to Parquet node and edge tables, "
+        "GraphML or JSON"
+    )
+    parser.add_argument("subgraph", choices=list(get_subgraphs()))
+    parser.add_argument("output", help="Output file, or directory for Parquet")
+    parser.add_argument(
+        "--format",
+        choices=list(GraphExporter.FORMATS),
+        default="json",
+    )
+    parser.add_argument(
+        "--iso3", help="Country of the country subgraph, ex: KEN"
+    )
+    parser.add_argument(
+        "--lod",
+        action="store_true",
+        help="Collapse metadata supernodes, sample leaves and aggregate "
+        "parallel edges, for visualization",
+    )
+    parser.add_argument("--supernode-degree", default=100, type=int)
+    parser.add_argument("--leaf-threshold", default=50, type=int)
+    parser.add_argument("--batch-size", default=5000, type=int)
+    parser.add_argument(
+        "--database", default=None, help="Defaults to the active graph"
+    )
+    parser.add_argument(
+        "--namespace", default=None, help="Defaults to the active graph"
+    )
+    args = parser.parse_args()
+
+    conn = Connection()
+    if not conn.connect():
+        raise SystemExit("Could not connect to the graph DB")
+    database, namespace = get_graph_resolver(
+        conn, args.database, args.namespace
+    )()
+    kg = KnowledgeGraph(conn=conn, database=database, namespace=namespace)
+    exporter = GraphExporter(
+        kg,
+        batch_size=args.batch_size,
+        supernode_degree=args.supernode_degree,
+        leaf_threshold=args.leaf_threshold,
+    )
+    params = {"iso3": args.iso3} if args.iso3 else {}
+    try:
+        exporter.export(
+            args.subgraph, args.output, args.format, params, args.lod
+        )
+    finally:
+        kg.close()
+
+
+if __name__ == "__main__":
+
+    main()
@@ -7,6 +7,7 @@ from src.importer.export import (
     ProjectExportImporter,
     ReadinessExportImporter,
 )
+from src.importer.import_orchestrator import ExportImportOrchestrator
 
 
 def main():
@@ -28,11 +29,10 @@ def main():
         base_path / "readiness.xlsx",
     ]
 
-    # Dynamically populate data export tables
-    for importer, file_path in zip(importers, file_paths):
-        print(f"Importing data for {importer.table_class.__name__}...")
-        importer.import_xlsx(file_path)
-        print("\n")
+    # Parse and transform all exports concurrently, then write them in
+    # foreign key order
+    orchestrator = ExportImportOrchestrator(db_handler)
+    orchestrator.import_all(list(zip(importers, file_paths)))
 
 
 if __name__ == "__main__":
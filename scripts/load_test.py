@@ -0,0 +1,92 @@
+import argparse
+import logging
+
+import pandas as pd
+
+from src.kg.db.connection import Connection
+from src.kg.db.query_executor import QueryExecutor
+from src.kg.load_test import LoadTest, StandInConnection, get_query_mix
+from src.kg.rebuild import get_graph_resolver
+
+
+def main():
+
+    parser = argparse.ArgumentParser(
+        description="Replay a mix of analyst read queries at a fixed "
+        "concurrency or arrival rate and report latency percentiles"
+    )
+    parser.add_argument(
+        "--backend", choices=["neo4j", "stand-in"], default="neo4j"
+    )
+    parser.add_argument("--concurrency", default=8, type=int)
+    parser.add_argument(
+        "--rate",
+        default=None,
+        type=float,
+        help="Queries per second for an open loop, closed loop if not set",
+    )
+    parser.add_argument("--duration", default=30.0, type=float)
+    parser.add_argument("--warmup", default=5.0, type=float)
+    parser.add_argument(
+        "--mix",
+        nargs="+",
+        default=None,
+        metavar="NAME=WEIGHT",
+        help="Query weights, ex: country_path=1 ldc_subgraph=0",
+    )
+    parser.add_argument(
+        "--database", default=None, help="Defaults to the active graph"
+    )
+    parser.add_argument(
+        "--namespace", default=None, help="Defaults to the active graph"
+    )
+    parser.add_argument("--seed", default=None, type=int)
+    parser.add_argument(
+        "--output", default=None, help="CSV path to write the report to"
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    if args.backend == "neo4j":
+        # One pooled connection per worker
+        conn = Connection(max_connection_pool_size=args.concurrency)
+        if not conn.connect():
+            raise SystemExit("Could not connect to the graph DB")
+        database, namespace = get_graph_resolver(
+            conn, args.database, args.namespace
+        )()
+    else:
+        conn = StandInConnection(seed=args.seed)
+        database, namespace = args.database or "neo4j", args.namespace or ""
+
+    mix = get_query_mix(namespace)
+    for item in args.mix or []:
+        name, weight = item.split("=")
+        if name not in mix:
+            parser.error(f"Unknown query {name}, choose from {list(mix)}")
+        mix[name]["weight"] = float(weight)
+    mix = {name: spec for name, spec in mix.items() if spec["weight"] > 0}
+
+    load_test = LoadTest(
+        QueryExecutor(conn, database),
+        mix,
+        concurrency=args.concurrency,
+        rate=args.rate,
+        duration=args.duration,
+        warmup=args.warmup,
+        seed=args.seed,
+    )
+    try:
+        report = load_test.run()
+    finally:
+        conn.close()
+
+    with pd.option_context("display.float_format", "{:.2f}".format):
+        print(report.to_string())
+    if args.output:
+        report.to_csv(args.output, index_label="query")
+
+
+if __name__ == "__main__":
+
+    main()
@@ -0,0 +1,28 @@
+import os
+
+from src.kg.db.connection import Connection
+from src.kg.rebuild import GraphRebuilder
+
+
+def main():
+
+    conn = Connection()
+    conn.connect()
+
+    # Single-database editions (ex: Community) use a label-namespaced graph
+    multi_database = os.environ.get("MULTI_DATABASE", "true") == "true"
+    rebuilder = GraphRebuilder(conn=conn, multi_database=multi_database)
+
+    # Load into a staging graph, verify, and swap readers over
+    rebuilder.rebuild()
+
+    # Wait for the previous graph to be dropped before closing the driver
+    if rebuilder.drop_thread:
+        rebuilder.drop_thread.join()
+
+    conn.close()
+
+
+if __name__ == "__main__":
+
+    main()
@@ -0,0 +1,49 @@
+import argparse
+from datetime import date
+
+from src.db.history import History
+from src.kg.db.connection import Connection
+from src.kg.history import HistoryGraph
+from src.kg.knowledge_graph import KnowledgeGraph
+
+
+def main():
+
+    parser = argparse.ArgumentParser(
+        description="Record the imported and parsed export snapshot in the "
+        "versioned history, storing only the rows changed since the last one"
+    )
+    parser.add_argument(
+        "--as-of",
+        type=date.fromisoformat,
+        help="Export date of the snapshot, ex: 2025-01-12",
+    )
+    parser.add_argument(
+        "--graph",
+        action="store_true",
+        help="Project the new versions into the graph",
+    )
+    parser.add_argument(
+        "--list", action="store_true", help="List the recorded snapshots"
+    )
+    args = parser.parse_args()
+
+    history = History()
+    if args.as_of:
+        history.record(args.as_of)
+
+        if args.graph:
+            conn = Connection()
+            conn.connect()
+            kg = KnowledgeGraph(conn=conn)
+            # Only the versions opened or closed by this snapshot
+            HistoryGraph(kg).project(since=args.as_of)
+            kg.close()
+
+    if args.list or not args.as_of:
+        print(history.get_snapshots().to_string(index=False))
+
+
+if __name__ == "__main__":
+
+    main()
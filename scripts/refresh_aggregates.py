@@ -0,0 +1,38 @@
+import argparse
+
+from src.kg.db.connection import Connection
+from src.kg.knowledge_graph import KnowledgeGraph
+from src.kg.portfolio import PortfolioAggregates
+from src.kg.rebuild import get_graph_resolver
+
+
+def main():
+
+    parser = argparse.ArgumentParser(
+        description="Refresh the portfolio rollups of the knowledge graph"
+    )
+    parser.add_argument(
+        "--database", default=None, help="Defaults to the active graph"
+    )
+    parser.add_argument(
+        "--namespace", default=None, help="Defaults to the active graph"
+    )
+    args = parser.parse_args()
+
+    conn = Connection()
+    conn.connect()
+
+    database, namespace = get_graph_resolver(
+        conn, args.database, args.namespace
+    )()
+    kg = KnowledgeGraph(conn=conn, database=database, namespace=namespace)
+
+    # Rewrite only the rollups whose underlying rows changed
+    PortfolioAggregates(kg).refresh()
+
+    kg.close()
+
+
+if __name__ == "__main__":
+
+    main()
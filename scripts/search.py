@@ -0,0 +1,62 @@
+import argparse
+import time
+
+from src.db.search_index import SearchIndex
+from src.kg.db.connection import Connection
+from src.kg.knowledge_graph import KnowledgeGraph
+from src.kg.search import FullTextSearch
+
+
+def main():
+
+    parser = argparse.ArgumentParser(
+        description="Search projects, entities and delivery partners by name "
+        "or code"
+    )
+    parser.add_argument("query", nargs="?", default="")
+    parser.add_argument(
+        "--backend", choices=FullTextSearch.BACKENDS, default="sqlite"
+    )
+    parser.add_argument("--labels", nargs="+", default=None)
+    parser.add_argument("--page", default=1, type=int)
+    parser.add_argument("--page-size", default=10, type=int)
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="Rebuild the SQLite mirror from the tables first",
+    )
+    args = parser.parse_args()
+
+    if args.rebuild:
+        SearchIndex().rebuild()
+
+    kg = None
+    if args.backend == "neo4j":
+        conn = Connection()
+        conn.connect()
+        kg = KnowledgeGraph(conn=conn)
+
+    search = FullTextSearch(kg=kg, backend=args.backend)
+    start = time.perf_counter()
+    results = search.search(
+        args.query,
+        labels=args.labels,
+        limit=args.page_size,
+        offset=(args.page - 1) * args.page_size,
+    )
+    elapsed = (time.perf_counter() - start) * 1000
+
+    for result in results:
+        print(
+            f"{result['score']:>8.3f}  {result['label']:<16}"
+            f"{result['code'] or '':<10}{result['name']}"
+        )
+    print(f"\n{len(results)} results in {elapsed:.2f} ms")
+
+    if kg:
+        kg.close()
+
+
+if __name__ == "__main__":
+
+    main()
@@ -0,0 +1,72 @@
+import argparse
+import logging
+
+from src.kg.db.connection import Connection
+from src.kg.load_test import StandInConnection
+from src.kg.rebuild import get_graph_resolver
+from src.kg.server import QueryServer, QueryService, get_query_catalog
+
+
+def main():
+
+    parser = argparse.ArgumentParser(
+        description="Serve the catalog of read queries over HTTP"
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", default=8080, type=int)
+    parser.add_argument("--workers", default=8, type=int)
+    parser.add_argument(
+        "--backend", choices=["neo4j", "stand-in"], default="neo4j"
+    )
+    parser.add_argument(
+        "--database",
+        default=None,
+        help="Defaults to the active graph, followed across rebuilds",
+    )
+    parser.add_argument(
+        "--namespace",
+        default=None,
+        help="Defaults to the active graph, followed across rebuilds",
+    )
+    parser.add_argument("--cache-size", default=256, type=int)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    if args.backend == "neo4j":
+        # One pooled connection per worker
+        conn = Connection(max_connection_pool_size=args.workers)
+        if not conn.connect():
+            raise SystemExit("Could not connect to the graph DB")
+        resolver = get_graph_resolver(conn, args.database, args.namespace)
+        database, namespace = resolver()
+    else:
+        # Echo the parameters, once per requested record
+        conn = StandInConnection(
+            responder=lambda query, params: [
+                {"index": i, **params} for i in range(params.get("limit", 1))
+            ]
+        )
+        resolver = None
+        database, namespace = args.database or "neo4j", args.namespace or ""
+
+    service = QueryService(
+        conn,
+        get_query_catalog(namespace),
+        database=database,
+        cache_size=args.cache_size,
+        resolver=resolver,
+    )
+    server = QueryServer((args.host, args.port), service, args.workers)
+    print(f"Serving {len(service.catalog)} queries on {args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        conn.close()
+
+
+if __name__ == "__main__":
+
+    main()
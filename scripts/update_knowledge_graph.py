@@ -0,0 +1,57 @@
+import argparse
+import logging
+
+from src.kg.db.connection import Connection
+from src.kg.knowledge_graph import KnowledgeGraph
+from src.kg.rebuild import get_graph_resolver
+from src.kg.updater import GraphUpdater
+
+
+def main():
+
+    parser = argparse.ArgumentParser(
+        description="Continuously apply the tabular DB change log to the "
+        "knowledge graph"
+    )
+    parser.add_argument("--batch-size", default=1000, type=int)
+    parser.add_argument("--interval", default=1.0, type=float)
+    parser.add_argument("--statistics-interval", default=60.0, type=float)
+    parser.add_argument(
+        "--database",
+        default=None,
+        help="Defaults to the active graph, followed across rebuilds",
+    )
+    parser.add_argument(
+        "--namespace",
+        default=None,
+        help="Defaults to the active graph, followed across rebuilds",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    conn = Connection()
+    conn.connect()
+
+    resolver = get_graph_resolver(conn, args.database, args.namespace)
+    database, namespace = resolver()
+    kg = KnowledgeGraph(conn=conn, database=database, namespace=namespace)
+    updater = GraphUpdater(
+        kg,
+        batch_size=args.batch_size,
+        interval=args.interval,
+        statistics_interval=args.statistics_interval,
+        resolver=resolver,
+    )
+
+    try:
+        updater.run()
+    except KeyboardInterrupt:
+        logging.info("Stopping graph updater")
+    finally:
+        kg.close()
+
+
+if __name__ == "__main__":
+
+    main()
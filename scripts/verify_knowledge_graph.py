@@ -0,0 +1,45 @@
+import argparse
+import logging
+
+from src.kg.db.connection import Connection
+from src.kg.knowledge_graph import KnowledgeGraph
+from src.kg.rebuild import get_graph_resolver
+from src.kg.verifier import ConsistencyVerifier
+
+
+def main():
+
+    parser = argparse.ArgumentParser(
+        description="Verify the knowledge graph against the tabular DB"
+    )
+    parser.add_argument(
+        "--database", default=None, help="Defaults to the active graph"
+    )
+    parser.add_argument(
+        "--namespace", default=None, help="Defaults to the active graph"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    conn = Connection()
+    conn.connect()
+
+    database, namespace = get_graph_resolver(
+        conn, args.database, args.namespace
+    )()
+    kg = KnowledgeGraph(conn=conn, database=database, namespace=namespace)
+
+    # Compare the graph against the tabular DB with aggregate fingerprints
+    verifier = ConsistencyVerifier(kg)
+    if verifier.verify():
+        print("Graph is consistent with the tabular DB.")
+    else:
+        print("Graph is NOT consistent with the tabular DB, see warnings.")
+
+    kg.close()
+
+
+if __name__ == "__main__":
+
+    main()
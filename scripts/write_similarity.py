@@ -0,0 +1,42 @@
+import argparse
+
+from src.kg.db.connection import Connection
+from src.kg.knowledge_graph import KnowledgeGraph
+from src.kg.rebuild import get_graph_resolver
+from src.kg.similarity import SimilarityEngine
+
+
+def main():
+
+    parser = argparse.ArgumentParser(
+        description="Write the most similar projects and entities to the "
+        "knowledge graph"
+    )
+    parser.add_argument(
+        "--database", default=None, help="Defaults to the active graph"
+    )
+    parser.add_argument(
+        "--namespace", default=None, help="Defaults to the active graph"
+    )
+    args = parser.parse_args()
+
+    conn = Connection()
+    conn.connect()
+
+    database, namespace = get_graph_resolver(
+        conn, args.database, args.namespace
+    )()
+    kg = KnowledgeGraph(conn=conn, database=database, namespace=namespace)
+
+    # Write the top-k most similar projects and entities as SIMILAR_TO
+    for name in ["project", "entity"]:
+        engine = SimilarityEngine(kg.data_services[name])
+        engine.compute_all()
+        engine.write_similar(kg.query_executor)
+
+    kg.close()
+
+
+if __name__ == "__main__":
+
+    main()
@@ -0,0 +1,271 @@
+from typing import Type
+
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.ext.declarative import DeclarativeMeta
+
+from src.db.db_handler import DBHandler
+from src.db.db_schema import (
+    ChangeLog,
+    ChangeOffset,
+    Country,
+    GraphGeneration,
+    Entity,
+    Project,
+    ProjectCountry,
+    Readiness,
+    ReadinessCountry,
+)
+from src.utils.singleton import Singleton
+
+
+class ChangeFeed(Singleton):
+    """Process-wide outbox of row changes in the tabular DB.
+
+    SQLite triggers on the data and join tables append one compact
+    `(table, row ID, op)` record per changed row to `change_log`, inside the
+    writing transaction, so that jobs editing the DB directly are captured
+    too. Join table changes are logged against the data row they belong to
+    (ex: a `project_country` insert logs its project).
+
+    Consumers read the log in ID order from their committed offset. SQLite
+    serializes writers, so IDs become visible in order and an offset never
+    skips a change committed later. Offsets are only committed after the
+    changes are applied, for at-least-once delivery.
+
+    Changes to a graph that bypass the log, such as a rebuild or a refresh
+    of the portfolio rollups, bump its generation instead, so that readers
+    caching on the offset also notice them.
+    """
+
+    # Captured tables and the column holding the ID of the logged data row
+    TRACKED: dict[Type[DeclarativeMeta], tuple[Type[DeclarativeMeta], str]] = {
+        Project: (Project, "id"),
+        Entity: (Entity, "id"),
+        Readiness: (Readiness, "id"),
+        Country: (Country, "id"),
+        ProjectCountry: (Project, "project_id"),
+        ReadinessCountry: (Readiness, "readiness_id"),
+    }
+
+    def __init__(self, db_handler: DBHandler = None) -> None:
+
+        # Avoid reinitializing in singleton
+        if not hasattr(self, "initialized"):
+            self.initialized = True
+        self.db_handler = db_handler or DBHandler()
+
+    def _get_trigger_queries(self) -> list[str]:
+        """Helper method to generate the insert, update and delete trigger
+        queries of every captured table
+
+        Returns:
+            list[str]: Trigger DDL queries
+        """
+
+        queries = []
+        for table_class, (logged_class, id_col) in self.TRACKED.items():
+            table = table_class.__tablename__
+            logged = logged_class.__tablename__
+            insert = (
+                f"INSERT INTO {ChangeLog.__tablename__}"
+                "(table_name, row_id, op)"
+            )
+            for event, op, row in [
+                ("INSERT", "I", "NEW"),
+                ("UPDATE", "U", "NEW"),
+                ("DELETE", "D", "OLD"),
+            ]:
+                body = f"{insert} VALUES ('{logged}', {row}.{id_col}, '{op}');"
+                # Log the previous row too if an update moved it
+                if event == "UPDATE":
+                    body += f"""
+                    {insert} SELECT '{logged}', OLD.{id_col}, 'U'
+                    WHERE OLD.{id_col} IS NOT NEW.{id_col};
+                    """
+                queries.append(f"""
+                    CREATE TRIGGER IF NOT EXISTS
+                    {table}_{event.lower()}_change
+                    AFTER {event} ON {table}
+                    BEGIN
+                    {body}
+                    END
+                    """)
+
+        return queries
+
+    def install(self) -> bool:
+        """Create the change capture triggers if they do not exist
+
+        Returns:
+            bool: True after completion
+        """
+
+        with self.db_handler.engine.begin() as conn:
+            for query in self._get_trigger_queries():
+                conn.execute(text(query))
+
+        return True
+
+    def uninstall(self) -> bool:
+        """Drop the change capture triggers
+
+        Returns:
+            bool: True after completion
+        """
+
+        with self.db_handler.engine.begin() as conn:
+            for table_class in self.TRACKED:
+                table = table_class.__tablename__
+                for event in ["insert", "update", "delete"]:
+                    conn.execute(
+                        text(f"DROP TRIGGER IF EXISTS {table}_{event}_change")
+                    )
+
+        return True
+
+    def get_head(self) -> int:
+        """Get the ID of the last logged change
+
+        Returns:
+            int: Last change ID, 0 if the log is empty
+        """
+
+        with self.db_handler.get_session() as session:
+            head = session.scalar(select(func.max(ChangeLog.id)))
+
+        return head or 0
+
+    def get_offset(self, name: str) -> int:
+        """Get the last change applied by a consumer
+
+        Args:
+            name (str): Consumer name
+
+        Returns:
+            int: Last applied change ID, 0 for a new consumer
+        """
+
+        with self.db_handler.get_session() as session:
+            state = session.get(ChangeOffset, name)
+
+        return state.change_id if state else 0
+
+    def commit_offset(
+        self, name: str, change_id: int, generation: int = None
+    ) -> bool:
+        """Commit the last change applied by a consumer
+
+        Args:
+            name (str): Consumer name
+            change_id (int): Last applied change ID
+            generation (int, optional): Graph generation the changes were
+                applied to, to only commit if it is still current, ex: not
+                swapped by a rebuild meanwhile. Defaults to None, to commit
+                regardless.
+
+        Returns:
+            bool: True if committed, False if the generation changed
+        """
+
+        with self.db_handler.get_session() as session:
+            session.merge(ChangeOffset(name=name, change_id=change_id))
+            # Write first, so that a concurrent bump is serialized before the
+            # generation is checked
+            session.flush()
+            if generation is not None:
+                state = session.get(GraphGeneration, name)
+                if (state.generation if state else 0) != generation:
+                    session.rollback()
+                    return False
+            session.commit()
+
+        return True
+
+    def get_generation(self, name: str) -> int:
+        """Get the generation of a graph
+
+        Args:
+            name (str): Graph name, as its consumer name
+
+        Returns:
+            int: Generation, 0 for a graph never bumped
+        """
+
+        with self.db_handler.get_session() as session:
+            state = session.get(GraphGeneration, name)
+
+        return state.generation if state else 0
+
+    def bump_generation(self, name: str, change_id: int = None) -> int:
+        """Bump the generation of a graph after a change that bypasses the
+        change log
+
+        Args:
+            name (str): Graph name, as its consumer name
+            change_id (int, optional): Offset to commit for the consumer in
+                the same transaction, ex: the head of a swapped rebuild, so
+                that consumers never see the new generation with an older
+                offset. Defaults to None, to keep the offset.
+
+        Returns:
+            int: New generation
+        """
+
+        with self.db_handler.get_session() as session:
+            state = session.get(GraphGeneration, name)
+            if state:
+                state.generation += 1
+            else:
+                state = GraphGeneration(name=name, generation=1)
+                session.add(state)
+            if change_id is not None:
+                session.merge(ChangeOffset(name=name, change_id=change_id))
+            session.commit()
+            generation = state.generation
+
+        return generation
+
+    def read(self, after: int, limit: int = 1000) -> list[dict]:
+        """Read the next batch of changes after an offset
+
+        Args:
+            after (int): Last applied change ID
+            limit (int, optional): Maximum number of changes. Defaults to 1000.
+
+        Returns:
+            list[dict]: Changes with `id`, `table_name`, `row_id` and `op`,
+                in ID order
+        """
+
+        with self.db_handler.get_session() as session:
+            rows = session.execute(
+                select(
+                    ChangeLog.id,
+                    ChangeLog.table_name,
+                    ChangeLog.row_id,
+                    ChangeLog.op,
+                )
+                .where(ChangeLog.id > after)
+                .order_by(ChangeLog.id)
+                .limit(limit)
+            ).all()
+
+        return [row._asdict() for row in rows]
+
+    def prune(self) -> int:
+        """Delete the changes applied by every consumer
+
+        Returns:
+            int: Number of deleted changes
+        """
+
+        with self.db_handler.get_session() as session:
+            applied = session.scalar(select(func.min(ChangeOffset.change_id)))
+            if not applied:
+                return 0
+            result = session.execute(
+                delete(ChangeLog).where(ChangeLog.id <= applied)
+            )
+            session.commit()
+
+        return result.rowcount
@@ -1,6 +1,6 @@
-from datetime import datetime
+from datetime import date, datetime
 
-from sqlalchemy import Boolean, ForeignKey
+from sqlalchemy import Boolean, ForeignKey, Index, func
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 
@@ -368,3 +368,177 @@ class ReadinessCountry(Base):
     country_id: Mapped[int] = mapped_column(
         ForeignKey("country_dict.id"), nullable=False
     )
+
+
+# Portfolio summary tables, materialized from the data tables
+class CountrySummary(Base):
+    __tablename__ = "country_summary"
+
+    country_id: Mapped[int] = mapped_column(
+        ForeignKey("country_dict.id"), primary_key=True
+    )
+    project_count: Mapped[int] = mapped_column(nullable=False)
+    project_financing_usd: Mapped[float] = mapped_column(nullable=False)
+    readiness_count: Mapped[int] = mapped_column(nullable=False)
+    readiness_financing_usd: Mapped[float] = mapped_column(nullable=False)
+    entity_count: Mapped[int] = mapped_column(nullable=False)
+    bm_count: Mapped[int] = mapped_column(nullable=False)
+
+
+class RegionSummary(Base):
+    __tablename__ = "region_summary"
+
+    region_id: Mapped[int] = mapped_column(
+        ForeignKey("region_dict.id"), primary_key=True
+    )
+    country_count: Mapped[int] = mapped_column(nullable=False)
+    project_count: Mapped[int] = mapped_column(nullable=False)
+    project_financing_usd: Mapped[float] = mapped_column(nullable=False)
+    readiness_count: Mapped[int] = mapped_column(nullable=False)
+    readiness_financing_usd: Mapped[float] = mapped_column(nullable=False)
+    entity_count: Mapped[int] = mapped_column(nullable=False)
+
+
+class EntitySummary(Base):
+    __tablename__ = "entity_summary"
+
+    entity_id: Mapped[int] = mapped_column(
+        ForeignKey("entity.id"), primary_key=True
+    )
+    project_count: Mapped[int] = mapped_column(nullable=False)
+    project_financing_usd: Mapped[float] = mapped_column(nullable=False)
+    country_count: Mapped[int] = mapped_column(nullable=False)
+
+
+class BmSummary(Base):
+    __tablename__ = "bm_summary"
+
+    bm_id: Mapped[int] = mapped_column(
+        ForeignKey("bm_dict.id"), primary_key=True
+    )
+    project_count: Mapped[int] = mapped_column(nullable=False)
+    project_financing_usd: Mapped[float] = mapped_column(nullable=False)
+    entity_count: Mapped[int] = mapped_column(nullable=False)
+
+
+class ThemeSummary(Base):
+    __tablename__ = "theme_summary"
+
+    theme_id: Mapped[int] = mapped_column(
+        ForeignKey("theme_dict.id"), primary_key=True
+    )
+    project_count: Mapped[int] = mapped_column(nullable=False)
+    project_financing_usd: Mapped[float] = mapped_column(nullable=False)
+
+
+class GroupSummary(Base):
+    __tablename__ = "group_summary"
+
+    # Country group, ex: "LDC" or "SIDS"
+    group: Mapped[str] = mapped_column(primary_key=True)
+    country_count: Mapped[int] = mapped_column(nullable=False)
+    project_count: Mapped[int] = mapped_column(nullable=False)
+    project_financing_usd: Mapped[float] = mapped_column(nullable=False)
+    readiness_count: Mapped[int] = mapped_column(nullable=False)
+    readiness_financing_usd: Mapped[float] = mapped_column(nullable=False)
+
+
+class SummaryState(Base):
+    __tablename__ = "summary_state"
+
+    # Fingerprint of the data tables the summaries were materialized from
+    name: Mapped[str] = mapped_column(primary_key=True)
+    fingerprint: Mapped[str] = mapped_column(nullable=False)
+
+
+# Change data capture, appended to by triggers on the data and join tables
+class ChangeLog(Base):
+    __tablename__ = "change_log"
+    # Never reuse IDs of pruned changes, as they are consumer offsets
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    # Data table of the changed row, join table changes are logged against
+    # the data row they belong to
+    table_name: Mapped[str] = mapped_column(nullable=False)
+    row_id: Mapped[int] = mapped_column(nullable=False)
+    # One of "I" (insert), "U" (update) or "D" (delete)
+    op: Mapped[str] = mapped_column(nullable=False)
+    changed_at: Mapped[datetime] = mapped_column(
+        server_default=func.current_timestamp()
+    )
+
+
+class ChangeOffset(Base):
+    __tablename__ = "change_offset"
+
+    # Last change applied by each consumer of the change log
+    name: Mapped[str] = mapped_column(primary_key=True)
+    change_id: Mapped[int] = mapped_column(nullable=False)
+
+
+class GraphGeneration(Base):
+    __tablename__ = "graph_generation"
+
+    # Counter of each graph, bumped on changes outside of the change log
+    # (ex: a rebuild or a refresh of the portfolio rollups)
+    name: Mapped[str] = mapped_column(primary_key=True)
+    generation: Mapped[int] = mapped_column(nullable=False)
+
+
+# Versioned history of the data tables across export snapshots
+class RowVersion(Base):
+    __tablename__ = "row_version"
+    __table_args__ = (
+        # Point-in-time reads scan the versions still valid at the date
+        Index(
+            "row_version_valid_index", "table_name", "valid_to", "valid_from"
+        ),
+        # Diffing a snapshot looks up the open version of each natural key
+        Index(
+            "row_version_key_index", "table_name", "natural_key", "valid_to"
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    table_name: Mapped[str] = mapped_column(nullable=False)
+    # Natural key of the row, stable across exports (ex: project ref)
+    natural_key: Mapped[str] = mapped_column(nullable=False)
+    # Validity interval [valid_from, valid_to), open versions end on
+    # date.max
+    valid_from: Mapped[date] = mapped_column(nullable=False)
+    valid_to: Mapped[date] = mapped_column(nullable=False)
+    # JSON of the row values, with references to other data tables by
+    # natural key
+    data: Mapped[str] = mapped_column(nullable=False)
+
+
+class HistorySnapshot(Base):
+    __tablename__ = "history_snapshot"
+
+    # Export date of each recorded snapshot
+    as_of: Mapped[date] = mapped_column(primary_key=True)
+    opened: Mapped[int] = mapped_column(nullable=False)
+    closed: Mapped[int] = mapped_column(nullable=False)
+    recorded_at: Mapped[datetime] = mapped_column(
+        server_default=func.current_timestamp()
+    )
+
+
+# Catalog of graph statistics, refreshed after each build or sync
+class GraphStatistic(Base):
+    __tablename__ = "graph_statistic"
+
+    # Node label namespace of the described graph
+    namespace: Mapped[str] = mapped_column(primary_key=True)
+    # One of "label", "relationship", "degree", "hubs" or "values"
+    kind: Mapped[str] = mapped_column(primary_key=True)
+    # Node label, without namespace
+    label: Mapped[str] = mapped_column(primary_key=True)
+    # Relationship type of "relationship" statistics, empty otherwise
+    key: Mapped[str] = mapped_column(primary_key=True)
+    # JSON of the statistic
+    value: Mapped[str] = mapped_column(nullable=False)
+    computed_at: Mapped[datetime] = mapped_column(
+        server_default=func.current_timestamp()
+    )
@@ -0,0 +1,455 @@
+import json
+import logging
+from collections import Counter
+from datetime import date, datetime
+from typing import Type
+
+import pandas as pd
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.ext.declarative import DeclarativeMeta
+
+from src.db.db_handler import DBHandler
+from src.db.db_schema import (
+    ActivityTypeDict,
+    BmDict,
+    Country,
+    CountryDict,
+    DeliveryPartnerDict,
+    Entity,
+    EntityTypeDict,
+    EssCategoryDict,
+    HistorySnapshot,
+    ModalityDict,
+    Project,
+    ProjectCountry,
+    Readiness,
+    ReadinessCountry,
+    RegionDict,
+    RowVersion,
+    SectorDict,
+    SizeDict,
+    StageDict,
+    StatusDict,
+    ThemeDict,
+)
+from src.utils.singleton import Singleton
+
+
+class History(Singleton):
+    """Process-wide versioned history of the data tables across successive
+    export snapshots.
+
+    Every table is re-imported from scratch, so surrogate IDs are not stable
+    between exports. Rows are instead keyed on natural keys (ex: project
+    ref), with repeated keys numbered in import order (ex: "RS-001#2").
+    References to other data tables and to the data dictionaries are stored
+    by natural key (ex: `sector_key` for `sector_id`), and the countries of
+    the join tables as a sorted list of ISO3 codes.
+
+    Recording a snapshot only closes the versions of the changed or removed
+    rows and opens versions for the changed or new ones, so storage grows
+    with the changes and not with the number of snapshots. Point-in-time
+    reads only scan the versions valid at the date, through an index on
+    their validity intervals.
+    """
+
+    # Natural key column of each data table, in foreign key order
+    TABLES: dict[Type[DeclarativeMeta], str] = {
+        Country: "iso3",
+        Entity: "code",
+        Project: "ref",
+        Readiness: "ref",
+    }
+    # Natural key column of each data dictionary
+    DICTIONARIES: dict[Type[DeclarativeMeta], str] = {
+        ActivityTypeDict: "name",
+        BmDict: "name",
+        CountryDict: "iso3",
+        DeliveryPartnerDict: "name",
+        EntityTypeDict: "name",
+        EssCategoryDict: "name",
+        ModalityDict: "name",
+        RegionDict: "code",
+        SectorDict: "name",
+        SizeDict: "name",
+        StageDict: "name",
+        StatusDict: "name",
+        ThemeDict: "name",
+    }
+    # References to other data tables, stored as their natural key
+    REFERENCES = {Project: {"entity_id": (Entity, "entity_key")}}
+    # Join tables and their parent ID column, stored as ISO3 code lists
+    JOINS = {
+        Project: (ProjectCountry, "project_id"),
+        Readiness: (ReadinessCountry, "readiness_id"),
+    }
+    # End of the validity interval of open versions
+    OPEN = date.max
+
+    def __init__(self, db_handler: DBHandler = None) -> None:
+
+        # Avoid reinitializing in singleton
+        if not hasattr(self, "initialized"):
+            self.initialized = True
+        self.db_handler = db_handler or DBHandler()
+
+    def _read(self, table_class: Type[DeclarativeMeta]) -> list[dict]:
+        """Helper method to read the rows of a table of the tabular DB
+
+        Args:
+            table_class (Type[DeclarativeMeta]): The SQLAlchemy ORM table class
+
+        Returns:
+            list[dict]: Rows of the table, in ID order
+        """
+
+        table = table_class.__table__
+        with self.db_handler.get_session() as session:
+            rows = session.execute(
+                select(*table.columns).order_by(table.c.id)
+            ).mappings()
+            return [dict(row) for row in rows]
+
+    def _get_references(
+        self, table_class: Type[DeclarativeMeta]
+    ) -> dict[str, tuple[Type[DeclarativeMeta], str]]:
+        """Helper method to get the columns of a data table referencing other
+        data tables or data dictionaries by surrogate ID
+
+        Args:
+            table_class (Type[DeclarativeMeta]): The SQLAlchemy ORM table class
+
+        Returns:
+            dict[str, tuple[Type[DeclarativeMeta], str]]: Referenced table
+                class and stored natural key column, by ID column
+        """
+
+        references = dict(self.REFERENCES.get(table_class, {}))
+        dictionaries = {
+            dict_class.__tablename__: dict_class
+            for dict_class in self.DICTIONARIES
+        }
+        for col in table_class.__table__.columns:
+            for foreign_key in col.foreign_keys:
+                target = foreign_key.column
+                # Natural key references, ex: ISO3, are stored as is
+                if target.table.name in dictionaries and target.name == "id":
+                    references[col.name] = (
+                        dictionaries[target.table.name],
+                        f"{col.name.removesuffix('_id')}_key",
+                    )
+
+        return references
+
+    def _get_keys(
+        self, table_class: Type[DeclarativeMeta], rows: list[dict]
+    ) -> list[str]:
+        """Helper method to get the natural keys of the rows of a table,
+        numbering repeated keys in import order
+
+        Args:
+            table_class (Type[DeclarativeMeta]): The SQLAlchemy ORM table class
+            rows (list[dict]): Rows of the table, in ID order
+
+        Returns:
+            list[str]: Natural keys, aligned with the rows
+        """
+
+        key_col = self.TABLES[table_class]
+        counts = Counter()
+        keys = []
+        for row in rows:
+            key = str(row[key_col] or "")
+            counts[key] += 1
+            keys.append(key if counts[key] == 1 else f"{key}#{counts[key]}")
+
+        return keys
+
+    @staticmethod
+    def _serialize(row: dict) -> str:
+        """Static helper method to serialize a row as canonical JSON, so
+        that equal rows always compare equal (ex: integral amounts stored as
+        REAL by some imports)
+
+        Args:
+            row (dict): Row values
+
+        Returns:
+            str: JSON with sorted keys
+        """
+
+        row = {
+            col: (
+                int(value)
+                if isinstance(value, float) and value.is_integer()
+                else value
+            )
+            for col, value in row.items()
+        }
+
+        return json.dumps(row, sort_keys=True, default=str)
+
+    def _get_rows(self) -> dict[Type[DeclarativeMeta], dict[str, str]]:
+        """Helper method to serialize the current rows of all data tables
+
+        Returns:
+            dict[Type[DeclarativeMeta], dict[str, str]]: Canonical JSON of
+                each row by natural key, by table class
+        """
+
+        rows = {}
+        # Surrogate ID to natural key, for referencing tables
+        ids = {
+            dict_class: {
+                row["id"]: row[key_col] for row in self._read(dict_class)
+            }
+            for dict_class, key_col in self.DICTIONARIES.items()
+        }
+        for table_class in self.TABLES:
+            table_rows = self._read(table_class)
+            keys = self._get_keys(table_class, table_rows)
+            ids[table_class] = {
+                row["id"]: key for row, key in zip(table_rows, keys)
+            }
+
+            countries = {}
+            if table_class in self.JOINS:
+                join_class, parent_col = self.JOINS[table_class]
+                for pair in self._read(join_class):
+                    countries.setdefault(pair[parent_col], []).append(
+                        ids[CountryDict].get(pair["country_id"])
+                    )
+
+            references = self._get_references(table_class)
+            rows[table_class] = {}
+            for row, key in zip(table_rows, keys):
+                for col, (ref_class, key_col) in references.items():
+                    row[key_col] = ids[ref_class].get(row.pop(col))
+                if table_class in self.JOINS:
+                    row["country_keys"] = sorted(
+                        filter(None, countries.get(row["id"], []))
+                    )
+                del row["id"]
+                rows[table_class][key] = self._serialize(row)
+
+        return rows
+
+    def get_snapshots(self) -> pd.DataFrame:
+        """Get the recorded snapshots
+
+        Returns:
+            pd.DataFrame: Export date, opened and closed versions of each
+                snapshot, in date order
+        """
+
+        with self.db_handler.get_session() as session:
+            data = session.execute(
+                select(
+                    HistorySnapshot.as_of,
+                    HistorySnapshot.opened,
+                    HistorySnapshot.closed,
+                ).order_by(HistorySnapshot.as_of)
+            ).all()
+
+        return pd.DataFrame(data, columns=["as_of", "opened", "closed"])
+
+    def record(self, as_of: date) -> bool:
+        """Main method to record the current contents of the data tables as
+        the snapshot of an export date, storing only the changed rows
+
+        Args:
+            as_of (date): Export date, after all recorded snapshots
+
+        Raises:
+            ValueError: Raise error if the date is not after the last
+                recorded snapshot
+
+        Returns:
+            bool: True after completion
+        """
+
+        with self.db_handler.get_session() as session:
+            last = session.scalar(select(func.max(HistorySnapshot.as_of)))
+        if last and as_of <= last:
+            raise ValueError(
+                f"Snapshot of {as_of} must be after the last one of {last}"
+            )
+
+        rows = self._get_rows()
+        opened, closed = 0, 0
+        with self.db_handler.get_session() as session:
+            for table_class, current in rows.items():
+                table_name = table_class.__tablename__
+                stored = {
+                    key: (version_id, data)
+                    for version_id, key, data in session.execute(
+                        select(
+                            RowVersion.id,
+                            RowVersion.natural_key,
+                            RowVersion.data,
+                        ).where(
+                            RowVersion.table_name == table_name,
+                            RowVersion.valid_to == self.OPEN,
+                        )
+                    )
+                }
+
+                # Close the versions of changed and removed rows
+                close_ids = [
+                    version_id
+                    for key, (version_id, data) in stored.items()
+                    if current.get(key) != data
+                ]
+                # Open versions for changed and new rows
+                versions = [
+                    {
+                        "table_name": table_name,
+                        "natural_key": key,
+                        "valid_from": as_of,
+                        "valid_to": self.OPEN,
+                        "data": data,
+                    }
+                    for key, data in current.items()
+                    if key not in stored or stored[key][1] != data
+                ]
+
+                if close_ids:
+                    session.execute(
+                        update(RowVersion)
+                        .where(RowVersion.id.in_(close_ids))
+                        .values(valid_to=as_of)
+                    )
+                if versions:
+                    session.execute(insert(RowVersion), versions)
+                opened += len(versions)
+                closed += len(close_ids)
+                logging.info(
+                    f"{table_name}: {len(versions)} opened, "
+                    f"{len(close_ids)} closed"
+                )
+
+            session.add(
+                HistorySnapshot(as_of=as_of, opened=opened, closed=closed)
+            )
+            session.commit()
+
+        print(
+            f"Recorded snapshot of {as_of}: {opened} versions opened, "
+            f"{closed} closed."
+        )
+
+        return True
+
+    def as_of(
+        self, table_class: Type[DeclarativeMeta], as_of: date
+    ) -> pd.DataFrame:
+        """Read the rows of a data table as they were at a date
+
+        Args:
+            table_class (Type[DeclarativeMeta]): The SQLAlchemy ORM table class
+            as_of (date): Point in time
+
+        Returns:
+            pd.DataFrame: Stored row values, with the natural key in a `key`
+                column and the versions in `valid_from` and `valid_to`, in
+                natural key order
+        """
+
+        with self.db_handler.get_session() as session:
+            data = session.execute(
+                select(
+                    RowVersion.natural_key,
+                    RowVersion.valid_from,
+                    RowVersion.valid_to,
+                    RowVersion.data,
+                )
+                .where(
+                    RowVersion.table_name == table_class.__tablename__,
+                    RowVersion.valid_to > as_of,
+                    RowVersion.valid_from <= as_of,
+                )
+                .order_by(RowVersion.natural_key)
+            ).all()
+
+        df = pd.DataFrame(
+            [json.loads(row.data) for row in data],
+            index=pd.RangeIndex(len(data)),
+        )
+        df.insert(0, "key", [row.natural_key for row in data])
+        df["valid_from"] = [row.valid_from for row in data]
+        df["valid_to"] = [row.valid_to for row in data]
+
+        return df
+
+    def get_tables(self, as_of: date) -> dict[str, pd.DataFrame]:
+        """Rebuild the data and join tables as they were at a date, in the
+        shape of the tabular DB tables. Rows that still exist keep their
+        current surrogate ID, and removed rows get new IDs after them.
+        References to the data dictionaries are resolved to the current
+        dictionary IDs, and are empty for values no longer in them. Tables
+        are empty, with their columns, before the first snapshot.
+
+        Args:
+            as_of (date): Point in time
+
+        Returns:
+            dict[str, pd.DataFrame]: Data and join tables by table name
+        """
+
+        tables = {}
+        # Natural key to the current surrogate ID of the dictionaries
+        ids = {}
+        for dict_class, key_col in self.DICTIONARIES.items():
+            rows = self._read(dict_class)
+            ids[dict_class] = pd.Series(
+                [row["id"] for row in rows],
+                index=[row[key_col] for row in rows],
+                dtype="int64",
+            )
+
+        for table_class in self.TABLES:
+            df = self.as_of(table_class, as_of)
+            rows = self._read(table_class)
+            current = pd.Series(
+                [row["id"] for row in rows],
+                index=self._get_keys(table_class, rows),
+                dtype="int64",
+            )
+            df["id"] = df["key"].map(current)
+            missing = df["id"].isna()
+            start = int(current.max()) + 1 if len(current) else 1
+            df.loc[missing, "id"] = range(start, start + int(missing.sum()))
+            df["id"] = df["id"].astype("int64")
+            df = df.sort_values("id", ignore_index=True)
+            # Natural key to the new surrogate ID, for referencing tables
+            ids[table_class] = pd.Series(df["id"].to_numpy(), index=df["key"])
+
+            for col, (ref_class, key_col) in self._get_references(
+                table_class
+            ).items():
+                if key_col in df:
+                    df[col] = df.pop(key_col).map(ids[ref_class])
+            if table_class in self.JOINS:
+                join_class, parent_col = self.JOINS[table_class]
+                # No versions, and so no columns, before the first snapshot
+                if "country_keys" not in df:
+                    df["country_keys"] = [[] for _ in range(len(df))]
+                pairs = df[["id", "country_keys"]].explode("country_keys")
+                pairs["country_keys"] = pairs["country_keys"].map(
+                    ids[CountryDict]
+                )
+                pairs = pairs.dropna().rename(
+                    columns={"id": parent_col, "country_keys": "country_id"}
+                )
+                pairs.insert(0, "id", range(1, len(pairs) + 1))
+                tables[join_class.__tablename__] = pairs.astype("int64")
+
+            columns = table_class.__table__.columns
+            df = df.reindex(columns=[col.name for col in columns])
+            # Dates are stored as text in the row JSON
+            for col in columns:
+                if col.type.python_type is datetime:
+                    df[col.name] = pd.to_datetime(df[col.name])
+            tables[table_class.__tablename__] = df
+
+        return tables
@@ -0,0 +1,123 @@
+import threading
+from typing import Type
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import select
+from sqlalchemy.ext.declarative import DeclarativeMeta
+
+from src.db.db_handler import DBHandler
+from src.utils.singleton import Singleton
+
+
+class LookupRegistry(Singleton):
+    """Process-wide registry of name to ID lookups for dictionary tables.
+
+    Each (table, name column, ID column) lookup is loaded once with a
+    column-only select and kept as a pandas Series indexed by name, so that
+    mapping a whole column of names is a single vectorized `get_indexer`.
+    Lookups are invalidated whenever their table is re-imported.
+    """
+
+    def __init__(self, db_handler: DBHandler = None) -> None:
+
+        # Avoid reinitializing in singleton
+        if not hasattr(self, "initialized"):
+            self.initialized = True
+            self.lookups = {}
+            self.lock = threading.Lock()
+        self.db_handler = db_handler or DBHandler()
+
+    def _load(
+        self, table_class: Type[DeclarativeMeta], name_col: str, id_col: str
+    ) -> pd.Series:
+        """Helper method to load a lookup with a column-only select
+
+        Args:
+            table_class (Type[DeclarativeMeta]): The SQLAlchemy ORM table class
+            name_col (str): Column name of the name column
+            id_col (str): Column name of the ID column
+
+        Returns:
+            pd.Series: IDs indexed by name
+        """
+
+        table = table_class.__table__
+        with self.db_handler.get_session() as session:
+            rows = session.execute(
+                select(table.c[name_col], table.c[id_col])
+            ).all()
+
+        names, ids = zip(*rows) if rows else ((), ())
+        lookup = pd.Series(np.asarray(ids, dtype=np.int64), index=names)
+        # Keep the last ID of any duplicated name, as a dictionary would
+        lookup = lookup[~lookup.index.duplicated(keep="last")]
+
+        return lookup
+
+    def get(
+        self,
+        table_class: Type[DeclarativeMeta],
+        name_col: str = "name",
+        id_col: str = "id",
+    ) -> pd.Series:
+        """Get a name to ID lookup, loading it on first use
+
+        Args:
+            table_class (Type[DeclarativeMeta]): The SQLAlchemy ORM table class
+            name_col (str, optional): Column name of the name column.
+                Defaults to "name".
+            id_col (str, optional): Column name of the ID column.
+                Defaults to "id".
+
+        Returns:
+            pd.Series: IDs indexed by name
+        """
+
+        key = (table_class.__tablename__, name_col, id_col)
+        with self.lock:
+            if key not in self.lookups:
+                self.lookups[key] = self._load(table_class, name_col, id_col)
+
+            return self.lookups[key]
+
+    @staticmethod
+    def map(values: pd.Series, lookup: pd.Series) -> pd.Series:
+        """Map a column of names to IDs in one vectorized lookup
+
+        Args:
+            values (pd.Series): Names to map
+            lookup (pd.Series): IDs indexed by name
+
+        Returns:
+            pd.Series: Mapped IDs, as floats with NaN if any name is unknown
+        """
+
+        indexer = lookup.index.get_indexer(values)
+        found = indexer >= 0
+        ids = lookup.to_numpy()[indexer]
+        if not found.all():
+            ids = np.where(found, ids, np.nan)
+
+        return pd.Series(ids, index=values.index)
+
+    def invalidate(self, table_class: Type[DeclarativeMeta] = None) -> bool:
+        """Drop the cached lookups of a table, or of all tables
+
+        Args:
+            table_class (Type[DeclarativeMeta], optional): The SQLAlchemy ORM
+                table class, or None for all tables. Defaults to None.
+
+        Returns:
+            bool: True after completion
+        """
+
+        with self.lock:
+            if table_class is None:
+                self.lookups.clear()
+            else:
+                for key in list(self.lookups):
+                    if key[0] == table_class.__tablename__:
+                        del self.lookups[key]
+
+        return True
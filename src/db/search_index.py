@@ -0,0 +1,240 @@
+import re
+import threading
+from typing import Type
+
+from sqlalchemy import text
+from sqlalchemy.ext.declarative import DeclarativeMeta
+
+from src.db.db_handler import DBHandler
+from src.db.db_schema import DeliveryPartnerDict, Entity, Project
+from src.utils.singleton import Singleton
+
+
+class SearchIndex(Singleton):
+    """Process-wide SQLite FTS5 mirror of the searchable names and codes.
+
+    Each searchable table is mirrored into one FTS5 table, with a name and a
+    code column. Rows are keyed by `(table position << 32) | id` so that the
+    rows of a table are one rowid range, which the importers replace in a
+    single transaction after each write. Prefix indexes on 2 to 4 characters
+    keep type-ahead queries on the index instead of scanning the vocabulary.
+
+    The mirror is created and filled from the tables on first use, so that
+    databases imported before it existed become searchable too.
+    """
+
+    TABLE = "search_fts"
+    # Searchable tables: node label, name column and optional code column
+    SOURCES: dict[Type[DeclarativeMeta], tuple[str, str, str]] = {
+        Project: ("Project", "name", "ref"),
+        Entity: ("Entity", "name", "code"),
+        DeliveryPartnerDict: ("DeliveryPartner", "name", None),
+    }
+    # BM25 weights of the name and code columns
+    WEIGHTS = (2.0, 1.0)
+
+    def __init__(self, db_handler: DBHandler = None) -> None:
+
+        # Avoid reinitializing in singleton
+        if not hasattr(self, "initialized"):
+            self.initialized = True
+            # Database URIs whose mirror is known to exist
+            self.ready = set()
+            self.lock = threading.Lock()
+        self.db_handler = db_handler or DBHandler()
+
+    @staticmethod
+    def tokenize(query: str) -> list[str]:
+        """Static helper method to split a search query into lowercase
+        alphanumeric tokens, dropping any query syntax
+
+        Args:
+            query (str): Search query as typed
+
+        Returns:
+            list[str]: Tokens
+        """
+
+        return re.findall(r"[^\W_]+", query.lower())
+
+    def _get_rowid_range(self, table_class: Type[DeclarativeMeta]) -> int:
+        """Helper method to get the first rowid of a table's rows
+
+        Args:
+            table_class (Type[DeclarativeMeta]): The SQLAlchemy ORM table class
+
+        Returns:
+            int: First rowid, the range spans 2**32 rowids
+        """
+
+        return list(self.SOURCES).index(table_class) << 32
+
+    def _ensure(self) -> bool:
+        """Helper method to create and fill the mirror if it does not exist
+
+        Returns:
+            bool: True after completion
+        """
+
+        db_uri = self.db_handler.db_uri
+        with self.lock:
+            if db_uri in self.ready:
+                return True
+            with self.db_handler.engine.begin() as conn:
+                exists = conn.execute(
+                    text(
+                        "SELECT 1 FROM sqlite_master "
+                        "WHERE type = 'table' AND name = :name"
+                    ),
+                    {"name": self.TABLE},
+                ).first()
+                if not exists:
+                    conn.execute(text(f"""
+                            CREATE VIRTUAL TABLE {self.TABLE} USING fts5(
+                                label UNINDEXED,
+                                node_id UNINDEXED,
+                                name,
+                                code,
+                                tokenize = 'unicode61 remove_diacritics 2',
+                                prefix = '2 3 4'
+                            )
+                            """))
+                    for table_class in self.SOURCES:
+                        self._sync(conn, table_class)
+            self.ready.add(db_uri)
+
+        return True
+
+    def _sync(self, conn, table_class: Type[DeclarativeMeta]) -> int:
+        """Helper method to replace the mirrored rows of a table within an
+        open transaction
+
+        Args:
+            conn (Connection): SQLAlchemy connection in a transaction
+            table_class (Type[DeclarativeMeta]): The SQLAlchemy ORM table class
+
+        Returns:
+            int: Number of mirrored rows
+        """
+
+        label, name_col, code_col = self.SOURCES[table_class]
+        start = self._get_rowid_range(table_class)
+        conn.execute(
+            text(
+                f"DELETE FROM {self.TABLE} "
+                "WHERE rowid >= :start AND rowid < :end"
+            ),
+            {"start": start, "end": start + (1 << 32)},
+        )
+        result = conn.execute(
+            text(f"""
+                INSERT INTO {self.TABLE}(rowid, label, node_id, name, code)
+                SELECT :start + id, :label, id, {name_col},
+                    {code_col or "NULL"}
+                FROM {table_class.__tablename__}
+                """),
+            {"start": start, "label": label},
+        )
+
+        return result.rowcount
+
+    def sync(self, table_class: Type[DeclarativeMeta]) -> bool:
+        """Replace the mirrored rows of a table after it was written, no-op
+        for tables that are not searchable
+
+        Args:
+            table_class (Type[DeclarativeMeta]): The SQLAlchemy ORM table class
+
+        Returns:
+            bool: True after completion
+        """
+
+        if table_class not in self.SOURCES:
+            return True
+
+        self._ensure()
+        with self.db_handler.engine.begin() as conn:
+            count = self._sync(conn, table_class)
+        print(f"Indexed {count} {self.SOURCES[table_class][0]} names.")
+
+        return True
+
+    def rebuild(self) -> bool:
+        """Replace the mirrored rows of all searchable tables
+
+        Returns:
+            bool: True after completion
+        """
+
+        self._ensure()
+        with self.db_handler.engine.begin() as conn:
+            for table_class in self.SOURCES:
+                self._sync(conn, table_class)
+            # Merge the index b-trees for faster queries
+            conn.execute(
+                text(f"INSERT INTO {self.TABLE}({self.TABLE}) VALUES (:cmd)"),
+                {"cmd": "optimize"},
+            )
+
+        return True
+
+    def search(
+        self,
+        query: str,
+        labels: list[str] = None,
+        limit: int = 10,
+        offset: int = 0,
+    ) -> list[dict]:
+        """Search the mirror for names and codes starting with every token
+        of the query, ranked by BM25
+
+        Args:
+            query (str): Search query as typed
+            labels (list[str], optional): Node labels to search. Defaults to
+                all labels.
+            limit (int, optional): Page size. Defaults to 10.
+            offset (int, optional): Number of results to skip. Defaults to 0.
+
+        Returns:
+            list[dict]: Results with `label`, `id`, `name`, `code` and
+                `score`, best match first
+        """
+
+        tokens = self.tokenize(query)
+        if not tokens:
+            return []
+
+        self._ensure()
+        match = " ".join(f'"{token}"*' for token in tokens)
+        params = {"match": match, "limit": limit, "offset": offset}
+        label_filter = ""
+        if labels:
+            names = [f":label{i}" for i in range(len(labels))]
+            label_filter = f"AND label IN ({', '.join(names)})"
+            params.update({f"label{i}": lbl for i, lbl in enumerate(labels)})
+
+        weights = ", ".join(str(weight) for weight in self.WEIGHTS)
+        with self.db_handler.engine.connect() as conn:
+            rows = conn.execute(
+                text(f"""
+                    SELECT label, node_id, name, code,
+                        bm25({self.TABLE}, 0, 0, {weights}) AS rank
+                    FROM {self.TABLE}
+                    WHERE {self.TABLE} MATCH :match {label_filter}
+                    ORDER BY rank, rowid
+                    LIMIT :limit OFFSET :offset
+                    """),
+                params,
+            ).all()
+
+        # BM25 ranks are negative, lower is better
+        return [
+            {
+                "label": label,
+                "id": node_id,
+                "name": name,
+                "code": code,
+                "score": -rank,
+            }
+            for label, node_id, name, code, rank in rows
+        ]
@@ -0,0 +1,231 @@
+import json
+import threading
+
+from sqlalchemy import delete, insert, select
+
+from src.db.db_handler import DBHandler
+from src.db.db_schema import GraphStatistic
+from src.utils.singleton import Singleton
+
+
+class StatsCatalog(Singleton):
+    """Process-wide catalog of precomputed graph statistics, stored in the
+    `graph_statistic` table of the tabular DB.
+
+    Statistics are stored per node label, so that a refresh after an
+    incremental sync only replaces the labels it touched. The catalog of a
+    namespace is loaded once into dictionaries, so that lookups by dashboards
+    or by callers sizing chunks and guarding queries never reach the graph
+    DB. Cached catalogs are invalidated whenever they are written.
+    """
+
+    KINDS = ["label", "relationship", "degree", "hubs", "values"]
+
+    def __init__(self, db_handler: DBHandler = None) -> None:
+
+        # Avoid reinitializing in singleton
+        if not hasattr(self, "initialized"):
+            self.initialized = True
+            self.catalogs = {}
+            self.lock = threading.Lock()
+        self.db_handler = db_handler or DBHandler()
+
+    def _load(self, namespace: str) -> dict:
+        """Helper method to load the catalog of a namespace
+
+        Args:
+            namespace (str): Node label namespace
+
+        Returns:
+            dict: Statistics by kind, then by label (and relationship type
+                for "relationship"), with the relationship counts by type
+                summed over labels under "relationship_totals"
+        """
+
+        catalog = {kind: {} for kind in self.KINDS}
+        catalog["relationship_totals"] = {}
+        with self.db_handler.get_session() as session:
+            rows = session.execute(
+                select(
+                    GraphStatistic.kind,
+                    GraphStatistic.label,
+                    GraphStatistic.key,
+                    GraphStatistic.value,
+                ).where(GraphStatistic.namespace == namespace)
+            ).all()
+
+        totals = catalog["relationship_totals"]
+        for kind, label, key, value in rows:
+            value = json.loads(value)
+            if kind == "relationship":
+                catalog[kind][(label, key)] = value
+                totals[key] = totals.get(key, 0) + value
+            else:
+                catalog[kind][label] = value
+
+        return catalog
+
+    def get_catalog(self, namespace: str = "") -> dict:
+        """Get the catalog of a namespace, loading it on first use
+
+        Args:
+            namespace (str, optional): Node label namespace. Defaults to "".
+
+        Returns:
+            dict: Statistics by kind, as from `_load`
+        """
+
+        with self.lock:
+            if namespace not in self.catalogs:
+                self.catalogs[namespace] = self._load(namespace)
+
+            return self.catalogs[namespace]
+
+    def label_count(self, label: str, namespace: str = "") -> int:
+        """Get the node count of a label
+
+        Args:
+            label (str): Node label, without namespace
+            namespace (str, optional): Node label namespace. Defaults to "".
+
+        Returns:
+            int: Node count, or None if not in the catalog
+        """
+
+        return self.get_catalog(namespace)["label"].get(label)
+
+    def relationship_count(
+        self, rel_type: str, label: str = None, namespace: str = ""
+    ) -> int:
+        """Get the count of a relationship type
+
+        Args:
+            rel_type (str): Relationship type, ex: "FUNDS"
+            label (str, optional): Node label of the start nodes, without
+                namespace. Defaults to None, for all labels.
+            namespace (str, optional): Node label namespace. Defaults to "".
+
+        Returns:
+            int: Relationship count, or None if not in the catalog
+        """
+
+        catalog = self.get_catalog(namespace)
+        if label is None:
+            return catalog["relationship_totals"].get(rel_type)
+
+        return catalog["relationship"].get((label, rel_type))
+
+    def degree_histogram(self, label: str, namespace: str = "") -> dict:
+        """Get the degree distribution of a label
+
+        Args:
+            label (str): Node label, without namespace
+            namespace (str, optional): Node label namespace. Defaults to "".
+
+        Returns:
+            dict: `buckets` as [lower bound, node count] pairs of powers of
+                two, with the `max` and `mean` degree, or None if not in the
+                catalog
+        """
+
+        return self.get_catalog(namespace)["degree"].get(label)
+
+    def hubs(self, label: str, namespace: str = "") -> list[dict]:
+        """Get the highest degree nodes of a label
+
+        Args:
+            label (str): Node label, without namespace
+            namespace (str, optional): Node label namespace. Defaults to "".
+
+        Returns:
+            list[dict]: Node `id` and `degree`, by decreasing degree, or
+                None if not in the catalog
+        """
+
+        return self.get_catalog(namespace)["hubs"].get(label)
+
+    def value_counts(
+        self, label: str, value_id: int = None, namespace: str = ""
+    ) -> dict:
+        """Get the neighbor counts of the values of a metadata label, ex:
+        the number of projects per theme
+
+        Args:
+            label (str): Metadata node label, without namespace
+            value_id (int, optional): ID of a single value. Defaults to None,
+                for all values.
+            namespace (str, optional): Node label namespace. Defaults to "".
+
+        Returns:
+            dict: Neighbor counts by label of a value, or of each value by
+                ID as a string, or None if not in the catalog
+        """
+
+        values = self.get_catalog(namespace)["values"].get(label)
+        if values is None or value_id is None:
+            return values
+
+        return values.get(str(value_id))
+
+    def write(
+        self, namespace: str, labels: list[str], statistics: dict
+    ) -> bool:
+        """Replace the statistics of some labels of a namespace
+
+        Args:
+            namespace (str): Node label namespace
+            labels (list[str]): Refreshed node labels, without namespace,
+                whose stored statistics are all replaced
+            statistics (dict): Statistics by kind, then by label (and
+                relationship type for "relationship"), as from `_load`
+
+        Returns:
+            bool: True after completion
+        """
+
+        rows = []
+        for kind in self.KINDS:
+            for key, value in statistics.get(kind, {}).items():
+                label, rel_type = key if kind == "relationship" else (key, "")
+                rows.append(
+                    {
+                        "namespace": namespace,
+                        "kind": kind,
+                        "label": label,
+                        "key": rel_type,
+                        "value": json.dumps(value),
+                    }
+                )
+
+        with self.db_handler.get_session() as session:
+            session.execute(
+                delete(GraphStatistic).where(
+                    GraphStatistic.namespace == namespace,
+                    GraphStatistic.label.in_(labels),
+                )
+            )
+            if rows:
+                session.execute(insert(GraphStatistic), rows)
+            session.commit()
+        self.invalidate(namespace)
+
+        return True
+
+    def invalidate(self, namespace: str = None) -> bool:
+        """Drop the cached catalog of a namespace, or of all namespaces
+
+        Args:
+            namespace (str, optional): Node label namespace, or None for all
+                namespaces. Defaults to None.
+
+        Returns:
+            bool: True after completion
+        """
+
+        with self.lock:
+            if namespace is None:
+                self.catalogs.clear()
+            else:
+                self.catalogs.pop(namespace, None)
+
+        return True
@@ -6,6 +6,9 @@ from sqlalchemy.ext.declarative import DeclarativeMeta
 from typing import Type
 
 from src.db.db_handler import DBHandler
+from src.db.lookup_registry import LookupRegistry
+from src.db.search_index import SearchIndex
+from src.utils.profiler import profile_stage
 
 
 class BaseCsvImporter:
@@ -15,6 +18,10 @@ class BaseCsvImporter:
     ) -> None:
         self.db_handler = db_handler
         self.table_class = table_class
+        # Shared name to ID lookups of the dictionary tables
+        self.lookup_registry = LookupRegistry(db_handler)
+        # Shared full-text search mirror of names and codes
+        self.search_index = SearchIndex(db_handler)
 
     def _read_csv(self, file_path: str) -> pd.DataFrame:
         """Helper method to read a CSV file as a Pandas dataframe
@@ -55,6 +62,10 @@ class BaseCsvImporter:
 
                 session.bulk_insert_mappings(self.table_class, records)
                 session.commit()
+                # Lookups of the re-imported dictionary are now stale
+                self.lookup_registry.invalidate(self.table_class)
+                # Keep the full-text search mirror in sync
+                self.search_index.sync(self.table_class)
                 print(
                     f"Inserted {len(records)} records into "
                     f"{self.table_class.__tablename__}."
@@ -69,6 +80,7 @@ class BaseCsvImporter:
 
         return False
 
+    @profile_stage("import")
     def import_csv(self, file_path: str) -> bool:
         """High-level main method to import a CSV data dictionary into the
         database
@@ -7,9 +7,18 @@ from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.declarative import DeclarativeMeta
 
 from src.db.db_handler import DBHandler
+from src.db.lookup_registry import LookupRegistry
+from src.db.search_index import SearchIndex
+from src.utils.dtype_policy import DtypePolicy
+from src.utils.parse_cache import ParseCache
+from src.utils.profiler import profile_stage
 
 
 class BaseXlsxImporter:
+    # Non-dictionary tables that must be written before `_process_df` can map
+    # their IDs
+    depends_on: list[Type[DeclarativeMeta]] = []
+
     def __init__(
         self, db_handler: DBHandler, table_class: Type[DeclarativeMeta]
     ) -> None:
@@ -21,6 +30,12 @@ class BaseXlsxImporter:
             if col.name != "id"
         ]
         self.cc = coco.CountryConverter()
+        # Shared name to ID lookups of the dictionary tables
+        self.lookup_registry = LookupRegistry(db_handler)
+        # Shared full-text search mirror of names and codes
+        self.search_index = SearchIndex(db_handler)
+        # Shared cache of parsed XLSX files
+        self.parse_cache = ParseCache()
 
     def _get_id_mapper(
         self,
@@ -29,6 +44,7 @@ class BaseXlsxImporter:
         id_col: str = "id",
     ) -> bool:
         """General helper to get a name to ID mapper for any given table class
+        from the shared lookup registry, which reads each table only once
 
         Args:
             table_class (Type[DeclarativeMeta]): The SQLAlchemy ORM table class
@@ -41,12 +57,8 @@ class BaseXlsxImporter:
             bool: True after completion
         """
 
-        # Create name to ID mapping dictionary
-        with self.db_handler.get_session() as session:
-            mapper = {
-                getattr(item, name_col): getattr(item, id_col)
-                for item in session.query(table_class).all()
-            }
+        # Get the name to ID lookup, indexed by name
+        mapper = self.lookup_registry.get(table_class, name_col, id_col)
 
         # Assign the mapper to the corresponding instance variable
         var_name = f"{table_class.__name__.lower().replace('dict', '')}"
@@ -72,7 +84,7 @@ class BaseXlsxImporter:
         df: pd.DataFrame,
         name_col: str,
         id_col: str,
-        mapper: dict[str, int],
+        mapper: pd.Series,
     ) -> bool:
         """Helper to map the IDs from the names, and then drop the name column
 
@@ -80,14 +92,14 @@ class BaseXlsxImporter:
             df (pd.DataFrame): Dataframe to map IDs on
             name_col (str): Name of the column with names to map from
             id_col (str): Name of the ID column to map to
-            mapper (dict[str, int]): Mapper with name as key and id as value
+            mapper (pd.Series): Mapper with names as index and IDs as values
 
         Returns:
             bool: True after completion
         """
 
-        # Map the ID from the names, using the mapper
-        df[id_col] = df[name_col].map(mapper)
+        # Map the ID from the names in one vectorized lookup
+        df[id_col] = self.lookup_registry.map(df[name_col], mapper)
         # Drop the redundant name column
         df.drop(name_col, axis=1, inplace=True)
 
@@ -115,7 +127,9 @@ class BaseXlsxImporter:
         return False
 
     def _read_xlsx(self, file_path: str) -> pd.DataFrame:
-        """Helper method to read in an XLSX data export file as a dataframe
+        """Helper method to read in an XLSX data export file as a dataframe,
+        reusing the cached parse of an unchanged file, with memory-lean
+        dtypes
 
         Args:
             file_path (str): Path to the Excel data export file
@@ -128,10 +142,12 @@ class BaseXlsxImporter:
         """
 
         try:
-            return pd.read_excel(file_path)
+            df = self.parse_cache.read_excel(file_path)
         except Exception as e:
             raise ValueError(f"Error reading XLSX file at {file_path}: {e}")
 
+        return DtypePolicy.apply(df)
+
     def _process_df(self, df: pd.DataFrame) -> pd.DataFrame:
         """Abstract method to process the dataframe, namely:
             1. Drop any calculated columns
@@ -164,9 +180,13 @@ class BaseXlsxImporter:
 
         with self.db_handler.get_session() as session:
             try:
-                records = df.to_dict(orient="records")
+                records = DtypePolicy.to_records(df)
                 session.bulk_insert_mappings(self.table_class, records)
                 session.commit()
+                # Lookups of the re-imported table are now stale
+                self.lookup_registry.invalidate(self.table_class)
+                # Keep the full-text search mirror in sync
+                self.search_index.sync(self.table_class)
                 print(
                     f"Inserted {len(records)} records into "
                     f"{self.table_class.__tablename__}."
@@ -181,6 +201,7 @@ class BaseXlsxImporter:
 
         return False
 
+    @profile_stage("import")
     def import_xlsx(self, file_path: str) -> bool:
         """High-level main method to import a XLSX data export file into the
         database
@@ -192,6 +213,5 @@ class BaseXlsxImporter:
             bool: True if successful, False if not
         """
 
-        raw = self._read_xlsx(file_path)
-        processed = self._process_df(raw)
+        processed = self._process_df(self._read_xlsx(file_path))
         return self._write_to_db(processed)
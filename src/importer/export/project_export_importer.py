@@ -15,6 +15,9 @@ from src.importer.base_xlsx_importer import BaseXlsxImporter
 
 
 class ProjectExportImporter(BaseXlsxImporter):
+    # Entity codes are mapped to the IDs of the imported Entity table
+    depends_on = [Entity]
+
     def __init__(self, db_handler: DBHandler) -> None:
         super().__init__(db_handler=db_handler, table_class=Project)
         self.modality_id_mapper = None
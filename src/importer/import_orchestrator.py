@@ -0,0 +1,117 @@
+import logging
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+from pandas.api.extensions import ExtensionArray
+
+from src.db.db_handler import DBHandler
+from src.importer.base_xlsx_importer import BaseXlsxImporter
+from src.utils.profiler import Profiler
+
+
+def _transform_export(
+    importer_class: type,
+    db_uri: str,
+    file_path: str,
+    process: bool,
+) -> dict[str, ExtensionArray]:
+    """Worker function to parse and optionally transform an export file in a
+    separate process
+
+    Args:
+        importer_class (type): Export importer class
+        db_uri (str): URI of the tabular DB, to read dictionary tables from
+        file_path (str): Path to the XLSX export file
+        process (bool): Toggle to also run `_process_df` in the worker
+
+    Returns:
+        dict[str, ExtensionArray]: Column arrays of the resulting dataframe,
+            keeping their memory-lean dtypes
+    """
+
+    importer = importer_class(DBHandler(db_uri))
+    with Profiler().stage(f"transform.{importer_class.__name__}"):
+        df = importer._read_xlsx(file_path)
+        if process:
+            df = importer._process_df(df)
+
+    return {col: df[col].array for col in df.columns}
+
+
+class ExportImportOrchestrator:
+    """Import data export files with parsing and transformation running
+    concurrently in worker processes, and writes committed in order.
+
+    Importers are given in foreign key order. An importer whose
+    `depends_on` tables are written by an earlier importer of the same run
+    (ex: the project export maps Entity codes to IDs) is only parsed in a
+    worker, and transformed in the main process once its dependencies are
+    written. Wall time is bounded by the slowest file plus the writes.
+    """
+
+    def __init__(self, db_handler: DBHandler, max_workers: int = None) -> None:
+
+        self.db_handler = db_handler
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+
+    @staticmethod
+    def _to_df(columns: dict[str, ExtensionArray]) -> pd.DataFrame:
+        """Static helper method to rebuild a dataframe from column arrays
+
+        Args:
+            columns (dict[str, ExtensionArray]): Column arrays
+
+        Returns:
+            pd.DataFrame: Rebuilt dataframe
+        """
+
+        return pd.DataFrame(columns)
+
+    def import_all(
+        self, jobs: list[tuple[BaseXlsxImporter, str | Path]]
+    ) -> bool:
+        """Main method to import all export files
+
+        Args:
+            jobs (list[tuple[BaseXlsxImporter, str | Path]]): Importers and
+                their file paths, in foreign key order
+
+        Returns:
+            bool: True if all imports are successful, False if not
+        """
+
+        written_tables = {importer.table_class for importer, _ in jobs}
+        futures: list[tuple[BaseXlsxImporter, bool, Future]] = []
+
+        with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+            # Submit all parsing and transformation up front
+            for importer, file_path in jobs:
+                in_worker = not any(
+                    table in written_tables for table in importer.depends_on
+                )
+                future = pool.submit(
+                    _transform_export,
+                    type(importer),
+                    self.db_handler.db_uri,
+                    str(file_path),
+                    in_worker,
+                )
+                futures.append((importer, in_worker, future))
+
+            # Commit writes in order as the results come in
+            results = []
+            for importer, in_worker, future in futures:
+                name = importer.table_class.__name__
+                print(f"Importing data for {name}...")
+                df = self._to_df(future.result())
+                with Profiler().stage(f"import.{type(importer).__name__}"):
+                    if not in_worker:
+                        df = importer._process_df(df)
+                    results.append(importer._write_to_db(df))
+                if not results[-1]:
+                    logging.error(f"Import failed for {name}")
+                print("\n")
+
+        return all(results)
@@ -0,0 +1,180 @@
+import asyncio
+from typing import Union
+
+from neo4j import GraphDatabase
+from pandas import DataFrame
+
+from src.db.db_handler import DBHandler
+from src.kg.db.async_connection import AsyncConnection
+from src.kg.db.connection import Connection
+from src.kg.db.async_query_executor import AsyncQueryExecutor
+from src.kg.db.throttle import WriteThrottle
+from src.kg.knowledge_graph import KnowledgeGraph
+from src.kg.services.base_async_service import (
+    AsyncDataService,
+    AsyncMetaService,
+)
+
+
+class AsyncKnowledgeGraph:
+
+    def __init__(
+        self,
+        conn: AsyncConnection,
+        max_concurrency: int = 4,
+        throttle: WriteThrottle = None,
+        database: str = "neo4j",
+        namespace: str = "",
+    ) -> None:
+
+        # Instantiate singleton DB Handler to read from tabular DB
+        self.db_handler = DBHandler()
+        self.database = database
+        # Optional node label prefix, as for the sync knowledge graph
+        self.namespace = namespace
+        self.conn = conn
+        if not self.conn.driver:
+            raise RuntimeError("Connection not established")
+        # Query executor bounding the number of concurrent sessions
+        self.query_executor = AsyncQueryExecutor(
+            self.conn,
+            database=self.database,
+            max_concurrency=max_concurrency,
+            throttle=throttle,
+        )
+        # Reuse the sync service definitions, executed asynchronously
+        meta_services, data_services = KnowledgeGraph._build_services(
+            None, self.namespace, self.database
+        )
+        self.meta_services = {
+            name: AsyncMetaService(service, self.query_executor)
+            for name, service in meta_services.items()
+        }
+        self.data_services = {
+            name: AsyncDataService(service, self.query_executor)
+            for name, service in data_services.items()
+        }
+
+    async def _ensure_constraints(self) -> bool:
+        """Helper coroutine to dynamically add constraints to the knowledge
+        graph
+
+        Returns:
+            bool: True after completion
+        """
+
+        # Gather all services, with the sync definitions of the data services
+        all_services = {**self.meta_services, **self.data_services}
+        data_services = {
+            name: service.service
+            for name, service in self.data_services.items()
+        }
+        queries = (
+            KnowledgeGraph._get_constraint_queries(
+                all_services, self.namespace
+            )
+            + KnowledgeGraph._get_index_queries(data_services, self.namespace)
+            + KnowledgeGraph._get_fulltext_queries(self.namespace)
+        )
+
+        # Schema writes are executed one by one to avoid schema lock conflicts
+        for query in queries:
+            await self.conn.execute_write(
+                lambda tx, query=query: tx.run(query), self.database
+            )
+
+        return True
+
+    async def close(self) -> bool:
+        """Close the driver connection to the graph DB
+
+        Returns:
+            bool: True after successful completion, False if any errors
+        """
+
+        return await self.conn.close()
+
+    async def initialize(self) -> bool:
+        """Main coroutine to initialize the GCF Knowledge Graph with all
+        metadata nodes, populating each metadata service concurrently
+
+        Returns:
+            bool: True after completion
+        """
+
+        await self._ensure_constraints()
+        results = await asyncio.gather(
+            *(service.populate() for service in self.meta_services.values())
+        )
+
+        return all(results)
+
+    async def populate(self) -> bool:
+        """Main coroutine to populate the GCF Knowledge Graph with all data
+        nodes. All services are prepared concurrently, then all data nodes
+        are written before any relationships, so that relationships between
+        data nodes (ex: Entity FUNDS Project) find both ends.
+
+        Returns:
+            bool: True after completion
+        """
+
+        services = self.data_services.values()
+        await asyncio.gather(*(service.prepare() for service in services))
+        nodes = await asyncio.gather(
+            *(service.write_nodes() for service in services)
+        )
+        relationships = await asyncio.gather(
+            *(service.write_relationships() for service in services)
+        )
+
+        return all(nodes) and all(relationships)
+
+    async def finalize(self, conn: Connection, head: int = None) -> bool:
+        """Post-build coroutine running the shared post-build hook of
+        `KnowledgeGraph.finalize` (statistics, portfolio rollups, snapshot
+        and publishing), whose stages are synchronous, through an
+        established sync connection, on the same database and namespace.
+        The sync connection waits for the writes of the async build, so that
+        reads routed to followers see it.
+
+        Args:
+            conn (Connection): Established sync connection
+            head (int, optional): Last change logged before the tables were
+                read, to publish the build. Defaults to None.
+
+        Returns:
+            bool: True if successful, False if not
+        """
+
+        bookmarks = await self.conn.bookmark_manager.get_bookmarks()
+        conn.bookmark_manager = GraphDatabase.bookmark_manager(
+            initial_bookmarks=bookmarks
+        )
+        kg = KnowledgeGraph(
+            conn,
+            throttle=self.query_executor.throttle,
+            database=self.database,
+            namespace=self.namespace,
+        )
+        kg.query_executor.set_progress(self.query_executor.progress)
+
+        return await asyncio.to_thread(kg.finalize, head)
+
+    async def query(
+        self, query: str, params: dict = None, return_df: bool = False
+    ) -> Union[list[dict], DataFrame]:
+        """Run a read query against the graph as a coroutine, sharing the
+        concurrency limit with any ongoing population
+
+        Args:
+            query (str): Cypher query for reading
+            params (dict, optional): Query parameters. Defaults to None.
+            return_df (bool, optional): Toggle to return a dataframe.
+                Defaults to False.
+
+        Returns:
+            Union[list[dict], DataFrame]: Results of the Cypher query
+        """
+
+        return await self.query_executor.execute_read(query, params, return_df)
@@ -0,0 +1,163 @@
+import logging
+from typing import Any, Callable
+
+from neo4j import READ_ACCESS, WRITE_ACCESS, AsyncGraphDatabase, AsyncSession
+from neo4j.exceptions import (
+    ServiceUnavailable,
+    DriverError,
+    ClientError,
+    Neo4jError,
+)
+
+from src.kg.db.connection import Connection
+
+
+class AsyncConnection(Connection):
+    """Async variant of the Connection, sharing its pool and retry settings"""
+
+    async def connect(self) -> bool:
+        """Method to establish an async Python driver connection to the Neo4j
+        graph DB and verify that the server is reachable
+
+        Returns:
+            bool: True if connected, False if not
+        """
+
+        try:
+            self.driver = AsyncGraphDatabase.driver(
+                self.kg_uri,
+                auth=(self.user, self.password),
+                **self._get_driver_config(),
+            )
+            await self.driver.verify_connectivity()
+            # Async sessions need an async bookmark manager
+            self.bookmark_manager = AsyncGraphDatabase.bookmark_manager()
+            mode = " with routing" if self.routing else ""
+            logging.info(f"Connected to graph DB{mode}.")
+            return True
+        except (ServiceUnavailable, DriverError, ClientError, Neo4jError) as e:
+            logging.error(f"Failed to connect to graph DB: {e}")
+            await self.close()
+            return False
+
+    def session(
+        self,
+        database: str = "neo4j",
+        access_mode: str = WRITE_ACCESS,
+        causal: bool = None,
+    ) -> AsyncSession:
+        """Method to open a short-lived async session for a single unit of work
+
+        Args:
+            database (str, optional): Database name. Defaults to "neo4j".
+            access_mode (str, optional): READ_ACCESS to route auto-commit
+                queries to followers, or WRITE_ACCESS to the leader.
+                Defaults to WRITE_ACCESS.
+            causal (bool, optional): Toggle to wait for the writes of this
+                connection. Defaults to None, for writes and for reads if
+                `causal_reads` is set.
+
+        Raises:
+            RuntimeError: Raises error if AsyncConnection.connect() has not
+                been previously called
+
+        Returns:
+            AsyncSession: New session, to be closed after the unit of work
+        """
+
+        if not self.driver:
+            raise RuntimeError("Connection not established")
+        if causal is None:
+            causal = access_mode == WRITE_ACCESS or self.causal_reads
+
+        return self.driver.session(
+            **self._get_session_config(database, access_mode, causal)
+        )
+
+    async def _run_managed(
+        self,
+        work: Callable,
+        database: str,
+        write: bool,
+        causal: bool = None,
+        **kwargs,
+    ) -> Any:
+        """Helper coroutine to run a managed transaction in a short-lived
+        session, retried by the driver on transient errors
+
+        Args:
+            work (Callable): Transaction coroutine function taking the
+                transaction
+            database (str): Database name
+            write (bool): Toggle to run as a write transaction
+            causal (bool, optional): Toggle to wait for the writes of this
+                connection. Defaults to None, as in `session`.
+            **kwargs: Additional arguments passed to the transaction function
+
+        Returns:
+            Any: Return value of the transaction function
+        """
+
+        access_mode = WRITE_ACCESS if write else READ_ACCESS
+        async with self.session(database, access_mode, causal) as session:
+            if write:
+                return await session.execute_write(work, **kwargs)
+            return await session.execute_read(work, **kwargs)
+
+    async def execute_write(
+        self, work: Callable, database: str = "neo4j", **kwargs
+    ) -> Any:
+        """Coroutine to run a managed write transaction with retries, routed
+        to the leader on clusters
+
+        Args:
+            work (Callable): Transaction coroutine function
+            database (str, optional): Database name. Defaults to "neo4j".
+            **kwargs: Additional arguments passed to the transaction function
+
+        Returns:
+            Any: Return value of the transaction function
+        """
+
+        return await self._run_managed(work, database, write=True, **kwargs)
+
+    async def execute_read(
+        self,
+        work: Callable,
+        database: str = "neo4j",
+        causal: bool = None,
+        **kwargs,
+    ) -> Any:
+        """Coroutine to run a managed read transaction with retries, routed
+        to a follower on clusters
+
+        Args:
+            work (Callable): Transaction coroutine function
+            database (str, optional): Database name. Defaults to "neo4j".
+            causal (bool, optional): Toggle to wait for the writes of this
+                connection. Defaults to None, for the `causal_reads` setting.
+            **kwargs: Additional arguments passed to the transaction function
+
+        Returns:
+            Any: Return value of the transaction function
+        """
+
+        return await self._run_managed(
+            work, database, write=False, causal=causal, **kwargs
+        )
+
+    async def close(self) -> bool:
+        """Method to close the async Python driver connection
+
+        Returns:
+            bool: True if closed, False if not
+        """
+
+        if self.driver:
+            await self.driver.close()
+            self.driver = None
+            logging.info("Closed connection to graph DB")
+            return True
+        else:
+            logging.warning("No active graph DB connection to close")
+            return False
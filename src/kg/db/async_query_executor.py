@@ -0,0 +1,170 @@
+import asyncio
+import logging
+import time
+from typing import Union
+
+from neo4j.exceptions import (
+    ServiceUnavailable,
+    DriverError,
+    ClientError,
+    Neo4jError,
+)
+from pandas import DataFrame
+from tqdm import tqdm
+
+from src.kg.db.async_connection import AsyncConnection
+from src.kg.db.query_executor import QueryExecutor
+from src.kg.db.throttle import WriteThrottle
+
+
+class AsyncQueryExecutor:
+
+    def __init__(
+        self,
+        conn: AsyncConnection,
+        database: str = "neo4j",
+        max_concurrency: int = 4,
+        throttle: WriteThrottle = None,
+    ) -> None:
+
+        self.conn = conn
+        self.database = database
+        # Bound the number of sessions in flight at any time, as each
+        # concurrent unit of work needs its own session
+        self.max_concurrency = max_concurrency
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        # Optional write throttle shared with any sync writers
+        self.throttle = throttle
+        # Toggle for write progress bars, off in long-running processes
+        self.progress = True
+
+    def set_progress(self, enabled: bool = True) -> bool:
+        """Method to enable or disable the progress bars of writes
+
+        Args:
+            enabled (bool, optional): Toggle to show progress bars.
+                Defaults to True.
+
+        Returns:
+            bool: True after completion
+        """
+
+        self.progress = enabled
+
+        return True
+
+    async def execute_read(
+        self,
+        query: str,
+        params: dict = None,
+        return_df: bool = False,
+        causal: bool = None,
+    ) -> Union[list[dict], DataFrame]:
+        """Execute a read/MATCH query as a coroutine
+
+        Args:
+            query (str): Cyper query for reading
+            params (dict, optional): Additional parameters to use for the
+                Cypher query. Defaults to None.
+            return_df (bool, optional): Toggle to return the results as a
+                pandas dataframe and not as a list of dictionaries.
+                Defaults to False.
+            causal (bool, optional): Toggle to read the writes of this
+                connection, instead of any follower's state. Defaults to
+                None, for the `causal_reads` setting of the connection.
+
+        Returns:
+            Union[list[dict], DataFrame]: Results of the Cypher query
+        """
+
+        async def _read(tx) -> list[dict]:
+            result = await tx.run(query, params or {})
+            return await result.data()
+
+        try:
+            async with self.semaphore:
+                records = await self.conn.execute_read(
+                    _read, self.database, causal=causal
+                )
+
+            if return_df:
+                return DataFrame(records)
+            else:
+                return records
+
+        except (ServiceUnavailable, DriverError, ClientError, Neo4jError) as e:
+            logging.error(f"{query} raised an error: \n{e}")
+            raise
+
+    async def _write_chunk(self, query: str, chunk: list[dict]) -> None:
+        """Helper coroutine to write a single chunk in its own retried managed
+        transaction once a concurrency slot is free
+
+        Args:
+            query (str): Cypher query to execute
+            chunk (list[dict]): Records of the chunk
+        """
+
+        attempts = 0
+
+        async def _write(tx) -> None:
+            nonlocal attempts
+            attempts += 1
+            result = await tx.run(query, data=chunk)
+            await result.consume()
+
+        async with self.semaphore:
+            if not self.throttle:
+                await self.conn.execute_write(_write, self.database)
+                return
+
+            # Every attempt beyond the first was caused by a server-side error
+            await asyncio.sleep(self.throttle.reserve(len(chunk)))
+            start = time.perf_counter()
+            try:
+                await self.conn.execute_write(_write, self.database)
+            except (Neo4jError, DriverError):
+                # Driver errors (ex: leader unavailable) also signal
+                # overload, even when raised before any attempt ran
+                self.throttle.record(
+                    time.perf_counter() - start, max(attempts, 1)
+                )
+                raise
+            self.throttle.record(time.perf_counter() - start, attempts - 1)
+
+    async def execute_write(
+        self, query: str, data: list[dict], chunk_size: int = 500
+    ) -> bool:
+        """Method to chunk up a list of dictionaries prepared for Cypher
+        parameterization and write the chunks as concurrent coroutines
+
+        Args:
+            query (str): Cypher query to execute
+            data (list[dict]): List of dictionaries for Cypher parameterization
+            chunk_size (int, optional): Number of records per batch.
+                Defaults to 500.
+
+        Returns:
+            bool: True if successful, False if not
+        """
+
+        try:
+            with tqdm(total=len(data), disable=not self.progress) as pbar:
+
+                async def _write_and_update(chunk: list[dict]) -> None:
+                    await self._write_chunk(query, chunk)
+                    pbar.update(len(chunk))
+
+                await asyncio.gather(
+                    *(
+                        _write_and_update(chunk)
+                        for chunk in QueryExecutor._chunk_list(
+                            data, chunk_size
+                        )
+                    )
+                )
+                return True
+        except (ServiceUnavailable, DriverError, ClientError, Neo4jError) as e:
+            logging.error(f"{query} raised an error: \n{e}")
+            raise
+        return False
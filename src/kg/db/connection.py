@@ -1,7 +1,9 @@
 import os
 import logging
+from typing import Any, Callable
+from urllib.parse import urlparse
 
-from neo4j import GraphDatabase
+from neo4j import READ_ACCESS, WRITE_ACCESS, GraphDatabase, Session
 from neo4j.exceptions import (
     ServiceUnavailable,
     DriverError,
@@ -12,18 +14,98 @@ from neo4j.exceptions import (
 
 class Connection:
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        max_connection_pool_size: int = 100,
+        connection_acquisition_timeout: float = 60.0,
+        max_connection_lifetime: float = 3600.0,
+        liveness_check_timeout: float = None,
+        keep_alive: bool = True,
+        max_transaction_retry_time: float = 30.0,
+        causal_reads: bool = False,
+    ) -> None:
 
         # Environment variables for graph connection
         self.kg_uri = os.environ.get("URI")
         self.user = os.environ.get("USERNAME")
         self.password = os.environ.get("PASSWORD")
 
+        # Connection pool settings
+        self.max_connection_pool_size = max_connection_pool_size
+        self.connection_acquisition_timeout = connection_acquisition_timeout
+        self.max_connection_lifetime = max_connection_lifetime
+        self.liveness_check_timeout = liveness_check_timeout
+        self.keep_alive = keep_alive
+
+        # Time budget of the driver for retrying managed transactions on
+        # transient errors, with its own exponential backoff and jitter
+        self.max_transaction_retry_time = max_transaction_retry_time
+
+        # Toggle to make all reads wait for the writes of this connection,
+        # instead of only those run with `causal=True`
+        self.causal_reads = causal_reads
+
         # Python driver to connect to graph database
         self.driver = None
+        # Bookmarks of the writes of this connection, for causal reads
+        self.bookmark_manager = GraphDatabase.bookmark_manager()
+
+    @property
+    def routing(self) -> bool:
+        """Whether the URI routes across a cluster (neo4j:// schemes), so
+        that reads are spread across followers and writes sent to the
+        leader, or connects to a single server (bolt:// schemes)
+
+        Returns:
+            bool: True if routing, False if not
+        """
+
+        return urlparse(self.kg_uri or "").scheme.startswith("neo4j")
+
+    def _get_driver_config(self) -> dict:
+        """Helper method to gather the connection pool settings as driver
+        keyword arguments
+
+        Returns:
+            dict: Driver configuration
+        """
+
+        return {
+            "max_connection_pool_size": self.max_connection_pool_size,
+            "connection_acquisition_timeout": (
+                self.connection_acquisition_timeout
+            ),
+            "max_connection_lifetime": self.max_connection_lifetime,
+            "liveness_check_timeout": self.liveness_check_timeout,
+            "keep_alive": self.keep_alive,
+            "max_transaction_retry_time": self.max_transaction_retry_time,
+        }
+
+    def _get_session_config(
+        self, database: str, access_mode: str, causal: bool
+    ) -> dict:
+        """Helper method to gather the session keyword arguments
+
+        Args:
+            database (str): Database name
+            access_mode (str): READ_ACCESS or WRITE_ACCESS, for the routing
+                of auto-commit queries
+            causal (bool): Toggle to chain the session to the writes of this
+                connection through the bookmark manager
+
+        Returns:
+            dict: Session configuration
+        """
+
+        config = {"database": database, "default_access_mode": access_mode}
+        if causal:
+            config["bookmark_manager"] = self.bookmark_manager
+
+        return config
 
     def connect(self) -> bool:
         """Method to establish a Python driver connection to the Neo4j graph DB
+        and verify that the server is reachable
 
         Returns:
             bool: True if connected, False if not
@@ -31,14 +113,127 @@ class Connection:
 
         try:
             self.driver = GraphDatabase.driver(
-                self.kg_uri, auth=(self.user, self.password)
+                self.kg_uri,
+                auth=(self.user, self.password),
+                **self._get_driver_config(),
             )
-            logging.info("Connected to graph DB.")
+            self.driver.verify_connectivity()
+            mode = " with routing" if self.routing else ""
+            logging.info(f"Connected to graph DB{mode}.")
             return True
         except (ServiceUnavailable, DriverError, ClientError, Neo4jError) as e:
             logging.error(f"Failed to connect to graph DB: {e}")
+            self.close()
             return False
 
+    def session(
+        self,
+        database: str = "neo4j",
+        access_mode: str = WRITE_ACCESS,
+        causal: bool = None,
+    ) -> Session:
+        """Method to open a short-lived session for a single unit of work
+
+        Args:
+            database (str, optional): Database name. Defaults to "neo4j".
+            access_mode (str, optional): READ_ACCESS to route auto-commit
+                queries to followers, or WRITE_ACCESS to the leader.
+                Defaults to WRITE_ACCESS.
+            causal (bool, optional): Toggle to wait for the writes of this
+                connection. Defaults to None, for writes and for reads if
+                `causal_reads` is set.
+
+        Raises:
+            RuntimeError: Raises error if Connection.connect() has not been
+                previously called
+
+        Returns:
+            Session: New session, to be closed after the unit of work
+        """
+
+        if not self.driver:
+            raise RuntimeError("Connection not established")
+        if causal is None:
+            causal = access_mode == WRITE_ACCESS or self.causal_reads
+
+        return self.driver.session(
+            **self._get_session_config(database, access_mode, causal)
+        )
+
+    def _run_managed(
+        self,
+        work: Callable,
+        database: str,
+        write: bool,
+        causal: bool = None,
+        **kwargs,
+    ) -> Any:
+        """Helper method to run a managed transaction in a short-lived
+        session. The driver retries the transaction function on transient
+        errors within `max_transaction_retry_time`, so it is not retried
+        again here.
+
+        Args:
+            work (Callable): Transaction function taking the transaction
+            database (str): Database name
+            write (bool): Toggle to run as a write transaction
+            causal (bool, optional): Toggle to wait for the writes of this
+                connection. Defaults to None, as in `session`.
+            **kwargs: Additional arguments passed to the transaction function
+
+        Returns:
+            Any: Return value of the transaction function
+        """
+
+        access_mode = WRITE_ACCESS if write else READ_ACCESS
+        with self.session(database, access_mode, causal) as session:
+            if write:
+                return session.execute_write(work, **kwargs)
+            return session.execute_read(work, **kwargs)
+
+    def execute_write(
+        self, work: Callable, database: str = "neo4j", **kwargs
+    ) -> Any:
+        """Method to run a managed write transaction with retries, routed to
+        the leader on clusters
+
+        Args:
+            work (Callable): Transaction function taking the transaction
+            database (str, optional): Database name. Defaults to "neo4j".
+            **kwargs: Additional arguments passed to the transaction function
+
+        Returns:
+            Any: Return value of the transaction function
+        """
+
+        return self._run_managed(work, database, write=True, **kwargs)
+
+    def execute_read(
+        self,
+        work: Callable,
+        database: str = "neo4j",
+        causal: bool = None,
+        **kwargs,
+    ) -> Any:
+        """Method to run a managed read transaction with retries, routed to
+        a follower on clusters
+
+        Args:
+            work (Callable): Transaction function taking the transaction
+            database (str, optional): Database name. Defaults to "neo4j".
+            causal (bool, optional): Toggle to wait for the writes of this
+                connection, ex: to read back a build. Defaults to None, for
+                the `causal_reads` setting.
+            **kwargs: Additional arguments passed to the transaction function
+
+        Returns:
+            Any: Return value of the transaction function
+        """
+
+        return self._run_managed(
+            work, database, write=False, causal=causal, **kwargs
+        )
+
     def close(self) -> bool:
         """Method to close the Python driver connection
 
@@ -48,6 +243,7 @@ class Connection:
 
         if self.driver:
             self.driver.close()
+            self.driver = None
             logging.info("Closed connection to graph DB")
             return True
         else:
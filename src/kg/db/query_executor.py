@@ -1,7 +1,8 @@
 import logging
+import threading
+import time
 from typing import Union
 
-from neo4j import Session
 from neo4j.exceptions import (
     ServiceUnavailable,
     DriverError,
@@ -11,17 +12,73 @@ from neo4j.exceptions import (
 from pandas import DataFrame
 from tqdm import tqdm
 
-from src.utils.singleton import Singleton
+from src.kg.db.connection import Connection
+from src.kg.db.throttle import WriteThrottle
 
 
-class QueryExecutor(Singleton):
+class QueryExecutor:
+    """Query interface of a database of the graph DB, shared per connection
+    and database: the services of a graph share its executor, and with it
+    the write throttle and progress settings, while graphs of other
+    databases (ex: a staging build, or a server reading the alias) get
+    their own. Each unit of work runs in its own short-lived session.
+    """
 
-    def __init__(self, session: Session) -> None:
+    # Executors by connection and database
+    _instances = {}
+    _lock = threading.Lock()
 
-        # Avoid reinitializing in singleton
+    def __new__(cls, conn: Connection, database: str = "neo4j"):
+
+        with cls._lock:
+            key = (cls, conn, database)
+            if key not in cls._instances:
+                cls._instances[key] = super().__new__(cls)
+
+            return cls._instances[key]
+
+    def __init__(self, conn: Connection, database: str = "neo4j") -> None:
+
+        # Avoid reinitializing the shared executor
         if not hasattr(self, "initialized"):
             self.initialized = True
-        self.session = session
+            self.conn = conn
+            self.database = database
+            # Optional write throttle, kept across re-instantiation
+            self.throttle = None
+            # Toggle for write progress bars, off in long-running processes
+            self.progress = True
+
+    def set_throttle(self, throttle: WriteThrottle = None) -> bool:
+        """Method to enable or disable throttling of writes, for sharing the
+        graph DB with interactive read traffic
+
+        Args:
+            throttle (WriteThrottle, optional): Write throttle, or None to
+                write as fast as possible. Defaults to None.
+
+        Returns:
+            bool: True after completion
+        """
+
+        self.throttle = throttle
+
+        return True
+
+    def set_progress(self, enabled: bool = True) -> bool:
+        """Method to enable or disable the progress bars of writes
+
+        Args:
+            enabled (bool, optional): Toggle to show progress bars.
+                Defaults to True.
+
+        Returns:
+            bool: True after completion
+        """
+
+        self.progress = enabled
+
+        return True
 
     @staticmethod
     def _chunk_list(data: list, chunk_size: int = 500) -> list:
@@ -39,7 +96,11 @@ class QueryExecutor(Singleton):
             yield data[i : i + chunk_size]
 
     def execute_read(
-        self, query: str, params: dict = None, return_df: bool = False
+        self,
+        query: str,
+        params: dict = None,
+        return_df: bool = False,
+        causal: bool = None,
     ) -> Union[list[dict], DataFrame]:
         """Execute a read/MATCH query
 
@@ -50,33 +111,121 @@ class QueryExecutor(Singleton):
             return_df (bool, optional): Toggle to return the results as a
                 pandas dataframe and not as a list of dictionaries.
                 Defaults to False.
+            causal (bool, optional): Toggle to read the writes of this
+                connection, instead of any follower's state. Defaults to
+                None, for the `causal_reads` setting of the connection.
 
         Returns:
             Union[list[dict], DataFrame]: Results of the Cypher query
         """
 
-        try:
-            with self.session.begin_transaction() as tx:
+        def _read(tx) -> list[dict]:
+            # Get the results of the Cypher query
+            result = tx.run(query, params or {})
+            # Convert the results as a list of dictionaries
+            return [record.data() for record in result]
 
-                # Get the results of the Cypher query
-                result = tx.run(query, params or {})
-                # Convert the results as a list of dictionaries
-                records = [record.data() for record in result]
+        try:
+            records = self.conn.execute_read(
+                _read, self.database, causal=causal
+            )
 
-                if return_df:
-                    return DataFrame(records)
-                else:
-                    return records
+            if return_df:
+                return DataFrame(records)
+            else:
+                return records
 
         except (ServiceUnavailable, DriverError, ClientError, Neo4jError) as e:
             logging.error(f"{query} raised an error: \n{e}")
             raise
 
+    def _run_write(
+        self, writes: list[tuple[str, list[dict]]], size: int
+    ) -> bool:
+        """Helper method to run writes in a single retried managed
+        transaction, waiting for and reporting back to the throttle if set
+
+        Args:
+            writes (list[tuple[str, list[dict]]]): Pairs of Cypher query and
+                records, run in order
+            size (int): Number of records, for the throttle
+
+        Returns:
+            bool: True after completion
+        """
+
+        attempts = 0
+
+        def _write(tx) -> None:
+            nonlocal attempts
+            attempts += 1
+            for query, data in writes:
+                tx.run(query, data=data).consume()
+
+        if not self.throttle:
+            self.conn.execute_write(_write, self.database)
+            return True
+
+        # Every attempt beyond the first was caused by a server-side error
+        self.throttle.acquire(size)
+        start = time.perf_counter()
+        try:
+            self.conn.execute_write(_write, self.database)
+        except (Neo4jError, DriverError):
+            # Driver errors (ex: leader unavailable) also signal overload,
+            # even when raised before any attempt ran
+            self.throttle.record(time.perf_counter() - start, max(attempts, 1))
+            raise
+        self.throttle.record(time.perf_counter() - start, attempts - 1)
+
+        return True
+
+    def _write_chunk(self, query: str, chunk: list[dict]) -> bool:
+        """Helper method to write a single chunk in a retried managed
+        transaction
+
+        Args:
+            query (str): Cypher query to execute
+            chunk (list[dict]): Records of the chunk
+
+        Returns:
+            bool: True after completion
+        """
+
+        return self._run_write([(query, chunk)], len(chunk))
+
+    def execute_transaction(self, writes: list[tuple[str, list]]) -> bool:
+        """Method to run a set of writes in a single retried managed
+        transaction, so that readers never see their intermediate states
+        (ex: a node unlinked but not yet relinked). Writes without records
+        are skipped and records are not chunked, so the set must fit in one
+        transaction.
+
+        Args:
+            writes (list[tuple[str, list]]): Pairs of Cypher query and
+                records, run in order
+
+        Returns:
+            bool: True if successful, False if not
+        """
+
+        writes = [(query, data) for query, data in writes if data]
+        if not writes:
+            return True
+
+        try:
+            return self._run_write(
+                writes, sum(len(data) for _, data in writes)
+            )
+        except (ServiceUnavailable, DriverError, ClientError, Neo4jError) as e:
+            logging.error(f"Transaction of {len(writes)} writes failed: {e}")
+            raise
+
     def execute_write(
         self, query: str, data: list[dict], chunk_size: int = 500
     ) -> bool:
         """Method to chunk up a list of dictionaries prepared for Cypher
-        parameterization and call `execute_write()` for each chunk
+        parameterization and run a retried managed write for each chunk
 
         Args:
             query (str): Cypher query to execute
@@ -89,11 +238,9 @@ class QueryExecutor(Singleton):
         """
 
         try:
-            with tqdm(total=len(data)) as pbar:
+            with tqdm(total=len(data), disable=not self.progress) as pbar:
                 for chunk in self._chunk_list(data, chunk_size):
-                    self.session.execute_write(
-                        lambda tx: tx.run(query, data=chunk)
-                    )
+                    self._write_chunk(query, chunk)
                     pbar.update(len(chunk))
                 return True
         except (ServiceUnavailable, DriverError, ClientError, Neo4jError) as e:
@@ -0,0 +1,222 @@
+import logging
+import threading
+import time
+
+# Default of optional arguments keeping the current value, as None is a value
+_UNCHANGED = object()
+
+
+class TokenBucket:
+
+    def __init__(self, rate: float = None, capacity: float = None) -> None:
+
+        # Tokens added per second, or None for no limit
+        self.rate = rate
+        # Maximum burst size, defaulting to one second worth of tokens
+        self.capacity = capacity
+        self.tokens = self._get_capacity()
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _get_capacity(self) -> float:
+        """Helper method to get the bucket capacity
+
+        Returns:
+            float: Maximum number of stored tokens
+        """
+
+        if self.capacity is not None:
+            return self.capacity
+        return self.rate or 0.0
+
+    def _refill(self) -> None:
+        """Helper method to add the tokens accrued since the last update"""
+
+        now = time.monotonic()
+        elapsed = now - self.updated_at
+        self.updated_at = now
+        self.tokens = min(
+            self._get_capacity(), self.tokens + elapsed * self.rate
+        )
+
+    def set_rate(self, rate: float = None) -> bool:
+        """Method to change the rate, including while tokens are reserved
+
+        Args:
+            rate (float, optional): New tokens per second, or None for no
+                limit. Defaults to None.
+
+        Returns:
+            bool: True after completion
+        """
+
+        with self.lock:
+            if self.rate:
+                # Settle the tokens accrued at the previous rate
+                self._refill()
+                self.rate = rate
+                self.tokens = min(self.tokens, self._get_capacity())
+            else:
+                # Start a newly limited bucket with a full burst
+                self.rate = rate
+                self.tokens = self._get_capacity()
+                self.updated_at = time.monotonic()
+
+        return True
+
+    def reserve(self, tokens: float) -> float:
+        """Method to take tokens from the bucket, going into debt if there
+        are not enough, and return how long the caller must wait
+
+        Args:
+            tokens (float): Number of tokens to take
+
+        Returns:
+            float: Number of seconds to wait before proceeding
+        """
+
+        with self.lock:
+            if not self.rate:
+                return 0.0
+            self._refill()
+            self.tokens -= tokens
+
+            return max(0.0, -self.tokens / self.rate)
+
+
+class WriteThrottle:
+
+    def __init__(
+        self,
+        records_per_second: float = None,
+        transactions_per_second: float = None,
+        latency_threshold: float = 2.0,
+        backoff_factor: float = 0.5,
+        recovery_factor: float = 1.1,
+        min_scale: float = 0.05,
+    ) -> None:
+
+        # Configured limits, or None for no limit
+        self.records_per_second = records_per_second
+        self.transactions_per_second = transactions_per_second
+        # Adaptive backoff settings: the limits are scaled down
+        # multiplicatively when a transaction is slow or fails, and recover
+        # gradually while transactions are healthy
+        self.latency_threshold = latency_threshold
+        self.backoff_factor = backoff_factor
+        self.recovery_factor = recovery_factor
+        self.min_scale = min_scale
+        self.scale = 1.0
+        # Token buckets for records and transactions
+        self.record_bucket = TokenBucket(records_per_second)
+        self.transaction_bucket = TokenBucket(transactions_per_second)
+        self.lock = threading.Lock()
+
+    def _apply_limits(self) -> bool:
+        """Helper method to push the scaled limits to the token buckets
+
+        Returns:
+            bool: True after completion
+        """
+
+        for bucket, limit in [
+            (self.record_bucket, self.records_per_second),
+            (self.transaction_bucket, self.transactions_per_second),
+        ]:
+            bucket.set_rate(limit * self.scale if limit else None)
+
+        return True
+
+    def set_limits(
+        self,
+        records_per_second: float = _UNCHANGED,
+        transactions_per_second: float = _UNCHANGED,
+    ) -> bool:
+        """Method to change the limits, including while a load is running
+
+        Args:
+            records_per_second (float, optional): New records per second
+                limit, or None for no limit. Defaults to the current limit.
+            transactions_per_second (float, optional): New transactions per
+                second limit, or None for no limit. Defaults to the current
+                limit.
+
+        Returns:
+            bool: True after completion
+        """
+
+        with self.lock:
+            if records_per_second is not _UNCHANGED:
+                self.records_per_second = records_per_second
+            if transactions_per_second is not _UNCHANGED:
+                self.transactions_per_second = transactions_per_second
+            self._apply_limits()
+            records_per_second = self.records_per_second
+            transactions_per_second = self.transactions_per_second
+
+        logging.info(
+            f"Write throttle set to {records_per_second} records/s and "
+            f"{transactions_per_second} transactions/s"
+        )
+
+        return True
+
+    def reserve(self, records: int) -> float:
+        """Method to reserve capacity for one transaction of records
+
+        Args:
+            records (int): Number of records in the transaction
+
+        Returns:
+            float: Number of seconds to wait before sending the transaction
+        """
+
+        return max(
+            self.record_bucket.reserve(records),
+            self.transaction_bucket.reserve(1),
+        )
+
+    def acquire(self, records: int) -> bool:
+        """Method to block until one transaction of records may be sent
+
+        Args:
+            records (int): Number of records in the transaction
+
+        Returns:
+            bool: True after completion
+        """
+
+        wait = self.reserve(records)
+        if wait:
+            time.sleep(wait)
+
+        return True
+
+    def record(self, latency: float, errors: int = 0) -> bool:
+        """Method to feed back the outcome of a transaction, backing off when
+        latency or server-side errors cross the thresholds
+
+        Args:
+            latency (float): Transaction latency in seconds
+            errors (int, optional): Number of server-side errors raised,
+                including retried attempts. Defaults to 0.
+
+        Returns:
+            bool: True after completion
+        """
+
+        with self.lock:
+            if errors or latency > self.latency_threshold:
+                scale = max(self.min_scale, self.scale * self.backoff_factor)
+                if scale != self.scale:
+                    logging.warning(
+                        f"Backing off write throttle to {scale:.0%} "
+                        f"(latency {latency:.2f}s, {errors} errors)"
+                    )
+            else:
+                scale = min(1.0, self.scale * self.recovery_factor)
+            if scale != self.scale:
+                self.scale = scale
+                self._apply_limits()
+
+        return True
@@ -0,0 +1,578 @@
+import hashlib
+import json
+from pathlib import Path
+from typing import Iterator
+from xml.sax.saxutils import escape, quoteattr
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from neo4j import READ_ACCESS
+
+from src.kg.knowledge_graph import KnowledgeGraph
+
+
+def get_subgraphs(ns: str = "", labels: list[str] = None) -> dict:
+    """Get the exportable subgraphs, each as a Cypher query returning its
+    nodes as `n` and one returning its relationships as `r`
+
+    Args:
+        ns (str, optional): Node label namespace. Defaults to "".
+        labels (list[str], optional): Node labels of the services, without
+            namespace, bounding the full subgraph to the graph of the
+            namespace. Defaults to None, for any node, ex: to list the
+            subgraph names.
+
+    Returns:
+        dict: Subgraph specs by name, with the `nodes` and `edges` queries
+            and their required `params`
+    """
+
+    # Label expression matching any service node of the namespace, leaving
+    # out other namespaces and bookkeeping nodes (statistics, history)
+    node = f":{'|'.join(f'{ns}{label}' for label in labels)}" if labels else ""
+
+    return {
+        "full": {
+            "nodes": f"MATCH (n{node}) RETURN n",
+            "edges": f"MATCH ({node})-[r]->({node}) RETURN r",
+            "params": [],
+        },
+        # Concepts related to Least Developed Countries, as in the README
+        "ldc": {
+            "nodes": f"""
+                MATCH (n:{ns}Country) WHERE n.isLdc = True RETURN n
+                UNION
+                MATCH (c:{ns}Country)<-[]-(n) WHERE c.isLdc = True RETURN n
+            """,
+            "edges": f"""
+                MATCH (c:{ns}Country)<-[r]-() WHERE c.isLdc = True RETURN r
+            """,
+            "params": [],
+        },
+        # Neighborhood of a country, as in the README
+        "country": {
+            "nodes": f"""
+                MATCH (n:{ns}Country {{iso3: $iso3}}) RETURN n
+                UNION
+                MATCH (:{ns}Country {{iso3: $iso3}})<-[*]-(n) RETURN n
+            """,
+            "edges": f"""
+                MATCH p = (:{ns}Country {{iso3: $iso3}})<-[*]-()
+                UNWIND relationships(p) AS r
+                RETURN DISTINCT r
+            """,
+            "params": ["iso3"],
+        },
+    }
+
+
+class ParquetSink:
+    """Node and edge tables in `nodes.parquet` and `edges.parquet` of a
+    directory, written one row group per batch"""
+
+    NODE_SCHEMA = pa.schema(
+        [
+            ("id", pa.string()),
+            ("labels", pa.list_(pa.string())),
+            # Properties differ by label, so they are kept as JSON
+            ("properties", pa.string()),
+        ]
+    )
+    EDGE_SCHEMA = pa.schema(
+        [
+            ("source", pa.string()),
+            ("target", pa.string()),
+            ("type", pa.string()),
+            ("properties", pa.string()),
+            ("count", pa.int64()),
+        ]
+    )
+
+    def __init__(self, path: str | Path) -> None:
+
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        self.node_writer = pq.ParquetWriter(
+            path / "nodes.parquet", self.NODE_SCHEMA
+        )
+        self.edge_writer = pq.ParquetWriter(
+            path / "edges.parquet", self.EDGE_SCHEMA
+        )
+
+    def _write(
+        self, writer: pq.ParquetWriter, schema: pa.Schema, batch: list[dict]
+    ) -> None:
+        """Helper method to write a batch of records as a row group
+
+        Args:
+            writer (pq.ParquetWriter): Writer of the table
+            schema (pa.Schema): Schema of the table
+            batch (list[dict]): Node or edge records
+        """
+
+        rows = [
+            {
+                **record,
+                "properties": json.dumps(record["properties"], default=str),
+            }
+            for record in batch
+        ]
+        writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+
+    def write_nodes(self, batch: list[dict]) -> None:
+        self._write(self.node_writer, self.NODE_SCHEMA, batch)
+
+    def write_edges(self, batch: list[dict]) -> None:
+        self._write(self.edge_writer, self.EDGE_SCHEMA, batch)
+
+    def close(self) -> None:
+
+        self.node_writer.close()
+        self.edge_writer.close()
+
+
+class GraphMLSink:
+    """GraphML file with the labels, properties (as JSON), relationship
+    types and parallel edge counts as attributes"""
+
+    KEYS = [
+        ("labels", "node"),
+        ("properties", "node"),
+        ("type", "edge"),
+        ("properties", "edge"),
+        ("count", "edge"),
+    ]
+
+    def __init__(self, path: str | Path) -> None:
+
+        self.file = open(path, "w", encoding="utf-8")
+        self.file.write(
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n'
+        )
+        for name, domain in self.KEYS:
+            attr_type = "int" if name == "count" else "string"
+            self.file.write(
+                f'<key id="{domain[0]}_{name}" for="{domain}" '
+                f'attr.name="{name}" attr.type="{attr_type}"/>\n'
+            )
+        self.file.write('<graph edgedefault="directed">\n')
+
+    @staticmethod
+    def _data(key: str, value) -> str:
+        return f'<data key="{key}">{escape(str(value))}</data>'
+
+    def write_nodes(self, batch: list[dict]) -> None:
+
+        for record in batch:
+            properties = json.dumps(record["properties"], default=str)
+            self.file.write(
+                f"<node id={quoteattr(record['id'])}>"
+                f"{self._data('n_labels', ':'.join(record['labels']))}"
+                f"{self._data('n_properties', properties)}</node>\n"
+            )
+
+    def write_edges(self, batch: list[dict]) -> None:
+
+        for record in batch:
+            properties = json.dumps(record["properties"], default=str)
+            self.file.write(
+                f"<edge source={quoteattr(record['source'])} "
+                f"target={quoteattr(record['target'])}>"
+                f"{self._data('e_type', record['type'])}"
+                f"{self._data('e_properties', properties)}"
+                f"{self._data('e_count', record['count'])}</edge>\n"
+            )
+
+    def close(self) -> None:
+
+        self.file.write("</graph>\n</graphml>\n")
+        self.file.close()
+
+
+class JsonSink:
+    """JSON file of a `nodes` and an `edges` list, as read by graph
+    visualization libraries"""
+
+    def __init__(self, path: str | Path) -> None:
+
+        self.file = open(path, "w", encoding="utf-8")
+        self.file.write('{"nodes": [')
+        self.section = "nodes"
+        self.count = 0
+
+    def _write(self, batch: list[dict]) -> None:
+        """Helper method to append records to the current list
+
+        Args:
+            batch (list[dict]): Node or edge records
+        """
+
+        for record in batch:
+            if self.count:
+                self.file.write(",")
+            self.file.write("\n" + json.dumps(record, default=str))
+            self.count += 1
+
+    def write_nodes(self, batch: list[dict]) -> None:
+        self._write(batch)
+
+    def write_edges(self, batch: list[dict]) -> None:
+
+        if self.section == "nodes":
+            self.file.write('\n], "edges": [')
+            self.section, self.count = "edges", 0
+        self._write(batch)
+
+    def close(self) -> None:
+
+        if self.section == "nodes":
+            self.file.write('\n], "edges": [')
+        self.file.write("\n]}\n")
+        self.file.close()
+
+
+class GraphExporter:
+    """Streaming export of a subgraph to Parquet node and edge tables,
+    GraphML or JSON.
+
+    Nodes and then relationships are read from a single result each and
+    written in batches as they arrive, so client memory stays flat
+    regardless of the subgraph size.
+
+    For visualization, level of detail (`lod`) reduction shrinks the
+    payload, with the heavy lifting done by the graph DB:
+
+    - Metadata nodes (ex: Sector or Size) with more than `supernode_degree`
+      relationships are collapsed: they are kept as single nodes with their
+      degree, without their relationships.
+    - Leaf nodes (a single relationship) of a parent with more than
+      `leaf_threshold` leaves are sampled down to about `leaf_threshold`,
+      with a hash of their ID so that node and edge decisions agree. Parents
+      are annotated with their leaf count.
+    - Parallel relationships between two nodes are aggregated into one edge
+      with the combined types and a count.
+    - Only the display properties in `LOD_PROPERTIES` are kept.
+
+    Degrees are counted over the whole graph, not only the subgraph.
+    """
+
+    FORMATS = {
+        "parquet": ParquetSink,
+        "graphml": GraphMLSink,
+        "json": JsonSink,
+    }
+    # Node properties kept with level of detail reduction
+    LOD_PROPERTIES = ["id", "name", "ref", "code", "iso3"]
+
+    def __init__(
+        self,
+        kg: KnowledgeGraph,
+        batch_size: int = 5000,
+        supernode_degree: int = 100,
+        leaf_threshold: int = 50,
+    ) -> None:
+
+        self.kg = kg
+        self.batch_size = batch_size
+        self.supernode_degree = supernode_degree
+        self.leaf_threshold = leaf_threshold
+        # Metadata labels that are not also data nodes (ex: Country)
+        data_labels = {
+            service.node_label for service in kg.data_services.values()
+        }
+        self.subgraphs = get_subgraphs(
+            kg.namespace,
+            sorted(
+                data_labels
+                | {service.node_label for service in kg.meta_services.values()}
+            ),
+        )
+        self.meta_labels = [
+            f"{kg.namespace}{service.node_label}"
+            for service in kg.meta_services.values()
+            if service.node_label not in data_labels
+        ]
+
+    def _stream(self, query: str, params: dict) -> Iterator[list[dict]]:
+        """Helper method to stream the records of a query in batches
+
+        Args:
+            query (str): Cypher query
+            params (dict): Query parameters
+
+        Yields:
+            Iterator[list[dict]]: Batches of records
+        """
+
+        with self.kg.conn.session(self.kg.database, READ_ACCESS) as session:
+            result = session.run(query, params)
+            batch = []
+            for record in result:
+                batch.append(record.data())
+                if len(batch) == self.batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+
+    def _get_node_query(self, base: str, lod: bool) -> str:
+        """Helper method to wrap a subgraph node query
+
+        Args:
+            base (str): Subgraph query returning nodes as `n`
+            lod (bool): Toggle to also return the degree and, for leaves,
+                the parent
+
+        Returns:
+            str: Cypher query
+        """
+
+        if not lod:
+            return f"""
+            CALL {{ {base} }}
+            RETURN elementId(n) AS id, labels(n) AS labels,
+                properties(n) AS properties
+            """
+
+        return f"""
+        CALL {{ {base} }}
+        WITH n, COUNT {{ (n)--() }} AS degree
+        RETURN elementId(n) AS id, labels(n) AS labels,
+            properties(n) AS properties, degree,
+            CASE WHEN degree = 1
+                THEN [(n)--(p) | elementId(p)][0]
+            END AS parent
+        """
+
+    def _get_edge_query(self, base: str, lod: bool) -> str:
+        """Helper method to wrap a subgraph relationship query
+
+        Args:
+            base (str): Subgraph query returning relationships as `r`
+            lod (bool): Toggle to aggregate parallel relationships and
+                return the degrees of both ends
+
+        Returns:
+            str: Cypher query
+        """
+
+        if not lod:
+            return f"""
+            CALL {{ {base} }}
+            RETURN elementId(startNode(r)) AS source,
+                elementId(endNode(r)) AS target, type(r) AS type,
+                properties(r) AS properties, 1 AS count
+            """
+
+        return f"""
+        CALL {{ {base} }}
+        WITH startNode(r) AS a, endNode(r) AS b,
+            collect(DISTINCT type(r)) AS types, count(r) AS count
+        RETURN elementId(a) AS source, elementId(b) AS target,
+            types, count, COUNT {{ (a)--() }} AS sourceDegree,
+            COUNT {{ (b)--() }} AS targetDegree
+        """
+
+    def _get_lod_state(self) -> tuple[dict, dict]:
+        """Helper method to find the supernodes to collapse and the parents
+        whose leaves to sample
+
+        Returns:
+            tuple[dict, dict]: Degree of each collapsed supernode and leaf
+                count of each sampled parent, by element ID
+        """
+
+        supernodes = {}
+        for batch in self._stream(
+            """
+            MATCH (m)
+            WHERE any(label IN labels(m) WHERE label IN $labels)
+            WITH m, COUNT { (m)--() } AS degree
+            WHERE degree > $threshold
+            RETURN elementId(m) AS id, degree
+            """,
+            {"labels": self.meta_labels, "threshold": self.supernode_degree},
+        ):
+            supernodes.update((row["id"], row["degree"]) for row in batch)
+
+        parents = {}
+        for batch in self._stream(
+            """
+            MATCH (p)--(leaf)
+            WHERE COUNT { (leaf)--() } = 1
+            WITH p, count(leaf) AS leaves
+            WHERE leaves > $threshold
+            RETURN elementId(p) AS id, leaves
+            """,
+            {"threshold": self.leaf_threshold},
+        ):
+            parents.update((row["id"], row["leaves"]) for row in batch)
+
+        return supernodes, parents
+
+    def _keep_leaf(self, leaf_id: str, leaves: int) -> bool:
+        """Helper method to decide whether a leaf of a sampled parent is
+        kept, consistently for its node and its edge
+
+        Args:
+            leaf_id (str): Element ID of the leaf
+            leaves (int): Leaf count of the parent
+
+        Returns:
+            bool: True if the leaf is kept, False if not
+        """
+
+        digest = hashlib.blake2b(leaf_id.encode(), digest_size=8).digest()
+        fraction = int.from_bytes(digest, "big") / 2**64
+
+        return fraction < self.leaf_threshold / leaves
+
+    def _reduce_nodes(
+        self, batch: list[dict], supernodes: dict, parents: dict
+    ) -> list[dict]:
+        """Helper method to apply level of detail reduction to nodes
+
+        Args:
+            batch (list[dict]): Node records with degrees and parents
+            supernodes (dict): Degree of each collapsed supernode
+            parents (dict): Leaf count of each sampled parent
+
+        Returns:
+            list[dict]: Kept node records
+        """
+
+        reduced = []
+        for record in batch:
+            node_id, parent = record["id"], record["parent"]
+            if parent in parents and not self._keep_leaf(
+                node_id, parents[parent]
+            ):
+                continue
+            properties = {
+                key: record["properties"][key]
+                for key in self.LOD_PROPERTIES
+                if key in record["properties"]
+            }
+            if node_id in supernodes:
+                properties["collapsedDegree"] = supernodes[node_id]
+            if node_id in parents:
+                properties["leafCount"] = parents[node_id]
+            reduced.append(
+                {
+                    "id": node_id,
+                    "labels": record["labels"],
+                    "properties": properties,
+                }
+            )
+
+        return reduced
+
+    def _reduce_edges(
+        self, batch: list[dict], supernodes: dict, parents: dict
+    ) -> list[dict]:
+        """Helper method to apply level of detail reduction to aggregated
+        edges
+
+        Args:
+            batch (list[dict]): Aggregated edge records with end degrees
+            supernodes (dict): Degree of each collapsed supernode
+            parents (dict): Leaf count of each sampled parent
+
+        Returns:
+            list[dict]: Kept edge records
+        """
+
+        reduced = []
+        for record in batch:
+            source, target = record["source"], record["target"]
+            if source in supernodes or target in supernodes:
+                continue
+            # Drop the edges of dropped leaves
+            if (
+                record["sourceDegree"] == 1
+                and target in parents
+                and not self._keep_leaf(source, parents[target])
+            ) or (
+                record["targetDegree"] == 1
+                and source in parents
+                and not self._keep_leaf(target, parents[source])
+            ):
+                continue
+            reduced.append(
+                {
+                    "source": source,
+                    "target": target,
+                    "type": "|".join(record["types"]),
+                    "properties": {},
+                    "count": record["count"],
+                }
+            )
+
+        return reduced
+
+    def export(
+        self,
+        subgraph: str,
+        path: str | Path,
+        fmt: str = "json",
+        params: dict = None,
+        lod: bool = False,
+    ) -> dict[str, int]:
+        """Main method to export a subgraph
+
+        Args:
+            subgraph (str): Subgraph name, ex: "ldc"
+            path (str | Path): Output file, or directory for Parquet
+            fmt (str, optional): One of "parquet", "graphml" or "json".
+                Defaults to "json".
+            params (dict, optional): Subgraph query parameters, ex: the
+                `iso3` of a country. Defaults to None.
+            lod (bool, optional): Toggle level of detail reduction.
+                Defaults to False.
+
+        Raises:
+            ValueError: Raise error if the subgraph, format or parameters
+                are invalid
+
+        Returns:
+            dict[str, int]: Number of written nodes and edges
+        """
+
+        if subgraph not in self.subgraphs:
+            raise ValueError(f"Subgraph must be one of {list(self.subgraphs)}")
+        if fmt not in self.FORMATS:
+            raise ValueError(f"Format must be one of {list(self.FORMATS)}")
+        spec = self.subgraphs[subgraph]
+        params = params or {}
+        missing = [param for param in spec["params"] if param not in params]
+        if missing:
+            raise ValueError(f"Missing subgraph parameters: {missing}")
+
+        supernodes, parents = self._get_lod_state() if lod else ({}, {})
+        counts = {"nodes": 0, "edges": 0}
+        sink = self.FORMATS[fmt](path)
+        try:
+            for batch in self._stream(
+                self._get_node_query(spec["nodes"], lod), params
+            ):
+                if lod:
+                    batch = self._reduce_nodes(batch, supernodes, parents)
+                sink.write_nodes(batch)
+                counts["nodes"] += len(batch)
+            for batch in self._stream(
+                self._get_edge_query(spec["edges"], lod), params
+            ):
+                if lod:
+                    batch = self._reduce_edges(batch, supernodes, parents)
+                sink.write_edges(batch)
+                counts["edges"] += len(batch)
+        finally:
+            sink.close()
+
+        print(
+            f"Exported {counts['nodes']} nodes and {counts['edges']} edges "
+            f"of {subgraph} to {path}"
+        )
+
+        return counts
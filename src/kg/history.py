@@ -0,0 +1,254 @@
+import json
+from datetime import date
+from typing import Type
+
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.declarative import DeclarativeMeta
+
+from src.db.db_schema import (
+    Country,
+    CountryDict,
+    Entity,
+    Project,
+    Readiness,
+    RowVersion,
+)
+from src.db.history import History
+from src.kg.knowledge_graph import KnowledgeGraph
+from src.kg.services.base_data_service import DataService
+
+
+class HistoryGraph:
+    """Projection of the recorded history of the data tables into the
+    knowledge graph as versioned relationships.
+
+    Each row is anchored by a `<Label>History` node holding its natural key,
+    with one `VERSION` relationship per version to a `<Label>Version` node
+    holding the row properties. Validity intervals are stored on the
+    relationships as `validFrom` and `validTo` dates, covered by a
+    relationship index, so that point-in-time reads only touch the versions
+    valid at the date. Each history node is linked to the current-state node
+    of its row by a `HISTORY_OF` relationship, relinked on every projection
+    as surrogate IDs change between exports.
+    """
+
+    # Node label of each versioned data table
+    LABELS: dict[Type[DeclarativeMeta], str] = {
+        Country: "Country",
+        Entity: "Entity",
+        Project: "Project",
+        Readiness: "Readiness",
+    }
+
+    def __init__(self, kg: KnowledgeGraph) -> None:
+
+        self.kg = kg
+        self.namespace = kg.namespace
+        self.query_executor = kg.query_executor
+        self.history = History(kg.db_handler)
+
+    def _get_schema_queries(self) -> list[str]:
+        """Helper method to generate the constraint queries of the history
+        and version nodes, and the index of the validity intervals
+
+        Returns:
+            list[str]: Constraint and index queries
+        """
+
+        queries = []
+        for label in self.LABELS.values():
+            for suffix, key in [("History", "key"), ("Version", "versionId")]:
+                node_label = f"{self.namespace}{label}{suffix}"
+                queries.append(f"""
+                    CREATE CONSTRAINT {node_label.lower()}_{key.lower()}_unique
+                    IF NOT EXISTS
+                    FOR (n:{node_label}) REQUIRE n.{key} IS UNIQUE
+                    """)
+        queries.append("""
+            CREATE INDEX version_valid_index IF NOT EXISTS
+            FOR ()-[r:VERSION]-() ON (r.validTo, r.validFrom)
+            """)
+
+        return queries
+
+    def _get_versions(
+        self, table_class: Type[DeclarativeMeta], since: date = None
+    ) -> list[dict]:
+        """Helper method to get the versions of a data table as records
+
+        Args:
+            table_class (Type[DeclarativeMeta]): The SQLAlchemy ORM table class
+            since (date, optional): Only get the versions opened or closed by
+                the snapshots from this date. Defaults to None, for all.
+
+        Returns:
+            list[dict]: Records with the natural `key`, `versionId`,
+                `validFrom`, `validTo` and camelcased `properties`
+        """
+
+        query = select(
+            RowVersion.id,
+            RowVersion.natural_key,
+            RowVersion.valid_from,
+            RowVersion.valid_to,
+            RowVersion.data,
+        ).where(RowVersion.table_name == table_class.__tablename__)
+        if since:
+            query = query.where(
+                or_(
+                    RowVersion.valid_from >= since,
+                    and_(
+                        RowVersion.valid_to >= since,
+                        RowVersion.valid_to < History.OPEN,
+                    ),
+                )
+            )
+
+        with self.kg.db_handler.get_session() as session:
+            rows = session.execute(query).all()
+
+        return [
+            {
+                "key": row.natural_key,
+                "versionId": row.id,
+                "validFrom": row.valid_from,
+                "validTo": row.valid_to,
+                "properties": {
+                    DataService._snake_to_camel(col): value
+                    for col, value in json.loads(row.data).items()
+                },
+            }
+            for row in rows
+        ]
+
+    def _get_current(self, table_class: Type[DeclarativeMeta]) -> list[dict]:
+        """Helper method to get the current-state node of each natural key
+        of a data table
+
+        Args:
+            table_class (Type[DeclarativeMeta]): The SQLAlchemy ORM table class
+
+        Returns:
+            list[dict]: Records with the natural `key` and the `nodeId` of
+                the current-state node
+        """
+
+        rows = self.history._read(table_class)
+        keys = self.history._get_keys(table_class, rows)
+        if table_class is Country:
+            # Country nodes are keyed by the country dictionary ID
+            with self.kg.db_handler.get_session() as session:
+                iso3_ids = dict(
+                    session.execute(
+                        select(CountryDict.iso3, CountryDict.id)
+                    ).all()
+                )
+            ids = [iso3_ids.get(row["iso3"]) for row in rows]
+        else:
+            ids = [row["id"] for row in rows]
+
+        return [
+            {"key": key, "nodeId": node_id}
+            for key, node_id in zip(keys, ids)
+            if node_id is not None
+        ]
+
+    def _link(self, table_class: Type[DeclarativeMeta], label: str) -> bool:
+        """Helper method to relink the history nodes of a data table to the
+        current-state nodes
+
+        Args:
+            table_class (Type[DeclarativeMeta]): The SQLAlchemy ORM table class
+            label (str): Node label of the data table
+
+        Returns:
+            bool: True if successful, False if not
+        """
+
+        history_label = f"{self.namespace}{label}History"
+        self.kg.conn.execute_write(
+            lambda tx: tx.run(f"""
+                MATCH (:{history_label})-[r:HISTORY_OF]->()
+                DELETE r
+                """).consume(),
+            self.kg.database,
+        )
+        query = f"""
+        UNWIND $data AS record
+        MATCH (h:{history_label} {{key: record.key}})
+        MATCH (n:{self.namespace}{label} {{id: record.nodeId}})
+        MERGE (h)-[:HISTORY_OF]->(n)
+        """
+
+        return self.query_executor.execute_write(
+            query, self._get_current(table_class)
+        )
+
+    def project(self, since: date = None) -> bool:
+        """Main method to write the versions into the graph, idempotently,
+        and link the history nodes to the current-state nodes
+
+        Args:
+            since (date, optional): Only write the versions opened or closed
+                by the snapshots from this date. Defaults to None, for all.
+
+        Returns:
+            bool: True if successful, False if not
+        """
+
+        for query in self._get_schema_queries():
+            self.kg.conn.execute_write(
+                lambda tx, query=query: tx.run(query).consume(),
+                self.kg.database,
+            )
+
+        results = []
+        for table_class, label in self.LABELS.items():
+            records = self._get_versions(table_class, since)
+            if not records:
+                continue
+            print(f"Projecting {len(records)} {label} versions...")
+            query = f"""
+            UNWIND $data AS record
+            MERGE (h:{self.namespace}{label}History {{key: record.key}})
+            MERGE (v:{self.namespace}{label}Version
+                {{versionId: record.versionId}})
+            SET v += record.properties
+            MERGE (h)-[r:VERSION]->(v)
+            SET r.validFrom = record.validFrom, r.validTo = record.validTo
+            """
+            results.append(self.query_executor.execute_write(query, records))
+        for table_class, label in self.LABELS.items():
+            results.append(self._link(table_class, label))
+
+        return all(results)
+
+    def as_of(self, label: str, as_of: date) -> list[dict]:
+        """Read the nodes of a label as they were at a date
+
+        Args:
+            label (str): Node label of a versioned data table, ex: "Project"
+            as_of (date): Point in time
+
+        Raises:
+            ValueError: Raise error if the label is not versioned
+
+        Returns:
+            list[dict]: Records with the natural `key`, the version
+                `properties` and their `validFrom` and `validTo` dates
+        """
+
+        if label not in self.LABELS.values():
+            raise ValueError(
+                f"Label must be one of {list(self.LABELS.values())}"
+            )
+
+        query = f"""
+        MATCH (h:{self.namespace}{label}History)-[r:VERSION]->
+            (v:{self.namespace}{label}Version)
+        WHERE r.validTo > $asOf AND r.validFrom <= $asOf
+        RETURN h.key AS key, properties(v) AS properties,
+            r.validFrom AS validFrom, r.validTo AS validTo
+        """
+
+        return self.query_executor.execute_read(query, {"asOf": as_of})
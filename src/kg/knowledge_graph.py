@@ -1,8 +1,20 @@
-import logging
+import re
+from pathlib import Path
 
+from pandas import DataFrame, concat
+from sqlalchemy import func, select
+
+from src.db.change_feed import ChangeFeed
 from src.db.db_handler import DBHandler
+from src.db.search_index import SearchIndex
 from src.kg.db.connection import Connection
 from src.kg.db.query_executor import QueryExecutor
+from src.kg.db.throttle import WriteThrottle
+from src.kg.projection import GraphProjection
+from src.kg.services.base_data_service import DataService
+from src.kg.snapshot import GraphSnapshot
+from src.kg.statistics import GraphStatistics
+from src.utils.profiler import profile_stage
 from src.kg import (
     ActivityTypeService,
     BmNodeService,
@@ -26,107 +38,423 @@ from src.kg import (
 
 class KnowledgeGraph:
 
-    def __init__(self, conn: Connection) -> None:
+    def __init__(
+        self,
+        conn: Connection,
+        throttle: WriteThrottle = None,
+        database: str = "neo4j",
+        namespace: str = "",
+    ) -> None:
 
         # Instantiate singleton DB Handler to read from tabular DB
         self.db_handler = DBHandler()
-        # Connect to the database and open an active session
-        self.database = "neo4j"
+        # Connection handing out short-lived sessions per unit of work
+        self.database = database
+        # Optional node label prefix, for staging graphs on single-database
+        # editions of Neo4j
+        self.namespace = namespace
         self.conn = conn
-        self.session = None
-        self._open_session()
-        # Instantiate singleton query executor interface
-        self.query_executor = QueryExecutor(self.session)
-        # Service classes for each metadata node type
-        self.meta_services = {
-            "activity_type": ActivityTypeService(self.session),
-            "bm": BmNodeService(self.session),
-            "country": CountryService(self.session),
-            "delivery_partner": DeliveryPartnerService(self.session),
-            "entity_type": EntityTypeService(self.session),
-            "ess_category": EssCategoryService(self.session),
-            "modality": ModalityService(self.session),
-            "region": RegionService(self.session),
-            "sector": SectorService(self.session),
-            "size": SizeService(self.session),
-            "stage": StageService(self.session),
-            "status": StatusService(self.session),
-            "theme": ThemeService(self.session),
-        }
-        self.data_services = {
-            "project": ProjectService(self.session),
-            "readiness": ReadinessService(self.session),
-            "entity": EntityService(self.session),
-            "country": CountryDataService(self.session),
-        }
+        if not self.conn.driver:
+            raise RuntimeError("Connection not established")
+        # Service classes for each metadata and data node type
+        self.meta_services, self.data_services = self._build_services(
+            self.conn, self.namespace, self.database
+        )
+        # Query executor of the database, shared with the services
+        self.query_executor = QueryExecutor(self.conn, self.database)
+        # Optionally throttle writes when sharing the graph DB with readers
+        self.query_executor.set_throttle(throttle)
         # Ensure proper constraints exist for each node type at initialization
         self._ensure_constraints()
 
-    def _ensure_constraints(self) -> bool:
-        """Helper method to dynamically add constraints to the knowledge graph
+    @staticmethod
+    def _build_services(
+        conn: Connection, namespace: str = "", database: str = "neo4j"
+    ) -> tuple[dict, dict]:
+        """Static helper method to instantiate the metadata and data services
+
+        Args:
+            conn (Connection): Established connection, or None to only build
+                the service definitions
+            namespace (str, optional): Node label prefix for the services.
+                Defaults to "".
+            database (str, optional): Database the services write to.
+                Defaults to "neo4j".
 
         Returns:
-            bool: True after completion
+            tuple[dict, dict]: Metadata services and data services by name
         """
 
-        # Gather all services
-        all_services = {**self.meta_services, **self.data_services}
+        meta_services = {
+            "activity_type": ActivityTypeService(conn, database),
+            "bm": BmNodeService(conn, database),
+            "country": CountryService(conn, database),
+            "delivery_partner": DeliveryPartnerService(conn, database),
+            "entity_type": EntityTypeService(conn, database),
+            "ess_category": EssCategoryService(conn, database),
+            "modality": ModalityService(conn, database),
+            "region": RegionService(conn, database),
+            "sector": SectorService(conn, database),
+            "size": SizeService(conn, database),
+            "stage": StageService(conn, database),
+            "status": StatusService(conn, database),
+            "theme": ThemeService(conn, database),
+        }
+        data_services = {
+            "project": ProjectService(conn, database),
+            "readiness": ReadinessService(conn, database),
+            "entity": EntityService(conn, database),
+            "country": CountryDataService(conn, database),
+        }
+
+        for service in {**meta_services, **data_services}.values():
+            service.namespace = namespace
+
+        return meta_services, data_services
+
+    @staticmethod
+    def _get_constraint_queries(
+        services: dict, namespace: str = ""
+    ) -> list[str]:
+        """Static helper method to generate a unique ID constraint query for
+        each distinct node label of the given services
 
-        # Iterate through services and generate constraints
-        for service_name, service in all_services.items():
+        Args:
+            services (dict): Services by name
+            namespace (str, optional): Node label prefix. Defaults to "".
+
+        Returns:
+            list[str]: Constraint Cypher queries
+        """
+
+        queries = []
+        for service in services.values():
             # Get the node label from the service
-            node_label = getattr(service, "node_label", None)
+            node_label = f"{namespace}{getattr(service, 'node_label', None)}"
             # Dynamically create a unique constraint for the id property
-            constraint_query = f"""
+            query = f"""
             CREATE CONSTRAINT {node_label.lower()}_id_unique IF NOT EXISTS
             FOR (n:{node_label}) REQUIRE n.id IS UNIQUE
             """
-            # Execute the constraint query
-            self.session.execute_write(lambda tx: tx.run(constraint_query))
+            if query not in queries:
+                queries.append(query)
+
+        return queries
+
+    @staticmethod
+    def _get_index_queries(services: dict, namespace: str = "") -> list[str]:
+        """Static helper method to generate an index query for each
+        relationship column materialized as a node property, and for each
+        relationship property listed in the `indexes` key of a relationship
+        config
+
+        Args:
+            services (dict): Services by name
+            namespace (str, optional): Node label prefix. Defaults to "".
+
+        Returns:
+            list[str]: Index Cypher queries
+        """
+
+        queries = []
+        for service in services.values():
+            node_label = f"{namespace}{service.node_label}"
+            relationships = getattr(service, "relationships", None) or {}
+            rel_configs = list(relationships.items())
+            join_config = getattr(service, "join_config", None)
+            if join_config:
+                # Join country relationships have no column of their own
+                rel_configs.append(
+                    (None, {**join_config, "relation": "INVOLVES"})
+                )
+
+            for key, rel_config in rel_configs:
+                # Relationship types are not namespaced, so neither are
+                # their indexes
+                relation = rel_config["relation"]
+                for prop in rel_config.get("indexes", []):
+                    query = f"""
+                    CREATE INDEX {relation.lower()}_{prop.lower()}_index
+                    IF NOT EXISTS FOR ()-[r:{relation}]-() ON (r.{prop})
+                    """
+                    if query not in queries:
+                        queries.append(query)
+                if key is None:
+                    continue
+                if "property" not in DataService._get_modes(rel_config):
+                    continue
+                query = f"""
+                CREATE INDEX {node_label.lower()}_{key.lower()}_index
+                IF NOT EXISTS FOR (n:{node_label}) ON (n.{key})
+                """
+                if query not in queries:
+                    queries.append(query)
+
+        return queries
+
+    @staticmethod
+    def _get_search_index_name(namespace: str = "") -> str:
+        """Static helper method to get the name of the full-text index
+
+        Args:
+            namespace (str, optional): Node label prefix. Defaults to "".
+
+        Returns:
+            str: Full-text index name
+        """
+
+        return f"{namespace.lower()}search_fulltext"
+
+    @staticmethod
+    def _get_fulltext_queries(namespace: str = "") -> list[str]:
+        """Static helper method to generate the full-text index query over
+        the names and codes of the labels mirrored by the search index
+
+        Args:
+            namespace (str, optional): Node label prefix. Defaults to "".
+
+        Returns:
+            list[str]: Full-text index Cypher queries
+        """
+
+        labels, properties = [], []
+        for label, *cols in SearchIndex.SOURCES.values():
+            labels.append(f"{namespace}{label}")
+            for col in filter(None, cols):
+                prop = f"n.{DataService._snake_to_camel(col)}"
+                if prop not in properties:
+                    properties.append(prop)
+
+        # Keep stop words, as the SQLite mirror does
+        query = f"""
+        CREATE FULLTEXT INDEX
+        {KnowledgeGraph._get_search_index_name(namespace)} IF NOT EXISTS
+        FOR (n:{"|".join(labels)}) ON EACH [{", ".join(properties)}]
+        OPTIONS {{indexConfig: {{
+            `fulltext.analyzer`: "standard-no-stop-words"
+        }}}}
+        """
+
+        return [query]
+
+    @staticmethod
+    def _get_drop_queries(services: dict, namespace: str) -> list[str]:
+        """Static helper method to generate the queries dropping the
+        constraints and node indexes of a label namespace, ex: to drop a
+        previous staging graph. Relationship indexes are shared by all
+        namespaces and kept.
+
+        Args:
+            services (dict): Services by name
+            namespace (str): Node label prefix
+
+        Returns:
+            list[str]: Drop Cypher queries
+        """
+
+        queries = []
+        for query in (
+            KnowledgeGraph._get_constraint_queries(services, namespace)
+            + KnowledgeGraph._get_index_queries(services, namespace)
+            + KnowledgeGraph._get_fulltext_queries(namespace)
+        ):
+            kind, name = re.search(
+                r"CREATE (?:FULLTEXT )?(CONSTRAINT|INDEX)\s+(\w+)", query
+            ).groups()
+            if name.startswith(namespace.lower()):
+                queries.append(f"DROP {kind} {name} IF EXISTS")
+
+        return queries
+
+    def _ensure_constraints(self) -> bool:
+        """Helper method to dynamically add constraints to the knowledge graph
+
+        Returns:
+            bool: True after completion
+        """
+
+        # Gather all services
+        all_services = {**self.meta_services, **self.data_services}
+
+        queries = (
+            self._get_constraint_queries(all_services, self.namespace)
+            + self._get_index_queries(all_services, self.namespace)
+            + self._get_fulltext_queries(self.namespace)
+        )
+
+        # Iterate through services and execute the constraint and index
+        # queries
+        for constraint_query in queries:
+            self.conn.execute_write(
+                lambda tx, query=constraint_query: tx.run(query).consume(),
+                self.database,
+            )
 
         return True
 
-    def _open_session(self) -> bool:
-        """Helper method to open a session using the Connection class
+    def count_expected_nodes(self) -> dict[str, int]:
+        """Count the nodes each label should have from the tabular DB tables
+
+        Returns:
+            dict[str, int]: Expected node count by namespaced node label
+        """
+
+        expected = {}
+        with self.db_handler.get_session() as session:
+            for service in [
+                *self.meta_services.values(),
+                *self.data_services.values(),
+            ]:
+                # Data services re-using a metadata label create no nodes
+                label = f"{self.namespace}{service.node_label}"
+                if label not in expected:
+                    expected[label] = session.scalar(
+                        select(func.count()).select_from(service.table_class)
+                    )
 
-        Raises:
-            RuntimeError: Raises error if Connection.connect() has not been
-                previously called
+        return expected
+
+    def count_nodes(self) -> dict[str, int]:
+        """Count the nodes of each label written by the services
 
         Returns:
-            bool: True if successfully opened, False if not
+            dict[str, int]: Node count by namespaced node label
         """
 
-        if not self.conn.driver:
-            raise RuntimeError("Connection not established")
-        else:
-            self.session = self.conn.driver.session(database=self.database)
-            logging.info("Session opened successfully")
-            return True
+        counts = {}
+        for label in self.count_expected_nodes():
+            # Counts verify a build, so they must see all of its writes
+            result = self.query_executor.execute_read(
+                f"MATCH (n:{label}) RETURN count(n) AS count", causal=True
+            )
+            counts[label] = result[0]["count"]
 
-    def _close_session(self) -> bool:
-        """Helper method to close the active session
+        return counts
+
+    def count_expected_relationships(self) -> dict[tuple, int]:
+        """Count the relationships each pattern should have from the tabular
+        DB tables
 
         Returns:
-            bool: True if session is successfully closed, False if not
+            dict[tuple, int]: Expected relationship count by namespaced
+                source label, relationship type and namespaced target label
         """
 
-        if self.session:
-            self.session.close()
-            logging.info("Session closed successfully")
-            return True
-        else:
-            logging.warning("No active session to close.")
-            return False
+        pairs = {}
+        for service in self.data_services.values():
+            service._get_data()
+            for src, rel, dst, df in service._get_relationship_pairs():
+                pairs.setdefault((src, rel, dst), []).append(df)
+            service._release()
+
+        # Pairs written by several services or rows are merged into one
+        # relationship
+        return {
+            pattern: len(concat(dfs).drop_duplicates())
+            for pattern, dfs in pairs.items()
+        }
+
+    def count_relationships(self) -> dict[tuple, int]:
+        """Count the relationships of each pattern written by the services
+
+        Returns:
+            dict[tuple, int]: Relationship count by namespaced source label,
+                relationship type and namespaced target label
+        """
+
+        counts = {}
+        for src, rel, dst in self.count_expected_relationships():
+            # Counts verify a build, so they must see all of its writes
+            result = self.query_executor.execute_read(
+                f"MATCH (:{src})-[r:{rel}]->(:{dst}) RETURN count(r) AS count",
+                causal=True,
+            )
+            counts[(src, rel, dst)] = result[0]["count"]
+
+        return counts
+
+    def get_node_properties(self) -> dict[str, DataFrame]:
+        """Get the node properties written by the services from the tabular
+        DB, without reading the graph
+
+        Returns:
+            dict[str, DataFrame]: Node properties by namespaced node label
+        """
+
+        properties = {}
+        for service in [
+            *self.meta_services.values(),
+            *self.data_services.values(),
+        ]:
+            # Data services re-using a metadata label create no nodes
+            label = f"{self.namespace}{service.node_label}"
+            if label in properties:
+                continue
+            service._get_data()
+            service._process_data()
+            df = DataFrame(service.processed)
+            if isinstance(service, DataService):
+                df = df[service.properties]
+            properties[label] = df
+            service._release()
+
+        return properties
+
+    @profile_stage("snapshot")
+    def write_snapshot(
+        self, path: str | Path = "data/gcf_graph.snapshot"
+    ) -> bool:
+        """Write a memory-mapped snapshot of the graph after a build, for
+        readers that traverse the graph in-process
+
+        Args:
+            path (str | Path, optional): Path to the snapshot file.
+                Defaults to "data/gcf_graph.snapshot".
+
+        Returns:
+            bool: True after completion
+        """
+
+        projection = GraphProjection.from_services(
+            self.meta_services, self.data_services
+        )
+        print(
+            f"Writing snapshot of {projection.node_count} nodes and "
+            f"{projection.relationship_count} relationships to {path}..."
+        )
+
+        return GraphSnapshot.write(
+            projection, self.get_node_properties(), path
+        )
+
+    def refresh_statistics(self, labels: list[str] = None) -> bool:
+        """Recompute the statistics catalog of the graph
+
+        Args:
+            labels (list[str], optional): Node labels to refresh, without
+                namespace. Defaults to None, for all labels.
+
+        Returns:
+            bool: True if successful, False if not
+        """
+
+        statistics = GraphStatistics(
+            self.query_executor,
+            self.meta_services,
+            self.data_services,
+            self.namespace,
+        )
+
+        return statistics.refresh(labels)
 
     def close(self) -> bool:
-        """Close the session and driver connection to the graph DB
+        """Close the driver connection to the graph DB
 
         Returns:
             bool: True after successful completion, False if any errors
         """
 
-        return all([self._close_session(), self.conn.close()])
+        return self.conn.close()
 
     def initialize(self) -> bool:
         """Main method to initialize the GCF Knowledge Graph with all
@@ -149,8 +477,63 @@ class KnowledgeGraph:
             bool: True after completion
         """
 
-        # Initialize and populate each data service
+        # Write all data nodes before any relationships, so that
+        # relationships between data nodes (ex: Entity FUNDS Project) find
+        # both ends
         for service in self.data_services.values():
-            service.populate()
+            service.populate_nodes()
+        for service in self.data_services.values():
+            service.populate_relationships()
 
         return True
+
+    def publish(self, head: int, bump: bool = False) -> bool:
+        """Let the continuous updater resume after a build of the graph
+
+        Args:
+            head (int): Last change logged before the tables were read, as
+                from `ChangeFeed.get_head`
+            bump (bool, optional): Toggle to also bump the graph generation
+                in the same transaction, for builds replacing the graph
+                readers and the updater use, ex: a rebuild swap. Defaults to
+                False.
+
+        Returns:
+            bool: True after completion
+        """
+
+        feed = ChangeFeed(self.db_handler)
+        if bump:
+            feed.bump_generation("graph", head)
+            return True
+
+        return feed.commit_offset("graph", head)
+
+    def finalize(self, head: int = None, snapshot: bool = True) -> bool:
+        """Post-build hook shared by every build path (sync, async and
+        blue/green rebuilds), run once all nodes and relationships are
+        written: precompute the statistics, materialize the portfolio
+        rollups onto the new nodes, write the snapshot and publish the build
+
+        Args:
+            head (int, optional): Last change logged before the tables were
+                read, to publish the build. Defaults to None, for builds
+                published by their caller, ex: after a swap.
+            snapshot (bool, optional): Toggle to write the snapshot.
+                Defaults to True.
+
+        Returns:
+            bool: True if successful, False if not
+        """
+
+        # Imported here, as the rollups depend on the knowledge graph
+        from src.kg.portfolio import PortfolioAggregates
+
+        results = [self.refresh_statistics()]
+        results.append(PortfolioAggregates(self).refresh(full=True))
+        if snapshot:
+            results.append(self.write_snapshot())
+        if head is not None:
+            results.append(self.publish(head))
+
+        return all(results)
@@ -0,0 +1,437 @@
+import heapq
+import logging
+import math
+import queue
+import random
+import threading
+import time
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+from neo4j import WRITE_ACCESS
+from neo4j.exceptions import Neo4jError, ServiceUnavailable
+
+from src.db.db_handler import DBHandler
+from src.db.db_schema import Country
+from src.kg.db.query_executor import QueryExecutor
+
+
+def get_query_mix(ns: str = "", db_handler: DBHandler = None) -> dict:
+    """Get the default mix of analyst queries from the README, parameterized
+    with the countries of the tabular DB: the neighborhood of a country,
+    the shortest path between two countries and the LDC subgraph
+
+    Args:
+        ns (str, optional): Node label namespace. Defaults to "".
+        db_handler (DBHandler, optional): Handler of the tabular DB to draw
+            country parameters from. Defaults to None, for the default DB.
+
+    Returns:
+        dict: Query specs by name, each with the Cypher `query`, a `params`
+            function of a `random.Random` and a relative `weight`
+    """
+
+    db_handler = db_handler or DBHandler()
+    with db_handler.get_session() as session:
+        iso3s = [row[0] for row in session.query(Country.iso3).all()]
+    if len(iso3s) < 2:
+        raise ValueError("Load test needs at least two countries")
+
+    return {
+        "country_neighborhood": {
+            "query": f"""
+                MATCH (r:{ns}Region)<-[:IS_IN]-(c:{ns}Country {{iso3: $iso3}})
+                    <-[*]-(n)
+                RETURN DISTINCT r, c, n
+            """,
+            "params": lambda rng: {"iso3": rng.choice(iso3s)},
+            "weight": 6,
+        },
+        "country_path": {
+            "query": f"""
+                MATCH p = shortestPath(
+                    (a:{ns}Country {{iso3: $a}})-[*..10]-
+                    (b:{ns}Country {{iso3: $b}})
+                )
+                RETURN p
+            """,
+            "params": lambda rng: dict(zip(["a", "b"], rng.sample(iso3s, 2))),
+            "weight": 3,
+        },
+        "ldc_subgraph": {
+            "query": f"""
+                MATCH (c:{ns}Country)<-[]-(n)
+                WHERE c.isLdc = True
+                RETURN c, n
+            """,
+            "params": lambda rng: {},
+            "weight": 1,
+        },
+    }
+
+
+class StandInResult:
+    """Result of a stand-in query, yielding records with a `data` method"""
+
+    def __init__(self, records: list[dict]) -> None:
+
+        self.records = records
+
+    def __iter__(self):
+
+        for record in self.records:
+            yield StandInRecord(record)
+
+
+class StandInRecord:
+
+    def __init__(self, data: dict) -> None:
+
+        self._data = data
+
+    def data(self) -> dict:
+        return self._data
+
+
+class StandInConnection:
+    """Local stand-in for `Connection`, to exercise the load test and its
+    reports without a graph DB.
+
+    Reads are served first come, first served by `workers` server slots,
+    each read for a log-normal service time with the given median, so that
+    latencies queue up once the offered load exceeds the capacity of about
+    `workers / median` reads per second, as on a server with a fixed number
+    of query threads. A share of reads fails with `ServiceUnavailable`.
+
+    Reads return the records of `responder`, by default the parameters as
+    a single record. The stand-in also acts as its own session.
+    """
+
+    def __init__(
+        self,
+        median: float = 0.005,
+        sigma: float = 0.5,
+        workers: int = 4,
+        error_rate: float = 0.0,
+        seed: int = None,
+        responder: Callable[[str, dict], list[dict]] = None,
+    ) -> None:
+
+        self.responder = responder or (lambda query, params: [params])
+        self.median = median
+        self.sigma = sigma
+        self.error_rate = error_rate
+        # Times at which each server slot becomes free, as a min-heap
+        self.free_at = [0.0] * workers
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def run(self, query: str, params: dict = None) -> StandInResult:
+        """Simulate a read query
+
+        Args:
+            query (str): Cypher query
+            params (dict, optional): Query parameters. Defaults to None.
+
+        Raises:
+            ServiceUnavailable: Raise error for the simulated failures
+
+        Returns:
+            StandInResult: Result with the records of the responder
+        """
+
+        with self.lock:
+            service_time = self.rng.lognormvariate(
+                math.log(self.median), self.sigma
+            )
+            failed = self.rng.random() < self.error_rate
+            # Take the earliest free slot, waiting for it if all are busy
+            start = max(time.perf_counter(), heapq.heappop(self.free_at))
+            finish = start + service_time
+            heapq.heappush(self.free_at, finish)
+        time.sleep(max(finish - time.perf_counter(), 0))
+        if failed:
+            raise ServiceUnavailable("Stand-in read failed")
+
+        return StandInResult(self.responder(query, params or {}))
+
+    def execute_read(
+        self,
+        work: Callable,
+        database: str = "neo4j",
+        causal: bool = None,
+        **kwargs,
+    ) -> Any:
+        """Method to run a read transaction function against the stand-in
+
+        Args:
+            work (Callable): Transaction function taking the transaction
+            database (str, optional): Database name, ignored. Defaults to
+                "neo4j".
+            causal (bool, optional): Toggle to wait for writes, ignored.
+                Defaults to None.
+            **kwargs: Additional arguments passed to the transaction function
+
+        Returns:
+            Any: Return value of the transaction function
+        """
+
+        return work(self, **kwargs)
+
+    def session(
+        self,
+        database: str = "neo4j",
+        access_mode: str = WRITE_ACCESS,
+        causal: bool = None,
+    ) -> "StandInConnection":
+        """Method to open a session, the stand-in itself
+
+        Args:
+            database (str, optional): Database name, ignored. Defaults to
+                "neo4j".
+            access_mode (str, optional): Access mode, ignored. Defaults to
+                WRITE_ACCESS.
+            causal (bool, optional): Toggle to wait for writes, ignored.
+                Defaults to None.
+
+        Returns:
+            StandInConnection: The stand-in
+        """
+
+        return self
+
+    def __enter__(self) -> "StandInConnection":
+        return self
+
+    def __exit__(self, *args) -> None:
+        return None
+
+    def close(self) -> bool:
+        return True
+
+
+class LoadTest:
+    """Concurrent replay of a weighted mix of parameterized read queries
+    through `QueryExecutor.execute_read`.
+
+    - Closed loop (no `rate`): `concurrency` workers each issue their next
+      query as soon as the previous one returns, measuring the throughput
+      the graph sustains at that concurrency.
+    - Open loop (`rate` queries per second): queries arrive on a fixed
+      schedule regardless of completions and are served by `concurrency`
+      workers. Latency is measured from the scheduled arrival, so that
+      queueing behind slow queries is reported rather than hidden
+      (coordinated omission).
+
+    Each query records its name, scheduled start, latency and error type,
+    summarized per query name by `report`.
+    """
+
+    def __init__(
+        self,
+        executor: QueryExecutor,
+        mix: dict,
+        concurrency: int = 8,
+        rate: float = None,
+        duration: float = 30.0,
+        warmup: float = 0.0,
+        seed: int = None,
+    ) -> None:
+
+        if not mix:
+            raise ValueError("Query mix must not be empty")
+        if concurrency < 1:
+            raise ValueError("Concurrency must be at least 1")
+
+        self.executor = executor
+        self.mix = mix
+        self.concurrency = concurrency
+        self.rate = rate
+        self.duration = duration
+        self.warmup = warmup
+        self.seed = seed
+        self.names = list(mix)
+        self.weights = [mix[name].get("weight", 1) for name in self.names]
+        # Instance variables to store the samples and the measured window
+        self.samples = []
+        self.lock = threading.Lock()
+        self.started_at = None
+        self.elapsed = None
+
+    def _pick(self, rng: random.Random) -> tuple[str, dict]:
+        """Helper method to draw the next query and its parameters
+
+        Args:
+            rng (random.Random): Random generator of the calling thread
+
+        Returns:
+            tuple[str, dict]: Query name and parameters
+        """
+
+        name = rng.choices(self.names, self.weights)[0]
+
+        return name, self.mix[name]["params"](rng)
+
+    def _execute(self, name: str, params: dict, scheduled: float) -> bool:
+        """Helper method to run one query and record its sample, unless it
+        was scheduled during the warmup
+
+        Args:
+            name (str): Query name
+            params (dict): Query parameters
+            scheduled (float): Scheduled start, as a `perf_counter` value
+
+        Returns:
+            bool: True if successful, False if not
+        """
+
+        error = None
+        try:
+            self.executor.execute_read(self.mix[name]["query"], params)
+        except (Neo4jError, ServiceUnavailable) as e:
+            error = type(e).__name__
+        except Exception as e:
+            logging.error(f"Unexpected error in {name}: {e}")
+            error = type(e).__name__
+        latency = time.perf_counter() - scheduled
+
+        if scheduled >= self.started_at:
+            with self.lock:
+                self.samples.append(
+                    (name, scheduled - self.started_at, latency, error)
+                )
+
+        return error is None
+
+    def _run_closed(self, deadline: float) -> bool:
+        """Helper method to run the closed loop workers until the deadline
+
+        Args:
+            deadline (float): End of the test, as a `perf_counter` value
+
+        Returns:
+            bool: True after completion
+        """
+
+        def worker(index: int) -> None:
+            rng = random.Random(
+                None if self.seed is None else self.seed + index
+            )
+            while (start := time.perf_counter()) < deadline:
+                self._execute(*self._pick(rng), start)
+
+        threads = [
+            threading.Thread(target=worker, args=(i,), daemon=True)
+            for i in range(self.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        return True
+
+    def _run_open(self, begin: float, deadline: float) -> bool:
+        """Helper method to schedule arrivals at the fixed rate until the
+        deadline, served by the worker pool
+
+        Args:
+            begin (float): Start of the test, as a `perf_counter` value
+            deadline (float): End of the test, as a `perf_counter` value
+
+        Returns:
+            bool: True after completion
+        """
+
+        arrivals = queue.Queue()
+
+        def worker() -> None:
+            while (arrival := arrivals.get()) is not None:
+                self._execute(*arrival)
+
+        threads = [
+            threading.Thread(target=worker, daemon=True)
+            for _ in range(self.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+
+        rng = random.Random(self.seed)
+        interval = 1 / self.rate
+        scheduled = begin
+        while scheduled < deadline:
+            wait = scheduled - time.perf_counter()
+            if wait > 0:
+                time.sleep(wait)
+            arrivals.put((*self._pick(rng), scheduled))
+            scheduled += interval
+
+        # Let the workers drain the backlog, then stop them
+        for _ in threads:
+            arrivals.put(None)
+        for thread in threads:
+            thread.join()
+
+        return True
+
+    def run(self) -> pd.DataFrame:
+        """Main method to run the load test
+
+        Returns:
+            pd.DataFrame: Report of the measured window, as from `report`
+        """
+
+        self.samples = []
+        begin = time.perf_counter()
+        self.started_at = begin + self.warmup
+        deadline = self.started_at + self.duration
+        mode = f"{self.rate}/s open" if self.rate else "closed"
+        logging.info(
+            f"Load testing {len(self.mix)} queries for {self.duration}s at "
+            f"concurrency {self.concurrency} ({mode} loop)"
+        )
+
+        if self.rate:
+            self._run_open(begin, deadline)
+        else:
+            self._run_closed(deadline)
+        # Open loop backlogs are drained past the deadline
+        self.elapsed = max(time.perf_counter(), deadline) - self.started_at
+
+        return self.report()
+
+    def report(self) -> pd.DataFrame:
+        """Summarize the samples per query name and overall
+
+        Returns:
+            pd.DataFrame: Count, errors, error rate, throughput of successful
+                queries per second and latency percentiles in milliseconds,
+                indexed by query name with an "all" row
+        """
+
+        columns = ["name", "offset", "latency", "error"]
+        df = pd.DataFrame(self.samples, columns=columns)
+        elapsed = self.elapsed or self.duration
+
+        rows = {}
+        for name, group in [*df.groupby("name"), ("all", df)]:
+            ok = group["error"].isna()
+            latencies = group.loc[ok, "latency"].to_numpy() * 1000
+            p50, p95, p99 = (
+                np.percentile(latencies, [50, 95, 99])
+                if len(latencies)
+                else (np.nan,) * 3
+            )
+            rows[name] = {
+                "count": len(group),
+                "errors": int((~ok).sum()),
+                "error_rate": float((~ok).mean()) if len(group) else 0.0,
+                "throughput": ok.sum() / elapsed,
+                "p50_ms": p50,
+                "p95_ms": p95,
+                "p99_ms": p99,
+                "max_ms": latencies.max() if len(latencies) else np.nan,
+            }
+
+        return pd.DataFrame.from_dict(rows, orient="index")
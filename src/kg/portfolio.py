@@ -0,0 +1,513 @@
+import hashlib
+import logging
+from datetime import date
+from typing import Type
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import delete
+from sqlalchemy.ext.declarative import DeclarativeMeta
+
+from src.db.change_feed import ChangeFeed
+from src.db.db_handler import DBHandler
+from src.db.history import History
+from src.db.db_schema import (
+    BmDict,
+    BmSummary,
+    Country,
+    CountryDict,
+    CountrySummary,
+    Entity,
+    EntitySummary,
+    GroupSummary,
+    Project,
+    ProjectCountry,
+    Readiness,
+    ReadinessCountry,
+    RegionDict,
+    RegionSummary,
+    SummaryState,
+    ThemeDict,
+    ThemeSummary,
+)
+from src.kg.knowledge_graph import KnowledgeGraph
+from src.kg.services.base_data_service import DataService
+from src.utils.dtype_policy import DtypePolicy
+from src.utils.profiler import profile_stage
+
+
+class PortfolioAggregates:
+    """Materialized portfolio rollups (project and readiness counts and
+    financing per country, region, LDC/SIDS group, entity, board meeting and
+    theme), computed in bulk with pandas from the tabular DB.
+
+    Rollups are stored in indexed summary tables of the tabular DB and as
+    properties on the Country, Region, Entity, Bm and Theme nodes. A refresh
+    is skipped when the data tables and the graph generation are unchanged
+    since the last one, and otherwise only rewrites the summary rows whose
+    values changed. Writing node properties bumps the graph generation, and
+    a generation bumped by anything else (ex: a rebuild swapping in nodes
+    without rollups) forces a full rewrite.
+    """
+
+    # Summary table, node label and key column of each rollup
+    SUMMARIES = {
+        CountrySummary: ("Country", "country_id"),
+        RegionSummary: ("Region", "region_id"),
+        EntitySummary: ("Entity", "entity_id"),
+        BmSummary: ("Bm", "bm_id"),
+        ThemeSummary: ("Theme", "theme_id"),
+        GroupSummary: (None, "group"),
+    }
+    # Data tables and dictionaries the rollups are computed from
+    SOURCES = [
+        Project,
+        Readiness,
+        Entity,
+        Country,
+        CountryDict,
+        ProjectCountry,
+        ReadinessCountry,
+        RegionDict,
+        BmDict,
+        ThemeDict,
+    ]
+
+    def __init__(self, kg: KnowledgeGraph = None) -> None:
+
+        self.db_handler = DBHandler()
+        # Without a knowledge graph, only the summary tables are refreshed
+        self.kg = kg
+        self.query_executor = kg.query_executor if kg else None
+        self.namespace = kg.namespace if kg else ""
+
+    def _read(self, table_class: Type[DeclarativeMeta]) -> pd.DataFrame:
+        """Helper method to read a table of the tabular DB as a dataframe
+
+        Args:
+            table_class (Type[DeclarativeMeta]): The SQLAlchemy ORM table class
+
+        Returns:
+            pd.DataFrame: Contents of the table
+        """
+
+        with self.db_handler.get_session() as session:
+            data = session.query(*table_class.__table__.columns).all()
+            columns = [col.name for col in table_class.__table__.columns]
+
+        return pd.DataFrame(data, columns=columns)
+
+    def _get_fingerprint(self, sources: dict[str, pd.DataFrame]) -> str:
+        """Helper method to fingerprint the contents of the data tables
+
+        Args:
+            sources (dict[str, pd.DataFrame]): Data tables by table name
+
+        Returns:
+            str: Hex digest of the data tables
+        """
+
+        digest = hashlib.sha256()
+        for name, df in sorted(sources.items()):
+            digest.update(name.encode())
+            hashes = pd.util.hash_pandas_object(df, index=False)
+            digest.update(np.sort(hashes.to_numpy()).tobytes())
+
+        return digest.hexdigest()
+
+    @staticmethod
+    def _rollup(
+        pairs: pd.DataFrame, key: str, item: str, prefix: str, index: pd.Index
+    ) -> pd.DataFrame:
+        """Static helper method to count distinct items and sum their
+        financing per key
+
+        Args:
+            pairs (pd.DataFrame): Key, item and `financing_usd` columns
+            key (str): Column name of the key to roll up to
+            item (str): Column name of the item to count
+            prefix (str): Prefix of the resulting column names
+            index (pd.Index): All keys, to fill keys without items
+
+        Returns:
+            pd.DataFrame: `<prefix>_count` and `<prefix>_financing_usd`
+                columns indexed by key
+        """
+
+        # Count each item once per key, ex: a project involving two
+        # countries of the same region
+        pairs = pairs.dropna(subset=[key, item])
+        pairs = pairs.drop_duplicates([key, item])
+        grouped = pairs.groupby(key)
+
+        return pd.DataFrame(
+            {
+                f"{prefix}_count": grouped[item].size(),
+                f"{prefix}_financing_usd": grouped["financing_usd"].sum(),
+            }
+        ).reindex(index, fill_value=0)
+
+    def compute(
+        self, sources: dict[str, pd.DataFrame]
+    ) -> dict[Type[DeclarativeMeta], pd.DataFrame]:
+        """Compute all rollups from the data tables
+
+        Args:
+            sources (dict[str, pd.DataFrame]): Data tables by table name
+
+        Returns:
+            dict[Type[DeclarativeMeta], pd.DataFrame]: Rollups by summary
+                table class, with the summary table columns
+        """
+
+        project = sources["project"].rename(columns={"id": "project_id"})
+        readiness = sources["readiness"].rename(columns={"id": "readiness_id"})
+        entity = sources["entity"]
+
+        # Country dictionary IDs with their region and LDC/SIDS flags
+        countries = sources["country_dict"][["id", "iso3"]].merge(
+            sources["country"][["iso3", "region_id", "is_sids", "is_ldc"]],
+            how="left",
+            on="iso3",
+        )
+        countries = countries.rename(columns={"id": "country_id"})
+
+        # Projects and readiness programmes by involved country
+        project_pairs = sources["project_country"].merge(
+            project[["project_id", "entity_id", "financing_usd"]],
+            on="project_id",
+        )
+        readiness_pairs = sources["readiness_country"].merge(
+            readiness[["readiness_id", "financing_usd"]], on="readiness_id"
+        )
+
+        rollups = {}
+
+        # Countries
+        index = pd.Index(countries["country_id"], name="country_id")
+        bm_pairs = project_pairs.merge(
+            entity[["id", "bm_id"]], left_on="entity_id", right_on="id"
+        )
+        df = pd.concat(
+            [
+                self._rollup(
+                    project_pairs, "country_id", "project_id", "project", index
+                ),
+                self._rollup(
+                    readiness_pairs,
+                    "country_id",
+                    "readiness_id",
+                    "readiness",
+                    index,
+                ),
+            ],
+            axis=1,
+        )
+        df["entity_count"] = (
+            entity.groupby("country_id").size().reindex(index, fill_value=0)
+        )
+        # Board meetings covering entities funding projects in the country
+        df["bm_count"] = (
+            bm_pairs.dropna(subset=["bm_id"])
+            .groupby("country_id")["bm_id"]
+            .nunique()
+            .reindex(index, fill_value=0)
+        )
+        rollups[CountrySummary] = df
+
+        # Regions, also counting readiness programmes by their own region
+        index = pd.Index(sources["region_dict"]["id"], name="region_id")
+        regions = countries[["country_id", "region_id"]]
+        readiness_regions = pd.concat(
+            [
+                readiness_pairs.merge(regions, on="country_id"),
+                readiness[["readiness_id", "region_id", "financing_usd"]],
+            ]
+        )
+        df = pd.concat(
+            [
+                self._rollup(
+                    project_pairs.merge(regions, on="country_id"),
+                    "region_id",
+                    "project_id",
+                    "project",
+                    index,
+                ),
+                self._rollup(
+                    readiness_regions,
+                    "region_id",
+                    "readiness_id",
+                    "readiness",
+                    index,
+                ),
+            ],
+            axis=1,
+        )
+        df.insert(
+            0,
+            "country_count",
+            regions.groupby("region_id").size().reindex(index, fill_value=0),
+        )
+        df["entity_count"] = (
+            entity.merge(regions, on="country_id")
+            .groupby("region_id")
+            .size()
+            .reindex(index, fill_value=0)
+        )
+        rollups[RegionSummary] = df
+
+        # LDC and SIDS country groups
+        groups = []
+        for group, flag in [("LDC", "is_ldc"), ("SIDS", "is_sids")]:
+            members = countries.loc[
+                countries[flag].fillna(False).astype(bool), ["country_id"]
+            ].assign(group=group)
+            groups.append(
+                pd.concat(
+                    [
+                        pd.Series(
+                            [len(members)],
+                            index=[group],
+                            name="country_count",
+                        ),
+                        self._rollup(
+                            project_pairs.merge(members, on="country_id"),
+                            "group",
+                            "project_id",
+                            "project",
+                            pd.Index([group]),
+                        ),
+                        self._rollup(
+                            readiness_pairs.merge(members, on="country_id"),
+                            "group",
+                            "readiness_id",
+                            "readiness",
+                            pd.Index([group]),
+                        ),
+                    ],
+                    axis=1,
+                )
+            )
+        rollups[GroupSummary] = pd.concat(groups).rename_axis("group")
+
+        # Entities, by the projects they fund
+        index = pd.Index(entity["id"], name="entity_id")
+        df = self._rollup(project, "entity_id", "project_id", "project", index)
+        df["country_count"] = (
+            project_pairs.groupby("entity_id")["country_id"]
+            .nunique()
+            .reindex(index, fill_value=0)
+        )
+        rollups[EntitySummary] = df
+
+        # Board meetings, by the projects and entities they cover
+        index = pd.Index(sources["bm_dict"]["id"], name="bm_id")
+        df = self._rollup(project, "bm_id", "project_id", "project", index)
+        df["entity_count"] = (
+            entity.groupby("bm_id").size().reindex(index, fill_value=0)
+        )
+        rollups[BmSummary] = df
+
+        # Themes
+        index = pd.Index(sources["theme_dict"]["id"], name="theme_id")
+        rollups[ThemeSummary] = self._rollup(
+            project, "theme_id", "project_id", "project", index
+        )
+
+        # Align with the summary table columns
+        for table_class, df in rollups.items():
+            columns = [col.name for col in table_class.__table__.columns]
+            df = df.reset_index()
+            count_cols = [col for col in columns if col.endswith("_count")]
+            df[count_cols] = df[count_cols].astype(np.int64)
+            rollups[table_class] = df[columns]
+
+        return rollups
+
+    def _diff(
+        self, table_class: Type[DeclarativeMeta], df: pd.DataFrame
+    ) -> tuple[pd.DataFrame, list]:
+        """Helper method to compare rollups with the stored summary table
+
+        Args:
+            table_class (Type[DeclarativeMeta]): Summary table class
+            df (pd.DataFrame): Rollups with the summary table columns
+
+        Returns:
+            tuple[pd.DataFrame, list]: Changed or new rollups, and keys of
+                stored rollups that no longer exist
+        """
+
+        key = self.SUMMARIES[table_class][1]
+        stored = self._read(table_class).set_index(key)
+        current = df.set_index(key)
+
+        common = current.index.intersection(stored.index)
+        unchanged = (
+            (current.loc[common] == stored.loc[common, current.columns])
+            .all(axis=1)
+            .reindex(current.index, fill_value=False)
+        )
+        changed = current[~unchanged.to_numpy()].reset_index()
+        deleted = stored.index.difference(current.index).tolist()
+
+        return changed, deleted
+
+    def _write_table(
+        self,
+        table_class: Type[DeclarativeMeta],
+        changed: pd.DataFrame,
+        deleted: list,
+    ) -> bool:
+        """Helper method to upsert changed rollups into a summary table
+
+        Args:
+            table_class (Type[DeclarativeMeta]): Summary table class
+            changed (pd.DataFrame): Changed or new rollups
+            deleted (list): Keys of rollups to delete
+
+        Returns:
+            bool: True if successful, False if not
+        """
+
+        key = self.SUMMARIES[table_class][1]
+        column = table_class.__table__.c[key]
+        keys = [*changed[key].tolist(), *deleted]
+
+        with self.db_handler.get_session() as session:
+            try:
+                session.execute(delete(table_class).where(column.in_(keys)))
+                session.bulk_insert_mappings(
+                    table_class, DtypePolicy.to_records(changed)
+                )
+                session.commit()
+                return True
+            except Exception as e:
+                session.rollback()
+                logging.error(
+                    f"Failed to write {table_class.__tablename__}: {e}"
+                )
+
+        return False
+
+    def _write_graph(
+        self, table_class: Type[DeclarativeMeta], changed: pd.DataFrame
+    ) -> bool:
+        """Helper method to set changed rollups as node properties
+
+        Args:
+            table_class (Type[DeclarativeMeta]): Summary table class
+            changed (pd.DataFrame): Changed or new rollups
+
+        Returns:
+            bool: True if successful, False if not
+        """
+
+        label, key = self.SUMMARIES[table_class]
+        if self.query_executor is None or label is None or changed.empty:
+            return True
+
+        # Property keys follow the camelcasing of the data services
+        properties = changed.drop(columns=key)
+        properties.columns = [
+            DataService._snake_to_camel(col) for col in properties.columns
+        ]
+        records = [
+            {"id": node_id, "properties": props}
+            for node_id, props in zip(
+                changed[key].tolist(), DtypePolicy.to_records(properties)
+            )
+        ]
+        query = f"""
+        UNWIND $data as record
+        MATCH (n:{self.namespace}{label} {{id: record.id}})
+        SET n += record.properties
+        """
+
+        return self.query_executor.execute_write(query, records)
+
+    def as_of(self, as_of: date) -> dict[Type[DeclarativeMeta], pd.DataFrame]:
+        """Compute the rollups as they were at a date from the recorded
+        history, without storing them
+
+        Args:
+            as_of (date): Point in time
+
+        Returns:
+            dict[Type[DeclarativeMeta], pd.DataFrame]: Rollups by summary
+                table class, with the summary table columns
+        """
+
+        # Data tables at the date, with the current dictionaries
+        sources = History(self.db_handler).get_tables(as_of)
+        for table_class in self.SOURCES:
+            if table_class.__tablename__ not in sources:
+                sources[table_class.__tablename__] = self._read(table_class)
+
+        return self.compute(sources)
+
+    @profile_stage("aggregate")
+    def refresh(self, full: bool = False) -> bool:
+        """Main method to refresh the rollups, rewriting only the summary rows
+        and node properties that changed
+
+        Args:
+            full (bool, optional): Toggle to rewrite all rollups even if
+                unchanged, ex: after a fresh graph build. Defaults to False.
+
+        Returns:
+            bool: True if successful, False if not
+        """
+
+        sources = {
+            table_class.__tablename__: self._read(table_class)
+            for table_class in self.SOURCES
+        }
+        feed = ChangeFeed(self.db_handler)
+        digest = self._get_fingerprint(sources)
+        # Fingerprints are prefixed with the graph generation they were
+        # written to
+        generation = str(feed.get_generation("graph"))
+
+        with self.db_handler.get_session() as session:
+            state = session.get(SummaryState, "portfolio")
+        if state and not full:
+            if state.fingerprint == f"{generation}:{digest}":
+                print("Portfolio aggregates are up to date.")
+                return True
+            stored_generation = state.fingerprint.partition(":")[0]
+            full = self.kg is not None and stored_generation != generation
+
+        results, written = [], 0
+        for table_class, df in self.compute(sources).items():
+            if full:
+                changed = df
+                deleted = self._read(table_class)[
+                    self.SUMMARIES[table_class][1]
+                ].tolist()
+            else:
+                changed, deleted = self._diff(table_class, df)
+            print(
+                f"Refreshing {len(changed)} rows of "
+                f"{table_class.__tablename__}..."
+            )
+            results.append(self._write_table(table_class, changed, deleted))
+            results.append(self._write_graph(table_class, changed))
+            if self.SUMMARIES[table_class][0] is not None:
+                written += len(changed)
+
+        # Only record the fingerprint once everything is written
+        if all(results):
+            # Let readers caching on the graph version see the new rollups
+            if self.kg is not None and written:
+                generation = str(feed.bump_generation("graph"))
+            with self.db_handler.get_session() as session:
+                session.merge(
+                    SummaryState(
+                        name="portfolio",
+                        fingerprint=f"{generation}:{digest}",
+                    )
+                )
+                session.commit()
+
+        return all(results)
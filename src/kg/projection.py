@@ -0,0 +1,603 @@
+import numpy as np
+import pandas as pd
+
+from src.kg.db.query_executor import QueryExecutor
+from src.kg.services.base_data_service import DataService
+from src.kg.services.base_meta_service import MetaService
+
+
+class GraphProjection:
+    """In-memory projection of the knowledge graph as compressed sparse row
+    (CSR) adjacency arrays, for traversal analytics without a graph server.
+
+    Nodes are numbered from 0, sorted by label and then by ID, so that
+    `node_labels` and `node_ids` give the label code and ID of each node.
+    For each direction, the neighbors of node `i` are
+    `targets[offsets[i]:offsets[i + 1]]`, with the relationship type code of
+    each neighbor in `types`. Traversals expand whole frontiers at once with
+    vectorized NumPy operations.
+    """
+
+    DIRECTIONS = ("OUT", "IN", "BOTH")
+
+    def __init__(
+        self,
+        label_names: list[str],
+        type_names: list[str],
+        label_offsets: np.ndarray,
+        node_ids: np.ndarray,
+        out_offsets: np.ndarray,
+        out_targets: np.ndarray,
+        out_types: np.ndarray,
+        in_offsets: np.ndarray,
+        in_targets: np.ndarray,
+        in_types: np.ndarray,
+    ) -> None:
+
+        self.label_names = list(label_names)
+        self.type_names = list(type_names)
+        # Node `i` has label code `k` for label_offsets[k] <= i < [k + 1]
+        self.label_offsets = label_offsets
+        self.node_ids = node_ids
+        self.node_labels = np.repeat(
+            np.arange(len(self.label_names), dtype=np.int16),
+            np.diff(label_offsets),
+        )
+        # Outgoing and incoming CSR adjacency
+        self.csr = {
+            "OUT": (out_offsets, out_targets, out_types),
+            "IN": (in_offsets, in_targets, in_types),
+        }
+
+    @property
+    def node_count(self) -> int:
+        """Number of projected nodes"""
+        return len(self.node_ids)
+
+    @property
+    def relationship_count(self) -> int:
+        """Number of projected relationships"""
+        return len(self.csr["OUT"][1])
+
+    @staticmethod
+    def _build_csr(
+        src: np.ndarray, dst: np.ndarray, types: np.ndarray, node_count: int
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Static helper method to build CSR arrays from an edge list
+
+        Args:
+            src (np.ndarray): Source node indices
+            dst (np.ndarray): Target node indices
+            types (np.ndarray): Relationship type codes
+            node_count (int): Number of nodes
+
+        Returns:
+            tuple[np.ndarray, np.ndarray, np.ndarray]: Offsets, targets and
+                relationship type codes
+        """
+
+        order = np.lexsort((dst, src))
+        counts = np.bincount(src, minlength=node_count)
+        offsets = np.zeros(node_count + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+
+        return offsets, dst[order], types[order]
+
+    @classmethod
+    def from_edges(
+        cls,
+        nodes: dict[str, np.ndarray],
+        edges: list[tuple[str, str, str, np.ndarray, np.ndarray]],
+    ) -> "GraphProjection":
+        """Build a projection from node IDs by label and edge lists. Edges
+        with an unknown label or ID at either end are dropped, as the graph
+        would not match them.
+
+        Args:
+            nodes (dict[str, np.ndarray]): Node IDs by label
+            edges (list[tuple[str, str, str, np.ndarray, np.ndarray]]): Source
+                label, relationship type, target label, source IDs and
+                target IDs
+
+        Returns:
+            GraphProjection: Projection of the nodes and edges
+        """
+
+        label_names = sorted(nodes)
+        ids_by_label = [np.unique(np.asarray(nodes[k])) for k in label_names]
+        label_offsets = np.zeros(len(label_names) + 1, dtype=np.int64)
+        np.cumsum([len(ids) for ids in ids_by_label], out=label_offsets[1:])
+        node_ids = np.concatenate(ids_by_label or [[]]).astype(np.int64)
+        node_count = len(node_ids)
+        codes = {label: code for code, label in enumerate(label_names)}
+
+        type_names = sorted({edge[1] for edge in edges})
+        type_codes = {rel: code for code, rel in enumerate(type_names)}
+
+        src_parts, dst_parts, type_parts = [], [], []
+        for src_label, rel, dst_label, src_ids, dst_ids in edges:
+            if src_label not in codes or dst_label not in codes:
+                continue
+            src = cls._lookup(
+                ids_by_label[codes[src_label]],
+                label_offsets[codes[src_label]],
+                np.asarray(src_ids, dtype=np.int64),
+            )
+            dst = cls._lookup(
+                ids_by_label[codes[dst_label]],
+                label_offsets[codes[dst_label]],
+                np.asarray(dst_ids, dtype=np.int64),
+            )
+            found = (src >= 0) & (dst >= 0)
+            src_parts.append(src[found])
+            dst_parts.append(dst[found])
+            type_parts.append(
+                np.full(found.sum(), type_codes[rel], dtype=np.int16)
+            )
+
+        src = np.concatenate(src_parts or [[]]).astype(np.int64)
+        dst = np.concatenate(dst_parts or [[]]).astype(np.int64)
+        types = np.concatenate(type_parts or [[]]).astype(np.int16)
+
+        return cls(
+            label_names,
+            type_names,
+            label_offsets,
+            node_ids,
+            *cls._build_csr(src, dst, types, node_count),
+            *cls._build_csr(dst, src, types, node_count),
+        )
+
+    @classmethod
+    def from_services(
+        cls,
+        meta_services: dict[str, MetaService],
+        data_services: dict[str, DataService],
+    ) -> "GraphProjection":
+        """Build a projection from the tabular DB, following the node and
+        relationship definitions of the given graph services
+
+        Args:
+            meta_services (dict[str, MetaService]): Metadata services by name
+            data_services (dict[str, DataService]): Data services by name
+
+        Returns:
+            GraphProjection: Projection of the knowledge graph
+        """
+
+        nodes = {}
+        for service in meta_services.values():
+            service._get_data()
+            label = service._get_label(service.node_label)
+            nodes[label] = service.raw_df["id"].to_numpy()
+            service._release()
+
+        edges = []
+        for service in data_services.values():
+            service._get_data()
+            label = service._get_label(service.node_label)
+            # Data services re-using a metadata label create no nodes
+            if label not in nodes:
+                nodes[label] = service.raw_df["id"].to_numpy()
+            for (
+                src_label,
+                rel,
+                dst_label,
+                df,
+            ) in service._get_relationship_pairs():
+                edges.append(
+                    (
+                        src_label,
+                        rel,
+                        dst_label,
+                        df["src"].to_numpy(dtype=np.int64),
+                        df["dst"].to_numpy(dtype=np.int64),
+                    )
+                )
+            service._release()
+
+        return cls.from_edges(nodes, edges)
+
+    @classmethod
+    def from_tables(cls) -> "GraphProjection":
+        """Build a projection straight from the tabular DB, with the default
+        graph services
+
+        Returns:
+            GraphProjection: Projection of the knowledge graph
+        """
+
+        # Deferred import, as the knowledge graph writes snapshots of its
+        # projection
+        from src.kg.knowledge_graph import KnowledgeGraph
+
+        return cls.from_services(*KnowledgeGraph._build_services(None))
+
+    @classmethod
+    def from_neo4j(
+        cls,
+        query_executor: QueryExecutor,
+        namespace: str = "",
+        labels: list[str] = None,
+    ) -> "GraphProjection":
+        """Build a projection from an export of the graph DB
+
+        Args:
+            query_executor (QueryExecutor): Query executor of the graph DB
+            namespace (str, optional): Node label prefix to project, stripped
+                from the projected labels. Defaults to "".
+            labels (list[str], optional): Node labels to project, without
+                namespace. Defaults to None, for the labels of the default
+                graph services.
+
+        Returns:
+            GraphProjection: Projection of the knowledge graph
+        """
+
+        if labels is None:
+            # Deferred import, as the knowledge graph writes snapshots of its
+            # projection
+            from src.kg.knowledge_graph import KnowledgeGraph
+
+            meta_services, data_services = KnowledgeGraph._build_services(None)
+            labels = [
+                service.node_label
+                for service in [
+                    *meta_services.values(),
+                    *data_services.values(),
+                ]
+            ]
+        # Nodes are matched on the service labels explicitly, as they may
+        # carry other labels in any order, ex: value labels of supernode keys
+        labels = list(dict.fromkeys(f"{namespace}{label}" for label in labels))
+        node = f":{'|'.join(labels)}"
+        node_df = query_executor.execute_read(
+            f"""
+            MATCH (n{node})
+            UNWIND [label IN labels(n) WHERE label IN $labels] AS label
+            RETURN label, n.id AS id
+            """,
+            {"labels": labels},
+            return_df=True,
+        )
+        edge_df = query_executor.execute_read(
+            f"""
+            MATCH (a{node})-[r]->(b{node})
+            UNWIND [label IN labels(a) WHERE label IN $labels] AS srcLabel
+            UNWIND [label IN labels(b) WHERE label IN $labels] AS dstLabel
+            RETURN srcLabel, a.id AS src, type(r) AS rel, dstLabel,
+                b.id AS dst
+            """,
+            {"labels": labels},
+            return_df=True,
+        )
+
+        def _strip(labels: pd.Series) -> pd.Series:
+            # Projected labels are without the namespace prefix
+            return labels.str.slice(len(namespace))
+
+        nodes = {}
+        if not node_df.empty:
+            node_df["label"] = _strip(node_df["label"])
+            node_df = node_df.dropna()
+            for label, group in node_df.groupby("label"):
+                nodes[label] = group["id"].to_numpy(dtype=np.int64)
+
+        edges = []
+        if not edge_df.empty:
+            edge_df["srcLabel"] = _strip(edge_df["srcLabel"])
+            edge_df["dstLabel"] = _strip(edge_df["dstLabel"])
+            edge_df = edge_df.dropna()
+            for (src_label, rel, dst_label), group in edge_df.groupby(
+                ["srcLabel", "rel", "dstLabel"]
+            ):
+                edges.append(
+                    (
+                        src_label,
+                        rel,
+                        dst_label,
+                        group["src"].to_numpy(dtype=np.int64),
+                        group["dst"].to_numpy(dtype=np.int64),
+                    )
+                )
+
+        return cls.from_edges(nodes, edges)
+
+    @staticmethod
+    def _lookup(
+        sorted_ids: np.ndarray, offset: int, ids: np.ndarray
+    ) -> np.ndarray:
+        """Static helper method to map IDs to node indices within a label
+
+        Args:
+            sorted_ids (np.ndarray): Sorted node IDs of the label
+            offset (int): Index of the first node of the label
+            ids (np.ndarray): IDs to map
+
+        Returns:
+            np.ndarray: Node indices, -1 for unknown IDs
+        """
+
+        if len(sorted_ids) == 0:
+            return np.full(len(ids), -1, dtype=np.int64)
+        pos = np.searchsorted(sorted_ids, ids)
+        pos = np.minimum(pos, len(sorted_ids) - 1)
+        found = sorted_ids[pos] == ids
+
+        return np.where(found, pos + offset, -1)
+
+    def get_index(self, label: str, node_id: int) -> int:
+        """Get the node index of a node
+
+        Args:
+            label (str): Node label
+            node_id (int): Node ID
+
+        Raises:
+            KeyError: Raise error if the node is not in the projection
+
+        Returns:
+            int: Node index
+        """
+
+        if label not in self.label_names:
+            raise KeyError(f"Unknown node label {label}")
+        code = self.label_names.index(label)
+        start, end = self.label_offsets[code], self.label_offsets[code + 1]
+        index = self._lookup(
+            self.node_ids[start:end], start, np.array([node_id])
+        )[0]
+        if index < 0:
+            raise KeyError(f"Unknown {label} node {node_id}")
+
+        return int(index)
+
+    def get_node(self, index: int) -> tuple[str, int]:
+        """Get the label and ID of a node index
+
+        Args:
+            index (int): Node index
+
+        Returns:
+            tuple[str, int]: Node label and ID
+        """
+
+        label = self.label_names[self.node_labels[index]]
+        return label, int(self.node_ids[index])
+
+    def _get_type_codes(self, rel_types: list[str] = None) -> np.ndarray:
+        """Helper method to map relationship types to type codes
+
+        Args:
+            rel_types (list[str], optional): Relationship types, or None for
+                all types. Defaults to None.
+
+        Returns:
+            np.ndarray: Relationship type codes, or None for all types
+        """
+
+        if rel_types is None:
+            return None
+
+        return np.array(
+            [
+                self.type_names.index(rel)
+                for rel in rel_types
+                if rel in self.type_names
+            ],
+            dtype=np.int16,
+        )
+
+    def _expand(
+        self,
+        frontier: np.ndarray,
+        direction: str,
+        type_codes: np.ndarray = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Helper method to gather all neighbors of a frontier of nodes in
+        one vectorized pass
+
+        Args:
+            frontier (np.ndarray): Node indices to expand
+            direction (str): One of "OUT", "IN" or "BOTH"
+            type_codes (np.ndarray, optional): Relationship type codes to
+                follow, or None for all types. Defaults to None.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Neighbor node indices and the
+                frontier node each was reached from
+        """
+
+        if direction not in self.DIRECTIONS:
+            raise ValueError(f"Direction must be one of {self.DIRECTIONS}")
+
+        neighbors, parents = [], []
+        for side in ["OUT", "IN"] if direction == "BOTH" else [direction]:
+            offsets, targets, types = self.csr[side]
+            starts = offsets[frontier]
+            counts = offsets[frontier + 1] - starts
+            # Concatenate the ranges of all frontier nodes without a loop
+            positions = np.repeat(starts - np.cumsum(counts) + counts, counts)
+            positions += np.arange(counts.sum())
+            reached_from = np.repeat(frontier, counts)
+            if type_codes is not None:
+                keep = np.isin(types[positions], type_codes)
+                positions, reached_from = positions[keep], reached_from[keep]
+            neighbors.append(targets[positions])
+            parents.append(reached_from)
+
+        return np.concatenate(neighbors), np.concatenate(parents)
+
+    def neighbors(
+        self, index: int, direction: str = "BOTH", rel_types: list[str] = None
+    ) -> np.ndarray:
+        """Get the distinct neighbors of a node
+
+        Args:
+            index (int): Node index
+            direction (str, optional): One of "OUT", "IN" or "BOTH".
+                Defaults to "BOTH".
+            rel_types (list[str], optional): Relationship types to follow, or
+                None for all types. Defaults to None.
+
+        Returns:
+            np.ndarray: Sorted neighbor node indices
+        """
+
+        found, _ = self._expand(
+            np.array([index]), direction, self._get_type_codes(rel_types)
+        )
+
+        return np.unique(found)
+
+    def bfs(
+        self,
+        source: int,
+        direction: str = "BOTH",
+        max_depth: int = None,
+        rel_types: list[str] = None,
+    ) -> np.ndarray:
+        """Breadth-first search from a node, expanding a whole level at once
+
+        Args:
+            source (int): Node index to start from
+            direction (str, optional): One of "OUT", "IN" or "BOTH".
+                Defaults to "BOTH".
+            max_depth (int, optional): Maximum number of hops, or None for no
+                limit. Defaults to None.
+            rel_types (list[str], optional): Relationship types to follow, or
+                None for all types. Defaults to None.
+
+        Returns:
+            np.ndarray: Hop distance of every node, -1 if unreachable
+        """
+
+        type_codes = self._get_type_codes(rel_types)
+        distances = np.full(self.node_count, -1, dtype=np.int32)
+        distances[source] = 0
+        frontier = np.array([source])
+        depth = 0
+
+        while len(frontier) and (max_depth is None or depth < max_depth):
+            depth += 1
+            found, _ = self._expand(frontier, direction, type_codes)
+            found = np.unique(found)
+            frontier = found[distances[found] < 0]
+            distances[frontier] = depth
+
+        return distances
+
+    def k_hop(
+        self,
+        source: int,
+        k: int,
+        direction: str = "BOTH",
+        rel_types: list[str] = None,
+    ) -> np.ndarray:
+        """Get the neighborhood of a node within k hops
+
+        Args:
+            source (int): Node index
+            k (int): Maximum number of hops
+            direction (str, optional): One of "OUT", "IN" or "BOTH".
+                Defaults to "BOTH".
+            rel_types (list[str], optional): Relationship types to follow, or
+                None for all types. Defaults to None.
+
+        Returns:
+            np.ndarray: Sorted node indices within k hops, without the source
+        """
+
+        distances = self.bfs(source, direction, k, rel_types)
+
+        return np.flatnonzero(distances > 0)
+
+    def shortest_path(
+        self,
+        source: int,
+        target: int,
+        direction: str = "BOTH",
+        max_depth: int = None,
+        rel_types: list[str] = None,
+    ) -> list[int] | None:
+        """Bidirectional breadth-first search for a shortest path, always
+        expanding the smaller of the two frontiers
+
+        Args:
+            source (int): Node index to start from
+            target (int): Node index to reach
+            direction (str, optional): One of "OUT", "IN" or "BOTH", as seen
+                from the source. Defaults to "BOTH".
+            max_depth (int, optional): Maximum path length, or None for no
+                limit. Defaults to None.
+            rel_types (list[str], optional): Relationship types to follow, or
+                None for all types. Defaults to None.
+
+        Returns:
+            list[int] | None: Node indices along the path, or None if there is
+                no path
+        """
+
+        if source == target:
+            return [source]
+
+        type_codes = self._get_type_codes(rel_types)
+        reverse = {"OUT": "IN", "IN": "OUT", "BOTH": "BOTH"}[direction]
+        # Parent and hop distance of each node visited by the forward and
+        # backward searches, -1 if unvisited
+        parents, distances = [], []
+        for start in [source, target]:
+            parents.append(np.full(self.node_count, -1, dtype=np.int64))
+            distances.append(np.full(self.node_count, -1, dtype=np.int32))
+            parents[-1][start] = start
+            distances[-1][start] = 0
+        frontiers = [np.array([source]), np.array([target])]
+        directions = [direction, reverse]
+        depths = [0, 0]
+
+        while len(frontiers[0]) and len(frontiers[1]):
+            if max_depth is not None and sum(depths) >= max_depth:
+                return None
+            side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            depths[side] += 1
+            found, reached_from = self._expand(
+                frontiers[side], directions[side], type_codes
+            )
+            new = parents[side][found] < 0
+            found, first = np.unique(found[new], return_index=True)
+            parents[side][found] = reached_from[new][first]
+            distances[side][found] = depths[side]
+            frontiers[side] = found
+
+            # Stop at the first level where both searches meet, joining at
+            # the node closest to the other end
+            met = found[distances[1 - side][found] >= 0]
+            if len(met):
+                meeting = met[np.argmin(distances[1 - side][met])]
+                return self._join_paths(parents, int(meeting))
+
+        return None
+
+    @staticmethod
+    def _join_paths(parents: list[np.ndarray], meeting: int) -> list[int]:
+        """Static helper method to join the two halves of a bidirectional
+        search at their meeting node
+
+        Args:
+            parents (list[np.ndarray]): Parents of the forward and backward
+                searches
+            meeting (int): Node index where both searches meet
+
+        Returns:
+            list[int]: Node indices from the source to the target
+        """
+
+        halves = []
+        for side in [0, 1]:
+            path, node = [], meeting
+            while parents[side][node] != node:
+                node = int(parents[side][node])
+                path.append(node)
+            halves.append(path)
+
+        return halves[0][::-1] + [meeting] + halves[1]
@@ -0,0 +1,378 @@
+import logging
+import os
+import re
+import threading
+from datetime import datetime, timezone
+from typing import Callable
+
+from src.db.change_feed import ChangeFeed
+from src.db.stats_catalog import StatsCatalog
+from src.kg.db.connection import Connection
+from src.kg.db.throttle import WriteThrottle
+from src.kg.knowledge_graph import KnowledgeGraph
+
+
+class GraphRebuilder:
+    """Blue/green rebuild of the knowledge graph.
+
+    On multi-database editions, the graph is loaded into a fresh staging
+    database, verified, and the alias read by query consumers is atomically
+    repointed to it. On single-database editions, the graph is loaded under
+    namespaced node labels (ex: `B20250112T000000_Project`) and a marker node
+    recording the active namespace is atomically updated. Readers resolve
+    labels through `get_active_label()`, and consumers their database and
+    namespace through `get_graph_resolver()`. In both modes the previous
+    graph is dropped in a background thread.
+
+    Builds run the shared post-build hook of `KnowledgeGraph.finalize`, and
+    are published once swapped: the continuous updater resumes from the
+    changes logged before the build, and the graph generation is bumped in
+    the same transaction, so that readers caching on the graph version see
+    the new graph and consumers re-resolve it.
+    """
+
+    def __init__(
+        self,
+        conn: Connection,
+        alias: str = "gcf",
+        multi_database: bool = True,
+        default_database: str = "neo4j",
+        throttle: WriteThrottle = None,
+    ) -> None:
+
+        # Database names may only contain ASCII letters, digits, dots and
+        # dashes, so validate the alias before using it as an identifier
+        if not re.fullmatch(r"[a-z][a-z0-9.\-]*", alias):
+            raise ValueError(f"Invalid graph alias: {alias}")
+        self.conn = conn
+        self.alias = alias
+        self.multi_database = multi_database
+        # Database holding the marker node on single-database editions
+        self.default_database = default_database
+        self.throttle = throttle
+        # Background thread dropping the previous graph
+        self.drop_thread = None
+
+    def _get_build_name(self) -> str:
+        """Helper method to generate a unique name for the staging graph
+
+        Returns:
+            str: Staging database name, or label namespace
+        """
+
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        if self.multi_database:
+            return f"{self.alias}-{stamp.lower()}"
+        return f"B{stamp}_"
+
+    def _run_system(self, query: str, params: dict = None) -> list[dict]:
+        """Helper method to run an administration command on the system DB
+
+        Args:
+            query (str): Administration command
+            params (dict, optional): Parameters. Defaults to None.
+
+        Returns:
+            list[dict]: Returned records
+        """
+
+        return self.conn.execute_write(
+            lambda tx: tx.run(query, params or {}).data(), "system"
+        )
+
+    def get_active_target(self) -> str:
+        """Get the database or label namespace readers currently use
+
+        Returns:
+            str: Database name or label namespace, None if never swapped
+        """
+
+        if self.multi_database:
+            records = self._run_system(
+                "SHOW ALIASES FOR DATABASE YIELD name, database "
+                "WHERE name = $alias RETURN database",
+                {"alias": self.alias},
+            )
+            return records[0]["database"] if records else None
+
+        records = self.conn.execute_read(
+            lambda tx: tx.run(
+                "MATCH (m:GraphAlias {name: $alias}) RETURN m.namespace AS ns",
+                alias=self.alias,
+            ).data(),
+            self.default_database,
+        )
+
+        return records[0]["ns"] if records else None
+
+    def get_active_graph(self) -> tuple[str, str]:
+        """Get the database and label namespace consumers of the graph
+        (readers and the continuous updater) should connect to. On
+        multi-database editions this is the alias itself once created, which
+        follows swaps without re-resolving.
+
+        Returns:
+            tuple[str, str]: Database name and label namespace
+        """
+
+        target = self.get_active_target()
+        if self.multi_database:
+            return (self.alias if target else self.default_database), ""
+
+        return self.default_database, target or ""
+
+    def get_active_label(self, label: str) -> str:
+        """Resolve a node label to the label of the active graph, for readers
+        of a label-namespaced graph on single-database editions
+
+        Args:
+            label (str): Node label (ex: Project)
+
+        Returns:
+            str: Node label within the active namespace
+        """
+
+        return f"{self.get_active_target() or ''}{label}"
+
+    def _create_staging_database(self, database: str) -> bool:
+        """Helper method to create the staging database and wait until it is
+        online
+
+        Args:
+            database (str): Staging database name
+
+        Returns:
+            bool: True after completion
+        """
+
+        self._run_system(f"CREATE DATABASE `{database}` IF NOT EXISTS WAIT")
+        logging.info(f"Created staging database {database}")
+
+        return True
+
+    def _build(self, target: str) -> KnowledgeGraph:
+        """Helper method to load the full graph into the staging target
+
+        Args:
+            target (str): Staging database name, or label namespace
+
+        Returns:
+            KnowledgeGraph: Knowledge graph of the staging target
+        """
+
+        if self.multi_database:
+            self._create_staging_database(target)
+            kg = KnowledgeGraph(
+                self.conn, throttle=self.throttle, database=target
+            )
+        else:
+            kg = KnowledgeGraph(
+                self.conn,
+                throttle=self.throttle,
+                database=self.default_database,
+                namespace=target,
+            )
+        kg.initialize()
+        kg.populate()
+        # Published after the swap, once readers use the staging target
+        kg.finalize()
+
+        return kg
+
+    def _verify(self, kg: KnowledgeGraph) -> bool:
+        """Helper method to check the staging graph node counts by label and
+        relationship counts by pattern against the tabular DB before
+        swapping
+
+        Args:
+            kg (KnowledgeGraph): Knowledge graph of the staging target
+
+        Raises:
+            RuntimeError: Raises error if any count does not match
+
+        Returns:
+            bool: True if all counts match
+        """
+
+        mismatches = {}
+        for expected, actual in [
+            (kg.count_expected_nodes(), kg.count_nodes()),
+            (kg.count_expected_relationships(), kg.count_relationships()),
+        ]:
+            mismatches.update(
+                {
+                    key: (count, actual.get(key))
+                    for key, count in expected.items()
+                    if actual.get(key) != count
+                }
+            )
+        if mismatches:
+            raise RuntimeError(
+                f"Staging graph counts do not match (expected, actual): "
+                f"{mismatches}"
+            )
+
+        return True
+
+    def _swap(self, target: str) -> bool:
+        """Helper method to atomically move readers to the staging target
+
+        Args:
+            target (str): Staging database name, or label namespace
+
+        Returns:
+            bool: True after completion
+        """
+
+        if self.multi_database:
+            self._run_system(
+                f"CREATE OR REPLACE ALIAS `{self.alias}` "
+                f"FOR DATABASE `{target}`"
+            )
+        else:
+            self.conn.execute_write(
+                lambda tx: tx.run(
+                    """
+                    MERGE (m:GraphAlias {name: $alias})
+                    SET m.namespace = $namespace, m.swappedAt = datetime()
+                    """,
+                    alias=self.alias,
+                    namespace=target,
+                ).consume(),
+                self.default_database,
+            )
+        logging.info(f"Swapped graph alias {self.alias} to {target}")
+
+        return True
+
+    def _drop(self, target: str, services: dict) -> bool:
+        """Helper method to drop a previous graph, with its statistics and,
+        in namespace mode, its constraints and node indexes
+
+        Args:
+            target (str): Previous database name, or label namespace
+            services (dict): Services by name
+
+        Returns:
+            bool: True after completion
+        """
+
+        labels = sorted({service.node_label for service in services.values()})
+        if self.multi_database:
+            self._run_system(f"DROP DATABASE `{target}` IF EXISTS")
+        else:
+            # The statistics node is written by the build, not the services
+            for label in [*labels, "GraphStatistics"]:
+                # Batched deletes need an implicit transaction
+                with self.conn.session(self.default_database) as session:
+                    session.run(f"""
+                        MATCH (n:{target}{label})
+                        CALL {{ WITH n DETACH DELETE n }}
+                        IN TRANSACTIONS OF 10000 ROWS
+                        """).consume()
+            # Schema writes are executed one by one
+            for query in KnowledgeGraph._get_drop_queries(services, target):
+                with self.conn.session(self.default_database) as session:
+                    session.run(query).consume()
+            StatsCatalog().write(target, labels, {})
+        logging.info(f"Dropped previous graph {target}")
+
+        return True
+
+    def _drop_in_background(self, target: str, services: dict) -> bool:
+        """Helper method to drop a previous graph without blocking readers or
+        the caller
+
+        Args:
+            target (str): Previous database name, or label namespace
+            services (dict): Services by name
+
+        Returns:
+            bool: True after the drop is started
+        """
+
+        def _run() -> None:
+            try:
+                self._drop(target, services)
+            except Exception as e:
+                logging.error(f"Failed to drop previous graph {target}: {e}")
+
+        self.drop_thread = threading.Thread(target=_run, name="graph-drop")
+        self.drop_thread.start()
+
+        return True
+
+    def rebuild(self) -> bool:
+        """Main method to rebuild the graph into a staging target, verify it,
+        swap readers over and drop the previous graph in the background
+
+        Returns:
+            bool: True after completion
+        """
+
+        previous = self.get_active_target()
+        target = self._get_build_name()
+        logging.info(f"Rebuilding graph {self.alias} into {target}")
+
+        # Changes logged before the tables are read are covered by the build
+        feed = ChangeFeed()
+        feed.install()
+        head = feed.get_head()
+
+        kg = self._build(target)
+        self._verify(kg)
+        self._swap(target)
+        # Consumers re-resolve the active graph on the new generation, and
+        # resume from the build head
+        kg.publish(head, bump=True)
+
+        # Never drop the default database or the un-namespaced graph, which
+        # predate the first blue/green rebuild
+        if previous and previous != self.default_database:
+            self._drop_in_background(
+                previous, {**kg.meta_services, **kg.data_services}
+            )
+
+        return True
+
+
+def get_graph_resolver(
+    conn: Connection,
+    database: str = None,
+    namespace: str = None,
+    alias: str = "gcf",
+) -> Callable[[], tuple[str, str]]:
+    """Get a resolver of the graph a consumer should use, following
+    blue/green rebuilds. The edition is read from the `MULTI_DATABASE`
+    environment variable, as for rebuilds.
+
+    Args:
+        conn (Connection): Established connection
+        database (str, optional): Database name overriding the active one.
+            Defaults to None.
+        namespace (str, optional): Label namespace overriding the active one.
+            Defaults to None.
+        alias (str, optional): Graph alias. Defaults to "gcf".
+
+    Returns:
+        Callable[[], tuple[str, str]]: Resolver of the database name and
+            label namespace, to call again when the graph generation changes
+    """
+
+    rebuilder = GraphRebuilder(
+        conn,
+        alias=alias,
+        multi_database=os.environ.get("MULTI_DATABASE", "true") == "true",
+    )
+
+    def _resolve() -> tuple[str, str]:
+        if database is not None and namespace is not None:
+            return database, namespace
+        active_database, active_namespace = rebuilder.get_active_graph()
+
+        return (
+            active_database if database is None else database,
+            active_namespace if namespace is None else namespace,
+        )
+
+    return _resolve
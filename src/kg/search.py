@@ -0,0 +1,111 @@
+from src.db.search_index import SearchIndex
+from src.kg.knowledge_graph import KnowledgeGraph
+
+
+class FullTextSearch:
+    """Ranked, paginated search over the names and codes of projects,
+    entities and delivery partners.
+
+    The same query can be answered by the SQLite FTS5 mirror, which needs no
+    graph connection and serves type-ahead lookups, or by the Neo4j
+    full-text index created with the knowledge graph. Both backends match
+    every token of the query as a prefix and return results in the same
+    shape, best match first. Scores are BM25 based on both backends but are
+    not comparable across them.
+    """
+
+    BACKENDS = ("sqlite", "neo4j")
+
+    def __init__(
+        self, kg: KnowledgeGraph = None, backend: str = "sqlite"
+    ) -> None:
+
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Backend must be one of {self.BACKENDS}")
+        if backend == "neo4j" and kg is None:
+            raise ValueError("The neo4j backend needs a knowledge graph")
+
+        self.kg = kg
+        self.backend = backend
+        self.search_index = SearchIndex()
+        self.labels = [label for label, *_ in SearchIndex.SOURCES.values()]
+
+    def _search_graph(
+        self, tokens: list[str], labels: list[str], limit: int, offset: int
+    ) -> list[dict]:
+        """Helper method to search the Neo4j full-text index
+
+        Args:
+            tokens (list[str]): Query tokens, free of Lucene syntax
+            labels (list[str]): Node labels to search
+            limit (int): Page size
+            offset (int): Number of results to skip
+
+        Returns:
+            list[dict]: Results, best match first
+        """
+
+        namespace = self.kg.namespace
+        query = """
+        CALL db.index.fulltext.queryNodes($index, $search)
+        YIELD node, score
+        WITH node, score,
+            [label IN labels(node) WHERE label IN $labels][0] AS label
+        WHERE label IS NOT NULL
+        RETURN label, node.id AS id, node.name AS name,
+            coalesce(node.ref, node.code) AS code, score
+        ORDER BY score DESC, id
+        SKIP $offset LIMIT $limit
+        """
+        params = {
+            "index": self.kg._get_search_index_name(namespace),
+            "search": " AND ".join(f"{token}*" for token in tokens),
+            "labels": [f"{namespace}{label}" for label in labels],
+            "offset": offset,
+            "limit": limit,
+        }
+        records = self.kg.query_executor.execute_read(query, params)
+
+        # Strip the namespace to match the SQLite results
+        for record in records:
+            record["label"] = record["label"][len(namespace) :]
+
+        return records
+
+    def search(
+        self,
+        query: str,
+        labels: list[str] = None,
+        limit: int = 10,
+        offset: int = 0,
+    ) -> list[dict]:
+        """Search names and codes starting with every token of the query
+
+        Args:
+            query (str): Search query as typed
+            labels (list[str], optional): Node labels to search. Defaults to
+                all searchable labels.
+            limit (int, optional): Page size. Defaults to 10.
+            offset (int, optional): Number of results to skip. Defaults to 0.
+
+        Raises:
+            ValueError: Raise error if any label is not searchable
+
+        Returns:
+            list[dict]: Results with `label`, `id`, `name`, `code` and
+                `score`, best match first
+        """
+
+        labels = labels or self.labels
+        unknown = set(labels) - set(self.labels)
+        if unknown:
+            raise ValueError(f"Labels {unknown} are not searchable")
+
+        if self.backend == "sqlite":
+            return self.search_index.search(query, labels, limit, offset)
+
+        tokens = SearchIndex.tokenize(query)
+        if not tokens:
+            return []
+
+        return self._search_graph(tokens, labels, limit, offset)
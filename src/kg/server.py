@@ -0,0 +1,548 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Callable, Iterator
+from urllib.parse import parse_qs, urlsplit
+
+from neo4j import READ_ACCESS
+from neo4j.exceptions import Neo4jError, ServiceUnavailable
+
+from src.db.change_feed import ChangeFeed
+from src.kg.db.connection import Connection
+from src.kg.db.query_executor import QueryExecutor
+
+
+def get_query_catalog(ns: str = "") -> dict:
+    """Get the catalog of named, parameterized read queries served over
+    HTTP. Query texts are fixed per namespace, so that the graph DB reuses
+    their cached plans across parameters.
+
+    Args:
+        ns (str, optional): Node label namespace. Defaults to "".
+
+    Returns:
+        dict: Query specs by name, each with a `description`, the Cypher
+            `query`, its `params` specs (`type`, and `required`, `default`,
+            `max` or `choices`) and whether to `stream` the records
+    """
+
+    limit = {"type": int, "default": 1000, "max": 100_000}
+
+    return {
+        "country_subgraph": {
+            "description": "Nodes related to a country, as in the README",
+            "query": f"""
+                MATCH (:{ns}Region)<-[:IS_IN]-(:{ns}Country {{iso3: $iso3}})
+                    <-[*]-(n)
+                WITH DISTINCT n
+                RETURN labels(n) AS labels, properties(n) AS properties
+                LIMIT $limit
+            """,
+            "params": {
+                "iso3": {"type": str, "required": True},
+                "limit": limit,
+            },
+            "stream": True,
+        },
+        "entity_funding": {
+            "description": "Projects funded by an entity, largest first",
+            "query": f"""
+                MATCH (:{ns}Entity {{code: $code}})-[f:FUNDS]->(p:{ns}Project)
+                RETURN p.ref AS ref, p.name AS name,
+                    f.financingUsd AS financingUsd
+                ORDER BY financingUsd DESC
+                LIMIT $limit
+            """,
+            "params": {
+                "code": {"type": str, "required": True},
+                "limit": limit,
+            },
+            "stream": False,
+        },
+        "shortest_path": {
+            "description": "Shortest path between two countries",
+            "query": f"""
+                MATCH p = shortestPath(
+                    (:{ns}Country {{iso3: $source}})-[*..10]-
+                    (:{ns}Country {{iso3: $target}})
+                )
+                RETURN
+                    [n IN nodes(p) | {{
+                        labels: labels(n), properties: properties(n)
+                    }}] AS nodes,
+                    [r IN relationships(p) | type(r)] AS relationships
+            """,
+            "params": {
+                "source": {"type": str, "required": True},
+                "target": {"type": str, "required": True},
+            },
+            "stream": False,
+        },
+        "group_portfolio": {
+            "description": "Portfolio rollups of the LDC or SIDS countries",
+            "query": f"""
+                MATCH (c:{ns}Country)
+                WHERE CASE $group
+                    WHEN "LDC" THEN c.isLdc
+                    WHEN "SIDS" THEN c.isSids
+                END
+                RETURN c.iso3 AS iso3, c.name AS name,
+                    c.projectCount AS projectCount,
+                    c.projectFinancingUsd AS projectFinancingUsd,
+                    c.readinessCount AS readinessCount,
+                    c.readinessFinancingUsd AS readinessFinancingUsd
+                ORDER BY projectFinancingUsd DESC
+            """,
+            "params": {
+                "group": {
+                    "type": str,
+                    "required": True,
+                    "choices": ["LDC", "SIDS"],
+                },
+            },
+            "stream": False,
+        },
+    }
+
+
+class QueryService:
+    """Executes catalog queries for the HTTP server, with ETags tied to the
+    graph version and a response cache.
+
+    The graph version combines the change log offset committed by the graph
+    builder and updater with the generation bumped by changes bypassing the
+    log, such as rollup refreshes and rebuild swaps (see `ChangeFeed`), so
+    an ETag changes exactly when the graph was updated. Conditional requests
+    with a current ETag are answered without querying the graph. Buffered
+    responses are kept in an LRU cache by query and parameters, and streamed
+    responses, meant for large results, are written record by record from
+    the driver result.
+
+    With a `resolver` of the active graph (see `get_graph_resolver`), the
+    service follows blue/green rebuilds: whenever the graph version
+    changes, it re-resolves the database and label namespace to read, and
+    rebuilds the catalog of the namespace.
+    """
+
+    def __init__(
+        self,
+        conn: Connection,
+        catalog: dict,
+        database: str = "neo4j",
+        version_func: Callable[[], str] = None,
+        version_ttl: float = 1.0,
+        cache_size: int = 256,
+        resolver: Callable[[], tuple[str, str]] = None,
+    ) -> None:
+
+        self.conn = conn
+        self.catalog = catalog
+        self.database = database
+        self.query_executor = QueryExecutor(conn, database)
+        self.resolver = resolver
+        # Namespace of the catalog, unknown until resolved
+        self.namespace = None
+        self.version_func = version_func or self._get_graph_version
+        self.version_ttl = version_ttl
+        self.cache_size = cache_size
+        # Cached graph version and when it was read
+        self.version = None
+        self.version_read_at = 0.0
+        # Encoded responses by query and parameters, in LRU order
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _get_graph_version() -> str:
+        """Static helper method to read the graph version from the tabular DB
+
+        Returns:
+            str: Change log offset and generation, ex: "1520.3"
+        """
+
+        feed = ChangeFeed()
+
+        return f"{feed.get_offset('graph')}.{feed.get_generation('graph')}"
+
+    def describe(self) -> list[dict]:
+        """Describe the catalog queries and their parameters
+
+        Returns:
+            list[dict]: Name, description and parameters of each query
+        """
+
+        return [
+            {
+                "name": name,
+                "description": spec["description"],
+                "params": {
+                    param: {**rules, "type": rules["type"].__name__}
+                    for param, rules in spec["params"].items()
+                },
+            }
+            for name, spec in self.catalog.items()
+        ]
+
+    def parse_params(self, name: str, args: dict[str, list[str]]) -> dict:
+        """Validate and convert the query string arguments of a query
+
+        Args:
+            name (str): Catalog query name
+            args (dict[str, list[str]]): Query string arguments
+
+        Raises:
+            KeyError: Raise error if the query is not in the catalog
+            ValueError: Raise error if the arguments are invalid
+
+        Returns:
+            dict: Query parameters
+        """
+
+        specs = self.catalog[name]["params"]
+        unknown = set(args) - set(specs)
+        if unknown:
+            raise ValueError(f"Unknown parameters: {sorted(unknown)}")
+
+        params = {}
+        for param, rules in specs.items():
+            if param not in args:
+                if rules.get("required"):
+                    raise ValueError(f"Missing parameter: {param}")
+                params[param] = rules.get("default")
+                continue
+            try:
+                value = rules["type"](args[param][-1])
+            except ValueError:
+                raise ValueError(
+                    f"Parameter {param} must be {rules['type'].__name__}"
+                )
+            if "max" in rules and not 0 <= value <= rules["max"]:
+                raise ValueError(
+                    f"Parameter {param} must be between 0 and {rules['max']}"
+                )
+            if "choices" in rules and value not in rules["choices"]:
+                raise ValueError(
+                    f"Parameter {param} must be one of {rules['choices']}"
+                )
+            params[param] = value
+
+        return params
+
+    def get_version(self) -> str:
+        """Get the graph version, re-read at most once per `version_ttl`
+
+        Returns:
+            str: Graph version
+        """
+
+        with self.lock:
+            now = time.monotonic()
+            if self.version is None or now - self.version_read_at > (
+                self.version_ttl
+            ):
+                version = self.version_func()
+                if version != self.version and self.resolver is not None:
+                    self._resolve()
+                self.version = version
+                self.version_read_at = now
+
+            return self.version
+
+    def _resolve(self) -> bool:
+        """Helper method to re-resolve the graph to read, and switch the
+        executor and catalog over if it changed, ex: after a rebuild swap
+
+        Returns:
+            bool: True after completion
+        """
+
+        database, namespace = self.resolver()
+        if database != self.database:
+            self.query_executor = QueryExecutor(self.conn, database)
+            self.database = database
+        if namespace != self.namespace:
+            self.catalog = get_query_catalog(namespace)
+            self.namespace = namespace
+
+        return True
+
+    @staticmethod
+    def get_etag(version: str, name: str, params: dict) -> str:
+        """Static helper method to get the ETag of a query response
+
+        Args:
+            version (str): Graph version
+            name (str): Catalog query name
+            params (dict): Query parameters
+
+        Returns:
+            str: Quoted strong ETag
+        """
+
+        key = json.dumps([version, name, params], sort_keys=True)
+        digest = hashlib.sha1(key.encode()).hexdigest()[:20]
+
+        return f'"{digest}"'
+
+    @staticmethod
+    def _encode(record: dict) -> bytes:
+        """Static helper method to encode a record, with temporal and other
+        driver types as strings
+
+        Args:
+            record (dict): Record of a query result
+
+        Returns:
+            bytes: JSON of the record
+        """
+
+        return json.dumps(record, default=str).encode()
+
+    def fetch(self, name: str, params: dict, version: str) -> bytes:
+        """Get the buffered response of a query, from the cache if the graph
+        version is unchanged
+
+        Args:
+            name (str): Catalog query name
+            params (dict): Query parameters
+            version (str): Graph version
+
+        Returns:
+            bytes: JSON response body
+        """
+
+        key = json.dumps([name, params], sort_keys=True)
+        with self.lock:
+            cached = self.cache.get(key)
+            if cached and cached[0] == version:
+                self.cache.move_to_end(key)
+                return cached[1]
+
+        records = self.query_executor.execute_read(
+            self.catalog[name]["query"], params
+        )
+        body = b"".join(self.stream_records(name, version, iter(records)))
+
+        with self.lock:
+            self.cache[key] = (version, body)
+            self.cache.move_to_end(key)
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+        return body
+
+    def stream_records(
+        self, name: str, version: str, records: Iterator[dict]
+    ) -> Iterator[bytes]:
+        """Encode records into a JSON response body piece by piece
+
+        Args:
+            name (str): Catalog query name
+            version (str): Graph version
+            records (Iterator[dict]): Records of the query result
+
+        Yields:
+            Iterator[bytes]: Pieces of the JSON response body
+        """
+
+        head = {"query": name, "version": version}
+        yield json.dumps(head)[:-1].encode() + b', "records": ['
+        for index, record in enumerate(records):
+            yield (b", " if index else b"") + self._encode(record)
+        yield b"]}"
+
+    def stream(self, name: str, params: dict, version: str) -> Iterator[bytes]:
+        """Run a query in a session and stream its response body as the
+        records arrive from the graph DB, without buffering the result
+
+        Args:
+            name (str): Catalog query name
+            params (dict): Query parameters
+            version (str): Graph version
+
+        Yields:
+            Iterator[bytes]: Pieces of the JSON response body
+        """
+
+        with self.conn.session(self.database, READ_ACCESS) as session:
+            result = session.run(self.catalog[name]["query"], params)
+            records = (record.data() for record in result)
+            yield from self.stream_records(name, version, records)
+
+
+class QueryRequestHandler(BaseHTTPRequestHandler):
+    """Read-only handler of the query endpoints:
+
+    - `GET /health`: Status and graph version
+    - `GET /queries`: Catalog queries and their parameters
+    - `GET /queries/<name>?<param>=<value>`: Query results as JSON, with an
+      ETag and 304 responses to matching `If-None-Match` headers
+    """
+
+    protocol_version = "HTTP/1.1"
+    # Seconds before closing idle keep-alive connections, freeing the worker
+    timeout = 5
+
+    def log_message(self, format: str, *args) -> None:
+        logging.debug(f"{self.address_string()} {format % args}")
+
+    def _send_json(
+        self, status: int, body: dict | bytes, headers: dict = None
+    ) -> None:
+        """Helper method to send a complete JSON response
+
+        Args:
+            status (int): HTTP status code
+            body (dict | bytes): Response body, encoded if not bytes
+            headers (dict, optional): Additional headers. Defaults to None.
+        """
+
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for header, value in (headers or {}).items():
+            self.send_header(header, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_stream(self, pieces: Iterator[bytes], headers: dict) -> None:
+        """Helper method to send a JSON response with chunked transfer
+        encoding. Errors after the headers are sent abort the connection,
+        so that clients see an incomplete response rather than a truncated
+        valid one.
+
+        Args:
+            pieces (Iterator[bytes]): Pieces of the response body
+            headers (dict): Additional headers
+        """
+
+        # Run the query up to its first piece before committing to a 200
+        pieces = iter(pieces)
+        first = next(pieces)
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        for header, value in headers.items():
+            self.send_header(header, value)
+        self.end_headers()
+
+        buffer = [first]
+        size = len(first)
+        try:
+            for piece in pieces:
+                buffer.append(piece)
+                size += len(piece)
+                # Coalesce small records into chunks of about 64 KiB
+                if size >= 65536:
+                    self._write_chunk(b"".join(buffer))
+                    buffer, size = [], 0
+        except Exception as e:
+            logging.error(f"Aborted streaming {self.path}: {e}")
+            self.close_connection = True
+            return
+        if buffer:
+            self._write_chunk(b"".join(buffer))
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, data: bytes) -> None:
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+
+    def do_GET(self) -> None:
+
+        service: QueryService = self.server.service
+        url = urlsplit(self.path)
+        parts = [part for part in url.path.split("/") if part]
+
+        if parts == ["health"]:
+            self._send_json(
+                200, {"status": "ok", "version": service.get_version()}
+            )
+            return
+        if parts == ["queries"]:
+            self._send_json(200, {"queries": service.describe()})
+            return
+        if len(parts) != 2 or parts[0] != "queries":
+            self._send_json(404, {"error": "Not found"})
+            return
+
+        name = parts[1]
+        if name not in service.catalog:
+            self._send_json(404, {"error": f"Unknown query {name}"})
+            return
+        try:
+            params = service.parse_params(name, parse_qs(url.query))
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+            return
+
+        version = service.get_version()
+        etag = service.get_etag(version, name, params)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        matches = self.headers.get("If-None-Match", "").split(",")
+        if etag in [match.strip() for match in matches]:
+            self.send_response(304)
+            for header, value in headers.items():
+                self.send_header(header, value)
+            self.end_headers()
+            return
+
+        try:
+            if service.catalog[name]["stream"]:
+                self._send_stream(
+                    service.stream(name, params, version), headers
+                )
+            else:
+                self._send_json(
+                    200, service.fetch(name, params, version), headers
+                )
+        except (Neo4jError, ServiceUnavailable) as e:
+            logging.error(f"Query {name} failed: {e}")
+            self._send_json(503, {"error": "Graph DB unavailable"})
+
+    def _send_read_only(self) -> None:
+        self._send_json(405, {"error": "Read-only"}, {"Allow": "GET"})
+
+    do_POST = do_PUT = do_PATCH = do_DELETE = _send_read_only
+
+
+class QueryServer(HTTPServer):
+    """HTTP server handling requests on a fixed pool of worker threads, so
+    that concurrency towards the graph DB is bounded by the pool size"""
+
+    # Let the server restart on the same port right away
+    allow_reuse_address = True
+
+    def __init__(
+        self, address: tuple[str, int], service: QueryService, workers: int
+    ) -> None:
+
+        super().__init__(address, QueryRequestHandler)
+        self.service = service
+        self.pool = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="query-worker"
+        )
+
+    def process_request(self, request, client_address) -> None:
+        self.pool.submit(self._process_request_thread, request, client_address)
+
+    def _process_request_thread(self, request, client_address) -> None:
+
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self) -> None:
+
+        super().server_close()
+        self.pool.shutdown(wait=True)
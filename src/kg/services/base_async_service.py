@@ -0,0 +1,129 @@
+import asyncio
+
+from src.kg.db.async_query_executor import AsyncQueryExecutor
+from src.kg.services.base_data_service import DataService
+from src.kg.services.base_meta_service import MetaService
+
+
+class AsyncService:
+
+    def __init__(
+        self,
+        service: MetaService | DataService,
+        query_executor: AsyncQueryExecutor,
+    ) -> None:
+
+        # Sync service holding the node definition and data processing
+        self.service = service
+        self.query_executor = query_executor
+        self.node_label = service.node_label
+
+    async def _execute(self, writes: list[tuple[str, list[dict]]]) -> bool:
+        """Helper coroutine to run a set of independent writes concurrently
+
+        Args:
+            writes (list[tuple[str, list[dict]]]): Pairs of Cypher query and
+                records
+
+        Returns:
+            bool: True if all writes are successful, False if not
+        """
+
+        results = await asyncio.gather(
+            *(
+                self.query_executor.execute_write(query, data)
+                for query, data in writes
+            )
+        )
+
+        return all(results)
+
+
+class AsyncMetaService(AsyncService):
+
+    def __init__(
+        self, service: MetaService, query_executor: AsyncQueryExecutor
+    ) -> None:
+
+        super().__init__(service, query_executor)
+
+    async def populate(self) -> bool:
+        """Main high-level coroutine to populate the graph with the nodes.
+        The blocking SQLite read and parameter building run in a worker
+        thread so they overlap with other services' Bolt I/O.
+
+        Returns:
+            bool: True if successful, False if not
+        """
+
+        writes = await asyncio.to_thread(self.service.prepare)
+
+        return await self._execute(writes)
+
+
+class AsyncDataService(AsyncService):
+
+    def __init__(
+        self, service: DataService, query_executor: AsyncQueryExecutor
+    ) -> None:
+
+        super().__init__(service, query_executor)
+        # Instance variables to store the prepared writes
+        self.node_writes = None
+        self.relationship_writes = None
+
+    def _prepare(self) -> bool:
+        """Blocking helper to retrieve and process the tabular data and build
+        the node and relationship writes separately
+
+        Returns:
+            bool: True after completion
+        """
+
+        self.node_writes, self.relationship_writes = (
+            self.service.prepare_writes()
+        )
+
+        return True
+
+    async def prepare(self) -> bool:
+        """Coroutine to prepare the writes in a worker thread
+
+        Returns:
+            bool: True after completion
+        """
+
+        return await asyncio.to_thread(self._prepare)
+
+    async def write_nodes(self) -> bool:
+        """Coroutine to write the prepared data nodes
+
+        Returns:
+            bool: True if successful, False if not
+        """
+
+        return await self._execute(self.node_writes)
+
+    async def write_relationships(self) -> bool:
+        """Coroutine to write the prepared relationships, which requires the
+        nodes at both ends to already exist
+
+        Returns:
+            bool: True if successful, False if not
+        """
+
+        return await self._execute(self.relationship_writes)
+
+    async def populate(self) -> bool:
+        """Main high-level coroutine to populate the graph with the nodes
+
+        Returns:
+            bool: True if successful, False if not
+        """
+
+        await self.prepare()
+
+        nodes = await self.write_nodes()
+        relationships = await self.write_relationships()
+
+        return nodes and relationships
@@ -1,39 +1,62 @@
+import json
+import re
 from typing import Type
 
-from pandas import DataFrame
-from neo4j import Session
+from pandas import DataFrame, notna
+from sqlalchemy import select
 from sqlalchemy.ext.declarative import DeclarativeMeta
-from tqdm import tqdm
 
 from src.db.db_handler import DBHandler
+from src.kg.db.connection import Connection
 from src.kg.db.query_executor import QueryExecutor
+from src.utils.dtype_policy import DtypePolicy
+from src.utils.profiler import profile_stage
 
 
 class DataService:
 
+    # Ways a relationship column can be materialized in the graph: as a
+    # relationship to the metadata node, as an indexed node property, or as
+    # an extra node label per metadata node. The label mode needs a `table`
+    # key with the dictionary table of the metadata nodes, to remove stale
+    # labels.
+    RELATIONSHIP_MODES = ("relationship", "property", "label")
+
     def __init__(
         self,
-        session: Session,
+        conn: Connection,
         table_class: Type[DeclarativeMeta],
         join_class: Type[DeclarativeMeta] = None,
+        database: str = "neo4j",
     ) -> None:
 
-        self.session = session
+        self.conn = conn
         self.db_handler = DBHandler()
-        self.query_executor = QueryExecutor(session)
+        # Services built only for their definitions (ex: by the async layer)
+        # have no connection and must not rebind the shared query executor
+        self.query_executor = QueryExecutor(conn, database) if conn else None
         self.table_class = table_class
         self.join_class = join_class
+        # Optional config of the join country relationships, with the same
+        # `properties` and `indexes` keys as the relationships config
+        self.join_config = None
         # Instance variables to store node metadata
         self.node_label = None
         self.custom_keys = None
+        # Optional prefix for all node labels written by the service
+        self.namespace = ""
         self.properties = None
         self.relationships = None
         self.config = None
+        # Optional IDs the data is restricted to, for incremental updates
+        self.ids = None
         # Instance variables to store data
         self.raw_df = None
         self.join_df = None
         self.processed = None
         self.join_processed = None
+        # Relationship writes kept between the node and relationship passes
+        self.relationship_writes = None
 
     @staticmethod
     def _snake_to_camel(snake_str: str) -> str:
@@ -50,9 +73,115 @@ class DataService:
         parts = snake_str.split("_")
         return parts[0] + "".join(part.capitalize() for part in parts[1:])
 
+    @classmethod
+    def _get_modes(cls, rel_config: dict) -> list[str]:
+        """Class helper method to get the modes of a relationship config,
+        set with an optional `mode` key holding one mode or a list of modes
+
+        Args:
+            rel_config (dict): Relationship config
+
+        Raises:
+            ValueError: Raise error if any mode is unknown, or if the label
+                mode has no dictionary table
+
+        Returns:
+            list[str]: Modes of the relationship, defaults to "relationship"
+        """
+
+        modes = rel_config.get("mode", "relationship")
+        modes = [modes] if isinstance(modes, str) else list(modes)
+        unknown = set(modes) - set(cls.RELATIONSHIP_MODES)
+        if unknown:
+            raise ValueError(f"Unknown relationship modes {unknown}")
+        if "label" in modes and "table" not in rel_config:
+            raise ValueError(
+                f"Label mode of {rel_config['label']} needs a `table` key"
+            )
+
+        return modes
+
+    @staticmethod
+    def _get_stamp_clause(rel_config: dict) -> str:
+        """Static helper method to build the clause stamping denormalized
+        properties onto a merged relationship `r`, so that aggregations can
+        read them off the relationship without expanding to its end nodes
+
+        The optional `properties` key lists data columns copied from each
+        record, and the optional `other_properties` key maps relationship
+        properties to properties of the `other` end node (ex: the BM code).
+
+        Args:
+            rel_config (dict): Relationship config
+
+        Returns:
+            str: Cypher SET clause, or an empty string without properties
+        """
+
+        assignments = [
+            f"r.{prop} = other.{other_prop}"
+            for prop, other_prop in rel_config.get(
+                "other_properties", {}
+            ).items()
+        ]
+        if rel_config.get("properties"):
+            assignments.insert(0, "r += record.properties")
+
+        return f"SET {', '.join(assignments)}" if assignments else ""
+
+    def _get_label(self, label: str) -> str:
+        """Helper method to prefix a node label with the service namespace,
+        used to build a label-namespaced staging graph
+
+        Args:
+            label (str): Node label
+
+        Returns:
+            str: Namespaced node label
+        """
+
+        return f"{self.namespace}{label}"
+
+    def _get_value_label(self, rel_config: dict, value) -> str:
+        """Helper method to get the extra label of a metadata node in label
+        mode, ex: "Sector_3". Integral IDs read as floats are written as
+        integers, and any character not allowed in a label is replaced by an
+        underscore, so that string IDs also give valid labels.
+
+        Args:
+            rel_config (dict): Relationship config
+            value: ID of the metadata node
+
+        Returns:
+            str: Namespaced node label
+        """
+
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        value = re.sub(r"\W", "_", str(value))
+
+        return self._get_label(f"{rel_config['label']}_{value}")
+
+    def _get_value_labels(self, rel_config: dict) -> list[str]:
+        """Helper method to get the extra labels of all metadata nodes of a
+        relationship in label mode, from its dictionary table
+
+        Args:
+            rel_config (dict): Relationship config
+
+        Returns:
+            list[str]: Namespaced node labels
+        """
+
+        table = rel_config["table"].__table__
+        with self.db_handler.get_session() as session:
+            ids = session.scalars(select(table.c.id)).all()
+
+        return [self._get_value_label(rel_config, i) for i in ids]
+
     def _get_data(self, for_join: bool = False) -> bool:
         """Helper method to retrieve the contents of the tabular DB table
-        as a Pandas dataframe
+        as a Pandas dataframe, restricted to the rows of `self.ids` if set
 
         Args:
             for_join (bool, optional): Toggle to read optional join class.
@@ -62,20 +191,26 @@ class DataService:
             bool: True after completion
         """
 
-        with self.db_handler.get_session() as session:
+        if for_join:
+            table = self.join_class.__table__
+            id_col = f"{self.node_label.lower()}_id"
+        else:
+            table = self.table_class.__table__
+            id_col = "id"
 
-            if for_join:
-                data = session.query(*self.join_class.__table__.columns).all()
-                cols = [col.name for col in self.join_class.__table__.columns]
-            else:
-                data = session.query(*self.table_class.__table__.columns).all()
-                cols = [col.name for col in self.table_class.__table__.columns]
+        with self.db_handler.get_session() as session:
+            query = session.query(*table.columns)
+            if self.ids is not None:
+                query = query.filter(table.c[id_col].in_(self.ids))
+            data = query.all()
+            cols = [col.name for col in table.columns]
             camel_cols = [self._snake_to_camel(col) for col in cols]
 
+        df = DtypePolicy.apply(DataFrame(data, columns=camel_cols))
         if for_join:
-            self.join_df = DataFrame(data, columns=camel_cols)
+            self.join_df = df
         else:
-            self.raw_df = DataFrame(data, columns=camel_cols)
+            self.raw_df = df
 
         return True
 
@@ -90,6 +225,8 @@ class DataService:
             df = self.join_df
         else:
             df = self.raw_df
+        # Convert to plain Python objects with None for missing values
+        df = DtypePolicy.to_object(df)
 
         # If custom keys are provided for the node
         if self.custom_keys:
@@ -112,63 +249,263 @@ class DataService:
 
         return True
 
-    def _create_and_connect(self, row: dict) -> bool:
-        """Helper method to create and connect each data node
+    def _get_node_writes(
+        self, upsert: bool = False
+    ) -> list[tuple[str, list[dict]]]:
+        """Helper method to build the set-based write creating the data nodes
 
         Args:
-            row (dict): Dictionary representation of a single row of the data
-                table
+            upsert (bool, optional): Toggle to also overwrite the properties
+                of existing nodes. Defaults to False.
 
         Returns:
-            bool: True after completion
+            list[tuple[str, list[dict]]]: Pairs of Cypher query and records
         """
 
         # Validate and retrieve node label and properties
-        node_label = self.config["node_label"]
-        properties = {
-            key: row[key] for key in self.config["properties"] if key in row
-        }
+        node_label = self._get_label(self.config["node_label"])
+        properties = self.config["properties"]
+        records = [
+            {
+                "id": row["id"],
+                "properties": {
+                    key: row[key] for key in properties if key in row
+                },
+            }
+            for row in self.processed
+        ]
+
+        # Create the main nodes
+        query = f"""
+        UNWIND $data as record
+        MERGE (n:{node_label} {{id: record.id}})
+        {"SET" if upsert else "ON CREATE SET"} n += record.properties
+        """
 
-        # Create the main node
-        create_query = f"""
-        MERGE (n:{node_label} {{id: $id}})
-        ON CREATE SET n += $properties
-        RETURN n
+        return [(query, records)]
+
+    def _get_relationship_writes(self) -> list[tuple[str, list[dict]]]:
+        """Helper method to build one set-based write per configured
+        relationship, connecting the data nodes with metadata nodes
+
+        Returns:
+            list[tuple[str, list[dict]]]: Pairs of Cypher query and records
         """
-        self.session.run(create_query, id=row["id"], properties=properties)
 
-        # Connect the main node with metadata nodes
+        node_label = self._get_label(self.config["node_label"])
+        columns = set(self.raw_df.columns)
+        writes = []
+
         for key, rel_config in self.config["relationships"].items():
-            if key in row and row[key] is not None:
-                # Retrieve the node label to connect to and relationship data
-                other_node_label = rel_config["label"]
-                direction = rel_config["direction"]
-                relation = rel_config["relation"]
+            # Skip relationships without a matching column in the table
+            if key not in columns:
+                continue
+            # Retrieve the node label to connect to and relationship data
+            other_node_label = self._get_label(rel_config["label"])
+            direction = rel_config["direction"]
+            relation = rel_config["relation"]
+            modes = self._get_modes(rel_config)
+            properties = rel_config.get("properties", [])
+            records = [
+                {
+                    "nodeId": row["id"],
+                    "otherId": row[key],
+                    "properties": {p: row[p] for p in properties if p in row},
+                }
+                for row in self.processed
+                if notna(row[key])
+            ]
+            if "relationship" in modes:
                 # Generate query based on direction
                 if direction == "OUT":
-                    rel_query = f"""
-                    MATCH (n:{node_label} {{id: $node_id}})
-                    MATCH (other:{other_node_label} {{id: $other_id}})
-                    MERGE (n)-[:{relation}]->(other)
-                    """
+                    pattern = f"(n)-[r:{relation}]->(other)"
                 else:
-                    rel_query = f"""
-                    MATCH (n:{node_label} {{id: $node_id}})
-                    MATCH (other:{other_node_label} {{id: $other_id}})
-                    MERGE (n)<-[:{relation}]-(other)
+                    pattern = f"(n)<-[r:{relation}]-(other)"
+                query = f"""
+                UNWIND $data as record
+                MATCH (n:{node_label} {{id: record.nodeId}})
+                MATCH (other:{other_node_label} {{id: record.otherId}})
+                MERGE {pattern}
+                {self._get_stamp_clause(rel_config)}
+                """
+                writes.append((query, records))
+            if "property" in modes:
+                # Store the metadata node ID as an indexed node property
+                query = f"""
+                UNWIND $data as record
+                MATCH (n:{node_label} {{id: record.nodeId}})
+                SET n.{key} = record.otherId
+                """
+                writes.append((query, records))
+            if "label" in modes and records:
+                # Labels cannot be parameterized, so set them with one
+                # conditional clause per metadata node in a single write,
+                # which is cheap for low cardinalities
+                clauses = []
+                for other_id in sorted({r["otherId"] for r in records}):
+                    value = other_id
+                    if isinstance(value, float) and value.is_integer():
+                        value = int(value)
+                    extra_label = self._get_value_label(rel_config, other_id)
+                    clauses.append(
+                        "FOREACH (_ IN CASE WHEN record.otherId = "
+                        f"{json.dumps(value)} "
+                        f"THEN [1] ELSE [] END | SET n:{extra_label})"
+                    )
+                query = f"""
+                UNWIND $data as record
+                MATCH (n:{node_label} {{id: record.nodeId}})
+                {" ".join(clauses)}
+                """
+                writes.append((query, records))
+
+        # Connect countries for data node classes with join country data
+        if self.join_class:
+            writes.append(self._get_join_country_write())
+
+        return writes
+
+    def _get_delete_writes(self, ids: list[int]) -> list[tuple[str, list]]:
+        """Helper method to build the write deleting the nodes of deleted rows
+
+        Args:
+            ids (list[int]): IDs of the deleted rows
+
+        Returns:
+            list[tuple[str, list]]: Pairs of Cypher query and records
+        """
+
+        if not ids:
+            return []
+
+        query = f"""
+        UNWIND $data as record
+        MATCH (n:{self._get_label(self.node_label)} {{id: record.id}})
+        DETACH DELETE n
+        """
+
+        return [(query, [{"id": i} for i in ids])]
+
+    def _get_unlink_writes(self) -> list[tuple[str, list[dict]]]:
+        """Helper method to build the writes removing the relationships and
+        properties the relationship writes derive from the processed rows,
+        before they are written again from their current values. Extra
+        labels written in "label" mode are removed for all metadata nodes of
+        their dictionary table.
+
+        Returns:
+            list[tuple[str, list[dict]]]: Pairs of Cypher query and records
+        """
+
+        node_label = self._get_label(self.config["node_label"])
+        records = [{"id": row["id"]} for row in self.processed]
+        writes = []
+
+        for key, rel_config in self.config["relationships"].items():
+            if key not in self.raw_df.columns:
+                continue
+            other_node_label = self._get_label(rel_config["label"])
+            relation = rel_config["relation"]
+            modes = self._get_modes(rel_config)
+            if "relationship" in modes:
+                if rel_config["direction"] == "OUT":
+                    pattern = f"(n)-[r:{relation}]->(:{other_node_label})"
+                else:
+                    pattern = f"(n)<-[r:{relation}]-(:{other_node_label})"
+                query = f"""
+                UNWIND $data as record
+                MATCH (n:{node_label} {{id: record.id}})
+                MATCH {pattern}
+                DELETE r
+                """
+                writes.append((query, records))
+            if "property" in modes:
+                query = f"""
+                UNWIND $data as record
+                MATCH (n:{node_label} {{id: record.id}})
+                REMOVE n.{key}
+                """
+                writes.append((query, records))
+            if "label" in modes:
+                value_labels = self._get_value_labels(rel_config)
+                if value_labels:
+                    query = f"""
+                    UNWIND $data as record
+                    MATCH (n:{node_label} {{id: record.id}})
+                    REMOVE n:{":".join(value_labels)}
                     """
-                self.session.run(
-                    rel_query, node_id=row["id"], other_id=row[key]
+                    writes.append((query, records))
+
+        if self.join_class:
+            query = f"""
+            UNWIND $data as record
+            MATCH (n:{node_label} {{id: record.id}})
+            MATCH (n)-[r:INVOLVES]->(:{self._get_label("Country")})
+            DELETE r
+            """
+            writes.append((query, records))
+
+        return writes
+
+    def _get_relationship_pairs(self) -> list[tuple[str, str, str, DataFrame]]:
+        """Helper method to derive the (source, target) node ID pairs each
+        relationship write is expected to create, from the processed data
+
+        Returns:
+            list[tuple[str, str, str, DataFrame]]: Source label, relationship
+                type, target label and a dataframe of `src` and `dst` IDs
+        """
+
+        node_label = self._get_label(self.config["node_label"])
+        df = self.raw_df
+        pairs = []
+
+        for key, rel_config in self.config["relationships"].items():
+            if key not in df.columns:
+                continue
+            # Columns materialized as properties or labels only create no
+            # relationships
+            if "relationship" not in self._get_modes(rel_config):
+                continue
+            other_node_label = self._get_label(rel_config["label"])
+            edges = df.loc[notna(df[key]), ["id", key]]
+            edges.columns = ["node", "other"]
+            if rel_config["direction"] == "OUT":
+                pairs.append(
+                    (
+                        node_label,
+                        rel_config["relation"],
+                        other_node_label,
+                        edges.rename(columns={"node": "src", "other": "dst"}),
+                    )
+                )
+            else:
+                pairs.append(
+                    (
+                        other_node_label,
+                        rel_config["relation"],
+                        node_label,
+                        edges.rename(columns={"other": "src", "node": "dst"}),
+                    )
                 )
 
-        return True
+        if self.join_class:
+            self._get_data(for_join=True)
+            self_id_key = f"{self.node_label.lower()}Id"
+            edges = self.join_df[[self_id_key, "countryId"]]
+            edges.columns = ["src", "dst"]
+            pairs.append(
+                (node_label, "INVOLVES", self._get_label("Country"), edges)
+            )
+
+        return pairs
 
-    def _connect_join_countries(self) -> bool:
-        """Helper method to use the join country tables to connect the data
-        node to Country nodes
+    def _get_join_country_write(self) -> tuple[str, list[dict]]:
+        """Helper method to use the join country tables to build the write
+        connecting the data node to Country nodes
 
         Returns:
-            bool: True if successful, False if not
+            tuple[str, list[dict]]: Cypher query and records
         """
 
         # Get and process join country table for the data service
@@ -178,30 +515,153 @@ class DataService:
         # Generate ID key for the data service
         self_id_key = f"{self.node_label.lower()}Id"
 
+        node_label = self._get_label(self.node_label)
+        country_label = self._get_label("Country")
+        join_config = self.join_config or {}
+        records = self.join_processed
+
+        # Stamp data node columns onto the relationships
+        properties = join_config.get("properties", [])
+        if properties:
+            stamps = {
+                row["id"]: {p: row[p] for p in properties if p in row}
+                for row in self.processed
+            }
+            records = [
+                {**row, "properties": stamps.get(row[self_id_key], {})}
+                for row in records
+            ]
+
         query = f"""
         UNWIND $data as record
-        MATCH (r: {self.node_label} {{id: record.{self_id_key}}})
-        MATCH (c: Country {{id: record.countryId}})
-        MERGE (r)-[:INVOLVES]->(c)
+        MATCH (n: {node_label} {{id: record.{self_id_key}}})
+        MATCH (other: {country_label} {{id: record.countryId}})
+        MERGE (n)-[r:INVOLVES]->(other)
+        {self._get_stamp_clause(join_config)}
         """
 
-        return self.query_executor.execute_write(query, self.join_processed)
+        return query, records
 
-    def populate(self) -> bool:
-        """Main high-level method to populate the graph with the nodes
+    def _release(self) -> bool:
+        """Helper method to drop the intermediate data once the writes are
+        built, as the writes keep their own references to the records
 
         Returns:
-            bool: True if successful, False if not
+            bool: True after completion
+        """
+
+        self.raw_df = None
+        self.join_df = None
+        self.processed = None
+        self.join_processed = None
+
+        return True
+
+    def prepare_writes(
+        self,
+    ) -> tuple[list[tuple[str, list[dict]]], list[tuple[str, list[dict]]]]:
+        """Retrieve and process the tabular data, then build the node writes
+        and the relationship writes separately, without touching the graph
+
+        Returns:
+            tuple[list[tuple[str, list[dict]]], list[tuple[str, list[dict]]]]:
+                Node writes and relationship writes, as pairs of Cypher query
+                and records
         """
 
-        # Retrieve and process data
         self._get_data()
         self._process_data()
+        node_writes = self._get_node_writes()
+        relationship_writes = self._get_relationship_writes()
+        self._release()
 
-        # Create and connect each data node
-        for row in tqdm(self.processed):
-            self._create_and_connect(row)
+        return node_writes, relationship_writes
 
-        # Connect countries for data node classes with join country data
-        if self.join_class:
-            self._connect_join_countries()
+    def prepare(self) -> list[tuple[str, list[dict]]]:
+        """Retrieve and process the tabular data, then build all Cypher
+        writes without touching the graph. Node writes come before the
+        relationship writes that depend on them.
+
+        Returns:
+            list[tuple[str, list[dict]]]: Pairs of Cypher query and records
+        """
+
+        node_writes, relationship_writes = self.prepare_writes()
+
+        return node_writes + relationship_writes
+
+    def prepare_changes(self, ids: list[int]) -> list[tuple[str, list]]:
+        """Retrieve and process the current rows of changed IDs only, then
+        build the writes bringing their nodes and relationships up to date:
+        nodes of deleted rows are deleted, and the nodes of other rows are
+        upserted and relinked from the relationship configs
+
+        Args:
+            ids (list[int]): IDs of the changed rows
+
+        Returns:
+            list[tuple[str, list]]: Pairs of Cypher query and records
+        """
+
+        self.ids = list(ids)
+        try:
+            self._get_data()
+            self._process_data()
+            present = {row["id"] for row in self.processed}
+            deleted = [i for i in self.ids if i not in present]
+            writes = (
+                self._get_delete_writes(deleted)
+                + self._get_unlink_writes()
+                + self._get_node_writes(upsert=True)
+                + self._get_relationship_writes()
+            )
+        finally:
+            self.ids = None
+            self._release()
+
+        return writes
+
+    @profile_stage("populate")
+    def populate_nodes(self) -> bool:
+        """Write the data nodes, keeping the relationship writes for
+        `populate_relationships`
+
+        Returns:
+            bool: True if successful, False if not
+        """
+
+        node_writes, self.relationship_writes = self.prepare_writes()
+
+        return all(
+            self.query_executor.execute_write(query, data)
+            for query, data in node_writes
+        )
+
+    @profile_stage("link")
+    def populate_relationships(self) -> bool:
+        """Write the relationships kept by `populate_nodes`, which requires
+        the nodes at both ends to already exist
+
+        Returns:
+            bool: True if successful, False if not
+        """
+
+        writes, self.relationship_writes = self.relationship_writes or [], None
+
+        return all(
+            self.query_executor.execute_write(query, data)
+            for query, data in writes
+        )
+
+    def populate(self) -> bool:
+        """Main high-level method to populate the graph with the nodes and
+        their relationships
+
+        Returns:
+            bool: True if successful, False if not
+        """
+
+        nodes = self.populate_nodes()
+        relationships = self.populate_relationships()
+
+        return nodes and relationships
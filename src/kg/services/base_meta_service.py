@@ -1,30 +1,52 @@
 from typing import Type
 
 from pandas import DataFrame
-from neo4j import Session
 from sqlalchemy.ext.declarative import DeclarativeMeta
 
 from src.db.db_handler import DBHandler
+from src.kg.db.connection import Connection
 from src.kg.db.query_executor import QueryExecutor
+from src.utils.dtype_policy import DtypePolicy
+from src.utils.profiler import profile_stage
 
 
 class MetaService:
 
     def __init__(
-        self, session: Session, table_class: Type[DeclarativeMeta]
+        self,
+        conn: Connection,
+        table_class: Type[DeclarativeMeta],
+        database: str = "neo4j",
     ) -> None:
 
-        self.session = session
+        self.conn = conn
         self.db_handler = DBHandler()
-        self.query_executor = QueryExecutor(session)
+        # Services built only for their definitions (ex: by the async layer)
+        # have no connection and must not rebind the shared query executor
+        self.query_executor = QueryExecutor(conn, database) if conn else None
         self.table_class = table_class
         # Instance variables to store node metadata
         self.node_label = None
         self.custom_keys = None
+        # Optional prefix for all node labels written by the service
+        self.namespace = ""
         # Instance variables to store data
         self.raw_df = None
         self.processed = None
 
+    def _get_label(self, label: str) -> str:
+        """Helper method to prefix a node label with the service namespace,
+        used to build a label-namespaced staging graph
+
+        Args:
+            label (str): Node label
+
+        Returns:
+            str: Namespaced node label
+        """
+
+        return f"{self.namespace}{label}"
+
     def _get_data(self) -> bool:
         """Helper method to retrieve the contents of the tabular DB table
         as a Pandas dataframe
@@ -37,7 +59,7 @@ class MetaService:
             data = session.query(*self.table_class.__table__.columns).all()
             columns = [col.name for col in self.table_class.__table__.columns]
 
-        self.raw_df = DataFrame(data, columns=columns)
+        self.raw_df = DtypePolicy.apply(DataFrame(data, columns=columns))
 
         return True
 
@@ -48,44 +70,87 @@ class MetaService:
             bool: True if successful
         """
 
+        # Convert to plain Python objects with None for missing values
+        df = DtypePolicy.to_object(self.raw_df)
+
         # If custom keys are provided for the node
         if self.custom_keys:
             # Check if the custom keys are valid
-            if len(self.custom_keys) != len(self.raw_df.columns):
+            if len(self.custom_keys) != len(df.columns):
                 raise ValueError("Length of custom_keys do not match.")
             # Create a list of dictionaries with custom keys
             self.processed = [
                 dict(zip(self.custom_keys, row))
-                for row in self.raw_df.itertuples(index=False, name=None)
+                for row in df.itertuples(index=False, name=None)
             ]
         else:
             # Use default column names as keys
-            self.processed = self.raw_df.to_dict(orient="records")
+            self.processed = df.to_dict(orient="records")
 
         return True
 
-    def populate(self) -> bool:
-        """Main high-level method to populate the graph with the nodes
+    def _get_writes(self) -> list[tuple[str, list[dict]]]:
+        """Helper to build the parameterized Cypher writes for the processed
+        data, shared by the sync and async execution paths
 
         Returns:
-            bool: True if successful, False if not
+            list[tuple[str, list[dict]]]: Pairs of Cypher query and records
         """
 
-        # Retrieve and process data
-        self._get_data()
-        self._process_data()
-
         # Create Cypher query to populate the knowledge graph with the node
         query = f"""
         UNWIND $data as record
-        MERGE (node: {self.node_label} {{id: record.id}})
+        MERGE (node: {self._get_label(self.node_label)} {{id: record.id}})
         ON CREATE SET
             node += record
         """
 
+        return [(query, self.processed)]
+
+    def _release(self) -> bool:
+        """Helper method to drop the intermediate data once the writes are
+        built, as the writes keep their own references to the records
+
+        Returns:
+            bool: True after completion
+        """
+
+        self.raw_df = None
+        self.processed = None
+
+        return True
+
+    def prepare(self) -> list[tuple[str, list[dict]]]:
+        """Retrieve and process the tabular data, then build the Cypher writes
+        without touching the graph
+
+        Returns:
+            list[tuple[str, list[dict]]]: Pairs of Cypher query and records
+        """
+
+        self._get_data()
+        self._process_data()
+        writes = self._get_writes()
+        self._release()
+
+        return writes
+
+    @profile_stage("populate")
+    def populate(self) -> bool:
+        """Main high-level method to populate the graph with the nodes
+
+        Returns:
+            bool: True if successful, False if not
+        """
+
+        writes = self.prepare()
+
         print(
-            f"Populating graph with {len(self.processed)} "
+            f"Populating graph with {sum(len(data) for _, data in writes)} "
             f"{self.node_label} nodes..."
         )
 
-        return self.query_executor.execute_write(query, self.processed)
+        return all(
+            self.query_executor.execute_write(query, data)
+            for query, data in writes
+        )
@@ -1,14 +1,16 @@
-from neo4j import Session
+from pandas import DataFrame, notna
+
+from src.kg.db.connection import Connection
 
 from src.kg.services.base_data_service import DataService
-from src.db.db_schema import Country
+from src.db.db_schema import Country, CountryDict
 
 
 class CountryDataService(DataService):
 
-    def __init__(self, session: Session) -> None:
+    def __init__(self, conn: Connection, database: str = "neo4j") -> None:
 
-        super().__init__(session, Country)
+        super().__init__(conn, Country, database=database)
         self.node_label = "Country"
         self.properties = None
         self.relationships = {
@@ -25,38 +27,132 @@ class CountryDataService(DataService):
             "relationships": self.relationships,
         }
 
-    def _connect_to_regions(self) -> bool:
-        """Custom helper method to connect Country nodes to Region nodes, as
-        Country node metadata was already populated with country metadata nodes
+    def _get_node_writes(
+        self, upsert: bool = False
+    ) -> list[tuple[str, list[dict]]]:
+        """Overriden helper method that creates no nodes, as Country nodes
+        were already populated by the country metadata service. Upserts
+        update the SIDS and LDC flags the metadata service read from the
+        country export.
+
+        Args:
+            upsert (bool, optional): Toggle to update the flags of existing
+                nodes. Defaults to False.
+
+        Returns:
+            list[tuple[str, list[dict]]]: Pairs of Cypher query and records
+        """
+
+        if not upsert:
+            return []
+
+        records = [
+            {
+                "iso3": row["iso3"],
+                "properties": {
+                    "isSids": bool(row["isSids"]),
+                    "isLdc": bool(row["isLdc"]),
+                },
+            }
+            for row in self.processed
+        ]
+        query = f"""
+        UNWIND $data as record
+        MATCH (c: {self._get_label("Country")} {{iso3: record.iso3}})
+        SET c += record.properties
+        """
+
+        return [(query, records)]
+
+    def _get_delete_writes(self, ids: list[int]) -> list[tuple[str, list]]:
+        """Overriden helper method that deletes no nodes, as Country nodes
+        belong to the country dictionary, but removes the Country to Region
+        relationships of the deleted rows, found by the row ID the
+        relationship writes store on Country nodes
+
+        Args:
+            ids (list[int]): IDs of the deleted rows
+
+        Returns:
+            list[tuple[str, list]]: Pairs of Cypher query and records
+        """
+
+        if not ids:
+            return []
+
+        query = f"""
+        UNWIND $data as record
+        MATCH (c: {self._get_label("Country")} {{rowId: record.id}})
+        OPTIONAL MATCH (c)-[r:IS_IN]->(:{self._get_label("Region")})
+        DELETE r
+        REMOVE c.rowId
+        """
+
+        return [(query, [{"id": i} for i in ids])]
+
+    def _get_unlink_writes(self) -> list[tuple[str, list[dict]]]:
+        """Overriden helper method to remove the Country to Region
+        relationships by ISO3
+
+        Returns:
+            list[tuple[str, list[dict]]]: Pairs of Cypher query and records
+        """
+
+        query = f"""
+        UNWIND $data as record
+        MATCH (c: {self._get_label("Country")} {{iso3: record.iso3}})
+        MATCH (c)-[r:IS_IN]->(:{self._get_label("Region")})
+        DELETE r
+        """
+
+        return [(query, [{"iso3": row["iso3"]} for row in self.processed])]
+
+    def _get_relationship_writes(self) -> list[tuple[str, list[dict]]]:
+        """Overriden helper method to connect Country nodes to Region nodes by
+        ISO3, as Country node IDs follow the country data dictionary. The row
+        ID is stored on Country nodes for deletes.
 
         Returns:
-            bool: True if successful, False if not
+            list[tuple[str, list[dict]]]: Pairs of Cypher query and records
         """
 
         to_write = [
-            {"iso3": i["iso3"], "regionId": i["regionId"]}
+            {"id": i["id"], "iso3": i["iso3"], "regionId": i["regionId"]}
             for i in self.processed
         ]
 
-        query = """
+        query = f"""
         UNWIND $data as record
-        MATCH (c: Country {iso3: record.iso3})
-        MATCH (r: Region {id: record.regionId})
+        MATCH (c: {self._get_label("Country")} {{iso3: record.iso3}})
+        MATCH (r: {self._get_label("Region")} {{id: record.regionId}})
         MERGE (c)-[:IS_IN]->(r)
+        SET c.rowId = record.id
         """
 
-        return self.query_executor.execute_write(query, to_write)
+        return [(query, to_write)]
 
-    def populate(self) -> bool:
-        """Overriden method for Country data service nodes that only populates
-        the :IS_IN relationship with Region nodes
+    def _get_relationship_pairs(self) -> list[tuple[str, str, str, DataFrame]]:
+        """Overriden helper method to derive the expected Country to Region
+        ID pairs, resolving Country node IDs from the country dictionary
 
         Returns:
-            bool: True after completion
+            list[tuple[str, str, str, DataFrame]]: Source label, relationship
+                type, target label and a dataframe of `src` and `dst` IDs
         """
 
-        self._get_data()
-        self._process_data()
-        self._connect_to_regions()
+        with self.db_handler.get_session() as session:
+            data = session.query(CountryDict.iso3, CountryDict.id).all()
+        iso3_df = DataFrame(data, columns=["iso3", "src"])
 
-        return True
+        df = self.raw_df[notna(self.raw_df["regionId"])]
+        edges = df.merge(iso3_df, on="iso3")[["src", "regionId"]]
+        edges.columns = ["src", "dst"]
+
+        return [
+            (
+                self._get_label("Country"),
+                "IS_IN",
+                self._get_label("Region"),
+                edges,
+            )
+        ]
@@ -1,4 +1,4 @@
-from neo4j import Session
+from src.kg.db.connection import Connection
 
 from src.kg.services.base_data_service import DataService
 from src.db.db_schema import Entity
@@ -6,9 +6,9 @@ from src.db.db_schema import Entity
 
 class EntityService(DataService):
 
-    def __init__(self, session: Session) -> None:
+    def __init__(self, conn: Connection, database: str = "neo4j") -> None:
 
-        super().__init__(session, Entity)
+        super().__init__(conn, Entity, database=database)
         self.node_label = "Entity"
         self.properties = ["id", "name", "code", "isDae"]
         self.relationships = {
@@ -41,6 +41,7 @@ class EntityService(DataService):
                 "label": "Bm",
                 "direction": "IN",
                 "relation": "COVERS",
+                "other_properties": {"bmCode": "name"},
             },
             "projectId": {
                 "label": "Project",
@@ -1,4 +1,4 @@
-from neo4j import Session
+from src.kg.db.connection import Connection
 
 from src.kg.services.base_data_service import DataService
 from src.db.db_schema import Project, ProjectCountry
@@ -6,10 +6,13 @@ from src.db.db_schema import Project, ProjectCountry
 
 class ProjectService(DataService):
 
-    def __init__(self, session: Session) -> None:
+    def __init__(self, conn: Connection, database: str = "neo4j") -> None:
 
         super().__init__(
-            session, table_class=Project, join_class=ProjectCountry
+            conn,
+            table_class=Project,
+            join_class=ProjectCountry,
+            database=database,
         )
         self.node_label = "Project"
         self.properties = ["id", "name", "ref", "financingUsd"]
@@ -23,11 +26,15 @@ class ProjectService(DataService):
                 "label": "Entity",
                 "direction": "IN",
                 "relation": "FUNDS",
+                # Denormalized for aggregations over the relationship
+                "properties": ["financingUsd"],
+                "indexes": ["financingUsd"],
             },
             "bmId": {
-                "label": "BM",
+                "label": "Bm",
                 "direction": "IN",
                 "relation": "COVERS",
+                "other_properties": {"bmCode": "name"},
             },
             "sectorId": {
                 "label": "Sector",
@@ -50,6 +57,11 @@ class ProjectService(DataService):
                 "relation": "HAS",
             },
         }
+        # Denormalized properties of the INVOLVES relationships to countries
+        self.join_config = {
+            "properties": ["financingUsd"],
+            "indexes": ["financingUsd"],
+        }
         # Configuration for the service node
         self.config = {
             "node_label": self.node_label,
@@ -1,4 +1,4 @@
-from neo4j import Session
+from src.kg.db.connection import Connection
 
 from src.kg.services.base_data_service import DataService
 from src.db.db_schema import Readiness, ReadinessCountry
@@ -6,10 +6,13 @@ from src.db.db_schema import Readiness, ReadinessCountry
 
 class ReadinessService(DataService):
 
-    def __init__(self, session: Session) -> None:
+    def __init__(self, conn: Connection, database: str = "neo4j") -> None:
 
         super().__init__(
-            session, table_class=Readiness, join_class=ReadinessCountry
+            conn,
+            table_class=Readiness,
+            join_class=ReadinessCountry,
+            database=database,
         )
         self.node_label = "Readiness"
         self.properties = [
@@ -24,7 +27,7 @@ class ReadinessService(DataService):
         ]
         self.relationships = {
             "activityTypeId": {
-                "label": "ActivityId",
+                "label": "ActivityType",
                 "direction": "OUT",
                 "relation": "HAS",
             },
@@ -44,6 +47,11 @@ class ReadinessService(DataService):
                 "relation": "IS_IN",
             },
         }
+        # Denormalized properties of the INVOLVES relationships to countries
+        self.join_config = {
+            "properties": ["financingUsd", "approvedDate"],
+            "indexes": ["financingUsd"],
+        }
         # Configuration for the service node
         self.config = {
             "node_label": self.node_label,
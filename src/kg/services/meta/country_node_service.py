@@ -1,15 +1,16 @@
-from neo4j import Session
 import pandas as pd
 
+from src.kg.db.connection import Connection
 from src.kg.services.base_meta_service import MetaService
 from src.db.db_schema import CountryDict, Country
+from src.utils.dtype_policy import DtypePolicy
 
 
 class CountryService(MetaService):
 
-    def __init__(self, session: Session) -> None:
+    def __init__(self, conn: Connection, database: str = "neo4j") -> None:
 
-        super().__init__(session, CountryDict)
+        super().__init__(conn, CountryDict, database=database)
         self.node_label = "Country"
         self.country_export_df = None
 
@@ -62,34 +63,19 @@ class CountryService(MetaService):
             "isLdc",
         ]
 
-        self.processed = df.to_dict(orient="records")
+        self.processed = DtypePolicy.to_records(df)
 
         return True
 
-    def populate(self) -> bool:
-        """Overriden main method with the additional calling of the custom
-        and overriden helper methods
+    def _get_data(self) -> bool:
+        """Overriden helper method that additionally reads the country export
+        required by the overriden `_process_data`
 
         Returns:
-            bool: True if successful, False if not
+            bool: True after completion
         """
 
-        # Retrieve and process data
-        self._get_data()
+        super()._get_data()
         self._read_country_export()
-        self._process_data()
-
-        # Create Cypher query to populate the knowledge graph with the node
-        query = f"""
-        UNWIND $data as record
-        MERGE (node: {self.node_label} {{id: record.id}})
-        ON CREATE SET
-            node += record
-        """
 
-        print(
-            f"Populating graph with {len(self.processed)} "
-            f"{self.node_label} nodes..."
-        )
-
-        return self.query_executor.execute_write(query, self.processed)
+        return True
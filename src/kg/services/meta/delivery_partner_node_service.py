@@ -1,4 +1,4 @@
-from neo4j import Session
+from src.kg.db.connection import Connection
 
 from src.kg.services.base_meta_service import MetaService
 from src.db.db_schema import DeliveryPartnerDict
@@ -6,7 +6,7 @@ from src.db.db_schema import DeliveryPartnerDict
 
 class DeliveryPartnerService(MetaService):
 
-    def __init__(self, session: Session) -> None:
+    def __init__(self, conn: Connection, database: str = "neo4j") -> None:
 
-        super().__init__(session, DeliveryPartnerDict)
+        super().__init__(conn, DeliveryPartnerDict, database=database)
         self.node_label = "DeliveryPartner"
@@ -1,4 +1,4 @@
-from neo4j import Session
+from src.kg.db.connection import Connection
 
 
 from src.kg.services.base_meta_service import MetaService
@@ -7,7 +7,7 @@ from src.db.db_schema import RegionDict
 
 class RegionService(MetaService):
 
-    def __init__(self, session: Session) -> None:
+    def __init__(self, conn: Connection, database: str = "neo4j") -> None:
 
-        super().__init__(session, RegionDict)
+        super().__init__(conn, RegionDict, database=database)
         self.node_label = "Region"
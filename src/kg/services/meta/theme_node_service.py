@@ -1,4 +1,4 @@
-from neo4j import Session
+from src.kg.db.connection import Connection
 
 from src.kg.services.base_meta_service import MetaService
 from src.db.db_schema import ThemeDict
@@ -6,7 +6,7 @@ from src.db.db_schema import ThemeDict
 
 class ThemeService(MetaService):
 
-    def __init__(self, session: Session) -> None:
+    def __init__(self, conn: Connection, database: str = "neo4j") -> None:
 
-        super().__init__(session, ThemeDict)
+        super().__init__(conn, ThemeDict, database=database)
         self.node_label = "Theme"
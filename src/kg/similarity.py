@@ -0,0 +1,396 @@
+import numpy as np
+import pandas as pd
+
+from src.kg.db.query_executor import QueryExecutor
+from src.kg.services.base_data_service import DataService
+
+
+class SimilarityEngine:
+    """Top-k similarity of data nodes (ex: projects or entities) from the
+    metadata nodes they are connected to.
+
+    Each node is a row of a sparse binary node x feature incidence matrix,
+    where a feature is one value of a configured relationship of the
+    service (ex: `sectorId` 3) or a country of its join table. The matrix is
+    held as CSR (by node) and CSC (by feature) NumPy arrays. Scores of a
+    batch of nodes against all nodes are one sparse matrix product, computed
+    by gathering the CSC columns of the batch's features and summing the
+    feature weights with `np.bincount`.
+
+    Frequent features (ex: modality or size) have long columns that would
+    dominate the gather, so they are kept as a small dense node x feature
+    matrix and scored with a dense matrix product instead.
+
+    Features are weighted by inverse document frequency by default, so that
+    sharing a rare country counts more than sharing a common size.
+    """
+
+    METRICS = ("cosine", "jaccard")
+    # Features held by more than this share of nodes are scored densely
+    DENSE_RATIO = 0.01
+
+    def __init__(
+        self,
+        service: DataService,
+        metric: str = "cosine",
+        idf: bool = True,
+        k: int = 10,
+        batch_size: int = 64,
+    ) -> None:
+
+        if metric not in self.METRICS:
+            raise ValueError(f"Metric must be one of {self.METRICS}")
+
+        self.service = service
+        self.metric = metric
+        self.idf = idf
+        self.k = k
+        self.batch_size = batch_size
+        # Instance variables to store the incidence matrix
+        self.node_ids = None
+        self.feature_names = None
+        self.weights = None
+        self.norms = None
+        self.csr = None
+        self.csc = None
+        self.dense = None
+        # Instance variables to store the cached top-k lists
+        self.top_ids = None
+        self.top_scores = None
+        self.cache = {}
+
+    @property
+    def node_count(self) -> int:
+        """Number of nodes in the incidence matrix"""
+        return len(self.node_ids)
+
+    @staticmethod
+    def _compress(
+        major: np.ndarray, minor: np.ndarray, size: int
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Static helper method to compress (major, minor) index pairs into
+        index pointer and index arrays
+
+        Args:
+            major (np.ndarray): Indices to compress on
+            minor (np.ndarray): Indices to store
+            size (int): Number of major indices
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Index pointers and indices
+        """
+
+        order = np.lexsort((minor, major))
+        indptr = np.zeros(size + 1, dtype=np.int64)
+        np.cumsum(np.bincount(major, minlength=size), out=indptr[1:])
+
+        return indptr, minor[order]
+
+    @staticmethod
+    def _gather(
+        indptr: np.ndarray, selected: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Static helper method to gather the index ranges of the selected
+        rows (or columns) in one vectorized pass
+
+        Args:
+            indptr (np.ndarray): Index pointers
+            selected (np.ndarray): Selected rows
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Positions within the indices and
+                the position in `selected` each one belongs to
+        """
+
+        starts = indptr[selected]
+        counts = indptr[selected + 1] - starts
+        positions = np.repeat(starts - np.cumsum(counts) + counts, counts)
+        positions += np.arange(counts.sum())
+        owners = np.repeat(np.arange(len(selected)), counts)
+
+        return positions, owners
+
+    def _get_features(self) -> tuple[np.ndarray, np.ndarray]:
+        """Helper method to read the (node, feature) pairs of the service
+        from the tabular DB
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Node rows and feature codes
+        """
+
+        self.service._get_data()
+        df = self.service.raw_df
+        self.node_ids = df["id"].to_numpy(dtype=np.int64)
+        rows, features, names = [], [], []
+
+        # One feature per distinct value of each configured relationship
+        for key in self.service.relationships:
+            if key not in df.columns:
+                continue
+            present = df[key].notna().to_numpy()
+            codes, uniques = pd.factorize(df[key][present])
+            rows.append(np.flatnonzero(present))
+            features.append(codes + len(names))
+            names.extend((key, int(value)) for value in uniques)
+
+        # One feature per country of the join country table
+        if self.service.join_class:
+            self.service._get_data(for_join=True)
+            join_df = self.service.join_df
+            self_id_key = f"{self.service.node_label.lower()}Id"
+            row = pd.Index(self.node_ids).get_indexer(join_df[self_id_key])
+            found = row >= 0
+            codes, uniques = pd.factorize(join_df["countryId"][found])
+            rows.append(row[found])
+            features.append(codes + len(names))
+            names.extend(("countryId", int(value)) for value in uniques)
+
+        self.service._release()
+        self.feature_names = names
+
+        rows = np.concatenate(rows or [[]]).astype(np.int64)
+        features = np.concatenate(features or [[]]).astype(np.int64)
+        # Drop duplicated pairs, as the matrix is binary
+        pairs = np.unique(rows * len(names) + features)
+
+        return pairs // max(len(names), 1), pairs % max(len(names), 1)
+
+    def build(self) -> bool:
+        """Build the incidence matrix and the feature weights, clearing any
+        cached top-k lists
+
+        Returns:
+            bool: True after completion
+        """
+
+        rows, features = self._get_features()
+        feature_count = len(self.feature_names)
+
+        # Inverse document frequency of each feature
+        frequency = np.bincount(features, minlength=feature_count)
+        if self.idf:
+            self.weights = np.log((1 + self.node_count) / (1 + frequency)) + 1
+        else:
+            self.weights = np.ones(feature_count)
+
+        # Split frequent features into a dense matrix of weights, and index
+        # the other features by column
+        dense_features = np.flatnonzero(
+            frequency > self.DENSE_RATIO * self.node_count
+        )
+        dense_cols = np.full(feature_count, -1)
+        dense_cols[dense_features] = np.arange(len(dense_features))
+        is_dense = dense_cols[features] >= 0
+        # Weights are kept in double precision, as in the sparse product, so
+        # that equal overlaps give equal scores whichever way they are summed
+        self.dense = np.zeros((self.node_count, len(dense_features)))
+        self.dense[rows[is_dense], dense_cols[features[is_dense]]] = (
+            self.weights[features[is_dense]]
+        )
+        self.csr = self._compress(rows, features, self.node_count)
+        self.csc = self._compress(
+            features[~is_dense], rows[~is_dense], feature_count
+        )
+
+        # Row norms: weighted set sizes for Jaccard, L2 norms for cosine
+        if self.metric == "jaccard":
+            self.norms = np.bincount(
+                rows, weights=self.weights[features], minlength=self.node_count
+            )
+        else:
+            self.norms = np.sqrt(
+                np.bincount(
+                    rows,
+                    weights=self.weights[features] ** 2,
+                    minlength=self.node_count,
+                )
+            )
+
+        self.top_ids, self.top_scores = None, None
+        self.cache = {}
+
+        return True
+
+    def _score_batch(self, batch: np.ndarray) -> np.ndarray:
+        """Helper method to score a batch of nodes against all nodes with
+        one sparse and one dense matrix product
+
+        Args:
+            batch (np.ndarray): Node rows to score
+
+        Returns:
+            np.ndarray: Scores of shape (batch, nodes), -inf for the nodes
+                themselves and nodes without shared features
+        """
+
+        n = self.node_count
+        # Features of each batch node
+        positions, owners = self._gather(self.csr[0], batch)
+        features = self.csr[1][positions]
+        # Nodes sharing each of those features, except for dense features
+        positions, pair = self._gather(self.csc[0], features)
+        candidates = self.csc[1][positions]
+        owners = owners[pair]
+        weights = self.weights[features[pair]]
+        if self.metric == "cosine":
+            weights = weights**2
+
+        overlap = np.bincount(
+            owners * n + candidates, weights=weights, minlength=len(batch) * n
+        ).reshape(len(batch), n)
+        # Overlap on dense features
+        if self.metric == "jaccard":
+            overlap = overlap + (self.dense[batch] > 0) @ self.dense.T
+        else:
+            overlap = overlap + self.dense[batch] @ self.dense.T
+
+        if self.metric == "jaccard":
+            union = self.norms[batch][:, None] + self.norms[None, :] - overlap
+        else:
+            union = self.norms[batch][:, None] * self.norms[None, :]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scores = np.where(overlap > 0, overlap / union, -np.inf)
+        scores[np.arange(len(batch)), batch] = -np.inf
+
+        return scores
+
+    def _top_k_batch(
+        self, batch: np.ndarray, k: int
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Helper method to get the top-k most similar nodes of a batch
+
+        Args:
+            batch (np.ndarray): Node rows
+            k (int): Number of neighbors
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Neighbor rows and scores of shape
+                (batch, k), with rows of -1 for missing neighbors
+        """
+
+        scores = self._score_batch(batch)
+        k = min(k, self.node_count)
+        # Select the nodes above the k-th highest score, then the ties at it
+        # by ascending row, so that the selection does not depend on the
+        # partition order
+        kth = -np.partition(-scores, k - 1, axis=1)[:, k - 1 : k]
+        above = scores > kth
+        ties = scores == kth
+        free = k - above.sum(axis=1, keepdims=True)
+        selected = above | (ties & (np.cumsum(ties, axis=1) <= free))
+        top = (np.flatnonzero(selected) % scores.shape[1]).reshape(-1, k)
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        # Sort by descending score, then by row for stable ties
+        order = np.lexsort((top, -top_scores), axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        top = np.where(np.isfinite(top_scores), top, -1)
+
+        return top, top_scores
+
+    def compute_all(self) -> bool:
+        """Compute and cache the top-k lists of all nodes, batch by batch
+
+        Returns:
+            bool: True after completion
+        """
+
+        if self.csr is None:
+            self.build()
+
+        k = min(self.k, self.node_count)
+        self.top_ids = np.full((self.node_count, k), -1, dtype=np.int64)
+        self.top_scores = np.full((self.node_count, k), -np.inf)
+        for start in range(0, self.node_count, self.batch_size):
+            end = min(start + self.batch_size, self.node_count)
+            batch = np.arange(start, end)
+            top, scores = self._top_k_batch(batch, k)
+            self.top_ids[batch] = top
+            self.top_scores[batch] = scores
+
+        return True
+
+    def top_k(self, node_id: int, k: int = None) -> list[tuple[int, float]]:
+        """Get the most similar nodes of a node, from the cache if possible
+
+        Args:
+            node_id (int): Node ID
+            k (int, optional): Number of neighbors. Defaults to the engine k.
+
+        Raises:
+            KeyError: Raise error if the node is unknown
+
+        Returns:
+            list[tuple[int, float]]: Node IDs and scores, most similar first
+        """
+
+        if self.csr is None:
+            self.build()
+
+        k = k or self.k
+        row = int(pd.Index(self.node_ids).get_indexer([node_id])[0])
+        if row < 0:
+            raise KeyError(f"Unknown {self.service.node_label} {node_id}")
+
+        if self.top_ids is not None and k <= self.top_ids.shape[1]:
+            top, scores = self.top_ids[row, :k], self.top_scores[row, :k]
+        elif (row, k) in self.cache:
+            top, scores = self.cache[(row, k)]
+        else:
+            top, scores = self._top_k_batch(np.array([row]), k)
+            top, scores = top[0], scores[0]
+            self.cache[(row, k)] = (top, scores)
+
+        return [
+            (int(self.node_ids[other]), float(score))
+            for other, score in zip(top, scores)
+            if other >= 0
+        ]
+
+    def write_similar(self, query_executor: QueryExecutor) -> bool:
+        """Write the cached top-k lists back to the graph as scored
+        `SIMILAR_TO` relationships, replacing any previous ones
+
+        Args:
+            query_executor (QueryExecutor): Query executor of the graph DB
+
+        Returns:
+            bool: True if successful, False if not
+        """
+
+        if self.top_ids is None:
+            self.compute_all()
+
+        label = self.service._get_label(self.service.node_label)
+        rows, ranks = np.nonzero(self.top_ids >= 0)
+        records = [
+            {
+                "nodeId": int(self.node_ids[row]),
+                "otherId": int(self.node_ids[self.top_ids[row, rank]]),
+                "score": float(self.top_scores[row, rank]),
+            }
+            for row, rank in zip(rows, ranks)
+        ]
+
+        # Drop the previous neighbors of every node first
+        delete_query = f"""
+        UNWIND $data as record
+        MATCH (n:{label} {{id: record.id}})-[r:SIMILAR_TO]->()
+        DELETE r
+        """
+        write_query = f"""
+        UNWIND $data as record
+        MATCH (n:{label} {{id: record.nodeId}})
+        MATCH (other:{label} {{id: record.otherId}})
+        MERGE (n)-[r:SIMILAR_TO]->(other)
+        SET r.score = record.score, r.metric = "{self.metric}"
+        """
+
+        print(
+            f"Writing {len(records)} SIMILAR_TO relationships between "
+            f"{label} nodes..."
+        )
+
+        return query_executor.execute_write(
+            delete_query, [{"id": int(i)} for i in self.node_ids]
+        ) and query_executor.execute_write(write_query, records)
@@ -0,0 +1,308 @@
+import json
+import mmap
+import os
+import struct
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.kg.projection import GraphProjection
+
+
+class GraphSnapshot:
+    """Read-only on-disk snapshot of the knowledge graph, holding the CSR
+    projection and the node property columns as aligned binary arrays in a
+    single file.
+
+    The file starts with a fixed preamble (magic bytes, format version and
+    header length) followed by a JSON header listing the offset, dtype and
+    length of every array. Arrays are aligned to 64 bytes, so readers map
+    the file once and view each array in place without copying. Worker
+    processes opening the same snapshot share its pages through the OS page
+    cache. Snapshots are replaced atomically, so a reader either sees the
+    old or the new file, and `reload` picks up the new one.
+    """
+
+    MAGIC = b"GCFSNAP\x00"
+    VERSION = 1
+    ALIGNMENT = 64
+    # Magic bytes, format version and header length
+    PREAMBLE = struct.Struct("<8sIQ")
+
+    def __init__(self, path: str | Path) -> None:
+
+        self.path = Path(path)
+        # Instance variables to store the mapped file and its contents
+        self.mm = None
+        self.stat = None
+        self.header = None
+        self.arrays = None
+        self.projection = None
+
+        self.reload()
+
+    @staticmethod
+    def _encode_column(series: pd.Series) -> tuple[str, dict]:
+        """Static helper method to encode a property column into arrays
+
+        Args:
+            series (pd.Series): Property column, aligned with the nodes
+
+        Returns:
+            tuple[str, dict]: Column kind and its arrays by name
+        """
+
+        valid = series.notna().to_numpy(dtype=np.uint8)
+        values = series.dropna()
+
+        if pd.api.types.is_bool_dtype(values):
+            kind = "bool"
+            data = series.fillna(False).to_numpy(dtype=np.uint8)
+        elif pd.api.types.is_integer_dtype(values):
+            kind = "int"
+            data = series.fillna(0).to_numpy(dtype=np.int64)
+        elif pd.api.types.is_numeric_dtype(values):
+            kind = "float"
+            data = series.to_numpy(dtype=np.float64, na_value=np.nan)
+        elif pd.api.types.is_datetime64_any_dtype(values) or (
+            len(values) and hasattr(values.iloc[0], "year")
+        ):
+            kind = "date"
+            dates = pd.to_datetime(series).to_numpy(dtype="datetime64[s]")
+            data = dates.view(np.int64)
+        else:
+            kind = "string"
+            encoded = [
+                str(v).encode() if ok else b"" for v, ok in zip(series, valid)
+            ]
+            offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+            np.cumsum([len(b) for b in encoded], out=offsets[1:])
+            blob = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+            return kind, {"offsets": offsets, "data": blob, "valid": valid}
+
+        return kind, {"data": data, "valid": valid}
+
+    @classmethod
+    def write(
+        cls,
+        projection: GraphProjection,
+        properties: dict[str, pd.DataFrame],
+        path: str | Path,
+    ) -> bool:
+        """Write a snapshot file, atomically replacing any existing one
+
+        Args:
+            projection (GraphProjection): CSR projection of the graph
+            properties (dict[str, pd.DataFrame]): Node properties by label,
+                with an `id` column
+            path (str | Path): Path to the snapshot file
+
+        Returns:
+            bool: True after completion
+        """
+
+        out_offsets, out_targets, out_types = projection.csr["OUT"]
+        in_offsets, in_targets, in_types = projection.csr["IN"]
+        arrays = {
+            "label_offsets": projection.label_offsets,
+            "node_ids": projection.node_ids,
+            "out_offsets": out_offsets,
+            "out_targets": out_targets,
+            "out_types": out_types,
+            "in_offsets": in_offsets,
+            "in_targets": in_targets,
+            "in_types": in_types,
+        }
+
+        # Align property columns with the node order of each label
+        columns = {}
+        for code, label in enumerate(projection.label_names):
+            if label not in properties:
+                continue
+            start = projection.label_offsets[code]
+            end = projection.label_offsets[code + 1]
+            df = properties[label].set_index("id")
+            df = df.reindex(projection.node_ids[start:end])
+            columns[label] = {}
+            for prop in df.columns:
+                kind, encoded = cls._encode_column(df[prop])
+                columns[label][prop] = kind
+                for name, array in encoded.items():
+                    arrays[f"{label}/{prop}/{name}"] = array
+
+        # Lay out the arrays after the header, each aligned
+        layout, offset = {}, 0
+        for name, array in arrays.items():
+            offset = -(-offset // cls.ALIGNMENT) * cls.ALIGNMENT
+            layout[name] = {
+                "dtype": array.dtype.str,
+                "length": len(array),
+                "offset": offset,
+            }
+            offset += array.nbytes
+        header = json.dumps(
+            {
+                "labels": projection.label_names,
+                "types": projection.type_names,
+                "columns": columns,
+                "arrays": layout,
+            }
+        ).encode()
+        data_start = cls.PREAMBLE.size + len(header)
+        data_start = -(-data_start // cls.ALIGNMENT) * cls.ALIGNMENT
+
+        # Write to a temporary file in the same directory, then swap it in
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(cls.PREAMBLE.pack(cls.MAGIC, cls.VERSION, len(header)))
+                f.write(header)
+                for name, array in arrays.items():
+                    f.seek(data_start + layout[name]["offset"])
+                    f.write(np.ascontiguousarray(array).tobytes())
+                # Extend the file over any trailing empty arrays
+                f.truncate(data_start + offset)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+        return True
+
+    def reload(self) -> bool:
+        """Map the snapshot file, if it was replaced since it was last mapped.
+        Arrays handed out before a reload keep the previous file alive.
+
+        Raises:
+            ValueError: Raise error if the file is not a snapshot of the
+                supported version
+
+        Returns:
+            bool: True if the snapshot was (re)loaded, False if unchanged
+        """
+
+        stat = os.stat(self.path)
+        if self.stat and (stat.st_ino, stat.st_mtime_ns) == (
+            self.stat.st_ino,
+            self.stat.st_mtime_ns,
+        ):
+            return False
+
+        with open(self.path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, header_size = self.PREAMBLE.unpack_from(mm)
+        if magic != self.MAGIC:
+            raise ValueError(f"{self.path} is not a graph snapshot")
+        if version != self.VERSION:
+            raise ValueError(
+                f"Unsupported snapshot version {version}, "
+                f"expected {self.VERSION}"
+            )
+        start = self.PREAMBLE.size
+        header = json.loads(mm[start : start + header_size])
+        data_start = start + header_size
+        data_start = -(-data_start // self.ALIGNMENT) * self.ALIGNMENT
+
+        # View every array in place within the mapped file
+        self.arrays = {
+            name: np.frombuffer(
+                mm,
+                dtype=np.dtype(spec["dtype"]),
+                count=spec["length"],
+                offset=data_start + spec["offset"],
+            )
+            for name, spec in header["arrays"].items()
+        }
+        self.mm, self.stat, self.header = mm, stat, header
+        self.projection = GraphProjection(
+            header["labels"],
+            header["types"],
+            *(
+                self.arrays[name]
+                for name in [
+                    "label_offsets",
+                    "node_ids",
+                    "out_offsets",
+                    "out_targets",
+                    "out_types",
+                    "in_offsets",
+                    "in_targets",
+                    "in_types",
+                ]
+            ),
+        )
+
+        return True
+
+    def get_column(self, label: str, prop: str) -> np.ndarray | list:
+        """Get a node property column of a label, in node order
+
+        Args:
+            label (str): Node label
+            prop (str): Property key
+
+        Returns:
+            np.ndarray | list: Values of the column, zero-copy for numbers,
+                with NaN (or None for strings) for missing values
+        """
+
+        kind = self.header["columns"][label][prop]
+        prefix = f"{label}/{prop}"
+        valid = self.arrays[f"{prefix}/valid"].astype(bool)
+        data = self.arrays[f"{prefix}/data"]
+
+        if kind == "string":
+            offsets = self.arrays[f"{prefix}/offsets"]
+            blob = data.tobytes()
+            return [
+                blob[offsets[i] : offsets[i + 1]].decode() if ok else None
+                for i, ok in enumerate(valid)
+            ]
+        if kind == "bool":
+            return data.view(np.bool_)
+        if kind == "date":
+            dates = data.view("datetime64[s]")
+            return dates if valid.all() else np.where(valid, dates, None)
+        if valid.all():
+            return data
+
+        return np.where(valid, data, np.nan)
+
+    def get_properties(self, index: int) -> dict:
+        """Get the properties of a node
+
+        Args:
+            index (int): Node index in the projection
+
+        Returns:
+            dict: Property values by key, with None for missing values
+        """
+
+        label, node_id = self.projection.get_node(index)
+        code = self.projection.node_labels[index]
+        row = index - int(self.projection.label_offsets[code])
+        properties = {"id": node_id}
+
+        for prop, kind in self.header["columns"].get(label, {}).items():
+            prefix = f"{label}/{prop}"
+            if not self.arrays[f"{prefix}/valid"][row]:
+                properties[prop] = None
+                continue
+            data = self.arrays[f"{prefix}/data"]
+            if kind == "string":
+                offsets = self.arrays[f"{prefix}/offsets"]
+                value = data[offsets[row] : offsets[row + 1]].tobytes()
+                properties[prop] = value.decode()
+            elif kind == "bool":
+                properties[prop] = bool(data[row])
+            elif kind == "date":
+                properties[prop] = pd.Timestamp(int(data[row]), unit="s")
+            else:
+                properties[prop] = data[row].item()
+
+        return properties
@@ -0,0 +1,228 @@
+import json
+
+from src.db.stats_catalog import StatsCatalog
+from src.kg.db.query_executor import QueryExecutor
+from src.kg.services.base_data_service import DataService
+from src.kg.services.base_meta_service import MetaService
+from src.utils.profiler import profile_stage
+
+
+class GraphStatistics:
+    """Statistics stage run after each build or sync of the graph, computing
+    in bulk per node label:
+
+    - The node count of the label
+    - The counts of the relationship types starting from the label
+    - The histogram of node degrees, in power of two buckets
+    - The `top_k` highest degree nodes (hubs)
+    - For metadata labels, the neighbor counts of each value by neighbor
+      label, ex: the number of projects per theme
+
+    Degrees are bucketed on the graph side, so that only bucket counts are
+    returned rather than a degree per node. The statistics are stored in the
+    `StatsCatalog` of the tabular DB for constant-time lookups, and mirrored
+    on a `GraphStatistics` node of the graph for graph-side consumers. Reads
+    wait for the writes of the build or sync they follow, even when routed
+    to followers.
+    """
+
+    def __init__(
+        self,
+        query_executor: QueryExecutor,
+        meta_services: dict[str, MetaService],
+        data_services: dict[str, DataService],
+        namespace: str = "",
+        top_k: int = 10,
+    ) -> None:
+
+        self.query_executor = query_executor
+        self.namespace = namespace
+        self.top_k = top_k
+        self.catalog = StatsCatalog()
+        # Distinct node labels of the services, without namespace
+        self.labels = list(
+            dict.fromkeys(
+                service.node_label
+                for service in [
+                    *meta_services.values(),
+                    *data_services.values(),
+                ]
+            )
+        )
+        self.meta_labels = [
+            service.node_label for service in meta_services.values()
+        ]
+
+    @staticmethod
+    def _get_histogram(rows: list[dict]) -> dict:
+        """Static helper method to shape the degree buckets of a label
+
+        Args:
+            rows (list[dict]): Power of two `bucket` of the degrees, with the
+                node `count`, `max` and `total` degree of each bucket
+
+        Returns:
+            dict: `buckets` as [lower bound, node count] pairs, with the
+                `max` and `mean` degree
+        """
+
+        if not rows:
+            return {"buckets": [], "max": 0, "mean": 0.0}
+
+        rows = sorted(rows, key=lambda row: row["bucket"])
+        count = sum(row["count"] for row in rows)
+
+        return {
+            "buckets": [
+                [
+                    0 if row["bucket"] == 0 else 2 ** (row["bucket"] - 1),
+                    row["count"],
+                ]
+                for row in rows
+            ],
+            "max": max(row["max"] for row in rows),
+            "mean": round(sum(row["total"] for row in rows) / count, 3),
+        }
+
+    def _compute_label(self, label: str) -> dict:
+        """Helper method to compute the statistics of a node label
+
+        Args:
+            label (str): Node label, without namespace
+
+        Returns:
+            dict: Statistics by kind, as written to the catalog
+        """
+
+        node_label = f"{self.namespace}{label}"
+        # Bucket 0 holds isolated nodes, bucket b degrees [2^(b-1), 2^b).
+        # The float log is corrected at exact powers of two.
+        buckets = self.query_executor.execute_read(
+            f"""
+            MATCH (n:{node_label})
+            WITH COUNT {{ (n)--() }} AS degree
+            WITH degree, CASE WHEN degree = 0 THEN -1
+                ELSE toInteger(floor(log(degree) / log(2))) END AS b
+            WITH degree, CASE
+                WHEN b < 0 THEN 0
+                WHEN 2 ^ (b + 1) <= degree THEN b + 2
+                WHEN 2 ^ b > degree THEN b
+                ELSE b + 1 END AS bucket
+            RETURN bucket, count(*) AS count, max(degree) AS max,
+                sum(degree) AS total
+            """,
+            causal=True,
+        )
+        hubs = self.query_executor.execute_read(
+            f"""
+            MATCH (n:{node_label})
+            WITH n, COUNT {{ (n)--() }} AS degree
+            ORDER BY degree DESC
+            LIMIT $k
+            RETURN n.id AS id, degree
+            """,
+            {"k": self.top_k},
+            causal=True,
+        )
+        relationships = self.query_executor.execute_read(
+            f"""
+            MATCH (:{node_label})-[r]->()
+            RETURN type(r) AS type, count(r) AS count
+            """,
+            causal=True,
+        )
+        statistics = {
+            "label": {label: sum(row["count"] for row in buckets)},
+            "relationship": {
+                (label, row["type"]): row["count"] for row in relationships
+            },
+            "degree": {label: self._get_histogram(buckets)},
+            "hubs": {
+                label: [
+                    {"id": row["id"], "degree": row["degree"]} for row in hubs
+                ]
+            },
+        }
+
+        if label in self.meta_labels:
+            values = {}
+            # Neighbors are matched on the labels of the services, as nodes
+            # may carry other labels, ex: value labels of supernode keys
+            for row in self.query_executor.execute_read(
+                f"""
+                MATCH (m:{node_label})--(n)
+                UNWIND [label IN $labels WHERE label IN labels(n)] AS label
+                RETURN m.id AS id, label, count(*) AS count
+                """,
+                {
+                    "labels": [
+                        f"{self.namespace}{other}" for other in self.labels
+                    ]
+                },
+                causal=True,
+            ):
+                # Neighbor labels are reported without namespace
+                other = row["label"].removeprefix(self.namespace)
+                values.setdefault(str(row["id"]), {})[other] = row["count"]
+            statistics["values"] = {label: values}
+
+        return statistics
+
+    def _write_node(self) -> bool:
+        """Helper method to mirror the catalog on the statistics node
+
+        Returns:
+            bool: True if successful, False if not
+        """
+
+        catalog = self.catalog.get_catalog(self.namespace)
+        label_counts = catalog["label"]
+        rel_counts = catalog["relationship_totals"]
+        # Nested statistics are stored as JSON, as node properties are flat
+        properties = {
+            "labels": list(label_counts),
+            "labelCounts": list(label_counts.values()),
+            "nodeCount": sum(label_counts.values()),
+            "relationshipTypes": list(rel_counts),
+            "relationshipCounts": list(rel_counts.values()),
+            "relationshipCount": sum(rel_counts.values()),
+            "degreeHistograms": json.dumps(catalog["degree"]),
+            "hubs": json.dumps(catalog["hubs"]),
+            "valueCounts": json.dumps(catalog["values"]),
+        }
+        query = f"""
+        UNWIND $data AS record
+        MERGE (s:{self.namespace}GraphStatistics {{id: "catalog"}})
+        SET s += record, s.computedAt = datetime()
+        """
+
+        return self.query_executor.execute_write(query, [properties])
+
+    @profile_stage("statistics")
+    def refresh(self, labels: list[str] = None) -> bool:
+        """Main method to recompute and store the statistics of some or all
+        node labels
+
+        Args:
+            labels (list[str], optional): Node labels to refresh, without
+                namespace, ex: those touched by a sync. Defaults to None, for
+                all labels of the services.
+
+        Returns:
+            bool: True if successful, False if not
+        """
+
+        labels = [
+            label for label in self.labels if labels is None or label in labels
+        ]
+        if not labels:
+            return True
+
+        statistics = {kind: {} for kind in StatsCatalog.KINDS}
+        for label in labels:
+            for kind, values in self._compute_label(label).items():
+                statistics[kind].update(values)
+        self.catalog.write(self.namespace, labels, statistics)
+        print(f"Refreshed graph statistics of {len(labels)} labels.")
+
+        return self._write_node()
@@ -0,0 +1,267 @@
+import logging
+import threading
+import time
+from typing import Callable
+
+from src.db.change_feed import ChangeFeed
+from src.kg.knowledge_graph import KnowledgeGraph
+
+
+class GraphUpdater:
+    """Long-running consumer of the tabular DB change log, keeping the graph
+    up to date without full rescans.
+
+    Each batch of changes is reduced to the distinct changed IDs per data
+    table, whose current rows are re-read and applied through the data
+    services as set-based writes. The consumer offset is committed only once
+    all writes of a batch succeeded, so a crash replays the batch, which the
+    idempotent writes absorb. The writes of each data table run in a single
+    transaction, so readers never see a node unlinked but not yet relinked.
+
+    Statistics of the touched labels are refreshed at most every
+    `statistics_interval` seconds, when the change log is drained and when
+    the updater stops, as each refresh scans the touched labels.
+
+    With a `resolver` of the active graph (see `get_graph_resolver`), the
+    updater follows blue/green rebuilds: whenever the graph generation
+    changes, it re-resolves the database and label namespace to write to.
+    Offsets are only committed if the generation did not change while a
+    batch was applied, so a batch applied to a swapped out graph is replayed
+    on the new one from the offset the rebuild published.
+    """
+
+    # Data services in foreign key order, so that relationships to data
+    # nodes find both ends (ex: Entity FUNDS Project)
+    ORDER = ["entity", "project", "readiness", "country"]
+
+    def __init__(
+        self,
+        kg: KnowledgeGraph,
+        name: str = "graph",
+        batch_size: int = 1000,
+        interval: float = 1.0,
+        prune: bool = True,
+        statistics_interval: float = 60.0,
+        resolver: Callable[[], tuple[str, str]] = None,
+    ) -> None:
+
+        self.name = name
+        self.batch_size = batch_size
+        self.interval = interval
+        self.prune = prune
+        self.statistics_interval = statistics_interval
+        # Labels touched since the last statistics refresh
+        self.pending_labels = set()
+        self.refreshed_at = time.monotonic()
+        self.feed = ChangeFeed(kg.db_handler)
+        # Optional resolver of the database and namespace of the live graph
+        self.resolver = resolver
+        # Graph generation the graph was last resolved at
+        self.generation = None
+        self._set_graph(kg)
+        self.stop_event = threading.Event()
+
+    def _set_graph(self, kg: KnowledgeGraph) -> bool:
+        """Helper method to set the knowledge graph changes are applied to
+
+        Args:
+            kg (KnowledgeGraph): Knowledge graph
+
+        Returns:
+            bool: True after completion
+        """
+
+        self.kg = kg
+        # Progress bars would flood the logs of a long-running process
+        kg.query_executor.set_progress(False)
+        # Data services by the table their changes are logged against
+        self.services = {
+            kg.data_services[key].table_class.__tablename__: (
+                kg.data_services[key]
+            )
+            for key in self.ORDER
+        }
+
+        return True
+
+    def _resolve(self, generation: int) -> bool:
+        """Helper method to re-resolve the graph to write to when the graph
+        generation changed, ex: after a rebuild swap
+
+        Args:
+            generation (int): Current graph generation
+
+        Returns:
+            bool: True after completion
+        """
+
+        if generation == self.generation:
+            return True
+        self.generation = generation
+        if self.resolver is None:
+            return True
+
+        database, namespace = self.resolver()
+        if (database, namespace) == (self.kg.database, self.kg.namespace):
+            return True
+        logging.info(
+            f"Following graph swap to database {database}, namespace "
+            f"{namespace or '(none)'}"
+        )
+        # Statistics of the new graph were computed by its build
+        self.pending_labels = set()
+
+        return self._set_graph(
+            KnowledgeGraph(
+                self.kg.conn,
+                throttle=self.kg.query_executor.throttle,
+                database=database,
+                namespace=namespace,
+            )
+        )
+
+    def _apply(self, changes: list[dict]) -> bool:
+        """Helper method to apply a batch of changes to the graph
+
+        Args:
+            changes (list[dict]): Changes read from the change log
+
+        Returns:
+            bool: True if successful, False if not
+        """
+
+        # Only the latest state of each row matters
+        ids = {table: set() for table in self.services}
+        for change in changes:
+            if change["table_name"] in ids:
+                ids[change["table_name"]].add(change["row_id"])
+            else:
+                logging.warning(f"Skipping change {change}")
+
+        for table, service in self.services.items():
+            if not ids[table]:
+                continue
+            writes = service.prepare_changes(sorted(ids[table]))
+            if not self.kg.query_executor.execute_transaction(writes):
+                return False
+            logging.info(f"Applied {len(ids[table])} {table} changes")
+        self.pending_labels.update(self._get_labels(ids))
+
+        return True
+
+    def _refresh_statistics(self, force: bool = False) -> bool:
+        """Helper method to refresh the statistics of the labels touched
+        since the last refresh, once `statistics_interval` has elapsed
+
+        Args:
+            force (bool, optional): Toggle to refresh regardless of the
+                interval. Defaults to False.
+
+        Returns:
+            bool: True if successful, False if not
+        """
+
+        if not self.pending_labels:
+            return True
+        elapsed = time.monotonic() - self.refreshed_at
+        if not force and elapsed < self.statistics_interval:
+            return True
+
+        labels, self.pending_labels = sorted(self.pending_labels), set()
+        self.refreshed_at = time.monotonic()
+
+        return self.kg.refresh_statistics(labels)
+
+    def _get_labels(self, ids: dict[str, set]) -> list[str]:
+        """Helper method to get the node labels whose statistics a batch of
+        changes may have changed: the labels of the changed nodes and of the
+        nodes they relate to
+
+        Args:
+            ids (dict[str, set]): Changed IDs by data table
+
+        Returns:
+            list[str]: Node labels, without namespace
+        """
+
+        labels = []
+        for table, service in self.services.items():
+            if not ids[table]:
+                continue
+            labels.append(service.node_label)
+            for rel_config in (service.relationships or {}).values():
+                labels.append(rel_config["label"])
+            # Join tables link to the involved countries
+            if service.join_class is not None:
+                labels.append("Country")
+
+        return list(dict.fromkeys(labels))
+
+    def run_once(self) -> int:
+        """Apply the next batch of changes and commit the offset
+
+        Returns:
+            int: Number of applied changes, 0 if there were none or if the
+                batch is to be replayed on a swapped graph
+        """
+
+        generation = self.feed.get_generation(self.name)
+        self._resolve(generation)
+        offset = self.feed.get_offset(self.name)
+        changes = self.feed.read(offset, self.batch_size)
+        if not changes:
+            return 0
+
+        if not self._apply(changes):
+            raise RuntimeError(
+                f"Failed to apply changes {changes[0]['id']} to "
+                f"{changes[-1]['id']}"
+            )
+        if not self.feed.commit_offset(
+            self.name, changes[-1]["id"], generation
+        ):
+            logging.info("Graph generation changed, replaying the batch")
+            return 0
+        if self.prune:
+            self.feed.prune()
+
+        return len(changes)
+
+    def run(self, max_batches: int = None) -> bool:
+        """Main method to apply changes continuously, polling the change log
+        whenever it is drained, until stopped
+
+        Args:
+            max_batches (int, optional): Number of batches to stop after.
+                Defaults to None, to run until `stop` is called.
+
+        Returns:
+            bool: True after completion
+        """
+
+        self.feed.install()
+        self.stop_event.clear()
+        batches = 0
+
+        while not self.stop_event.is_set():
+            if max_batches is not None and batches >= max_batches:
+                break
+            if self.run_once():
+                batches += 1
+            else:
+                self._refresh_statistics()
+                # Wait for new changes, waking up early when stopped
+                self.stop_event.wait(self.interval)
+
+        return self._refresh_statistics(force=True)
+
+    def stop(self) -> bool:
+        """Stop a running updater after its current batch
+
+        Returns:
+            bool: True after completion
+        """
+
+        self.stop_event.set()
+
+        return True
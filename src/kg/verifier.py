@@ -0,0 +1,515 @@
+import hashlib
+import logging
+
+import numpy as np
+import pandas as pd
+
+from src.kg.knowledge_graph import KnowledgeGraph
+from src.kg.services.base_data_service import DataService
+
+
+class ConsistencyVerifier:
+    """Verifier checking that the graph matches the tabular DB.
+
+    Every node and relationship is reduced to a 31-bit row fingerprint,
+    which is summed (and summed squared) per bucket of IDs on both sides.
+    Sums are order-independent, so each label and relationship type costs a
+    single aggregate query. Rows are only compared for buckets whose counts
+    or sums differ.
+
+    Cypher has no native string hash, so strings are fingerprinted by a
+    polynomial hash of the position of each character in `ALPHABET`, which
+    both sides compute without APOC. Characters outside of it share one
+    code, so only edits swapping one for another go unnoticed. With
+    `use_apoc`, a prefix of their MD5 is used instead.
+    """
+
+    # Mersenne prime modulus keeping squared fingerprints within 64 bits
+    MODULUS = 2147483647
+    MULTIPLIER = 31
+    PAIR_MULTIPLIER = 1000003
+    # Characters with their own code in string hashes: printable ASCII and
+    # Latin-1, ex: for accented country names
+    ALPHABET = "".join(map(chr, [*range(32, 127), *range(160, 256)]))
+
+    def __init__(
+        self, kg: KnowledgeGraph, buckets: int = 64, use_apoc: bool = False
+    ) -> None:
+
+        self.kg = kg
+        self.query_executor = kg.query_executor
+        self.buckets = buckets
+        self.use_apoc = use_apoc
+        # Instance variable to store the verification results
+        self.report = None
+
+    @staticmethod
+    def _get_kind(series: pd.Series) -> str:
+        """Static helper method to infer how a property column is
+        fingerprinted
+
+        Args:
+            series (pd.Series): Property column from the tabular DB
+
+        Returns:
+            str: One of "bool", "number", "date" or "string"
+        """
+
+        if pd.api.types.is_bool_dtype(series):
+            return "bool"
+        if pd.api.types.is_numeric_dtype(series):
+            return "number"
+        if pd.api.types.is_datetime64_any_dtype(series):
+            return "date"
+        values = series.dropna()
+        if len(values) and hasattr(values.iloc[0], "year"):
+            return "date"
+
+        return "string"
+
+    def _hash_string(self, value: str) -> int:
+        """Helper method to hash a string, mirroring the Cypher expression of
+        `_encode_cypher`
+
+        Args:
+            value (str): String property value
+
+        Returns:
+            int: Hash, seeded by the length so that empty strings differ from
+                missing values
+        """
+
+        codes = {c: i for i, c in enumerate(self.ALPHABET)}
+        h = len(value) + 1
+        for c in value:
+            h = (h * self.MULTIPLIER + codes.get(c, len(self.ALPHABET))) % (
+                self.MODULUS
+            )
+
+        return h
+
+    def _encode_column(self, series: pd.Series, kind: str) -> np.ndarray:
+        """Helper method to encode a property column into non-negative
+        integers, mirroring `_encode_cypher`
+
+        Args:
+            series (pd.Series): Property column from the tabular DB
+            kind (str): Property kind
+
+        Returns:
+            np.ndarray: Encoded values, 0 for missing values
+        """
+
+        missing = series.isna().to_numpy()
+        if kind == "bool":
+            values = np.where(series.astype(bool), 1, 2)
+        elif kind == "number":
+            numbers = pd.to_numeric(series, errors="coerce").fillna(0)
+            values = np.floor(numbers.to_numpy(dtype=float) * 100 + 0.5)
+            values = values.astype(np.int64)
+        elif kind == "date":
+            dates = pd.to_datetime(series)
+            values = (
+                dates.dt.year.fillna(0) * 10000
+                + dates.dt.month.fillna(0) * 100
+                + dates.dt.day.fillna(0)
+            ).to_numpy(dtype=np.int64)
+        elif self.use_apoc:
+            values = np.array(
+                [
+                    int(hashlib.md5(str(v).encode()).hexdigest()[:7], 16)
+                    for v in series.fillna("")
+                ],
+                dtype=np.int64,
+            )
+        else:
+            values = np.array(
+                [self._hash_string(str(v)) for v in series.fillna("")],
+                dtype=np.int64,
+            )
+
+        values = np.where(missing, 0, values).astype(np.int64)
+
+        return values % self.MODULUS
+
+    def _encode_cypher(self, prop: str, kind: str) -> str:
+        """Helper method to build the Cypher expression encoding a property,
+        mirroring `_encode_column`
+
+        Args:
+            prop (str): Property key
+            kind (str): Property kind
+
+        Returns:
+            str: Cypher expression
+        """
+
+        v = f"n.`{prop}`"
+        if kind == "bool":
+            expr = f"CASE {v} WHEN true THEN 1 WHEN false THEN 2 END"
+        elif kind == "number":
+            expr = (
+                f"CASE WHEN {v} <> {v} THEN 0 "
+                f"ELSE toInteger(floor(toFloat({v}) * 100 + 0.5)) END"
+            )
+        elif kind == "date":
+            expr = f"{v}.year * 10000 + {v}.month * 100 + {v}.day"
+        elif self.use_apoc:
+            # Decode the first 7 hex digits of the MD5 without APOC helpers
+            expr = (
+                f"reduce(h = 0, c IN split(left(apoc.util.md5([{v}]), 7), '') "
+                f"| h * 16 + size(split('0123456789abcdef', c)[0]))"
+            )
+        else:
+            # Position of each character in the alphabet, its length if not
+            # found, as in `_hash_string`
+            expr = (
+                f"reduce(h = size({v}) + 1, i IN range(0, size({v}) - 1) | "
+                f"(h * {self.MULTIPLIER} + "
+                f"size(split($alphabet, substring({v}, i, 1))[0])) % $m)"
+            )
+
+        return f"(coalesce({expr}, 0) % $m + $m) % $m"
+
+    def _fingerprint_nodes(
+        self, df: pd.DataFrame, kinds: dict[str, str]
+    ) -> np.ndarray:
+        """Helper method to compute the row fingerprints of expected nodes
+
+        Args:
+            df (pd.DataFrame): Node properties, including the id
+            kinds (dict[str, str]): Property kind by property key
+
+        Returns:
+            np.ndarray: Row fingerprint per node
+        """
+
+        g = df["id"].to_numpy(dtype=np.int64) % self.MODULUS
+        for prop, kind in kinds.items():
+            encoded = self._encode_column(df[prop], kind)
+            g = (g * self.MULTIPLIER + encoded) % self.MODULUS
+
+        return g
+
+    def _fingerprint_pairs(self, df: pd.DataFrame) -> np.ndarray:
+        """Helper method to compute the row fingerprints of expected edges
+
+        Args:
+            df (pd.DataFrame): Edges with `src` and `dst` node IDs
+
+        Returns:
+            np.ndarray: Row fingerprint per edge
+        """
+
+        src = df["src"].to_numpy(dtype=np.int64) % self.MODULUS
+        dst = df["dst"].to_numpy(dtype=np.int64) % self.MODULUS
+
+        return (src * self.PAIR_MULTIPLIER + dst) % self.MODULUS
+
+    def _aggregate(self, keys: np.ndarray, g: np.ndarray) -> pd.DataFrame:
+        """Helper method to aggregate row fingerprints into bucket sums
+
+        Args:
+            keys (np.ndarray): Bucketing key per row (node or source ID)
+            g (np.ndarray): Row fingerprint per row
+
+        Returns:
+            pd.DataFrame: Count and fingerprint sums indexed by bucket
+        """
+
+        df = pd.DataFrame(
+            {
+                "bucket": keys % self.buckets,
+                "sumG": g,
+                "sumF": g * g % self.MODULUS,
+            }
+        )
+        agg = df.groupby("bucket").agg(
+            count=("sumG", "size"), sumG=("sumG", "sum"), sumF=("sumF", "sum")
+        )
+        agg[["sumG", "sumF"]] %= self.MODULUS
+
+        return agg
+
+    def _read_aggregate(self, match: str, g_steps: list[str]) -> pd.DataFrame:
+        """Helper method to compute the bucket sums in a single graph query
+
+        Args:
+            match (str): MATCH clause binding `key` and `n` or `a`/`b`
+            g_steps (list[str]): WITH clauses computing the row fingerprint g
+
+        Returns:
+            pd.DataFrame: Count and fingerprint sums indexed by bucket
+        """
+
+        query = "\n".join(
+            [
+                match,
+                *g_steps,
+                "WITH key % $buckets AS bucket, g",
+                "RETURN bucket, count(*) AS count,",
+                "    sum(g) % $m AS sumG, sum(g * g % $m) % $m AS sumF",
+            ]
+        )
+        records = self.query_executor.execute_read(
+            query,
+            {
+                "m": self.MODULUS,
+                "buckets": self.buckets,
+                "alphabet": self.ALPHABET,
+            },
+        )
+        df = pd.DataFrame(records, columns=["bucket", "count", "sumG", "sumF"])
+
+        return df.set_index("bucket")
+
+    def _read_rows(
+        self, match: str, g_steps: list[str], buckets: list[int]
+    ) -> pd.DataFrame:
+        """Helper method to read the row fingerprints of mismatching buckets
+
+        Args:
+            match (str): MATCH clause binding `key` and `n` or `a`/`b`
+            g_steps (list[str]): WITH clauses computing the row fingerprint g
+            buckets (list[int]): Buckets to drill down into
+
+        Returns:
+            pd.DataFrame: Row key and fingerprint
+        """
+
+        query = "\n".join(
+            [
+                match,
+                "WITH * WHERE key % $buckets IN $selected",
+                *g_steps,
+                "RETURN row, g",
+            ]
+        )
+        records = self.query_executor.execute_read(
+            query,
+            {
+                "m": self.MODULUS,
+                "buckets": self.buckets,
+                "alphabet": self.ALPHABET,
+                "selected": [int(b) for b in buckets],
+            },
+        )
+
+        df = pd.DataFrame(records, columns=["row", "g"])
+        # Edge rows are returned as [source, target] lists
+        df["row"] = df["row"].map(
+            lambda row: tuple(row) if isinstance(row, list) else row
+        )
+
+        return df
+
+    @staticmethod
+    def _get_mismatching_buckets(
+        expected: pd.DataFrame, actual: pd.DataFrame
+    ) -> list[int]:
+        """Static helper method to compare bucket aggregates
+
+        Args:
+            expected (pd.DataFrame): Bucket sums from the tabular DB
+            actual (pd.DataFrame): Bucket sums from the graph
+
+        Returns:
+            list[int]: Buckets whose count or sums differ
+        """
+
+        joined = expected.join(
+            actual, how="outer", lsuffix="_expected", rsuffix="_actual"
+        ).fillna(0)
+        differs = (
+            (joined["count_expected"] != joined["count_actual"])
+            | (joined["sumG_expected"] != joined["sumG_actual"])
+            | (joined["sumF_expected"] != joined["sumF_actual"])
+        )
+
+        return joined.index[differs].astype(int).tolist()
+
+    @staticmethod
+    def _diff_rows(expected: pd.DataFrame, actual: pd.DataFrame) -> dict:
+        """Static helper method to diff row fingerprints within mismatching
+        buckets
+
+        Args:
+            expected (pd.DataFrame): Row key and fingerprint from the tabular
+                DB
+            actual (pd.DataFrame): Row key and fingerprint from the graph
+
+        Returns:
+            dict: Missing, extra and changed row keys
+        """
+
+        joined = expected.merge(
+            actual, on="row", how="outer", suffixes=("_expected", "_actual")
+        )
+        missing = joined["g_actual"].isna()
+        extra = joined["g_expected"].isna()
+        changed = (
+            ~missing & ~extra & (joined["g_expected"] != joined["g_actual"])
+        )
+
+        return {
+            "missing": joined.loc[missing, "row"].tolist(),
+            "extra": joined.loc[extra, "row"].tolist(),
+            "changed": joined.loc[changed, "row"].tolist(),
+        }
+
+    def _verify_bucketed(
+        self,
+        keys: np.ndarray,
+        rows: list,
+        g: np.ndarray,
+        match: str,
+        g_steps: list[str],
+    ) -> dict:
+        """Helper method to compare one label or relationship type, drilling
+        down only into mismatching buckets
+
+        Args:
+            keys (np.ndarray): Bucketing key per expected row
+            rows (list): Row key per expected row
+            g (np.ndarray): Row fingerprint per expected row
+            match (str): MATCH clause binding `key` and `row`
+            g_steps (list[str]): WITH clauses computing the row fingerprint g
+
+        Returns:
+            dict: Result for the label or relationship type
+        """
+
+        expected = self._aggregate(keys, g)
+        actual = self._read_aggregate(match, g_steps)
+        buckets = self._get_mismatching_buckets(expected, actual)
+        result = {
+            "expected": int(expected["count"].sum()),
+            "actual": int(actual["count"].sum()),
+            "mismatched_buckets": buckets,
+        }
+        if buckets:
+            expected_rows = pd.DataFrame({"row": rows, "g": g})
+            expected_rows = expected_rows[
+                np.isin(keys % self.buckets, buckets)
+            ]
+            actual_rows = self._read_rows(match, g_steps, buckets)
+            result.update(self._diff_rows(expected_rows, actual_rows))
+
+        return result
+
+    def _get_expected_nodes(self) -> dict[str, pd.DataFrame]:
+        """Helper method to read and process the expected node properties of
+        every service from the tabular DB
+
+        Returns:
+            dict[str, pd.DataFrame]: Node properties by namespaced label
+        """
+
+        nodes = {}
+        for service in [
+            *self.kg.meta_services.values(),
+            *self.kg.data_services.values(),
+        ]:
+            label = service._get_label(service.node_label)
+            # Data services re-using a metadata label create no nodes
+            if label in nodes:
+                continue
+            service._get_data()
+            service._process_data()
+            df = pd.DataFrame(service.processed)
+            if isinstance(service, DataService):
+                props = [p for p in service.properties if p in df.columns]
+                df = df[props]
+            nodes[label] = df
+
+        return nodes
+
+    def verify_nodes(self) -> dict:
+        """Compare node counts and property fingerprints per label
+
+        Returns:
+            dict: Result by namespaced node label
+        """
+
+        results = {}
+        for label, df in self._get_expected_nodes().items():
+            kinds = {
+                prop: self._get_kind(df[prop])
+                for prop in df.columns
+                if prop != "id"
+            }
+            g = self._fingerprint_nodes(df, kinds)
+            g_steps = ["WITH key, row, n, (key % $m + $m) % $m AS g"] + [
+                f"WITH key, row, n, (g * {self.MULTIPLIER} + "
+                f"{self._encode_cypher(prop, kind)}) % $m AS g"
+                for prop, kind in kinds.items()
+            ]
+            match = f"MATCH (n:{label})\nWITH n, n.id AS key, n.id AS row"
+            ids = df["id"].to_numpy(dtype=np.int64)
+            results[label] = self._verify_bucketed(
+                ids, df["id"].tolist(), g, match, g_steps
+            )
+
+        return results
+
+    def verify_relationships(self) -> dict:
+        """Compare edge counts and (source, target) fingerprints per
+        relationship type between each pair of labels
+
+        Returns:
+            dict: Result by "(Source)-[TYPE]->(Target)" pattern
+        """
+
+        pairs = {}
+        for service in self.kg.data_services.values():
+            service._get_data()
+            for src, rel, dst, df in service._get_relationship_pairs():
+                pairs.setdefault((src, rel, dst), []).append(df)
+
+        results = {}
+        for (src, rel, dst), dfs in pairs.items():
+            # Pairs written by several services or rows are merged into one
+            # relationship, as when counting expected relationships
+            df = pd.concat(dfs).drop_duplicates().astype(np.int64)
+            g = self._fingerprint_pairs(df)
+            match = (
+                f"MATCH (a:{src})-[:{rel}]->(b:{dst})\n"
+                f"WITH a.id AS key, [a.id, b.id] AS row, a, b"
+            )
+            g_steps = [
+                "WITH key, row, ((a.id % $m) * "
+                f"{self.PAIR_MULTIPLIER} + b.id % $m) % $m AS g"
+            ]
+            rows = list(zip(df["src"], df["dst"]))
+            results[f"({src})-[{rel}]->({dst})"] = self._verify_bucketed(
+                df["src"].to_numpy(), rows, g, match, g_steps
+            )
+
+        return results
+
+    def verify(self) -> bool:
+        """Main method to verify the graph against the tabular DB
+
+        Returns:
+            bool: True if consistent, False if not
+        """
+
+        self.report = {
+            "nodes": self.verify_nodes(),
+            "relationships": self.verify_relationships(),
+        }
+
+        consistent = True
+        for kind, results in self.report.items():
+            for name, result in results.items():
+                if result["mismatched_buckets"]:
+                    consistent = False
+                    logging.warning(
+                        f"{name}: expected {result['expected']} {kind}, "
+                        f"found {result['actual']} "
+                        f"({len(result.get('missing', []))} missing, "
+                        f"{len(result.get('extra', []))} extra, "
+                        f"{len(result.get('changed', []))} changed)"
+                    )
+
+        return consistent
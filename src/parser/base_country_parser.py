@@ -7,6 +7,10 @@ from sqlalchemy.ext.declarative import DeclarativeMeta
 import country_converter as coco
 
 from src.db.db_handler import DBHandler
+from src.db.lookup_registry import LookupRegistry
+from src.utils.dtype_policy import DtypePolicy
+from src.utils.parse_cache import ParseCache
+from src.utils.profiler import profile_stage
 from src.db.db_schema import CountryDict
 
 
@@ -24,6 +28,10 @@ class BaseCountryParser:
         self.final_cols = None
         # Instance variable to save ISO3 to country_id mapper
         self.country_id_mapper = None
+        # Shared name to ID lookups of the dictionary tables
+        self.lookup_registry = LookupRegistry(db_handler)
+        # Shared cache of parsed XLSX files
+        self.parse_cache = ParseCache()
         # Country converter instance for country name matching
         self.cc = coco.CountryConverter()
         # Instance variables to save dataframes
@@ -39,21 +47,17 @@ class BaseCountryParser:
             bool: True after completion
         """
 
-        # Create name to ID mapping dictionary
-        with self.db_handler.get_session() as session:
-            mapper = {
-                item.iso3: item.id for item in session.query(CountryDict).all()
-            }
-
-        # Assign the mapper to the corresponding instance variable
-        self.country_id_mapper = mapper
+        # Get the ISO3 to ID lookup from the shared lookup registry
+        self.country_id_mapper = self.lookup_registry.get(
+            CountryDict, name_col="iso3"
+        )
 
         return True
 
     def _read_xlsx(self, file_path: str) -> bool:
         """Helper method to read in an XLSX data export file as a dataframe,
         create a new ID column, and retrieve only the country name column for
-        country parsing
+        country parsing. Unchanged files are read from the parse cache.
 
         Args:
             file_path (str): Path to the Excel data export file
@@ -66,13 +70,13 @@ class BaseCountryParser:
         """
 
         try:
-            df = pd.read_excel(file_path)
+            df = self.parse_cache.read_excel(file_path)
             # Re-create ID column for input
             df["id"] = range(1, len(df) + 1)
             # Filter out rows without countries
             df = df[~pd.isna(df[self.country_col])].copy()
-            # Keep only ID and country columns
-            self.input = df[["id", self.country_col]]
+            # Keep only ID and country columns, releasing the other columns
+            self.input = DtypePolicy.apply(df[["id", self.country_col]])
             return True
         except Exception as e:
             raise ValueError(f"Error reading XLSX file at {file_path}: {e}")
@@ -108,11 +112,13 @@ class BaseCountryParser:
         # Map ISO3 from country names using country converter
         df["iso3"] = self.cc.pandas_convert(df[self.country_col])
         # Map country ID from ISO3 using custom mapper
-        df["country_id"] = df["iso3"].map(self.country_id_mapper)
+        df["country_id"] = self.lookup_registry.map(
+            df["iso3"], self.country_id_mapper
+        )
         # Drop redundant columns
         df.drop([self.country_col, "iso3"], axis=1, inplace=True)
 
-        self.parsed = df
+        self.parsed = DtypePolicy.apply(df)
 
         return True
 
@@ -127,7 +133,7 @@ class BaseCountryParser:
 
         with self.db_handler.get_session() as session:
             try:
-                records = df.to_dict(orient="records")
+                records = DtypePolicy.to_records(df)
                 session.bulk_insert_mappings(self.table_class, records)
                 session.commit()
                 print(
@@ -144,6 +150,7 @@ class BaseCountryParser:
 
         return False
 
+    @profile_stage("parse")
     def parse_countries(self, file_path: str) -> bool:
         """High-level main method to parse out multiple country values in a
         single cell to multiple rows
@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+
+
+class DtypePolicy:
+    """Memory-lean dtype policy for the dataframes of the importers, parsers
+    and graph services:
+
+    1. ID columns (`id`, `*_id`, `*Id`) become the smallest nullable integer
+    2. Low-cardinality text columns (dictionary-backed names such as BM
+       codes, sizes, sectors or regions) become categoricals
+    3. Other text columns become `string[pyarrow]`
+
+    Dataframes are converted back to plain Python objects, with None for
+    missing values, only when they are handed to SQLAlchemy or Neo4j.
+    """
+
+    # Toggle to fall back to the default pandas dtypes (ex: for benchmarks)
+    enabled = True
+    # Text columns with at most this share of distinct values are categorical
+    category_ratio = 0.5
+    # Nullable integer dtypes, from smallest to largest
+    int_dtypes = ["Int8", "Int16", "Int32", "Int64"]
+
+    @staticmethod
+    def _is_id_col(col: str) -> bool:
+        """Static helper method to check whether a column holds IDs
+
+        Args:
+            col (str): Column name
+
+        Returns:
+            bool: True if the column holds IDs, False if not
+        """
+
+        return col == "id" or col.endswith("_id") or col.endswith("Id")
+
+    @classmethod
+    def _get_int_dtype(cls, series: pd.Series) -> str:
+        """Helper class method to get the smallest nullable integer dtype
+        that holds all values of a numeric column
+
+        Args:
+            series (pd.Series): Numeric column
+
+        Returns:
+            str: Nullable integer dtype name
+        """
+
+        values = series.dropna()
+        if values.empty:
+            return cls.int_dtypes[0]
+        low, high = values.min(), values.max()
+        for dtype in cls.int_dtypes:
+            info = np.iinfo(dtype.lower())
+            if info.min <= low and high <= info.max:
+                return dtype
+
+        return cls.int_dtypes[-1]
+
+    @classmethod
+    def apply(cls, df: pd.DataFrame) -> pd.DataFrame:
+        """Convert the columns of a dataframe to memory-lean dtypes
+
+        Args:
+            df (pd.DataFrame): Dataframe with default pandas dtypes
+
+        Returns:
+            pd.DataFrame: Dataframe with memory-lean dtypes
+        """
+
+        if not cls.enabled:
+            return df
+
+        dtypes = {}
+        for col in df.columns:
+            series = df[col]
+            if pd.api.types.is_bool_dtype(series):
+                continue
+            if pd.api.types.is_numeric_dtype(series):
+                # Only convert integral ID columns, keeping amounts as is
+                values = series.dropna()
+                if cls._is_id_col(str(col)) and (values % 1 == 0).all():
+                    dtypes[col] = cls._get_int_dtype(series)
+            elif pd.api.types.is_object_dtype(
+                series
+            ) or pd.api.types.is_string_dtype(series):
+                values = series.dropna()
+                # Skip non-text columns, such as dates or lists
+                if not values.map(type).eq(str).all():
+                    continue
+                if values.nunique() <= cls.category_ratio * len(series):
+                    dtypes[col] = "category"
+                else:
+                    dtypes[col] = "string[pyarrow]"
+
+        return df.astype(dtypes)
+
+    @staticmethod
+    def to_object(df: pd.DataFrame) -> pd.DataFrame:
+        """Convert a dataframe to plain Python objects with None for missing
+        values, as expected by SQLAlchemy and the Neo4j driver
+
+        Args:
+            df (pd.DataFrame): Dataframe with any dtypes
+
+        Returns:
+            pd.DataFrame: Dataframe of Python objects
+        """
+
+        return df.astype(object).where(df.notna(), None)
+
+    @classmethod
+    def to_records(cls, df: pd.DataFrame) -> list[dict]:
+        """Convert a dataframe to a list of dictionaries of plain Python
+        objects with None for missing values
+
+        Args:
+            df (pd.DataFrame): Dataframe with any dtypes
+
+        Returns:
+            list[dict]: Records of the dataframe
+        """
+
+        return cls.to_object(df).to_dict(orient="records")
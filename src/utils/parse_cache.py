@@ -0,0 +1,133 @@
+import hashlib
+import json
+import logging
+from pathlib import Path
+
+import pandas as pd
+
+from src.utils.singleton import Singleton
+
+
+class ParseCache(Singleton):
+    """Transparent cache of parsed XLSX exports.
+
+    Each parsed sheet is stored as a Parquet file in a `.cache` directory
+    next to the source file, keyed by a hash of the reader options and a
+    hash of the file contents. Repeat reads of an unchanged file skip XLSX
+    parsing and read the memory-mapped Parquet file instead. A file is kept
+    cached once per set of reader options, and only entries of previous
+    contents are evicted.
+    """
+
+    # Bump to invalidate all cached files when the cache format changes
+    VERSION = 1
+    CACHE_DIR = ".cache"
+
+    def __init__(self, enabled: bool = True) -> None:
+
+        # Avoid reinitializing in singleton
+        if not hasattr(self, "initialized"):
+            self.initialized = True
+        self.enabled = enabled
+
+    def _get_options_key(self, options: dict) -> str:
+        """Helper method to compute the part of the cache key identifying the
+        reader options
+
+        Args:
+            options (dict): Reader keyword arguments
+
+        Returns:
+            str: Hex digest of the reader options and cache format
+        """
+
+        digest = hashlib.sha256(
+            json.dumps(
+                {"version": self.VERSION, "options": options},
+                sort_keys=True,
+                default=str,
+            ).encode()
+        )
+
+        return digest.hexdigest()[:16]
+
+    @staticmethod
+    def _get_file_key(file_path: Path) -> str:
+        """Static helper method to compute the part of the cache key
+        identifying the file contents
+
+        Args:
+            file_path (Path): Path to the source file
+
+        Returns:
+            str: Hex digest of the file contents
+        """
+
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+
+        return digest.hexdigest()[:16]
+
+    def _get_cache_path(
+        self, file_path: Path, options_key: str, file_key: str
+    ) -> Path:
+        """Helper method to get the cache file path of a file and its reader
+        options
+
+        Args:
+            file_path (Path): Path to the source file
+            options_key (str): Cache key of the reader options
+            file_key (str): Cache key of the file contents
+
+        Returns:
+            Path: Path to the cached Parquet file
+        """
+
+        cache_dir = file_path.parent / self.CACHE_DIR
+        return cache_dir / f"{file_path.stem}-{options_key}-{file_key}.parquet"
+
+    def read_excel(self, file_path: str, **options) -> pd.DataFrame:
+        """Read an XLSX file as a dataframe, from the cache if possible
+
+        Args:
+            file_path (str): Path to the XLSX file
+            **options: Keyword arguments passed to `pd.read_excel`
+
+        Returns:
+            pd.DataFrame: Contents of the XLSX file
+        """
+
+        if not self.enabled:
+            return pd.read_excel(file_path, **options)
+
+        file_path = Path(file_path)
+        options_key = self._get_options_key(options)
+        cache_path = self._get_cache_path(
+            file_path, options_key, self._get_file_key(file_path)
+        )
+
+        if cache_path.exists():
+            return pd.read_parquet(cache_path, memory_map=True)
+
+        df = pd.read_excel(file_path, **options)
+
+        # Write to a temporary file first so readers never see partial files,
+        # then drop the entries of previous contents of the source file read
+        # with the same options, keeping those of other options
+        tmp_path = cache_path.with_suffix(".tmp")
+        try:
+            cache_path.parent.mkdir(exist_ok=True)
+            df.to_parquet(tmp_path)
+            for stale in cache_path.parent.glob(
+                f"{file_path.stem}-{options_key}-*.parquet"
+            ):
+                stale.unlink()
+            tmp_path.replace(cache_path)
+        except Exception as e:
+            # Mixed-type columns cannot be stored as Parquet, so skip caching
+            logging.warning(f"Could not cache parsed {file_path}: {e}")
+            tmp_path.unlink(missing_ok=True)
+
+        return df
@@ -0,0 +1,335 @@
+import cProfile
+import functools
+import io
+import logging
+import multiprocessing
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from src.utils.singleton import Singleton
+
+
+class StackSampler(threading.Thread):
+    """Daemon thread sampling the call stack of another thread at a fixed
+    interval, counting each distinct stack"""
+
+    def __init__(self, thread_id: int, interval: float) -> None:
+
+        super().__init__(name="profile-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts = Counter()
+        self.stop_event = threading.Event()
+
+    def run(self) -> None:
+
+        while not self.stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(
+                    f"{code.co_qualname} ({Path(code.co_filename).name})"
+                )
+                frame = frame.f_back
+            if stack:
+                self.counts[";".join(reversed(stack))] += 1
+
+    def stop(self) -> Counter:
+        """Stop sampling
+
+        Returns:
+            Counter: Sample counts by root-first stack
+        """
+
+        self.stop_event.set()
+        self.join()
+
+        return self.counts
+
+
+class Profiler(Singleton):
+    """Process-wide opt-in profiler of pipeline stages.
+
+    Modes are set with the `GCF_PROFILE` environment variable (or
+    `configure`), and reports are written into the run directory set with
+    `GCF_PROFILE_DIR`, by default a new timestamped directory in `profiles/`.
+    Worker processes inherit both and write into the same run directory.
+
+    - "full" wraps each stage in cProfile and tracemalloc and samples its
+      stack every millisecond. Each stage writes pstats (`.prof`, viewable
+      with snakeviz), a cumulative time listing (`.prof.txt`), collapsed
+      stacks (`.collapsed`, for flamegraph.pl or speedscope) and its top
+      net allocations (`.alloc.txt`).
+    - "sample" only samples stacks every 10 milliseconds from a background
+      thread, without tracing calls or allocations, which is cheap enough to
+      leave on in production. Each stage writes its collapsed stacks.
+
+    Every stage also appends a line to `summary.tsv`. Nested stages are part
+    of their enclosing stage and are not profiled separately.
+    """
+
+    MODES = ("off", "full", "sample")
+    ENV_MODE = "GCF_PROFILE"
+    ENV_DIR = "GCF_PROFILE_DIR"
+    # Seconds between stack samples by mode
+    SAMPLE_INTERVALS = {"full": 0.001, "sample": 0.01}
+    # Frames kept per traced allocation
+    TRACE_FRAMES = 10
+    # Number of entries in the text reports
+    TOP = 30
+
+    def __init__(self) -> None:
+
+        # Avoid reinitializing in singleton
+        if not hasattr(self, "initialized"):
+            self.initialized = True
+            self.mode = "off"
+            self.run_dir = None
+            self.sequence = 0
+            self.lock = threading.Lock()
+            # Per-thread depth of active stages
+            self.local = threading.local()
+            self.configure(
+                os.environ.get(self.ENV_MODE, "off"),
+                os.environ.get(self.ENV_DIR),
+            )
+
+    @property
+    def enabled(self) -> bool:
+        """Whether stages are profiled"""
+        return self.mode != "off"
+
+    def configure(self, mode: str = "full", run_dir: str = None) -> bool:
+        """Set the profiling mode and run directory
+
+        Args:
+            mode (str, optional): One of "off", "full" or "sample". Defaults
+                to "full".
+            run_dir (str, optional): Directory to write the reports into.
+                Defaults to a new timestamped directory in `profiles/`.
+
+        Raises:
+            ValueError: Raise error if the mode is unknown
+
+        Returns:
+            bool: True after completion
+        """
+
+        mode = mode or "off"
+        if mode not in self.MODES:
+            raise ValueError(f"Profiling mode must be one of {self.MODES}")
+
+        self.mode = mode
+        if not self.enabled:
+            return True
+
+        timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        self.run_dir = Path(run_dir or Path("profiles") / timestamp)
+        self.run_dir.mkdir(parents=True, exist_ok=True)
+        # Let worker processes write into the same run directory
+        os.environ[self.ENV_MODE] = self.mode
+        os.environ[self.ENV_DIR] = str(self.run_dir)
+        if multiprocessing.parent_process() is None:
+            print(f"Profiling ({self.mode}) into {self.run_dir}")
+
+        return True
+
+    def _get_prefix(self, name: str) -> str:
+        """Helper method to get a unique file prefix for a stage
+
+        Args:
+            name (str): Stage name
+
+        Returns:
+            str: File prefix, with the PID for worker processes
+        """
+
+        with self.lock:
+            self.sequence += 1
+            sequence = self.sequence
+        name = re.sub(r"[^\w.-]+", "_", name)
+        if multiprocessing.parent_process() is not None:
+            name = f"{name}-{os.getpid()}"
+
+        return f"{sequence:03d}-{name}"
+
+    def _write_collapsed(self, prefix: str, counts: Counter) -> bool:
+        """Helper method to write sampled stacks in the collapsed format
+
+        Args:
+            prefix (str): Stage file prefix
+            counts (Counter): Sample counts by root-first stack
+
+        Returns:
+            bool: True after completion
+        """
+
+        lines = [f"{stack} {count}\n" for stack, count in counts.items()]
+        with open(self.run_dir / f"{prefix}.collapsed", "w") as f:
+            f.writelines(sorted(lines))
+
+        return True
+
+    def _write_stats(self, prefix: str, profile: cProfile.Profile) -> bool:
+        """Helper method to write the cProfile stats and a listing of the
+        functions with the highest cumulative time
+
+        Args:
+            prefix (str): Stage file prefix
+            profile (cProfile.Profile): Disabled profile of the stage
+
+        Returns:
+            bool: True after completion
+        """
+
+        profile.dump_stats(self.run_dir / f"{prefix}.prof")
+        stream = io.StringIO()
+        stats = pstats.Stats(profile, stream=stream)
+        stats.sort_stats("cumulative").print_stats(self.TOP)
+        with open(self.run_dir / f"{prefix}.prof.txt", "w") as f:
+            f.write(stream.getvalue())
+
+        return True
+
+    def _write_allocations(
+        self, prefix: str, before: tracemalloc.Snapshot, peak: int
+    ) -> bool:
+        """Helper method to write the top net allocations of a stage, by line
+        and by call stack
+
+        Args:
+            prefix (str): Stage file prefix
+            before (tracemalloc.Snapshot): Snapshot from the stage start
+            peak (int): Peak traced memory during the stage in bytes
+
+        Returns:
+            bool: True after completion
+        """
+
+        # Leave out the allocations of the profiling itself
+        filters = [
+            tracemalloc.Filter(False, path)
+            for path in [
+                tracemalloc.__file__,
+                cProfile.__file__,
+                __file__,
+                "<frozen importlib._bootstrap>",
+            ]
+        ]
+        after = tracemalloc.take_snapshot().filter_traces(filters)
+        before = before.filter_traces(filters)
+
+        lines = [f"Peak traced memory: {peak / 2**20:.1f} MiB\n"]
+        lines.append(f"\nTop {self.TOP} net allocations by line:\n")
+        for stat in after.compare_to(before, "lineno")[: self.TOP]:
+            lines.append(f"{stat}\n")
+        lines.append("\nTop 5 net allocations by call stack:\n")
+        for stat in after.compare_to(before, "traceback")[:5]:
+            lines.append(f"\n{stat}\n")
+            lines.extend(f"  {line}\n" for line in stat.traceback.format())
+        with open(self.run_dir / f"{prefix}.alloc.txt", "w") as f:
+            f.writelines(lines)
+
+        return True
+
+    @contextmanager
+    def stage(self, name: str):
+        """Context manager profiling a pipeline stage, a no-op unless
+        profiling is enabled
+
+        Args:
+            name (str): Stage name, ex: "populate.ProjectService"
+
+        Yields:
+            None
+        """
+
+        depth = getattr(self.local, "depth", 0)
+        if not self.enabled or depth:
+            yield
+            return
+
+        full = self.mode == "full"
+        prefix = self._get_prefix(name)
+        sampler = StackSampler(
+            threading.get_ident(), self.SAMPLE_INTERVALS[self.mode]
+        )
+        profile, started_tracing, before = None, False, None
+        if full:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(self.TRACE_FRAMES)
+                started_tracing = True
+            tracemalloc.reset_peak()
+            before = tracemalloc.take_snapshot()
+            profile = cProfile.Profile()
+
+        self.local.depth = 1
+        sampler.start()
+        if profile:
+            profile.enable()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            if profile:
+                profile.disable()
+            counts = sampler.stop()
+            self.local.depth = 0
+
+            try:
+                peak = 0
+                self._write_collapsed(prefix, counts)
+                if full:
+                    peak = tracemalloc.get_traced_memory()[1]
+                    self._write_allocations(prefix, before, peak)
+                    self._write_stats(prefix, profile)
+                summary = self.run_dir / "summary.tsv"
+                if not summary.exists():
+                    summary.write_text(
+                        "stage\tmode\tseconds\tpeak_mib\tsamples\n"
+                    )
+                with open(summary, "a") as f:
+                    f.write(
+                        f"{prefix}\t{self.mode}\t{elapsed:.3f}\t"
+                        f"{peak / 2**20:.1f}\t{sum(counts.values())}\n"
+                    )
+            except OSError as e:
+                # Never fail the pipeline over a report
+                logging.error(f"Failed to write profile of {name}: {e}")
+            finally:
+                if started_tracing:
+                    tracemalloc.stop()
+
+
+def profile_stage(kind: str):
+    """Decorator profiling a method as a pipeline stage named after its kind
+    and class, ex: "populate.ProjectService"
+
+    Args:
+        kind (str): Stage kind, ex: "import", "parse" or "populate"
+    """
+
+    def decorator(method):
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            profiler = Profiler()
+            if not profiler.enabled:
+                return method(self, *args, **kwargs)
+            with profiler.stage(f"{kind}.{type(self).__name__}"):
+                return method(self, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,40 @@
+import pytest
+from neo4j import AsyncGraphDatabase
+
+from src.db.db_handler import DBHandler
+from src.kg.db.async_connection import AsyncConnection
+from src.kg.db.connection import Connection
+from recording_driver import AsyncRecordingDriver, RecordingDriver
+
+
+@pytest.fixture
+def tabular_db(tmp_path, monkeypatch) -> DBHandler:
+    """Empty tabular DB in a temporary working directory, as the DB handler
+    opens `data/gcf_data.db` relative to it"""
+
+    (tmp_path / "data").mkdir()
+    monkeypatch.chdir(tmp_path)
+
+    return DBHandler()
+
+
+@pytest.fixture
+def recording_conn() -> Connection:
+    """Connection whose driver records the routing of each unit of work, as
+    for a cluster with a leader and two followers"""
+
+    conn = Connection()
+    conn.driver = RecordingDriver()
+
+    return conn
+
+
+@pytest.fixture
+def async_recording_conn() -> AsyncConnection:
+    """Async variant of the recording connection"""
+
+    conn = AsyncConnection()
+    conn.driver = AsyncRecordingDriver()
+    conn.bookmark_manager = AsyncGraphDatabase.bookmark_manager()
+
+    return conn
@@ -0,0 +1,301 @@
+import itertools
+import threading
+from typing import Any, Callable
+
+from neo4j import READ_ACCESS, WRITE_ACCESS
+
+
+class RecordingResult:
+    """Result of a recorded query, with the records of the responder"""
+
+    def __init__(self, records: list[dict]) -> None:
+
+        self.records = records
+
+    def __iter__(self):
+
+        for record in self.records:
+            yield RecordingRecord(record)
+
+    def data(self) -> list[dict]:
+        return list(self.records)
+
+    def consume(self) -> None:
+        return None
+
+
+class RecordingRecord:
+
+    def __init__(self, data: dict) -> None:
+
+        self._data = data
+
+    def data(self) -> dict:
+        return self._data
+
+
+class AsyncRecordingResult(RecordingResult):
+    """Result of a recorded query, consumed as a coroutine"""
+
+    async def data(self) -> list[dict]:
+        return list(self.records)
+
+    async def consume(self) -> None:
+        return None
+
+
+class RecordingTransaction:
+    """Transaction running queries on the server chosen for its unit of work"""
+
+    def __init__(self, session: "RecordingSession", server: str) -> None:
+
+        self.session = session
+        self.server = server
+
+    def run(self, query: str, parameters: dict = None, **kwargs) -> Any:
+
+        params = {**(parameters or {}), **kwargs}
+        self.session.driver._record(self.session, self.server, query, params)
+
+        return RecordingResult(self.session.driver.responder(query, params))
+
+
+class AsyncRecordingTransaction(RecordingTransaction):
+
+    async def run(self, query: str, parameters: dict = None, **kwargs) -> Any:
+
+        result = super().run(query, parameters, **kwargs)
+
+        return AsyncRecordingResult(result.records)
+
+
+class RecordingSession:
+    """Session of the recording driver, routing each unit of work as a
+    routing driver would: managed transactions by their kind, auto-commit
+    queries by the default access mode of the session"""
+
+    def __init__(
+        self,
+        driver: "RecordingDriver",
+        database: str = "neo4j",
+        default_access_mode: str = WRITE_ACCESS,
+        bookmarks: Any = None,
+        bookmark_manager: Any = None,
+        **kwargs,
+    ) -> None:
+
+        self.driver = driver
+        self.database = database
+        self.default_access_mode = default_access_mode
+        self.bookmark_manager = bookmark_manager
+        # Bookmarks of the last write of the session
+        self.bookmarks = list(bookmarks or [])
+
+    def __enter__(self) -> "RecordingSession":
+        return self
+
+    def __exit__(self, *args) -> None:
+        return None
+
+    def _get_bookmarks(self) -> list[str]:
+        """Helper method to get the bookmarks the unit of work waits for
+
+        Returns:
+            list[str]: Bookmarks of the session and its bookmark manager
+        """
+
+        bookmarks = list(self.bookmarks)
+        if self.bookmark_manager is not None:
+            bookmarks.extend(self.bookmark_manager.get_bookmarks())
+
+        return sorted(set(bookmarks))
+
+    def _run_unit(self, access_mode: str, work: Callable, **kwargs) -> Any:
+        """Helper method to run a unit of work on the routed server, and
+        commit a bookmark for writes
+
+        Args:
+            access_mode (str): READ_ACCESS or WRITE_ACCESS
+            work (Callable): Transaction function taking the transaction
+            **kwargs: Additional arguments passed to the transaction function
+
+        Returns:
+            Any: Return value of the transaction function
+        """
+
+        self.access_mode = access_mode
+        self.waited = self._get_bookmarks()
+        server = self.driver._route(access_mode)
+        result = work(RecordingTransaction(self, server), **kwargs)
+
+        if access_mode == WRITE_ACCESS:
+            bookmark = self.driver._commit()
+            if self.bookmark_manager is not None:
+                self.bookmark_manager.update_bookmarks(self.waited, [bookmark])
+            self.bookmarks = [bookmark]
+
+        return result
+
+    def execute_read(self, work: Callable, *args, **kwargs) -> Any:
+        return self._run_unit(READ_ACCESS, work, **kwargs)
+
+    def execute_write(self, work: Callable, *args, **kwargs) -> Any:
+        return self._run_unit(WRITE_ACCESS, work, **kwargs)
+
+    def run(self, query: str, parameters: dict = None, **kwargs) -> Any:
+        return self._run_unit(
+            self.default_access_mode,
+            lambda tx: tx.run(query, parameters, **kwargs),
+        )
+
+    def last_bookmarks(self) -> list[str]:
+        return list(self.bookmarks)
+
+    def close(self) -> None:
+        return None
+
+
+class AsyncRecordingSession(RecordingSession):
+    """Async session of the recording driver, routing units of work as the
+    sync session, with the async bookmark manager of an `AsyncConnection`"""
+
+    async def __aenter__(self) -> "AsyncRecordingSession":
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        return None
+
+    async def _run_unit(
+        self, access_mode: str, work: Callable, **kwargs
+    ) -> Any:
+
+        self.access_mode = access_mode
+        bookmarks = list(self.bookmarks)
+        if self.bookmark_manager is not None:
+            bookmarks.extend(await self.bookmark_manager.get_bookmarks())
+        self.waited = sorted(set(bookmarks))
+        server = self.driver._route(access_mode)
+        result = await work(AsyncRecordingTransaction(self, server), **kwargs)
+
+        if access_mode == WRITE_ACCESS:
+            bookmark = self.driver._commit()
+            if self.bookmark_manager is not None:
+                await self.bookmark_manager.update_bookmarks(
+                    self.waited, [bookmark]
+                )
+            self.bookmarks = [bookmark]
+
+        return result
+
+    async def execute_read(self, work: Callable, *args, **kwargs) -> Any:
+        return await self._run_unit(READ_ACCESS, work, **kwargs)
+
+    async def execute_write(self, work: Callable, *args, **kwargs) -> Any:
+        return await self._run_unit(WRITE_ACCESS, work, **kwargs)
+
+    async def close(self) -> None:
+        return None
+
+
+class RecordingDriver:
+    """Driver double for `Connection.driver`, recording the routing decision
+    of every query instead of reaching a graph DB.
+
+    With `routing`, it stands for a cluster reached through a `neo4j://`
+    URI: writes go to the leader and reads are spread round-robin across
+    the followers. Without, every query goes to the single server, as with a
+    `bolt://` URI. Each write commits a new bookmark, and every query records
+    the bookmarks it waited for, so that causal chaining can be checked.
+
+    Queries return the records of `responder`, by default none.
+    """
+
+    def __init__(
+        self,
+        followers: int = 2,
+        routing: bool = True,
+        responder: Callable[[str, dict], list[dict]] = None,
+    ) -> None:
+
+        self.responder = responder or (lambda query, params: [])
+        self.routing = routing
+        self.leader = "leader"
+        self.followers = [f"follower-{i + 1}" for i in range(followers)]
+        self.next_follower = itertools.cycle(self.followers)
+        # Recorded routing decisions, in query order
+        self.routes = []
+        self.commits = 0
+        self.lock = threading.Lock()
+
+    def _route(self, access_mode: str) -> str:
+        """Helper method to pick the server of a unit of work
+
+        Args:
+            access_mode (str): READ_ACCESS or WRITE_ACCESS
+
+        Returns:
+            str: Server name
+        """
+
+        if not self.routing or access_mode == WRITE_ACCESS:
+            return self.leader
+        with self.lock:
+            return next(self.next_follower)
+
+    def _commit(self) -> str:
+        """Helper method to commit a write and get its bookmark
+
+        Returns:
+            str: New bookmark
+        """
+
+        with self.lock:
+            self.commits += 1
+            return f"FB:{self.commits}"
+
+    def _record(
+        self, session: RecordingSession, server: str, query: str, params: dict
+    ) -> None:
+        """Helper method to record the routing decision of a query
+
+        Args:
+            session (RecordingSession): Session running the query
+            server (str): Routed server
+            query (str): Cypher query
+            params (dict): Query parameters
+        """
+
+        with self.lock:
+            self.routes.append(
+                {
+                    "database": session.database,
+                    "access_mode": session.access_mode,
+                    "server": server,
+                    "bookmarks": session.waited,
+                    "query": query,
+                    "params": params,
+                }
+            )
+
+    def session(self, **config) -> RecordingSession:
+        return RecordingSession(self, **config)
+
+    def verify_connectivity(self) -> None:
+        return None
+
+    def close(self) -> None:
+        return None
+
+
+class AsyncRecordingDriver(RecordingDriver):
+    """Driver double for `AsyncConnection.driver`, recording as the sync
+    recording driver"""
+
+    def session(self, **config) -> AsyncRecordingSession:
+        return AsyncRecordingSession(self, **config)
+
+    async def verify_connectivity(self) -> None:
+        return None
+
+    async def close(self) -> None:
+        return None
@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+from neo4j import WRITE_ACCESS
+
+from src.kg.async_knowledge_graph import AsyncKnowledgeGraph
+from src.kg.db.async_query_executor import AsyncQueryExecutor
+from src.kg.knowledge_graph import KnowledgeGraph
+
+
+@pytest.fixture
+def executor(async_recording_conn) -> AsyncQueryExecutor:
+
+    executor = AsyncQueryExecutor(async_recording_conn, database="gcf-new")
+    executor.set_progress(False)
+
+    return executor
+
+
+def test_async_writes_are_chunked_on_the_leader(executor):
+
+    data = [{"id": i} for i in range(1200)]
+    assert asyncio.run(executor.execute_write("CREATE (n)", data))
+
+    routes = executor.conn.driver.routes
+    assert sorted(len(route["params"]["data"]) for route in routes) == [
+        200,
+        500,
+        500,
+    ]
+    assert {route["server"] for route in routes} == {"leader"}
+    assert {route["database"] for route in routes} == {"gcf-new"}
+
+
+def test_async_reads_go_to_followers(executor):
+
+    for _ in range(2):
+        asyncio.run(executor.execute_read("MATCH (n) RETURN n"))
+
+    assert [route["server"] for route in executor.conn.driver.routes] == [
+        "follower-1",
+        "follower-2",
+    ]
+
+
+def test_async_writes_chain_bookmarks(executor):
+
+    asyncio.run(executor.execute_write("CREATE (n)", [{}]))
+    asyncio.run(executor.execute_write("CREATE (n)", [{}]))
+
+    assert [route["bookmarks"] for route in executor.conn.driver.routes] == [
+        [],
+        ["FB:1"],
+    ]
+
+
+def test_async_graph_builds_in_its_namespace(tabular_db, async_recording_conn):
+
+    kg = AsyncKnowledgeGraph(
+        async_recording_conn, database="gcf-new", namespace="t_"
+    )
+    asyncio.run(kg._ensure_constraints())
+
+    routes = async_recording_conn.driver.routes
+    assert {route["database"] for route in routes} == {"gcf-new"}
+    queries = [route["query"] for route in routes]
+    assert any("FOR (n:t_Project)" in query for query in queries)
+    assert not any("(n:Project)" in query for query in queries)
+    assert kg.data_services["project"].service.namespace == "t_"
+
+
+def test_async_finalize_follows_the_build(
+    tabular_db, async_recording_conn, recording_conn, monkeypatch
+):
+
+    finalized = []
+    monkeypatch.setattr(
+        KnowledgeGraph,
+        "finalize",
+        lambda kg, head: finalized.append((kg.database, kg.namespace, head)),
+    )
+    kg = AsyncKnowledgeGraph(
+        async_recording_conn, database="gcf-new", namespace="t_"
+    )
+    asyncio.run(kg.query_executor.execute_write("CREATE (n)", [{}]))
+    asyncio.run(kg.finalize(recording_conn, 3))
+
+    assert finalized == [("gcf-new", "t_", 3)]
+    # The sync connection waits for the writes of the async build
+    routes = recording_conn.driver.routes
+    assert routes[0]["access_mode"] == WRITE_ACCESS
+    assert routes[0]["bookmarks"] == ["FB:1"]
@@ -0,0 +1,73 @@
+import pytest
+from sqlalchemy import text
+
+from src.db.change_feed import ChangeFeed
+from src.db.db_handler import DBHandler
+
+
+def _execute(db_handler: DBHandler, query: str) -> None:
+
+    with db_handler.engine.begin() as conn:
+        conn.execute(text(query))
+
+
+@pytest.fixture
+def feed(tabular_db) -> ChangeFeed:
+
+    feed = ChangeFeed(tabular_db)
+    feed.install()
+
+    return feed
+
+
+def test_join_table_changes_are_logged_against_their_data_row(
+    tabular_db, feed
+):
+
+    _execute(
+        tabular_db,
+        "INSERT INTO project_country (project_id, country_id) VALUES (7, 1)",
+    )
+    _execute(
+        tabular_db,
+        "UPDATE project_country SET project_id = 8 WHERE project_id = 7",
+    )
+
+    changes = [
+        (change["table_name"], change["row_id"], change["op"])
+        for change in feed.read(0)
+    ]
+    assert changes == [
+        ("project", 7, "I"),
+        ("project", 8, "U"),
+        ("project", 7, "U"),
+    ]
+    assert feed.get_head() == 3
+
+
+def test_offset_commit_is_refused_after_a_generation_bump(feed):
+
+    generation = feed.get_generation("graph")
+    # A rebuild swaps the graph and publishes its head
+    assert feed.bump_generation("graph", change_id=5) == generation + 1
+    assert feed.get_offset("graph") == 5
+
+    assert not feed.commit_offset("graph", 3, generation)
+    assert feed.get_offset("graph") == 5
+    assert feed.commit_offset("graph", 6, generation + 1)
+    assert feed.get_offset("graph") == 6
+
+
+def test_prune_keeps_changes_not_applied_by_every_consumer(tabular_db, feed):
+
+    for project_id in range(1, 4):
+        _execute(
+            tabular_db,
+            "INSERT INTO project_country (project_id, country_id) "
+            f"VALUES ({project_id}, 1)",
+        )
+    feed.commit_offset("graph", 3)
+    feed.commit_offset("search", 1)
+
+    assert feed.prune() == 1
+    assert [change["id"] for change in feed.read(0)] == [2, 3]
@@ -0,0 +1,93 @@
+import pandas as pd
+import pytest
+from sqlalchemy import insert
+
+from src.db.db_schema import SectorDict
+from src.kg.services.data.project_service import ProjectService
+
+SECTOR_LABELS = {
+    "label": "Sector",
+    "direction": "OUT",
+    "relation": "HAS",
+    "mode": ["relationship", "label"],
+    "table": SectorDict,
+}
+
+
+@pytest.fixture
+def service(tabular_db, recording_conn) -> ProjectService:
+
+    with tabular_db.get_session() as session:
+        session.execute(
+            insert(SectorDict),
+            [{"id": 1, "name": "Public"}, {"id": 2, "name": "Private"}],
+        )
+        session.commit()
+
+    service = ProjectService(recording_conn)
+    service.namespace = "t_"
+    service.join_class = None
+    service.config = {
+        "node_label": "Project",
+        "relationships": {"sectorId": SECTOR_LABELS},
+    }
+    service.raw_df = pd.DataFrame({"id": [7], "sectorId": [2]})
+    service.processed = [{"id": 7, "sectorId": 2}]
+
+    return service
+
+
+@pytest.mark.parametrize(
+    "rel_config",
+    [
+        {"label": "Sector", "mode": "labels"},
+        {"label": "Sector", "mode": "label"},
+    ],
+)
+def test_invalid_modes_are_rejected(rel_config):
+
+    with pytest.raises(ValueError):
+        ProjectService._get_modes(rel_config)
+
+
+@pytest.mark.parametrize(
+    "value, label",
+    [(3, "t_Sector_3"), (3.0, "t_Sector_3"), ("a-b", "t_Sector_a_b")],
+)
+def test_value_label(service, value, label):
+
+    assert service._get_value_label(SECTOR_LABELS, value) == label
+
+
+def test_unlink_removes_all_value_labels(service):
+
+    queries = [query for query, _ in service._get_unlink_writes()]
+
+    assert any("DELETE r" in query for query in queries)
+    assert any("REMOVE n:t_Sector_1:t_Sector_2" in query for query in queries)
+
+
+def test_label_writes_set_one_label_per_value(service):
+
+    service.processed = [
+        {"id": 7, "sectorId": 2.0},
+        {"id": 8, "sectorId": 1},
+    ]
+    service.raw_df = pd.DataFrame(service.processed)
+    queries = [query for query, _ in service._get_relationship_writes()]
+
+    assert len(queries) == 2
+    assert "MERGE (n)-[r:HAS]->(other)" in queries[0]
+    assert "ELSE [] END | SET n:t_Sector_1)" in queries[1]
+    assert "ELSE [] END | SET n:t_Sector_2)" in queries[1]
+    assert "record.otherId = 2 THEN" in queries[1]
+
+
+def test_label_only_mode_expects_no_relationships(service):
+
+    service.config["relationships"]["sectorId"] = {
+        **SECTOR_LABELS,
+        "mode": "label",
+    }
+
+    assert service._get_relationship_pairs() == []
@@ -0,0 +1,116 @@
+import pandas as pd
+import pytest
+
+from src.db.db_schema import (
+    CountrySummary,
+    EntitySummary,
+    GroupSummary,
+    RegionSummary,
+)
+from src.kg.portfolio import PortfolioAggregates
+
+
+@pytest.fixture
+def sources() -> dict[str, pd.DataFrame]:
+    """Data tables of two entities and a project involving two countries of
+    the same region, one of them an LDC"""
+
+    return {
+        "project": pd.DataFrame(
+            {
+                "id": [1, 2],
+                "entity_id": [1, 2],
+                "bm_id": [1, 1],
+                "theme_id": [1, 1],
+                "financing_usd": [100, 50],
+            }
+        ),
+        "readiness": pd.DataFrame(
+            {"id": [1], "region_id": [10], "financing_usd": [10]}
+        ),
+        "entity": pd.DataFrame(
+            {"id": [1, 2], "country_id": [1, 3], "bm_id": [1, None]}
+        ),
+        "country": pd.DataFrame(
+            {
+                "iso3": ["AAA", "BBB", "CCC"],
+                "region_id": [10, 10, 20],
+                "is_sids": [False, False, True],
+                "is_ldc": [True, False, False],
+            }
+        ),
+        "country_dict": pd.DataFrame(
+            {"id": [1, 2, 3], "iso3": ["AAA", "BBB", "CCC"]}
+        ),
+        "project_country": pd.DataFrame(
+            {"project_id": [1, 1], "country_id": [1, 2]}
+        ),
+        "readiness_country": pd.DataFrame(
+            {"readiness_id": [1], "country_id": [1]}
+        ),
+        "region_dict": pd.DataFrame({"id": [10, 20]}),
+        "bm_dict": pd.DataFrame({"id": [1]}),
+        "theme_dict": pd.DataFrame({"id": [1]}),
+    }
+
+
+@pytest.fixture
+def rollups(tabular_db, sources) -> dict:
+    return PortfolioAggregates().compute(sources)
+
+
+def test_rollups_have_summary_table_columns(rollups):
+
+    for table_class, df in rollups.items():
+        assert list(df.columns) == [
+            col.name for col in table_class.__table__.columns
+        ]
+
+
+def test_projects_are_counted_once_per_region(rollups):
+
+    region = rollups[RegionSummary].set_index("region_id").loc[10]
+
+    assert region["country_count"] == 2
+    assert region["project_count"] == 1
+    assert region["project_financing_usd"] == 100
+    # Readiness programmes count by their countries and their own region
+    assert region["readiness_count"] == 1
+    assert region["readiness_financing_usd"] == 10
+
+
+def test_countries_without_projects_roll_up_to_zero(rollups):
+
+    country = rollups[CountrySummary].set_index("country_id").loc[3]
+
+    assert country["project_count"] == 0
+    assert country["project_financing_usd"] == 0
+    assert country["entity_count"] == 1
+
+
+def test_group_and_entity_rollups(rollups):
+
+    groups = rollups[GroupSummary].set_index("group")
+    assert groups.loc["LDC", "country_count"] == 1
+    assert groups.loc["LDC", "project_count"] == 1
+    assert groups.loc["SIDS", "project_count"] == 0
+
+    entities = rollups[EntitySummary].set_index("entity_id")
+    assert entities.loc[1, "country_count"] == 2
+    assert entities.loc[2, "project_financing_usd"] == 50
+
+
+def test_diff_only_returns_changed_rollups(tabular_db, rollups):
+
+    aggregates = PortfolioAggregates()
+    df = rollups[RegionSummary]
+    aggregates._write_table(RegionSummary, df, [])
+
+    changed, deleted = aggregates._diff(RegionSummary, df)
+    assert changed.empty
+    assert deleted == []
+
+    df = df[df["region_id"] == 10].assign(project_count=2)
+    changed, deleted = aggregates._diff(RegionSummary, df)
+    assert changed["region_id"].tolist() == [10]
+    assert deleted == [20]
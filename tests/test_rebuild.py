@@ -0,0 +1,122 @@
+import pytest
+
+from src.kg.rebuild import GraphRebuilder, get_graph_resolver
+from recording_driver import RecordingDriver
+
+
+class CountingGraph:
+    """Knowledge graph double with fixed expected and actual counts"""
+
+    def __init__(self, nodes: dict, relationships: dict) -> None:
+
+        self.nodes = nodes
+        self.relationships = relationships
+
+    def count_expected_nodes(self) -> dict:
+        return {"Project": 2}
+
+    def count_nodes(self) -> dict:
+        return self.nodes
+
+    def count_expected_relationships(self) -> dict:
+        return {("Entity", "FUNDS", "Project"): 2}
+
+    def count_relationships(self) -> dict:
+        return self.relationships
+
+
+def _respond_target(target: str = None):
+    """Responder of the active target, as an alias or a marker node"""
+
+    def _respond(query: str, params: dict) -> list[dict]:
+        if target is None:
+            return []
+        if "SHOW ALIASES" in query:
+            return [{"database": target}]
+        if "GraphAlias" in query:
+            return [{"ns": target}]
+        return []
+
+    return _respond
+
+
+def test_multi_database_swap_repoints_the_alias(recording_conn):
+
+    GraphRebuilder(recording_conn)._swap("gcf-20250112t000000")
+
+    route = recording_conn.driver.routes[-1]
+    assert route["database"] == "system"
+    assert route["server"] == "leader"
+    assert (
+        "CREATE OR REPLACE ALIAS `gcf` FOR DATABASE `gcf-20250112t000000`"
+        in route["query"]
+    )
+
+
+def test_single_database_swap_updates_the_marker(recording_conn):
+
+    rebuilder = GraphRebuilder(recording_conn, multi_database=False)
+    rebuilder._swap("B20250112T000000_")
+
+    route = recording_conn.driver.routes[-1]
+    assert route["database"] == "neo4j"
+    assert "MERGE (m:GraphAlias {name: $alias})" in route["query"]
+    assert route["params"] == {
+        "alias": "gcf",
+        "namespace": "B20250112T000000_",
+    }
+
+
+@pytest.mark.parametrize(
+    "multi_database, target, graph",
+    [
+        (True, None, ("neo4j", "")),
+        (True, "gcf-20250112t000000", ("gcf", "")),
+        (False, None, ("neo4j", "")),
+        (False, "B20250112T000000_", ("neo4j", "B20250112T000000_")),
+    ],
+)
+def test_active_graph(recording_conn, multi_database, target, graph):
+
+    recording_conn.driver = RecordingDriver(responder=_respond_target(target))
+    rebuilder = GraphRebuilder(recording_conn, multi_database=multi_database)
+
+    assert rebuilder.get_active_graph() == graph
+
+
+def test_invalid_alias_is_rejected(recording_conn):
+
+    with pytest.raises(ValueError):
+        GraphRebuilder(recording_conn, alias="gcf`; DROP")
+
+
+def test_resolver_follows_swaps_and_keeps_overrides(
+    recording_conn, monkeypatch
+):
+
+    monkeypatch.setenv("MULTI_DATABASE", "false")
+    recording_conn.driver = RecordingDriver(
+        responder=_respond_target("B20250112T000000_")
+    )
+
+    assert get_graph_resolver(recording_conn)() == (
+        "neo4j",
+        "B20250112T000000_",
+    )
+    assert get_graph_resolver(recording_conn, database="gcf-old")() == (
+        "gcf-old",
+        "B20250112T000000_",
+    )
+    assert get_graph_resolver(recording_conn, namespace="")() == ("neo4j", "")
+
+
+def test_verify_compares_node_and_relationship_counts(recording_conn):
+
+    rebuilder = GraphRebuilder(recording_conn)
+    funds = ("Entity", "FUNDS", "Project")
+
+    assert rebuilder._verify(CountingGraph({"Project": 2}, {funds: 2}))
+    with pytest.raises(RuntimeError):
+        rebuilder._verify(CountingGraph({"Project": 2}, {funds: 1}))
+    with pytest.raises(RuntimeError):
+        rebuilder._verify(CountingGraph({}, {funds: 2}))
@@ -0,0 +1,131 @@
+import pytest
+from neo4j import READ_ACCESS, WRITE_ACCESS
+
+from src.kg.db.query_executor import QueryExecutor
+from recording_driver import RecordingDriver
+
+
+def _read(tx) -> list[dict]:
+    return tx.run("MATCH (n) RETURN n").data()
+
+
+def _write(tx) -> None:
+    tx.run("CREATE (n)").consume()
+
+
+@pytest.fixture
+def executor(recording_conn) -> QueryExecutor:
+
+    executor = QueryExecutor(recording_conn)
+    executor.set_throttle(None)
+    executor.set_progress(False)
+
+    return executor
+
+
+def test_reads_go_to_followers_and_writes_to_leader(recording_conn):
+
+    recording_conn.execute_read(_read)
+    recording_conn.execute_read(_read)
+    recording_conn.execute_write(_write)
+
+    routes = recording_conn.driver.routes
+    assert [route["access_mode"] for route in routes] == [
+        READ_ACCESS,
+        READ_ACCESS,
+        WRITE_ACCESS,
+    ]
+    assert [route["server"] for route in routes] == [
+        "follower-1",
+        "follower-2",
+        "leader",
+    ]
+
+
+def test_single_server_without_routing(recording_conn):
+
+    recording_conn.driver = RecordingDriver(routing=False)
+    recording_conn.execute_read(_read)
+    recording_conn.execute_write(_write)
+
+    assert {route["server"] for route in recording_conn.driver.routes} == {
+        "leader"
+    }
+
+
+def test_database_is_passed_to_sessions(recording_conn):
+
+    recording_conn.execute_read(_read, "gcf-new")
+    recording_conn.execute_write(_write, "gcf-new")
+
+    assert {route["database"] for route in recording_conn.driver.routes} == {
+        "gcf-new"
+    }
+
+
+def test_causal_reads_wait_for_writes(recording_conn):
+
+    recording_conn.execute_write(_write)
+    recording_conn.execute_write(_write)
+    recording_conn.execute_read(_read)
+    recording_conn.execute_read(_read, causal=True)
+
+    routes = recording_conn.driver.routes
+    # Each write waits for the previous one, through the bookmark manager
+    assert routes[1]["bookmarks"] == ["FB:1"]
+    # Reads only wait when causal, then for the last write
+    assert routes[2]["bookmarks"] == []
+    assert routes[3]["bookmarks"] == ["FB:2"]
+    assert routes[3]["server"].startswith("follower")
+
+
+def test_causal_reads_setting(recording_conn):
+
+    recording_conn.causal_reads = True
+    recording_conn.execute_write(_write)
+    recording_conn.execute_read(_read)
+
+    assert recording_conn.driver.routes[1]["bookmarks"] == ["FB:1"]
+
+
+def test_transaction_commits_writes_once(executor, recording_conn):
+
+    executor.execute_transaction(
+        [
+            ("UNLINK", [{"id": 1}]),
+            ("SKIPPED", []),
+            ("LINK", [{"id": 1}, {"id": 2}]),
+        ]
+    )
+
+    routes = recording_conn.driver.routes
+    assert [route["query"] for route in routes] == ["UNLINK", "LINK"]
+    assert {route["server"] for route in routes} == {"leader"}
+    assert recording_conn.driver.commits == 1
+
+
+def test_chunked_write_commits_each_chunk(executor, recording_conn):
+
+    executor.execute_write("MERGE", [{"id": i} for i in range(5)], 2)
+
+    routes = recording_conn.driver.routes
+    assert [len(route["params"]["data"]) for route in routes] == [2, 2, 1]
+    assert recording_conn.driver.commits == 3
+    # Chunks are chained, so that each sees the previous ones
+    assert [route["bookmarks"] for route in routes] == [
+        [],
+        ["FB:1"],
+        ["FB:2"],
+    ]
+
+
+def test_executor_is_shared_per_database(recording_conn):
+
+    executor = QueryExecutor(recording_conn)
+    staging = QueryExecutor(recording_conn, "gcf-new")
+
+    assert QueryExecutor(recording_conn) is executor
+    assert staging is not executor
+    # Constructing another database's executor does not rebind others
+    assert executor.database == "neo4j"
+    assert staging.database == "gcf-new"
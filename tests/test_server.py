@@ -0,0 +1,151 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from src.db.change_feed import ChangeFeed
+from src.kg.load_test import StandInConnection
+from src.kg.server import QueryServer, QueryService, get_query_catalog
+
+
+class CountingResponder:
+    """Responder of the stand-in, counting the reads reaching it"""
+
+    def __init__(self) -> None:
+
+        self.calls = 0
+
+    def __call__(self, query: str, params: dict) -> list[dict]:
+
+        self.calls += 1
+        return [{"index": i, **params} for i in range(params["limit"])]
+
+
+@pytest.fixture
+def responder() -> CountingResponder:
+    return CountingResponder()
+
+
+@pytest.fixture
+def service(responder) -> QueryService:
+
+    conn = StandInConnection(median=0.0001, seed=0, responder=responder)
+
+    return QueryService(conn, get_query_catalog(), version_func=lambda: "7.1")
+
+
+def test_fetch_runs_catalog_query(service):
+
+    params = service.parse_params(
+        "entity_funding", {"code": ["ACTED"], "limit": ["2"]}
+    )
+    body = json.loads(service.fetch("entity_funding", params, "7.1"))
+
+    assert body["query"] == "entity_funding"
+    assert body["version"] == "7.1"
+    assert body["records"] == [
+        {"index": 0, "code": "ACTED", "limit": 2},
+        {"index": 1, "code": "ACTED", "limit": 2},
+    ]
+
+
+def test_fetch_caches_per_version(service, responder):
+
+    params = {"code": "ACTED", "limit": 1}
+    first = service.fetch("entity_funding", params, "7.1")
+    assert service.fetch("entity_funding", params, "7.1") == first
+    assert responder.calls == 1
+
+    service.fetch("entity_funding", params, "8.1")
+    assert responder.calls == 2
+
+
+@pytest.mark.parametrize(
+    "args",
+    [
+        {},
+        {"code": ["ACTED"], "limit": ["many"]},
+        {"code": ["ACTED"], "limit": ["100001"]},
+        {"code": ["ACTED"], "other": ["1"]},
+    ],
+)
+def test_parse_params_rejects_invalid(service, args):
+
+    with pytest.raises(ValueError):
+        service.parse_params("entity_funding", args)
+
+
+def test_version_follows_offset_and_generation(tabular_db):
+
+    service = QueryService(
+        StandInConnection(), get_query_catalog(), version_ttl=0
+    )
+    feed = ChangeFeed()
+    assert service.get_version() == "0.0"
+
+    feed.commit_offset("graph", 12)
+    assert service.get_version() == "12.0"
+
+    # Rollup refreshes and rebuild swaps bypass the change log
+    feed.bump_generation("graph")
+    assert service.get_version() == "12.1"
+
+
+def test_service_follows_resolved_graph(responder):
+
+    conn = StandInConnection(median=0.0001, seed=0, responder=responder)
+    versions = iter(["1.0", "1.0", "2.1"])
+    graphs = iter([("neo4j", ""), ("neo4j", "B2_")])
+    service = QueryService(
+        conn,
+        get_query_catalog(),
+        version_func=lambda: next(versions),
+        version_ttl=0,
+        resolver=lambda: next(graphs),
+    )
+
+    assert service.get_version() == "1.0"
+    assert service.get_version() == "1.0"
+    assert ":Entity" in service.catalog["entity_funding"]["query"]
+
+    # A rebuild swap bumps the generation, moving to the new namespace
+    assert service.get_version() == "2.1"
+    assert ":B2_Entity" in service.catalog["entity_funding"]["query"]
+
+
+def test_http_etag_and_streaming(service):
+
+    server = QueryServer(("127.0.0.1", 0), service, workers=2)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        with urllib.request.urlopen(f"{base}/health") as response:
+            assert json.load(response) == {"status": "ok", "version": "7.1"}
+
+        url = f"{base}/queries/entity_funding?code=ACTED&limit=3"
+        with urllib.request.urlopen(url) as response:
+            etag = response.headers["ETag"]
+            assert len(json.load(response)["records"]) == 3
+
+        request = urllib.request.Request(url, headers={"If-None-Match": etag})
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(request)
+        assert error.value.code == 304
+
+        url = f"{base}/queries/country_subgraph?iso3=KEN&limit=2"
+        with urllib.request.urlopen(url) as response:
+            assert response.headers["Transfer-Encoding"] == "chunked"
+            assert [r["iso3"] for r in json.load(response)["records"]] == [
+                "KEN",
+                "KEN",
+            ]
+
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(f"{base}/queries/entity_funding")
+        assert error.value.code == 400
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+from neo4j.exceptions import ServiceUnavailable
+
+from src.kg.db.async_query_executor import AsyncQueryExecutor
+from src.kg.db.query_executor import QueryExecutor
+from src.kg.db.throttle import WriteThrottle
+
+
+class UnavailableConnection:
+    """Connection whose writes fail before any attempt, as when the leader
+    is unreachable"""
+
+    def execute_write(self, work, database: str = "neo4j") -> None:
+        raise ServiceUnavailable("No leader")
+
+
+class AsyncUnavailableConnection:
+
+    async def execute_write(self, work, database: str = "neo4j") -> None:
+        raise ServiceUnavailable("No leader")
+
+
+def test_set_limits_keeps_limits_not_passed():
+
+    throttle = WriteThrottle(records_per_second=100, transactions_per_second=5)
+
+    throttle.set_limits(transactions_per_second=10)
+    assert throttle.records_per_second == 100
+    assert throttle.transactions_per_second == 10
+
+    throttle.set_limits(records_per_second=None)
+    assert throttle.records_per_second is None
+    assert throttle.transactions_per_second == 10
+
+
+def test_driver_errors_back_off():
+
+    throttle = WriteThrottle(records_per_second=100)
+    executor = QueryExecutor(UnavailableConnection())
+    executor.set_throttle(throttle)
+
+    with pytest.raises(ServiceUnavailable):
+        executor._write_chunk("CREATE (n)", [{}])
+    assert throttle.scale == 0.5
+
+
+def test_async_driver_errors_back_off():
+
+    throttle = WriteThrottle(records_per_second=100)
+    executor = AsyncQueryExecutor(
+        AsyncUnavailableConnection(), throttle=throttle
+    )
+
+    with pytest.raises(ServiceUnavailable):
+        asyncio.run(executor._write_chunk("CREATE (n)", [{}]))
+    assert throttle.scale == 0.5
@@ -0,0 +1,70 @@
+import pytest
+from sqlalchemy import text
+
+from src.kg.knowledge_graph import KnowledgeGraph
+from src.kg.updater import GraphUpdater
+
+
+@pytest.fixture
+def kg(tabular_db, recording_conn) -> KnowledgeGraph:
+    return KnowledgeGraph(recording_conn)
+
+
+def _log_project_change(kg: KnowledgeGraph, project_id: int) -> None:
+
+    with kg.db_handler.engine.begin() as conn:
+        conn.execute(
+            text(
+                "INSERT INTO project_country (project_id, country_id) "
+                f"VALUES ({project_id}, 1)"
+            )
+        )
+
+
+def test_changes_are_applied_in_one_transaction_per_table(kg):
+
+    updater = GraphUpdater(kg, prune=False)
+    updater.feed.install()
+    _log_project_change(kg, 7)
+    _log_project_change(kg, 8)
+    commits = kg.conn.driver.commits
+
+    assert updater.run_once() == 2
+    assert kg.conn.driver.commits == commits + 1
+    assert updater.feed.get_offset("graph") == 2
+    assert updater.pending_labels >= {"Project", "Country"}
+    assert updater.run_once() == 0
+
+
+def test_updater_follows_graph_swap(kg):
+
+    targets = iter([("neo4j", ""), ("neo4j", "B20250112T000000_")])
+    updater = GraphUpdater(kg, resolver=lambda: next(targets))
+    updater.feed.install()
+
+    updater.run_once()
+    assert updater.kg is kg
+
+    # A rebuild swaps the graph and bumps its generation
+    updater.feed.bump_generation("graph")
+    updater.run_once()
+    assert updater.kg.namespace == "B20250112T000000_"
+    assert updater.services["project"].namespace == "B20250112T000000_"
+    assert updater.kg.query_executor.progress is False
+
+
+def test_batch_applied_to_swapped_graph_is_replayed(kg, monkeypatch):
+
+    updater = GraphUpdater(kg)
+    updater.feed.install()
+    _log_project_change(kg, 7)
+    # The graph is swapped while the batch is applied
+    monkeypatch.setattr(
+        updater,
+        "_apply",
+        lambda changes: bool(updater.feed.bump_generation("graph")),
+    )
+
+    assert updater.run_once() == 0
+    assert updater.feed.get_offset("graph") == 0
+    assert [change["id"] for change in updater.feed.read(0)] == [1]
@@ -0,0 +1,39 @@
+import pandas as pd
+
+from src.kg.verifier import ConsistencyVerifier
+
+
+def _hash_cypher(verifier: ConsistencyVerifier, value: str) -> int:
+    """Evaluate the Cypher string hash of `_encode_cypher` step by step"""
+
+    h = len(value) + 1
+    for i in range(len(value)):
+        code = len(verifier.ALPHABET.split(value[i : i + 1])[0])
+        h = (h * verifier.MULTIPLIER + code) % verifier.MODULUS
+
+    return h
+
+
+def test_string_hash_mirrors_cypher():
+
+    verifier = ConsistencyVerifier.__new__(ConsistencyVerifier)
+    verifier.use_apoc = False
+    values = ["", "KEN", "Côte d'Ivoire", "Ελλάδα", "a,b;c"]
+
+    assert [verifier._hash_string(v) for v in values] == [
+        _hash_cypher(verifier, v) for v in values
+    ]
+    encoded = verifier._encode_column(
+        pd.Series([*values, None]), "string"
+    ).tolist()
+    assert encoded[-1] == 0
+    assert 0 not in encoded[:-1]
+
+
+def test_same_length_edits_change_the_hash():
+
+    verifier = ConsistencyVerifier.__new__(ConsistencyVerifier)
+    verifier.use_apoc = False
+
+    assert verifier._hash_string("ACTED") != verifier._hash_string("ACTEE")
+    assert verifier._hash_string("ab") != verifier._hash_string("ba")